@@ -0,0 +1,96 @@
+"""
+Chunking throughput of helper.text_splitter.RecursiveTextSplitter against
+LangChain's RecursiveCharacterTextSplitter (when installed) on contract-sized
+synthetic documents.
+
+    cd src && python -m benchmarks.bench_text_splitter [--repeat 5]
+"""
+import argparse
+import random
+import time
+from helper.text_splitter import RecursiveTextSplitter
+
+DOCUMENT_SIZES = {
+    "page (~3 KB)": 3_000,
+    "contract (~150 KB, ~50 pages)": 150_000,
+    "bundle (~3 MB, ~1000 pages)": 3_000_000,
+}
+
+WORDS = (
+    "the agreement party parties shall may herein thereof indemnify obligations "
+    "confidential information termination effective date governing law clause "
+    "notice breach liability warranty services fees payment term renewal"
+).split()
+
+
+def make_document(size: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    paragraphs = []
+    length = 0
+    clause = 1
+    while length < size:
+        sentences = []
+        # Mostly short clauses, with the occasional long paragraph that needs recursive splitting
+        sentence_count = rng.randint(2, 6) if rng.random() < 0.8 else rng.randint(15, 40)
+        for _ in range(sentence_count):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(8, 30))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = f"{clause}.{rng.randint(1, 9)} " + " ".join(sentences)
+        if rng.random() < 0.3:
+            paragraph = paragraph.replace(". ", ".\n", 2)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+        clause += 1
+    return "\n\n".join(paragraphs)[:size]
+
+
+def bench(split, text: str, repeat: int):
+    best = float("inf")
+    chunks = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = split(text)
+        best = min(best, time.perf_counter() - start)
+    return chunks, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap-size", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    native = RecursiveTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.overlap_size)
+
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        langchain = RecursiveCharacterTextSplitter(
+            chunk_size=args.chunk_size, chunk_overlap=args.overlap_size, length_function=len
+        )
+    except ImportError:
+        langchain = None
+        print("langchain_text_splitters not installed; reporting the native splitter only.\n")
+
+    print(f"chunk_size={args.chunk_size} overlap_size={args.overlap_size} repeat={args.repeat}\n")
+    print(f"{'document':32} {'splitter':10} {'chunks':>8} {'seconds':>9} {'chunks/s':>12} {'MB/s':>8}")
+
+    for label, size in DOCUMENT_SIZES.items():
+        text = make_document(size)
+        results = [("native", native.split_text)]
+        if langchain is not None:
+            results.append(("langchain", langchain.split_text))
+
+        outputs = {}
+        for name, split in results:
+            chunks, seconds = bench(split, text, args.repeat)
+            outputs[name] = chunks
+            print(f"{label:32} {name:10} {len(chunks):8d} {seconds:9.4f} "
+                  f"{len(chunks) / seconds:12,.0f} {len(text) / seconds / 1e6:8.1f}")
+
+        if langchain is not None and outputs["native"] != outputs["langchain"]:
+            print(f"  !! output differs from LangChain for {label}")
+
+
+if __name__ == "__main__":
+    main()
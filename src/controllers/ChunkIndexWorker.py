@@ -0,0 +1,246 @@
+from .BaseController import BaseController
+from .NLPController import NLPController
+from models.ModelRegistry import ModelRegistry
+from models.ChunkModel import ChunkModel
+from models.db_schemes import Project, DataChunk
+from helper.process_pool import run_in_executor
+from pymongo.errors import OperationFailure
+from bson import ObjectId
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+# $changeStream is only supported on replica sets
+CHANGE_STREAM_NOT_SUPPORTED_CODES = {40573}
+# The resume token fell off the oplog (ChangeStreamFatalError, ChangeStreamHistoryLost)
+CHANGE_STREAM_HISTORY_LOST_CODES = {280, 286}
+
+
+class ChunkIndexWorker(BaseController):
+    """
+    Background indexer tailing the chunks change stream. New canonical chunks are embedded
+    and pushed to the vector and lexical indexes in micro-batches, and deleted chunks are
+    removed from them, so /nlp/index/push is only needed for resets and catch-ups.
+
+    Updates to chunks already indexed (moved to another asset, new source assets) refresh
+    their vector payload; the text of a chunk never changes under the same id.
+
+    The resume token of the last handled event is stored after every flush: a restart
+    replays at most one batch, which is harmless because record ids derive from chunk ids.
+    Every API and worker process starts the worker, but only the one holding its lease
+    in the worker states collection tails the stream; the others wait to take over.
+    """
+
+    WORKER_NAME = "chunk_index_worker"
+    # Only the indexers' own bookkeeping; updates touching nothing else aren't content changes
+    BOOKKEEPING_FIELDS = {"chunk_indexed_at"}
+    CHUNK_FIELDS = ChunkModel.INDEX_FIELDS + ["chunk_project_id", "chunk_indexed_at"]
+
+    def __init__(self, models: ModelRegistry, nlp_controller: NLPController):
+        super().__init__()
+        self.chunk_model = models.chunk_model
+        self.project_model = models.project_model
+        self.worker_state_model = models.worker_state_model
+        self.nlp_controller = nlp_controller
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{self.generate_unique_key(6)}"
+        self.retry_delay = 1.0
+
+    async def run(self):
+        """
+        Runs the worker while this process holds its lease, renewing it a few times per
+        lease period. A process that loses the lease stops tailing and stands by again.
+        """
+        lease_seconds = self.app_settings.AUTO_INDEX_LEASE_SECONDS
+        following = None
+        try:
+            while True:
+                if not await self.acquire_lease(lease_seconds):
+                    await asyncio.sleep(lease_seconds / 3)
+                    continue
+
+                logger.info(f"[AUTO-INDEX] {self.worker_id} holds the indexer lease")
+                following = asyncio.create_task(self.follow())
+                while not following.done():
+                    await asyncio.wait({following}, timeout=lease_seconds / 3)
+                    if not following.done() and not await self.acquire_lease(lease_seconds):
+                        logger.warning(f"[AUTO-INDEX] {self.worker_id} lost the indexer lease; standing by")
+                        following.cancel()
+                        await asyncio.gather(following, return_exceptions=True)
+
+                if not following.cancelled():
+                    # follow() only returns when change streams aren't supported
+                    return
+        finally:
+            if following is not None and not following.done():
+                following.cancel()
+                await asyncio.gather(following, return_exceptions=True)
+            try:
+                await self.worker_state_model.release_lease(self.WORKER_NAME, owner=self.worker_id)
+            except Exception:
+                # Already logged; the lease then simply expires
+                pass
+
+    async def acquire_lease(self, lease_seconds: float) -> bool:
+        try:
+            return await self.worker_state_model.acquire_lease(
+                self.WORKER_NAME, owner=self.worker_id, lease_seconds=lease_seconds
+            )
+        except Exception:
+            # Already logged; without a confirmed lease the worker must not keep tailing
+            return False
+
+    async def follow(self):
+        """
+        Tails the stream until cancelled, reopening it from the stored resume token
+        with exponential backoff after errors.
+        """
+        with_pre_images = False
+        if self.app_settings.AUTO_INDEX_DELETE_PRE_IMAGES:
+            try:
+                await self.chunk_model.enable_change_pre_images()
+                with_pre_images = True
+            except Exception:
+                logger.warning("[AUTO-INDEX] Pre-images unavailable; deleted chunks are left to the process route")
+
+        while True:
+            try:
+                resume_token = await self.worker_state_model.get_resume_token(self.WORKER_NAME)
+                await self.tail(resume_token=resume_token, with_pre_images=with_pre_images)
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAM_NOT_SUPPORTED_CODES:
+                    logger.error("[AUTO-INDEX] Change streams need MongoDB to run as a replica set; worker stopped")
+                    return
+                if e.code in CHANGE_STREAM_HISTORY_LOST_CODES:
+                    logger.warning("[AUTO-INDEX] Resume token expired; restarting from now. "
+                                   "Run /nlp/index/push to catch up on missed chunks")
+                    await self.worker_state_model.save_resume_token(self.WORKER_NAME, None)
+                    continue
+                logger.exception(f"[AUTO-INDEX] Change stream failed: {e}")
+            except Exception as e:
+                logger.exception(f"[AUTO-INDEX] Indexing failed: {e}")
+
+            logger.info(f"[AUTO-INDEX] Retrying in {self.retry_delay:.0f}s")
+            await asyncio.sleep(self.retry_delay)
+            self.retry_delay = min(self.retry_delay * 2, self.app_settings.AUTO_INDEX_RETRY_MAX_SECONDS)
+
+    async def tail(self, resume_token: Optional[dict] = None, with_pre_images: bool = False):
+        batch_size = self.app_settings.AUTO_INDEX_BATCH_SIZE
+        batch_wait = self.app_settings.AUTO_INDEX_BATCH_WAIT_SECONDS
+
+        async with self.chunk_model.watch_chunks(
+            resume_after=resume_token,
+            with_pre_images=with_pre_images,
+            max_await_time_ms=max(1, int(min(batch_wait, 1.0) * 1000))
+        ) as stream:
+            logger.info(f"[AUTO-INDEX] Watching chunks (resumed={resume_token is not None})")
+            while stream.alive:
+                events = await self.next_batch(stream, batch_size=batch_size, batch_wait=batch_wait)
+                if not events:
+                    continue
+                await self.flush(events)
+                await self.worker_state_model.save_resume_token(self.WORKER_NAME, events[-1]["_id"])
+                self.retry_delay = 1.0
+
+    async def next_batch(self, stream, batch_size: int, batch_wait: float) -> List[dict]:
+        """
+        Collects events until `batch_size` of them arrived or `batch_wait` seconds have
+        passed since the first one. Returns an empty list when the stream stays idle.
+        """
+        events = []
+        deadline = None
+        while len(events) < batch_size and stream.alive:
+            event = await stream.try_next()
+            if event is not None:
+                events.append(event)
+                if deadline is None:
+                    deadline = time.monotonic() + batch_wait
+            elif deadline is None:
+                return events
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        return events
+
+    def group_events(self, events: List[dict]) -> Tuple[List[ObjectId], Dict[ObjectId, List[ObjectId]]]:
+        """
+        Splits a batch into the ids of chunks that may need indexing and the deleted chunk
+        ids per project. Deletes are only known with their project when a pre-image is present.
+        """
+        changed_ids = {}
+        deleted_ids = {}
+        for event in events:
+            chunk_id = event["documentKey"]["_id"]
+
+            if event["operationType"] == "delete":
+                changed_ids.pop(chunk_id, None)
+                project_id = (event.get("fullDocumentBeforeChange") or {}).get("chunk_project_id")
+                if project_id is not None:
+                    deleted_ids.setdefault(project_id, []).append(chunk_id)
+                continue
+
+            if event["operationType"] == "update":
+                description = event.get("updateDescription") or {}
+                fields = set(description.get("updatedFields") or {}) | set(description.get("removedFields") or [])
+                if fields and fields <= self.BOOKKEEPING_FIELDS:
+                    continue
+
+            changed_ids[chunk_id] = None
+        return list(changed_ids), deleted_ids
+
+    async def flush(self, events: List[dict]):
+        changed_ids, deleted_ids = self.group_events(events)
+        projects = {}
+
+        new_by_project = {}
+        updated_by_project = {}
+        if changed_ids:
+            # Re-read rather than trusting the events: a deleted chunk or a duplicate is skipped
+            chunks = await self.chunk_model.get_canonical_chunks_by_ids(changed_ids, projection=self.CHUNK_FIELDS)
+            for chunk in chunks:
+                by_project = new_by_project if chunk.chunk_indexed_at is None else updated_by_project
+                by_project.setdefault(chunk.chunk_project_id, []).append(chunk)
+
+        for project_id, chunks in new_by_project.items():
+            project = await self.get_project(project_id, projects)
+            if project is None:
+                continue
+            await run_in_executor(None, self.index_chunks, project, chunks)
+            await self.chunk_model.mark_chunks_indexed(chunk_ids=[chunk.id for chunk in chunks])
+
+        for project_id, chunks in updated_by_project.items():
+            project = await self.get_project(project_id, projects)
+            if project is None:
+                continue
+            await run_in_executor(None, self.nlp_controller.update_chunk_payloads, project, chunks)
+
+        for project_id, chunk_ids in deleted_ids.items():
+            project = await self.get_project(project_id, projects)
+            if project is None:
+                continue
+            await run_in_executor(None, self.nlp_controller.delete_chunks_from_indexes, project, chunk_ids)
+
+        logger.info(f"[AUTO-INDEX] Flushed {len(events)} events: "
+                    f"{sum(len(chunks) for chunks in new_by_project.values())} chunks indexed, "
+                    f"{sum(len(chunks) for chunks in updated_by_project.values())} updated, "
+                    f"{sum(len(ids) for ids in deleted_ids.values())} removed")
+
+    async def get_project(self, project_id: ObjectId, projects: Dict[ObjectId, Optional[Project]]) -> Optional[Project]:
+        if project_id not in projects:
+            projects[project_id] = await self.project_model.get_project_by_id(project_id)
+            if projects[project_id] is None:
+                logger.warning(f"[AUTO-INDEX] Skipping chunks of missing project {project_id}")
+        return projects[project_id]
+
+    def index_chunks(self, project: Project, chunks: List[DataChunk]):
+        """
+        Embeds and upserts the chunks into the project's indexes; blocking, run off the event loop.
+        """
+        chunks_ids = [self.nlp_controller.get_chunk_record_id(chunk) for chunk in chunks]
+        self.nlp_controller.index_into_vector_db(project=project, chunks=chunks, chunks_ids=chunks_ids)
+
+        if self.nlp_controller.lexical_index_client:
+            self.nlp_controller.add_to_lexical_index(project=project, chunks=chunks, chunks_ids=chunks_ids)
@@ -1,12 +1,38 @@
+import hashlib
 import logging
 import os
 import re
-from typing import Dict, Union, Tuple
+import shutil
+import tarfile
+import uuid
+import zipfile
+import aiofiles
+from typing import AsyncIterator, Dict, List, Optional, Union, Tuple
 from fastapi import UploadFile
+from helper.document_workers import hash_file
+from helper.process_pool import run_in_executor
 from .BaseController import BaseController
 from .ProjectController import ProjectController
 from models import ResponseStatus
 
+# Bytes inspected to sniff the real type of a streamed upload
+SNIFF_BYTES = 8192
+
+# Content-addressed upload store, under the files directory
+BLOBS_DIR_NAME = "blobs"
+# Partial data of resumable upload sessions, under the files directory
+UPLOADS_DIR_NAME = "uploads"
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+# Hash characters prefixed to the cleaned file name to form a project file id
+BLOB_NAME_HASH_LENGTH = 16
+
+EXTENSION_CONTENT_TYPES = {
+    ".txt": "text/plain",
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
@@ -63,25 +89,363 @@ class DataController(BaseController):
             "Status": ResponseStatus.FILE_UPLOAD_SUCCESS.value,
         }
 
-    async def generate_unique_filepath(self, orig_file_name: str, project_id: str) -> Tuple[str, str]:
-        logger.info(f"Generating unique filepath for file: {orig_file_name}, project ID: {project_id}")
-        random_key = self.generate_unique_key(length=12)
+    def get_blob_path(self, content_hash: str) -> str:
+        """
+        Uploads are stored once per content under assets/files/blobs/<2 hex chars>/<sha256>.
+        """
+        return str(self.files_dir / BLOBS_DIR_NAME / content_hash[:2] / content_hash)
+
+    def get_blob_tmp_path(self) -> str:
+        return str(self.files_dir / BLOBS_DIR_NAME / "tmp" / f"{uuid.uuid4().hex}.part")
+
+    def store_blob(self, tmp_path: str, content_hash: str) -> Tuple[str, bool]:
+        """
+        Moves a fully written upload into the blob store. When the blob already exists
+        the new copy is dropped. Returns the blob path and whether it was already stored.
+        """
+        blob_path = self.get_blob_path(content_hash)
+        if os.path.exists(blob_path):
+            os.remove(tmp_path)
+            logger.info(f"Blob {content_hash} already stored, dropped duplicate upload")
+            return blob_path, True
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(tmp_path, blob_path)
+        return blob_path, False
+
+    def link_blob_to_project(self, content_hash: str, orig_file_name: str, project_id: str) -> Tuple[str, str]:
+        """
+        Exposes a blob in the project directory as <hash prefix>_<cleaned name>, a hardlink
+        to the blob (a copy when the filesystem can't link). The name is derived from the
+        content, so the same file uploaded twice to a project resolves to the same file id.
+        """
         project_path = ProjectController().get_project_path(project_id=project_id)
         cleaned_name = self.get_cleaned_filename(orig_file_name)[:100]
-        unique_filename = f"{random_key}_{cleaned_name}"
-        new_file_path = os.path.join(project_path, unique_filename)
+        file_id = f"{content_hash[:BLOB_NAME_HASH_LENGTH]}_{cleaned_name}"
+        file_path = os.path.join(project_path, file_id)
 
-        while os.path.exists(new_file_path):
-            logger.debug(f"File exists: {new_file_path}. Generating new key.")
-            random_key = self.generate_unique_key(length=12)
-            unique_filename = f"{random_key}_{cleaned_name}"
-            new_file_path = os.path.join(project_path, unique_filename)
+        if not os.path.exists(file_path):
+            blob_path = self.get_blob_path(content_hash)
+            try:
+                os.link(blob_path, file_path)
+            except FileExistsError:
+                pass
+            except OSError as e:
+                logger.warning(f"Hardlinking blob {content_hash} failed ({e}), copying instead")
+                shutil.copyfile(blob_path, file_path)
 
-        logger.info(f"Generated unique file path: {new_file_path}")
-        return new_file_path, unique_filename
+        logger.info(f"Blob {content_hash} available as {file_path}")
+        return file_path, file_id
 
     def get_cleaned_filename(self, orig_file_name: str) -> str:
         logger.debug(f"Cleaning filename: {orig_file_name}")
         cleaned = re.sub(r'[^a-zA-Z0-9_.-]', '_', orig_file_name.strip())
         logger.debug(f"Cleaned filename: {cleaned}")
         return cleaned
+
+    def sniff_content_type(self, head: bytes) -> Optional[str]:
+        """
+        Infers the content type from the first bytes of a file instead of trusting the client.
+        """
+        if head.startswith(b"%PDF-"):
+            return "application/pdf"
+        if head.startswith(b"PK\x03\x04"):
+            # A .docx is a zip archive whose first entries describe a Word document
+            if b"[Content_Types].xml" in head or b"word/" in head:
+                return EXTENSION_CONTENT_TYPES[".docx"]
+            return "application/zip"
+        if head and b"\x00" not in head:
+            try:
+                head.decode("utf-8")
+            except UnicodeDecodeError as e:
+                # The sniff window may end in the middle of a multi-byte character
+                if e.start < len(head) - 3:
+                    return None
+            return "text/plain"
+        return None
+
+    def validate_content_type(self, head: bytes, file_name: str) -> Dict[str, Union[str, bool, None]]:
+        sniffed_type = self.sniff_content_type(head)
+        expected_type = EXTENSION_CONTENT_TYPES.get(os.path.splitext(file_name)[-1].lower())
+
+        if sniffed_type not in self.app_settings.FILE_ALLOWED_TYPES:
+            logger.warning(f"Unsupported sniffed file type for {file_name}: {sniffed_type}")
+            return {
+                "valid": False,
+                "Status": ResponseStatus.FILE_TYPE_NOT_SUPPORTED.value,
+                "reason": f"Unsupported file type: {sniffed_type or 'unknown'}"
+            }
+
+        if sniffed_type != expected_type:
+            logger.warning(f"Content of {file_name} ({sniffed_type}) does not match its extension")
+            return {
+                "valid": False,
+                "Status": ResponseStatus.FILE_TYPE_NOT_SUPPORTED.value,
+                "reason": f"File content ({sniffed_type}) does not match the file extension"
+            }
+
+        return {"valid": True, "Status": ResponseStatus.FILE_VALIDATED_SUCCESS.value, "content_type": sniffed_type}
+
+    async def save_stream(self, stream: AsyncIterator[bytes], file_name: str,
+                          content_length: Optional[int] = None,
+                          check_content_type: bool = True) -> Dict[str, Union[str, bool, int, None]]:
+        """
+        Writes an upload into the blob store, hashing it on the way and checking the size
+        limit on every chunk (and, with `check_content_type`, the sniffed type once the
+        first SNIFF_BYTES have arrived). The data is written once, to a temporary file
+        next to the blobs that is renamed to its content hash, or dropped when that blob
+        already exists. The partial file is removed on any failure.
+        """
+        max_size = self.app_settings.FILE_MAX_SIZE * 1024 * 1024
+        size_exceeded = {
+            "valid": False,
+            "Status": ResponseStatus.FILE_SIZE_EXCEEDED.value,
+            "reason": f"File exceeds limit of {self.app_settings.FILE_MAX_SIZE}MB"
+        }
+
+        if content_length is not None and content_length > max_size:
+            logger.warning(f"Declared size {content_length} bytes exceeds limit of {max_size} bytes")
+            return size_exceeded
+
+        tmp_path = self.get_blob_tmp_path()
+        os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+        digest = hashlib.sha256()
+        result = None
+        size = 0
+        head = bytearray() if check_content_type else None
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out_file:
+                async for data in stream:
+                    size += len(data)
+                    if size > max_size:
+                        logger.warning(f"Upload of {file_name} exceeded {max_size} bytes, aborting")
+                        result = size_exceeded
+                        break
+
+                    if head is None:
+                        digest.update(data)
+                        await out_file.write(data)
+                        continue
+
+                    head += data
+                    if len(head) >= SNIFF_BYTES:
+                        result = self.validate_content_type(bytes(head[:SNIFF_BYTES]), file_name)
+                        if not result["valid"]:
+                            break
+                        digest.update(head)
+                        await out_file.write(head)
+                        head = None
+
+                if result is None or result["valid"]:
+                    if head is not None:
+                        # Whole body was smaller than the sniff window
+                        result = self.validate_content_type(bytes(head), file_name)
+                        if result["valid"]:
+                            digest.update(head)
+                            await out_file.write(head)
+                    if size == 0:
+                        result = {
+                            "valid": False,
+                            "Status": ResponseStatus.FILE_VALIDATION_FAILED.value,
+                            "reason": "Empty upload"
+                        }
+            if result is None or result["valid"]:
+                content_hash = digest.hexdigest()
+                blob_path, deduplicated = self.store_blob(tmp_path, content_hash)
+        except Exception as e:
+            logger.error(f"Streaming upload of {file_name} failed: {e}")
+            result = {
+                "valid": False,
+                "Status": ResponseStatus.FILE_UPLOAD_FAILED.value,
+                "reason": str(e)
+            }
+
+        if result is not None and not result["valid"]:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return result
+
+        logger.info(f"Stored {size} bytes of {file_name} as blob {content_hash}")
+        return {
+            **(result or {}),
+            "valid": True,
+            "Status": ResponseStatus.FILE_UPLOAD_SUCCESS.value,
+            "size": size,
+            "content_hash": content_hash,
+            "blob_path": blob_path,
+            "deduplicated": deduplicated,
+        }
+
+    async def iter_upload_file(self, file: UploadFile) -> AsyncIterator[bytes]:
+        while chunk := await file.read(self.app_settings.FILE_DEFAULT_CHUNK_SIZE):
+            yield chunk
+
+    def get_upload_session_path(self, session_id: str) -> str:
+        return str(self.files_dir / UPLOADS_DIR_NAME / f"{session_id}.part")
+
+    def create_upload_session_file(self, session_id: str, file_size: int) -> str:
+        """
+        Creates the session's partial file at its final size (sparse where supported),
+        so ranges can be written at their offsets in any order.
+        """
+        file_path = self.get_upload_session_path(session_id)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as fh:
+            fh.truncate(file_size)
+        return file_path
+
+    def remove_upload_session_file(self, session_id: str):
+        file_path = self.get_upload_session_path(session_id)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def parse_content_range(self, header: Optional[str], file_size: int) -> Optional[Tuple[int, int]]:
+        """
+        Parses a `Content-Range: bytes <first>-<last>/<total>` header into a [start, end)
+        range. Returns None when it is malformed or does not fit the session's file size.
+        """
+        match = CONTENT_RANGE_RE.match((header or "").strip())
+        if not match:
+            return None
+        first, last, total = (int(value) for value in match.groups())
+        if total != file_size or first > last or last >= file_size:
+            return None
+        return first, last + 1
+
+    async def write_range(self, stream: AsyncIterator[bytes], file_path: str,
+                          start: int, end: int) -> Dict[str, Union[str, bool, int, None]]:
+        """
+        Writes a request body into bytes [start, end) of a session file. `written` is
+        always reported, so the bytes that did arrive before a dropped connection count.
+        """
+        expected = end - start
+        written = 0
+        result = {"valid": True, "Status": ResponseStatus.UPLOAD_RANGE_RECEIVED.value}
+        try:
+            async with aiofiles.open(file_path, "r+b") as out_file:
+                await out_file.seek(start)
+                async for data in stream:
+                    if written + len(data) > expected:
+                        data = data[:expected - written]
+                        result = {
+                            "valid": False,
+                            "Status": ResponseStatus.UPLOAD_RANGE_INVALID.value,
+                            "reason": f"Body is longer than the {expected} bytes of its Content-Range"
+                        }
+                    await out_file.write(data)
+                    written += len(data)
+                    if not result["valid"]:
+                        break
+        except Exception as e:
+            logger.warning(f"Range upload into {file_path} interrupted after {written} bytes: {e}")
+            result = {
+                "valid": False,
+                "Status": ResponseStatus.FILE_UPLOAD_FAILED.value,
+                "reason": str(e)
+            }
+
+        if result["valid"] and written < expected:
+            result = {
+                "valid": False,
+                "Status": ResponseStatus.UPLOAD_RANGE_INVALID.value,
+                "reason": f"Received {written} of the {expected} bytes of its Content-Range"
+            }
+        return {**result, "written": written}
+
+    def merge_byte_ranges(self, ranges: List[List[int]]) -> List[List[int]]:
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+
+    def get_received_offset(self, merged_ranges: List[List[int]]) -> int:
+        """
+        Bytes received contiguously from the start of the file; a sequential client resumes here.
+        """
+        if merged_ranges and merged_ranges[0][0] == 0:
+            return merged_ranges[0][1]
+        return 0
+
+    async def finalize_upload_file(self, file_path: str, file_name: str) -> Dict[str, Union[str, bool, int, None]]:
+        """
+        Checks the type of a completely received session file, hashes it and moves it
+        into the blob store. Returns the same shape as `save_stream`.
+        """
+        with open(file_path, "rb") as fh:
+            head = fh.read(SNIFF_BYTES)
+        result = self.validate_content_type(head, file_name)
+        if not result["valid"]:
+            return result
+
+        try:
+            size = os.path.getsize(file_path)
+            content_hash = await run_in_executor(None, hash_file, file_path)
+            blob_path, deduplicated = self.store_blob(file_path, content_hash)
+        except Exception as e:
+            logger.error(f"Finalizing upload of {file_name} failed: {e}")
+            return {
+                "valid": False,
+                "Status": ResponseStatus.FILE_UPLOAD_FAILED.value,
+                "reason": str(e)
+            }
+
+        logger.info(f"Finalized {size} bytes of {file_name} as blob {content_hash}")
+        return {
+            **result,
+            "Status": ResponseStatus.FILE_UPLOAD_SUCCESS.value,
+            "size": size,
+            "content_hash": content_hash,
+            "blob_path": blob_path,
+            "deduplicated": deduplicated,
+        }
+
+    def get_archive_type(self, file_name: str) -> Optional[str]:
+        name = (file_name or "").lower()
+        if name.endswith(".zip"):
+            return "zip"
+        if name.endswith(TAR_SUFFIXES):
+            return "tar"
+        return None
+
+    def is_archive_member_skipped(self, member_name: str) -> bool:
+        """
+        Directories' metadata files (macOS resource forks, dotfiles) are not documents.
+        """
+        base_name = os.path.basename(member_name.rstrip("/"))
+        return not base_name or base_name.startswith(".") or member_name.startswith("__MACOSX/")
+
+    async def iter_zip_member(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> AsyncIterator[bytes]:
+        """
+        Streams one decompressed zip member; reads run in threads, so members of the same
+        archive can be consumed concurrently.
+        """
+        chunk_size = self.app_settings.FILE_DEFAULT_CHUNK_SIZE
+        member = await run_in_executor(None, archive.open, info)
+        try:
+            while chunk := await run_in_executor(None, member.read, chunk_size):
+                yield chunk
+        finally:
+            member.close()
+
+    async def iter_tar_members(self, fileobj) -> AsyncIterator[Tuple[str, int, AsyncIterator[bytes]]]:
+        """
+        Walks a (possibly compressed) tar archive in streaming mode, yielding
+        (member name, size, byte stream) for every regular file. A tar stream is
+        sequential, so each member has to be consumed before the next one is requested.
+        """
+        archive = await run_in_executor(None, tarfile.open, fileobj=fileobj, mode="r|*")
+        try:
+            while (member := await run_in_executor(None, archive.next)) is not None:
+                if member.isfile():
+                    yield member.name, member.size, self.iter_tar_member(archive, member)
+        finally:
+            archive.close()
+
+    async def iter_tar_member(self, archive: tarfile.TarFile, member: tarfile.TarInfo) -> AsyncIterator[bytes]:
+        chunk_size = self.app_settings.FILE_DEFAULT_CHUNK_SIZE
+        member_file = archive.extractfile(member)
+        while chunk := await run_in_executor(None, member_file.read, chunk_size):
+            yield chunk
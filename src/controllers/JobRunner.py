@@ -0,0 +1,152 @@
+from .LeasedWorker import LeasedWorker
+from models.JobModel import JobModel
+from models.db_schemes import Job
+from models.enums.JobEnums import JobStatusEnum
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job handler once its job is cancelled or was taken over by another runner.
+    """
+
+
+class JobContext:
+    """
+    Handed to a job handler to report progress and move the job's checkpoint.
+    """
+
+    def __init__(self, job: Job, job_model: JobModel, worker_id: str):
+        self.job = job
+        self.job_model = job_model
+        self.worker_id = worker_id
+
+    @property
+    def checkpoint(self) -> dict:
+        return self.job.job_checkpoint or {}
+
+    async def report(self, checkpoint: Optional[dict] = None, **increments: int):
+        """
+        Adds to the progress counters (files, chunks, vectors, errors) and, with `checkpoint`,
+        records where a resumed run should start. Raises JobCancelled when the job should stop.
+        """
+        job = await self.job_model.update_progress(
+            job_id=self.job.id,
+            worker_id=self.worker_id,
+            increments={name: value for name, value in increments.items() if value},
+            checkpoint=checkpoint
+        )
+        if job is None or job.job_cancel_requested:
+            raise JobCancelled(f"Job {self.job.id} was cancelled")
+        self.job = job
+
+
+JobHandler = Callable[[Job, JobContext], Awaitable[Optional[dict]]]
+
+
+class JobRunner(LeasedWorker):
+    """
+    Bounded pool of JOB_MAX_CONCURRENT workers running the jobs stored by JobModel.
+    Workers claim jobs atomically, so several processes can share one queue; a job whose
+    runner stops heart-beating is claimed again and resumes from its last checkpoint, up to
+    JOB_MAX_ATTEMPTS times; after that it is marked failed.
+    """
+
+    LOG_PREFIX = "[JOBS]"
+    WORKER_LABEL = "Runner"
+    ITEM_LABEL = "job"
+    INTERRUPTIONS = (asyncio.CancelledError, JobCancelled)
+
+    def __init__(self, job_model: JobModel, handlers: Dict[str, JobHandler]):
+        super().__init__(handlers=handlers)
+        self.job_model = job_model
+        self.wakeup = asyncio.Event()
+
+    @property
+    def concurrency(self) -> int:
+        return self.app_settings.JOB_MAX_CONCURRENT
+
+    @property
+    def poll_seconds(self) -> float:
+        return self.app_settings.JOB_POLL_SECONDS
+
+    @property
+    def heartbeat_seconds(self) -> float:
+        return self.app_settings.JOB_HEARTBEAT_SECONDS
+
+    def get_stale_before(self) -> datetime:
+        return datetime.utcnow() - timedelta(seconds=self.app_settings.JOB_HEARTBEAT_TIMEOUT_SECONDS)
+
+    async def submit(self, job: Job) -> Job:
+        job = await self.job_model.create_job(job)
+        self.wakeup.set()
+        return job
+
+    async def cancel(self, job_id: ObjectId) -> Optional[Job]:
+        job = await self.job_model.request_cancel(job_id=job_id, stale_before=self.get_stale_before())
+        self.cancel_running([job_id])
+        return job
+
+    async def claim(self) -> Optional[Job]:
+        return await self.job_model.claim_next_job(
+            worker_id=self.worker_id, stale_before=self.get_stale_before(),
+            max_attempts=self.app_settings.JOB_MAX_ATTEMPTS
+        )
+
+    async def wait_for_work(self):
+        # Submitted in this process: no need to wait for the next poll
+        self.wakeup.clear()
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout=self.poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def renew(self, item_ids: List[ObjectId]) -> List[ObjectId]:
+        """
+        Keeps this runner's jobs claimed and fails the jobs whose runners died on every
+        allowed attempt. Returns the jobs cancelled through another process.
+        """
+        cancelled_ids = await self.job_model.heartbeat(job_ids=item_ids, worker_id=self.worker_id)
+        failed = await self.job_model.fail_exhausted_jobs(
+            stale_before=self.get_stale_before(), max_attempts=self.app_settings.JOB_MAX_ATTEMPTS
+        )
+        if failed:
+            logger.warning(f"[JOBS] Marked {failed} jobs failed after {self.app_settings.JOB_MAX_ATTEMPTS} attempts")
+        return cancelled_ids
+
+    def get_item_type(self, job: Job) -> str:
+        return job.job_type
+
+    def describe(self, job: Job) -> str:
+        return f"{job.job_type} job {job.id} (attempt {job.job_attempts})"
+
+    def call_handler(self, handler: JobHandler, job: Job) -> Awaitable[Optional[dict]]:
+        return handler(job, JobContext(job=job, job_model=self.job_model, worker_id=self.worker_id))
+
+    async def run_job(self, job: Job):
+        await self.run_item(job)
+
+    async def record_success(self, job: Job, result: Optional[dict]):
+        await self.job_model.finish_job(
+            job_id=job.id, worker_id=self.worker_id, job_status=JobStatusEnum.SUCCEEDED.value, result=result
+        )
+
+    async def record_failure(self, job: Job, error: str, retry: bool = True):
+        # A failed handler is not retried: a resumed job only follows a dead runner
+        await self.job_model.finish_job(
+            job_id=job.id, worker_id=self.worker_id, job_status=JobStatusEnum.FAILED.value, error=error
+        )
+
+    async def record_interruption(self, job: Job):
+        await self.job_model.finish_job(
+            job_id=job.id, worker_id=self.worker_id, job_status=JobStatusEnum.CANCELLED.value
+        )
+
+    async def release(self, job: Job):
+        await self.job_model.requeue_job(job_id=job.id, worker_id=self.worker_id)
@@ -0,0 +1,169 @@
+from .BaseController import BaseController
+from bson import ObjectId
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+import asyncio
+import logging
+import os
+import socket
+
+logger = logging.getLogger(__name__)
+
+
+class LeasedWorker(BaseController):
+    """
+    Bounded pool of workers claiming items (jobs, tasks) from a shared store, so several
+    processes can serve one queue. Every item is held under this worker's id: a heartbeat
+    renews the claims of the running items and cancels those the store says are lost
+    (cancelled, or taken over by another worker). On shutdown, running items go back to
+    the queue instead of being recorded as interrupted.
+
+    Subclasses say how items are claimed, renewed and recorded; handlers are looked up
+    by the item's type.
+    """
+
+    LOG_PREFIX = "[WORKER]"
+    WORKER_LABEL = "Worker"
+    ITEM_LABEL = "item"
+    # Raised by handlers (besides cancellation) to stop an item without failing it
+    INTERRUPTIONS: Tuple[Type[BaseException], ...] = (asyncio.CancelledError,)
+
+    def __init__(self, handlers: Dict[str, Callable[..., Awaitable[Optional[dict]]]]):
+        super().__init__()
+        self.handlers = handlers
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{self.generate_unique_key(6)}"
+        self.running: Dict[ObjectId, asyncio.Task] = {}
+        self.tasks = []
+        self.stopping = False
+
+    @property
+    def concurrency(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def poll_seconds(self) -> float:
+        raise NotImplementedError
+
+    @property
+    def heartbeat_seconds(self) -> float:
+        raise NotImplementedError
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(self.concurrency)]
+        self.tasks.append(asyncio.create_task(self.heartbeat()))
+        logger.info(f"{self.LOG_PREFIX} {self.WORKER_LABEL} {self.worker_id} started with {self.concurrency} slots")
+
+    async def stop(self):
+        """
+        Stops the workers; items still running are handed back to the queue.
+        """
+        self.stopping = True
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        logger.info(f"{self.LOG_PREFIX} {self.WORKER_LABEL} {self.worker_id} stopped")
+
+    async def claim(self) -> Optional[Any]:
+        """
+        Claims the next item for this worker, or returns None when there is none.
+        """
+        raise NotImplementedError
+
+    async def renew(self, item_ids: List[ObjectId]) -> List[ObjectId]:
+        """
+        Renews this worker's claims on `item_ids`; returns the ids it no longer holds.
+        """
+        raise NotImplementedError
+
+    def get_item_type(self, item) -> str:
+        raise NotImplementedError
+
+    def describe(self, item) -> str:
+        return f"{self.get_item_type(item)} {self.ITEM_LABEL} {item.id}"
+
+    def call_handler(self, handler: Callable, item) -> Awaitable[Optional[dict]]:
+        return handler(item)
+
+    async def record_success(self, item, result: Optional[dict]):
+        raise NotImplementedError
+
+    async def record_failure(self, item, error: str, retry: bool = True):
+        """
+        Records a failed item; `retry` is False when running it again cannot help.
+        """
+        raise NotImplementedError
+
+    async def record_interruption(self, item):
+        """
+        Records an item stopped by cancellation or one of INTERRUPTIONS, outside shutdown.
+        """
+        raise NotImplementedError
+
+    async def release(self, item):
+        """
+        Hands a running item back to the queue on shutdown.
+        """
+        raise NotImplementedError
+
+    async def wait_for_work(self):
+        await asyncio.sleep(self.poll_seconds)
+
+    async def work(self):
+        while True:
+            try:
+                item = await self.claim()
+            except Exception as e:
+                logger.exception(f"{self.LOG_PREFIX} {self.WORKER_LABEL} {self.worker_id} "
+                                 f"failed to claim a {self.ITEM_LABEL}: {e}")
+                item = None
+
+            if item is None:
+                await self.wait_for_work()
+                continue
+
+            await self.run_item(item)
+
+    async def run_item(self, item):
+        handler = self.handlers.get(self.get_item_type(item))
+        if handler is None:
+            await self.record_failure(
+                item, error=f"Unknown {self.ITEM_LABEL} type: {self.get_item_type(item)}", retry=False
+            )
+            return
+
+        logger.info(f"{self.LOG_PREFIX} Running {self.describe(item)}")
+        running = asyncio.create_task(self.call_handler(handler, item))
+        self.running[item.id] = running
+        try:
+            result = await running
+        except self.INTERRUPTIONS:
+            if self.stopping:
+                await self.release(item)
+                raise
+            await self.record_interruption(item)
+        except Exception as e:
+            logger.exception(f"{self.LOG_PREFIX} {self.ITEM_LABEL.capitalize()} {item.id} failed: {e}")
+            await self.record_failure(item, error=str(e))
+        else:
+            await self.record_success(item, result)
+        finally:
+            self.running.pop(item.id, None)
+
+    def cancel_running(self, item_ids: List[ObjectId]):
+        for item_id in item_ids:
+            running = self.running.get(item_id)
+            if running is not None:
+                running.cancel()
+
+    async def heartbeat(self):
+        """
+        Renews this worker's claims and stops the items it no longer holds.
+        """
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                lost_ids = await self.renew(list(self.running))
+            except Exception as e:
+                logger.exception(f"{self.LOG_PREFIX} {self.WORKER_LABEL} {self.worker_id} "
+                                 f"failed to renew its {self.ITEM_LABEL}s: {e}")
+                continue
+            self.cancel_running(lost_ids)
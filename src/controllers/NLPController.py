@@ -1,9 +1,14 @@
 from .BaseController import BaseController
-from models.db_schemes import Project, DataChunk
+from models.db_schemes import Project, DataChunk, RetrievedDocument
 from stores.llm.LLMEnums import DocumentTypeEnum
-from typing import List
+from stores.lexical.LexicalEnums import SearchModeEnum
+from stores.lexical.BM25Index import BM25IndexBuilder
+from stores.vectorDB.VectorDBEnums import VectorDBPayloadModeEnum
+from typing import List, Optional
+from bson import ObjectId
 import json
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -11,20 +16,48 @@ logger = logging.getLogger(__name__)
 class NLPController(BaseController):
 
     def __init__(self, vectordb_client, generation_client, 
-                 embedding_client, template_parser):
+                 embedding_client, template_parser, lexical_index_client=None):
         super().__init__()
 
         self.vectordb_client = vectordb_client
         self.generation_client = generation_client
         self.embedding_client = embedding_client
         self.template_parser = template_parser
+        self.lexical_index_client = lexical_index_client
 
     def create_collection_name(self, project_id: str):
         return f"collection_{project_id}".strip()
 
+    def get_chunk_record_id(self, chunk: DataChunk) -> str:
+        """
+        Derives a stable vector/lexical record id from the chunk's ObjectId,
+        so the same chunk maps to the same record across indexing runs.
+        """
+        return self.get_record_id(chunk.id)
+
+    def get_record_id(self, chunk_id: ObjectId) -> str:
+        return str(uuid.UUID(bytes=chunk_id.binary.rjust(16, b"\x00")))
+
+    def get_chunk_id(self, record_id: str) -> Optional[ObjectId]:
+        """
+        Inverse of get_record_id; None for record ids that don't map to a chunk.
+        """
+        try:
+            record_bytes = uuid.UUID(record_id).bytes
+        except (TypeError, ValueError):
+            return None
+        if record_bytes[:4] != b"\x00" * 4:
+            return None
+        return ObjectId(record_bytes[4:])
+
+    def is_slim_payload(self) -> bool:
+        return self.app_settings.VECTOR_DB_PAYLOAD_MODE == VectorDBPayloadModeEnum.SLIM.value
+
     def reset_vector_db_collection(self, project: Project):
         collection_name = self.create_collection_name(project_id=project.project_id)
         logger.info(f"Resetting collection: {collection_name}")
+        if self.lexical_index_client:
+            self.lexical_index_client.delete_index(collection_name=collection_name)
         return self.vectordb_client.delete_collection(collection_name=collection_name)
 
     def get_vector_db_collection_info(self, project: Project):
@@ -33,17 +66,62 @@ class NLPController(BaseController):
         collection_info = self.vectordb_client.get_collection_info(collection_name=collection_name)
         return json.loads(json.dumps(collection_info, default=lambda x: x.__dict__))
 
+    def get_chunk_payload_metadata(self, chunk: DataChunk) -> dict:
+        """
+        Vector payload metadata: the chunk's own fields and its asset id (document-level
+        metadata lives on the asset). Canonical chunks also list every asset the text appears in.
+        """
+        if self.is_slim_payload():
+            return {"asset_id": str(chunk.chunk_asset_id)}
+
+        metadata = {**chunk.chunk_metadata, "asset_id": str(chunk.chunk_asset_id)}
+        if chunk.chunk_source_asset_ids:
+            metadata["source_asset_ids"] = [str(asset_id) for asset_id in chunk.chunk_source_asset_ids]
+        return metadata
+
+    def get_chunk_vectors(self, chunks: List[DataChunk]) -> List[list]:
+        """
+        Embeds the chunks, except those copied from an already indexed chunk (the same
+        uploaded blob processed elsewhere), whose stored vector is fetched instead.
+        """
+        vectors = [None] * len(chunks)
+
+        sources = {}
+        for i, chunk in enumerate(chunks):
+            if chunk.chunk_vector_source:
+                sources.setdefault(chunk.chunk_vector_source["collection_name"], []).append(
+                    (i, chunk.chunk_vector_source["record_id"])
+                )
+
+        for collection_name, items in sources.items():
+            stored = self.vectordb_client.get_vectors(
+                collection_name=collection_name, record_ids=[record_id for _, record_id in items]
+            )
+            for i, record_id in items:
+                vector = stored.get(record_id)
+                # Vectors from another embedding setup can't be mixed into this collection
+                if vector is not None and len(vector) == self.embedding_client.embedding_size:
+                    vectors[i] = vector
+
+        reused = sum(1 for vector in vectors if vector is not None)
+        if reused:
+            logger.info(f"Reusing {reused} stored vectors, embedding {len(chunks) - reused} chunks")
+
+        return [
+            vector if vector is not None else self.embedding_client.embed_text(
+                text=chunk.chunk_text, document_type=DocumentTypeEnum.DOCUMENT.value
+            )
+            for chunk, vector in zip(chunks, vectors)
+        ]
+
     def index_into_vector_db(self, project: Project, chunks: List[DataChunk],
                              chunks_ids: List[int], do_reset: bool = False):
         collection_name = self.create_collection_name(project_id=project.project_id)
         logger.info(f"Indexing {len(chunks)} chunks into vector DB collection: {collection_name} (reset={do_reset})")
 
-        texts = [c.chunk_text for c in chunks]
-        metadata = [c.chunk_metadata for c in chunks]
-        vectors = [
-            self.embedding_client.embed_text(text=text, document_type=DocumentTypeEnum.DOCUMENT.value)
-            for text in texts
-        ]
+        texts = [None if self.is_slim_payload() else c.chunk_text for c in chunks]
+        metadata = [self.get_chunk_payload_metadata(c) for c in chunks]
+        vectors = self.get_chunk_vectors(chunks)
 
         self.vectordb_client.create_collection(
             collection_name=collection_name,
@@ -61,6 +139,127 @@ class NLPController(BaseController):
 
         logger.info(f"Successfully indexed into collection: {collection_name}")
         return True
+
+    def delete_chunks_from_indexes(self, project: Project, chunk_ids: List[ObjectId]) -> int:
+        """
+        Removes the records of deleted chunks from the project's vector and lexical indexes.
+        """
+        if not chunk_ids:
+            return 0
+
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        records_ids = [self.get_record_id(chunk_id) for chunk_id in chunk_ids]
+        logger.info(f"Removing {len(records_ids)} stale records from collection: {collection_name}")
+
+        if self.vectordb_client.is_collection_existed(collection_name):
+            self.vectordb_client.delete_by_ids(collection_name=collection_name, record_ids=records_ids)
+        if self.lexical_index_client:
+            self.lexical_index_client.remove_documents(collection_name=collection_name, doc_ids=records_ids)
+        return len(records_ids)
+
+    def update_chunk_payloads(self, project: Project, chunks: List[DataChunk]) -> int:
+        """
+        Refreshes the payload of already indexed canonical chunks that moved to another
+        asset (new asset id, order and metadata) or whose source assets changed. The text
+        is unchanged, so neither the vector nor the lexical entry needs rebuilding.
+        """
+        indexed_chunks = [c for c in chunks if c.chunk_indexed_at is not None]
+        if not indexed_chunks:
+            return 0
+
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        logger.info(f"Updating the payload of {len(indexed_chunks)} records in collection: {collection_name}")
+        self.vectordb_client.update_metadata(
+            collection_name=collection_name,
+            record_ids=[self.get_chunk_record_id(c) for c in indexed_chunks],
+            metadata=[self.get_chunk_payload_metadata(c) for c in indexed_chunks],
+        )
+        return len(indexed_chunks)
+
+    def get_lexical_index_builder(self, project: Project, do_reset: bool = False) -> BM25IndexBuilder:
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        logger.info(f"Opening lexical index builder: {collection_name} (reset={do_reset})")
+        return self.lexical_index_client.open_builder(collection_name=collection_name, do_reset=do_reset)
+
+    def index_into_lexical_index(self, builder: BM25IndexBuilder, chunks: List[DataChunk],
+                                 chunks_ids: List[str]):
+        builder.add_documents(doc_ids=chunks_ids, texts=[c.chunk_text for c in chunks])
+        return True
+
+    def add_to_lexical_index(self, project: Project, chunks: List[DataChunk], chunks_ids: List[str]):
+        """
+        Writes the chunks to the project's lexical index as a new segment, under its lock,
+        so concurrent indexers (threads or worker processes) don't overwrite each other.
+        """
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        added = self.lexical_index_client.add_documents(
+            collection_name=collection_name,
+            doc_ids=chunks_ids,
+            texts=[c.chunk_text for c in chunks]
+        )
+        logger.info(f"Lexical index updated: {collection_name} ({added} documents added)")
+        return True
+
+    def compact_lexical_index(self, project: Project):
+        """
+        Merges the segments written by incremental updates, e.g. at the end of an index job.
+        """
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        self.lexical_index_client.compact(collection_name=collection_name)
+        return True
+
+    def save_lexical_index(self, project: Project, builder: BM25IndexBuilder):
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        index = self.lexical_index_client.save_index(collection_name=collection_name, builder=builder)
+        logger.info(f"Lexical index saved: {collection_name} ({index.num_docs} documents)")
+        return True
+
+    def search_lexical_index(self, project: Project, query: str, limit: int = 10) -> List[RetrievedDocument]:
+        collection_name = self.create_collection_name(project_id=project.project_id)
+        logger.info(f"Lexical search in: {collection_name} with query: {query}")
+
+        if not self.lexical_index_client:
+            logger.error("Lexical index client is not configured.")
+            return []
+
+        results = self.lexical_index_client.search(collection_name=collection_name, query=query, limit=limit)
+        logger.info(f"Lexical search completed with {len(results)} results.")
+        return results
+
+    def fuse_search_results(self, result_lists: List[List[RetrievedDocument]],
+                            limit: int = 10) -> List[RetrievedDocument]:
+        """
+        Merges ranked result lists with reciprocal rank fusion: each document scores
+        sum(1 / (k + rank)) over the lists it appears in.
+        """
+        rrf_k = self.app_settings.HYBRID_RRF_K
+        fused_scores = {}
+        documents = {}
+
+        for results in result_lists:
+            for rank, doc in enumerate(results or [], start=1):
+                key = doc.record_id or doc.text
+                fused_scores[key] = fused_scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+                documents.setdefault(key, doc)
+
+        ranked = sorted(fused_scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [
+            RetrievedDocument.model_construct(text=documents[key].text, score=score, record_id=documents[key].record_id)
+            for key, score in ranked
+        ]
+
+    def search_collection(self, project: Project, query: str, limit: int = 10,
+                          search_mode: str = SearchModeEnum.DENSE.value) -> List[RetrievedDocument]:
+        if search_mode == SearchModeEnum.LEXICAL.value:
+            return self.search_lexical_index(project=project, query=query, limit=limit)
+
+        if search_mode == SearchModeEnum.HYBRID.value:
+            candidate_limit = limit * 2
+            lexical_results = self.search_lexical_index(project=project, query=query, limit=candidate_limit)
+            dense_results = self.search_vector_db_collection(project=project, query=query, limit=candidate_limit)
+            return self.fuse_search_results([dense_results, lexical_results], limit=limit)
+
+        return self.search_vector_db_collection(project=project, query=query, limit=limit)
     
     def search_vector_db_collection(self, project: Project, query: str, limit: int = 10):
         collection_name = self.create_collection_name(project_id=project.project_id)
@@ -92,14 +291,51 @@ class NLPController(BaseController):
             logger.exception(f"Error occurred during vector DB search: {e}")
             raise
 
-    def answer_rag_question(self, project: Project, question: str, limit: int = 5):
+    async def hydrate_search_results(self, results: List[RetrievedDocument], chunk_model,
+                                     asset_model=None) -> List[RetrievedDocument]:
+        """
+        Fills in the text of results whose vector payload is slim, with one batched lookup
+        through `chunk_model`. Results whose chunk no longer exists are dropped. With
+        `asset_model`, results also get their chunk's metadata merged over the document
+        metadata of its asset.
+        """
+        if not results:
+            return results
+
+        chunk_ids = {doc.record_id: self.get_chunk_id(doc.record_id) for doc in results}
+        missing = [doc for doc in results if not doc.text]
+        if missing:
+            texts = await chunk_model.get_chunk_texts(
+                [chunk_ids[doc.record_id] for doc in missing if chunk_ids[doc.record_id]]
+            )
+            for doc in missing:
+                doc.text = texts.get(chunk_ids[doc.record_id], "")
+            logger.info(f"Hydrated {len(missing)} search results from the chunks collection")
+
+        if asset_model is not None:
+            chunks = await chunk_model.get_chunks_by_ids(
+                [chunk_id for chunk_id in chunk_ids.values() if chunk_id],
+                projection=["chunk_metadata", "chunk_asset_id"]
+            )
+            chunks = await asset_model.hydrate_chunk_metadata(chunks)
+            metadata = {chunk.id: chunk.chunk_metadata for chunk in chunks}
+            for doc in results:
+                doc.metadata = metadata.get(chunk_ids[doc.record_id])
+
+        return [doc for doc in results if doc.text]
+
+    def answer_rag_question(self, project: Project, question: str, limit: int = 5,
+                            search_mode: str = SearchModeEnum.DENSE.value,
+                            search_results: Optional[List[RetrievedDocument]] = None):
         logger.info(f"[RAG] Answering question for project: {project.project_id} | Q: {question}")
 
-        search_results = self.search_vector_db_collection(
-            project=project,
-            query=question,
-            limit=limit
-        )
+        if search_results is None:
+            search_results = self.search_collection(
+                project=project,
+                query=question,
+                limit=limit,
+                search_mode=search_mode
+            )
 
         if not search_results:
             logger.warning("[RAG] No search results found for the given question.")
@@ -158,6 +394,7 @@ class NLPController(BaseController):
             "question": question,
             "answer": answer,
             "context": context,
+            "sources": [{"record_id": doc.record_id, "metadata": doc.metadata} for doc in search_results],
             "full_prompt": full_prompt,
             "chat_history": chat_history
         }
@@ -1,5 +1,7 @@
 import os
+import asyncio
 import logging
+import uuid
 
 # Configure module-level logger
 logger = logging.getLogger(__name__)
@@ -14,11 +16,16 @@ if not logger.handlers:
 
 from .BaseController import BaseController
 from .ProjectController import ProjectController
-from langchain_community.document_loaders import (
-    TextLoader, PyMuPDFLoader, Docx2txtLoader
+from concurrent.futures import Executor
+from typing import AsyncIterator, List, Optional, Tuple
+from helper.document_workers import (
+    LOADER_REGISTRY, load_and_split_file, load_and_split_pdf_page_range, get_pdf_page_count,
+    count_file_pages_cached, load_and_split_file_page_range,
+    hash_file, get_extraction_cache_key, merge_cache_parts, get_cache_part_path, evict_extraction_cache,
+    EXTRACTION_CACHE_VERSION, EXTRACTION_CACHE_SUFFIX
 )
 from models import ProcessingEnums
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from helper.process_pool import run_in_executor
 
 class ProcessController(BaseController):
     def __init__(self, project_id: str):
@@ -28,10 +35,12 @@ class ProcessController(BaseController):
         super().__init__()
         self.project_id = project_id
         self.project_path = ProjectController().get_project_path(project_id=project_id)
-        self.loader_registry = {
-            ProcessingEnums.TXT.value: TextLoader,
-            ProcessingEnums.PDF.value: PyMuPDFLoader,
-            ProcessingEnums.DOCX.value: Docx2txtLoader,
+        self.loader_registry = LOADER_REGISTRY
+        self.extraction_cache_dir = self.base_path / "assets" / "cache" / "extracted"
+        self.extraction_cache_dir.mkdir(parents=True, exist_ok=True)
+        self.splitter_options = {
+            "length_unit": self.app_settings.CHUNK_LENGTH_UNIT,
+            "token_encoding": self.app_settings.CHUNK_TOKEN_ENCODING,
         }
 
     def get_file_extension(self, file_id: str) -> str:
@@ -40,9 +49,9 @@ class ProcessController(BaseController):
         """
         return os.path.splitext(file_id)[-1].lower()
 
-    def get_file_loader(self, file_id: str):
+    def get_file_path(self, file_id: str) -> str:
         """
-        Returns the appropriate LangChain document loader for the given file.
+        Resolves a file ID to its path and checks that it can be loaded.
         Raises FileNotFoundError or ValueError as appropriate.
         """
         file_extension = self.get_file_extension(file_id)
@@ -61,59 +70,217 @@ class ProcessController(BaseController):
                 f"Supported types are: {supported}"
             )
 
-        logger.info(f"Using loader {loader_cls.__name__} for file: {file_path}")
-        return loader_cls(file_path)
+        return file_path
 
-    def get_file_content(self, file_id: str):
+    def get_pdf_page_ranges(self, page_count: int) -> List[Tuple[int, int]]:
         """
-        Loads and returns the content of the specified file using the appropriate loader.
+        Splits a PDF into [start, end) page ranges for parallel parsing. PDFs at or
+        below PDF_SHARD_PAGE_THRESHOLD pages are kept as a single range.
         """
-        try:
-            loader = self.get_file_loader(file_id=file_id)
-            documents = loader.load()
-            logger.info(f"Successfully loaded {len(documents)} documents from {file_id}")
-            return documents
-        except (FileNotFoundError, ValueError) as e:
-            logger.error(f"Error loading file {file_id}: {e}")
-            raise
+        if page_count <= self.app_settings.PDF_SHARD_PAGE_THRESHOLD:
+            return [(0, page_count)]
+
+        shard_size = max(1, self.app_settings.PDF_SHARD_PAGE_SIZE)
+        return [(start, min(start + shard_size, page_count)) for start in range(0, page_count, shard_size)]
+
+    def get_chunking_params(self, chunk_size: int, overlap_size: int) -> dict:
+        """
+        Everything that determines a file's chunks besides its content; a change
+        to any of these means the file has to be processed again.
+        """
+        return {
+            "chunk_size": chunk_size,
+            "overlap_size": overlap_size,
+            **self.splitter_options,
+            "extraction_version": EXTRACTION_CACHE_VERSION,
+        }
 
-    def process_file_content(self, file_content: list, file_id: str, chunk_size: int = 1000, overlap_size: int = 200):
+    async def get_file_content_hash(self, file_id: str, known_hash: Optional[str] = None,
+                                    known_mtime: Optional[float] = None,
+                                    blob_hash: Optional[str] = None) -> Tuple[str, float]:
         """
-        Processes the content of the specified file and returns the text split into chunks.
+        Returns the file's (content hash, mtime). A previously recorded hash is
+        trusted while the file's mtime is unchanged, so unchanged files are not re-read;
+        files stored as blobs are named by their hash and never need hashing again.
+        """
+        file_path = self.get_file_path(file_id=file_id)
+        mtime = os.stat(file_path).st_mtime
+        if blob_hash:
+            return blob_hash, mtime
+        if known_hash and known_mtime == mtime:
+            return known_hash, mtime
 
-        Args:
-            file_content (list): List of Document-like objects with `page_content` and `metadata` attributes.
-            file_id (str): Identifier for logging/debugging purposes.
-            chunk_size (int): Max characters per chunk.
-            overlap_size (int): Overlap between consecutive chunks.
+        content_hash = await run_in_executor(None, hash_file, file_path)
+        return content_hash, mtime
 
-        Returns:
-            list: List of chunked Document objects.
+    async def get_extraction_cache_path(self, file_path: str, content_hash: Optional[str] = None) -> Optional[str]:
+        """
+        Returns where the extracted pages of this file are (or will be) cached,
+        keyed by content hash and loader version. None when caching is disabled.
         """
+        if not self.app_settings.EXTRACTION_CACHE_ENABLED:
+            return None
+
+        if content_hash is None:
+            content_hash = await run_in_executor(None, hash_file, file_path)
+        cache_key = get_extraction_cache_key(file_path, content_hash)
+        return str(self.extraction_cache_dir / f"{cache_key}{EXTRACTION_CACHE_SUFFIX}")
+
+    def use_cached_extraction(self, cache_path: Optional[str]) -> bool:
+        """
+        True when the extraction is cached. A hit refreshes the entry's mtime, which
+        eviction reads as its last use.
+        """
+        if cache_path is None:
+            return False
         try:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=chunk_size,
-                chunk_overlap=overlap_size,
-                length_function=len
+            os.utime(cache_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def evict_extraction_cache(self):
+        """
+        Applies EXTRACTION_CACHE_MAX_SIZE and EXTRACTION_CACHE_MAX_AGE_DAYS; runs after each new cache entry.
+        """
+        removed = await run_in_executor(
+            None, evict_extraction_cache, str(self.extraction_cache_dir),
+            max_bytes=self.app_settings.EXTRACTION_CACHE_MAX_SIZE * 1024 * 1024,
+            max_age_seconds=self.app_settings.EXTRACTION_CACHE_MAX_AGE_DAYS * 24 * 3600
+        )
+        if removed:
+            logger.info(f"Evicted {removed} files from the extraction cache")
+
+    def get_cache_part_paths(self, cache_path: Optional[str], count: int) -> List[Optional[str]]:
+        """
+        Part file names for one sharded run, unique to it: identical content parsed
+        concurrently (deduplicated blobs, parallel tasks) shares `cache_path`.
+        """
+        if cache_path is None:
+            return [None] * count
+        run_id = uuid.uuid4().hex
+        return [get_cache_part_path(cache_path, run_id, i) for i in range(count)]
+
+    def discard_cache_parts(self, part_paths: List[Optional[str]]):
+        for part_path in part_paths:
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+
+    async def get_file_chunks(self, file_id: str, chunk_size: int = 1000, overlap_size: int = 200,
+                              executor: Optional[Executor] = None,
+                              content_hash: Optional[str] = None) -> List[Tuple[str, dict]]:
+        """
+        Parses and splits the file in `executor` (a process pool in the API) so the
+        event loop stays free. Returns the chunks as (text, metadata) tuples.
+        Files already in the extraction cache are only re-split, never re-parsed;
+        pass `content_hash` when it is already known to skip re-hashing the file.
+        """
+        file_path = self.get_file_path(file_id=file_id)
+        cache_path = await self.get_extraction_cache_path(file_path, content_hash=content_hash)
+        is_cached = self.use_cached_extraction(cache_path)
+
+        page_ranges = []
+        if not is_cached and self.get_file_extension(file_id) == ProcessingEnums.PDF.value:
+            page_count = await run_in_executor(executor, get_pdf_page_count, file_path)
+            page_ranges = self.get_pdf_page_ranges(page_count=page_count)
+
+        if len(page_ranges) > 1:
+            logger.info(f"Parsing {file_id} in {len(page_ranges)} page-range shards")
+            part_paths = self.get_cache_part_paths(cache_path, count=len(page_ranges))
+            shards = await asyncio.gather(*(
+                run_in_executor(
+                    executor, load_and_split_pdf_page_range, file_path, start_page, end_page,
+                    chunk_size=chunk_size, overlap_size=overlap_size, cache_part_path=part_path,
+                    **self.splitter_options
+                )
+                for (start_page, end_page), part_path in zip(page_ranges, part_paths)
+            ), return_exceptions=True)
+
+            errors = [shard for shard in shards if isinstance(shard, Exception)]
+            if errors:
+                self.discard_cache_parts(part_paths)
+                raise errors[0]
+
+            if cache_path:
+                await run_in_executor(None, merge_cache_parts, cache_path, part_paths)
+            chunks = [chunk for shard in shards for chunk in shard]
+        else:
+            if is_cached:
+                logger.info(f"Using cached extraction for {file_id}")
+            chunks = await run_in_executor(
+                executor, load_and_split_file, file_path,
+                chunk_size=chunk_size, overlap_size=overlap_size, cache_path=cache_path,
+                **self.splitter_options
             )
+        if cache_path and not is_cached:
+            await self.evict_extraction_cache()
+        logger.info(f"Created {len(chunks)} chunks from {file_id} with chunk size {chunk_size} and overlap {overlap_size}")
+        return chunks
 
-            valid_docs = [(doc.page_content, doc.metadata) for doc in file_content 
-                          if hasattr(doc, 'page_content') and hasattr(doc, 'metadata')]
+    async def stream_file_chunks(self, file_id: str, chunk_size: int = 1000, overlap_size: int = 200,
+                                 batch_size: int = 500,
+                                 executor: Optional[Executor] = None,
+                                 content_hash: Optional[str] = None) -> AsyncIterator[List[Tuple[str, dict]]]:
+        """
+        Yields the file's chunks in batches of up to `batch_size` while it is still
+        being parsed, so only one batch (plus one page range) is held in memory.
+        All parsing and splitting runs in `executor`: uncached PDFs shard by shard,
+        other files are parsed into the extraction cache once and then split range by range,
+        each range read from the cache member holding it.
+        """
+        file_path = self.get_file_path(file_id=file_id)
+        cache_path = await self.get_extraction_cache_path(file_path, content_hash=content_hash)
+        is_cached = self.use_cached_extraction(cache_path)
+        buffer = []
 
-            if not valid_docs:
-                logger.warning(f"No valid documents found in file {file_id}. Returning empty list.")
-                return []
+        if not is_cached and self.get_file_extension(file_id) == ProcessingEnums.PDF.value:
+            page_count = await run_in_executor(executor, get_pdf_page_count, file_path)
+            page_starts = range(0, page_count, max(1, self.app_settings.PDF_SHARD_PAGE_SIZE))
+            part_paths = self.get_cache_part_paths(cache_path, count=len(page_starts))
+            completed = False
 
-            file_content_text, file_content_metadata = zip(*valid_docs) if valid_docs else ([], [])
+            try:
+                for start_page, part_path in zip(page_starts, part_paths):
+                    buffer.extend(await run_in_executor(
+                        executor, load_and_split_pdf_page_range, file_path,
+                        start_page, min(start_page + page_starts.step, page_count),
+                        chunk_size=chunk_size, overlap_size=overlap_size, cache_part_path=part_path,
+                        **self.splitter_options
+                    ))
+                    while len(buffer) >= batch_size:
+                        yield buffer[:batch_size]
+                        buffer = buffer[batch_size:]
 
-            if not file_content_text:
-                logger.warning(f"No text content found in file {file_id}. Returning empty list.")
-                return []
+                if cache_path:
+                    await run_in_executor(None, merge_cache_parts, cache_path, part_paths)
+                completed = True
+            finally:
+                if not completed:
+                    self.discard_cache_parts(part_paths)
+        elif cache_path is None:
+            # Without the cache there is nowhere to read page ranges from: split the file in one go
+            chunks = await run_in_executor(
+                executor, load_and_split_file, file_path,
+                chunk_size=chunk_size, overlap_size=overlap_size, **self.splitter_options
+            )
+            for start in range(0, len(chunks), batch_size):
+                yield chunks[start:start + batch_size]
+        else:
+            range_size = max(1, self.app_settings.PDF_SHARD_PAGE_SIZE)
+            page_count = await run_in_executor(executor, count_file_pages_cached, file_path, cache_path, range_size)
+            for start_page in range(0, page_count, range_size):
+                buffer.extend(await run_in_executor(
+                    executor, load_and_split_file_page_range, file_path,
+                    start_page, min(start_page + range_size, page_count),
+                    chunk_size=chunk_size, overlap_size=overlap_size, cache_path=cache_path,
+                    **self.splitter_options
+                ))
+                while len(buffer) >= batch_size:
+                    yield buffer[:batch_size]
+                    buffer = buffer[batch_size:]
 
-            chunks = text_splitter.create_documents(file_content_text, metadatas=file_content_metadata)
-            logger.info(f"Created {len(chunks)} chunks from {file_id} with chunk size {chunk_size} and overlap {overlap_size}")
-            return chunks
+        if buffer:
+            yield buffer
 
-        except Exception as e:
-            logger.error(f"Error processing file {file_id}: {e}")
-            raise
+        if cache_path and not is_cached:
+            await self.evict_extraction_cache()
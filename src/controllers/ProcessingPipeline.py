@@ -0,0 +1,580 @@
+from .BaseController import BaseController
+from .ProcessController import ProcessController
+from .NLPController import NLPController
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from models.db_schemes import Asset, DataChunk, Project
+from helper.config import Settings
+from helper.document_workers import hash_chunk_text
+from helper.minhash import LSHIndex, compute_minhashes, get_lsh_bands
+from helper.process_pool import run_in_executor
+from bson import ObjectId
+from collections import deque
+from concurrent.futures import Executor
+from pymongo import WriteConcern
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Page-level metadata keys; they always stay on the chunk
+CHUNK_METADATA_KEYS = ("page",)
+
+
+def get_bulk_write_concern(app_settings: Settings) -> Optional[WriteConcern]:
+    """
+    Write concern for bulk chunk inserts; None keeps the client's default.
+    """
+    w = app_settings.CHUNK_INSERT_WRITE_CONCERN
+    journal = app_settings.CHUNK_INSERT_JOURNAL
+    if w is None and journal is None:
+        return None
+    if isinstance(w, str) and w.isdigit():
+        w = int(w)
+    return WriteConcern(w=w, j=journal)
+
+
+def get_document_metadata(metadata: dict) -> dict:
+    """
+    Document-level part of a chunk's metadata, stored once on the asset.
+    """
+    return {key: value for key, value in metadata.items() if key not in CHUNK_METADATA_KEYS}
+
+
+def get_chunk_own_metadata(metadata: dict, document_metadata: dict) -> dict:
+    """
+    What the chunk keeps: the fields whose value differs from the asset's document metadata.
+    """
+    return {
+        key: value for key, value in metadata.items()
+        if key not in document_metadata or document_metadata[key] != value
+    }
+
+
+def get_copied_chunk_metadata(metadata: dict, file_path: str) -> dict:
+    """
+    Metadata of a chunk copied from another asset, with its path fields pointed at this file.
+    """
+    return {**metadata, **{key: file_path for key in ("source", "file_path") if key in metadata}}
+
+
+class ProcessingPipeline(BaseController):
+    """
+    Chunks a project's assets into its chunks collection; one instance per run, used by the
+    process endpoint, process and ingest jobs and process tasks.
+
+    Unchanged files are skipped. Chunks whose normalized text is unchanged keep their id (and
+    vector) across re-processing and versions, identical blobs copy the chunks of a processed
+    copy instead of parsing again, and near-duplicates point at a canonical chunk (MinHash/LSH).
+    Once the run is over, chunks it replaced leave the indexes and the payloads of the
+    chunks it moved or re-attributed are refreshed.
+
+    `on_progress` is awaited as files finish, with the counter increments and the last asset
+    id before which every file is done (assets must come in _id order for that to be a
+    resumable checkpoint). `on_chunks_unindexed` is awaited with the canonical chunks that
+    need indexing as they are written (each inserted batch, then the reused or promoted
+    chunks of a file that are not indexed yet), e.g. to feed an indexer.
+    """
+
+    def __init__(self, project: Project, project_model: ProjectModel, asset_model: AssetModel,
+                 chunk_model: ChunkModel, nlp_controller: NLPController,
+                 chunk_size: int, overlap_size: int, do_reset: int = 0, do_stream: int = 0,
+                 executor: Optional[Executor] = None,
+                 on_progress: Optional[Callable[[dict, Optional[ObjectId]], Awaitable]] = None,
+                 on_chunks_unindexed: Optional[Callable[[List[DataChunk]], Awaitable]] = None):
+        super().__init__()
+        self.project = project
+        self.project_model = project_model
+        self.asset_model = asset_model
+        self.chunk_model = chunk_model
+        self.nlp_controller = nlp_controller
+        self.chunk_size = chunk_size
+        self.overlap_size = overlap_size
+        self.do_reset = do_reset
+        self.do_stream = do_stream
+        self.executor = executor
+        self.on_progress = on_progress
+        self.on_chunks_unindexed = on_chunks_unindexed
+
+        self.process_controller = ProcessController(project_id=project.project_id)
+        self.chunking_params = self.process_controller.get_chunking_params(
+            chunk_size=chunk_size, overlap_size=overlap_size
+        )
+        self.write_concern = get_bulk_write_concern(self.app_settings)
+        self.dedup_index = LSHIndex()
+        self.donor_collections: Dict[ObjectId, Optional[str]] = {}
+
+        self.counters = {
+            "inserted_chunks": 0,
+            "duplicate_chunks": 0,
+            "reused_chunks": 0,
+            "failed_chunks": 0,
+            "processed_files": 0,
+            "skipped_files": 0,
+            "failed_files": 0,
+        }
+        self.empty_files: List[str] = []
+        # Replaced canonical chunks, removed from the indexes at the end of the run
+        self.stale_chunk_ids: List[ObjectId] = []
+        # Indexed canonical chunks whose payload has to be refreshed at the end of the run
+        self.changed_canonicals: Dict[ObjectId, DataChunk] = {}
+
+        # Files finish out of order; the checkpoint is the last asset before which all are done
+        self.started_ids = deque()
+        self.completed_ids = set()
+        self.checkpoint_id: Optional[ObjectId] = None
+
+    async def run(self, assets: AsyncIterator[Asset]) -> dict:
+        """
+        Processes `assets`, at most PROCESS_MAX_CONCURRENT_FILES at a time, and returns the
+        run's counters plus the names of the files that produced no chunks.
+        """
+        pending = set()
+        try:
+            try:
+                async for asset in assets:
+                    if len(pending) >= self.app_settings.PROCESS_MAX_CONCURRENT_FILES:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        await self.record_results(done)
+                    self.started_ids.append(asset.id)
+                    pending.add(asyncio.create_task(self.run_process_file(asset)))
+            finally:
+                # Files already started are finished, even when the run is cancelled
+                if pending:
+                    done, _ = await asyncio.wait(pending)
+                    await self.record_results(done)
+        finally:
+            # Runs for cancelled runs too: chunks deleted so far must leave the indexes
+            self.update_indexes()
+
+        return {**self.counters, "empty_files": self.empty_files}
+
+    async def run_process_file(self, asset: Asset):
+        try:
+            return asset, await self.process_file(asset)
+        except Exception as e:
+            return asset, e
+
+    async def record_results(self, tasks):
+        increments = {"files": 0, "chunks": 0, "errors": 0}
+        for task in tasks:
+            asset, result = task.result()
+            self.completed_ids.add(asset.id)
+            if isinstance(result, Exception):
+                logger.error(f"Error occurred while processing file {asset.asset_name}: {result}", exc_info=result)
+                self.counters["failed_files"] += 1
+                increments["errors"] += 1
+                continue
+            increments["files"] += 1
+            if result is None:
+                self.counters["skipped_files"] += 1
+            elif any(result):
+                inserted, reused, duplicates, failed = result
+                self.counters["inserted_chunks"] += inserted
+                self.counters["reused_chunks"] += reused
+                self.counters["duplicate_chunks"] += duplicates
+                self.counters["failed_chunks"] += failed
+                self.counters["processed_files"] += 1
+                increments["chunks"] += inserted
+                increments["errors"] += failed
+
+        while self.started_ids and self.started_ids[0] in self.completed_ids:
+            self.checkpoint_id = self.started_ids.popleft()
+            self.completed_ids.discard(self.checkpoint_id)
+        if self.on_progress is not None:
+            await self.on_progress(increments, self.checkpoint_id)
+
+    def update_indexes(self):
+        if not (self.stale_chunk_ids or self.changed_canonicals):
+            return
+        try:
+            # Replaced chunks must not keep answering searches from the vector/lexical indexes
+            self.nlp_controller.delete_chunks_from_indexes(project=self.project, chunk_ids=self.stale_chunk_ids)
+            self.nlp_controller.update_chunk_payloads(
+                project=self.project, chunks=list(self.changed_canonicals.values())
+            )
+        except Exception as e:
+            logger.error(f"Failed to update indexes after processing project {self.project.project_id}: {e}")
+
+    async def get_donor_collection_name(self, donor: Asset) -> Optional[str]:
+        if donor.asset_project_id not in self.donor_collections:
+            donor_project = await self.project_model.get_project_by_id(project_object_id=donor.asset_project_id)
+            self.donor_collections[donor.asset_project_id] = self.nlp_controller.create_collection_name(
+                project_id=donor_project.project_id
+            ) if donor_project else None
+        return self.donor_collections[donor.asset_project_id]
+
+    async def iter_chunk_batches(self, file_id: str, content_hash: str, donor: Optional[Asset] = None):
+        """
+        Yields batches of (text, metadata, source chunk). With a `donor` asset (same blob,
+        same chunking params) its chunks are copied instead of parsing the file again,
+        and each copy carries the donor chunk it came from.
+        """
+        batch_size = self.app_settings.PROCESS_STREAM_BATCH_SIZE
+        if donor is not None:
+            file_path = self.process_controller.get_file_path(file_id=file_id)
+            async for donor_chunks in self.chunk_model.iter_asset_chunks(asset_id=donor.id, batch_size=batch_size):
+                yield [
+                    (
+                        chunk.chunk_text,
+                        get_copied_chunk_metadata(
+                            {**(donor.asset_document_metadata or {}), **chunk.chunk_metadata}, file_path
+                        ),
+                        chunk
+                    )
+                    for chunk in donor_chunks
+                ]
+        elif self.do_stream == 1:
+            async for batch in self.process_controller.stream_file_chunks(
+                file_id=file_id,
+                chunk_size=self.chunk_size,
+                overlap_size=self.overlap_size,
+                batch_size=batch_size,
+                executor=self.executor,
+                content_hash=content_hash
+            ):
+                yield [(chunk_text, chunk_metadata, None) for chunk_text, chunk_metadata in batch]
+        else:
+            batch = await self.process_controller.get_file_chunks(
+                file_id=file_id,
+                chunk_size=self.chunk_size,
+                overlap_size=self.overlap_size,
+                executor=self.executor,
+                content_hash=content_hash
+            )
+            yield [(chunk_text, chunk_metadata, None) for chunk_text, chunk_metadata in batch]
+
+    async def get_version_chain(self, asset: Asset) -> list:
+        """
+        The asset id followed by the ids of every earlier version it replaces.
+        """
+        chain = [asset.id]
+        previous_id = asset.asset_previous_version_id
+        while previous_id is not None and previous_id not in chain:
+            chain.append(previous_id)
+            previous_asset = await self.asset_model.get_asset_by_id(asset_id=previous_id)
+            previous_id = previous_asset.asset_previous_version_id if previous_asset else None
+        return chain
+
+    async def mark_duplicates(self, records: List[DataChunk], exclude_ids: Set[ObjectId]) -> Set[ObjectId]:
+        """
+        MinHashes the new chunks and points each near-duplicate of a canonical chunk
+        (already in the project, or earlier in this run) at it; the rest become canonical.
+        Returns the ids of the canonical chunks that gained duplicates.
+        New canonicals only join the run's index in commit_canonicals, once inserted.
+        """
+        app_settings = self.app_settings
+        # Chunks copied from another asset already carry their signature and bands
+        unsigned = [record for record in records if record.chunk_minhash is None or not record.chunk_lsh_bands]
+        if unsigned:
+            unsigned_signatures = await run_in_executor(
+                self.executor, compute_minhashes, [record.chunk_text for record in unsigned],
+                num_perm=app_settings.CHUNK_DEDUP_NUM_PERM,
+                shingle_size=app_settings.CHUNK_DEDUP_SHINGLE_SIZE
+            )
+            for record, signature in zip(unsigned, unsigned_signatures):
+                record.chunk_minhash = signature
+                record.chunk_lsh_bands = get_lsh_bands(signature, bands=app_settings.CHUNK_DEDUP_BANDS)
+        signatures = [record.chunk_minhash for record in records]
+        records_bands = [record.chunk_lsh_bands for record in records]
+
+        candidates = await self.chunk_model.get_canonical_candidates(
+            project_id=self.project.id,
+            lsh_bands=sorted({band for bands in records_bands for band in bands})
+        )
+        for chunk_id, signature, bands in candidates:
+            if chunk_id not in self.dedup_index.signatures:
+                self.dedup_index.add(chunk_id, signature, bands)
+
+        # Canonicals of this batch, matched by the batch's later chunks
+        batch_index = LSHIndex()
+        matched_ids = set()
+        for record, signature, bands in zip(records, signatures, records_bands):
+            canonical_id = self.dedup_index.query(
+                signature, bands, threshold=app_settings.CHUNK_DEDUP_THRESHOLD, exclude=exclude_ids
+            )
+            if canonical_id is None:
+                canonical_id = batch_index.query(signature, bands, threshold=app_settings.CHUNK_DEDUP_THRESHOLD)
+            if canonical_id is None:
+                record.id = ObjectId()
+                record.chunk_source_asset_ids = [record.chunk_asset_id]
+                batch_index.add(record.id, signature, bands)
+            else:
+                record.chunk_canonical_id = canonical_id
+                matched_ids.add(canonical_id)
+        return matched_ids
+
+    async def commit_canonicals(self, records: List[DataChunk],
+                                insert_failed: bool) -> Tuple[Set[ObjectId], Set[ObjectId]]:
+        """
+        Adds the batch's inserted canonical chunks to the run's index. After a failed insert,
+        the duplicates of canonicals that didn't make it are promoted in their place.
+        Returns the (missing, promoted) canonical ids.
+        """
+        canonicals = {record.id: record for record in records if record.chunk_canonical_id is None}
+        missing_ids = set()
+        promoted_ids = set()
+        if insert_failed and canonicals:
+            missing_ids = set(canonicals) - await self.chunk_model.get_existing_chunk_ids(chunk_ids=list(canonicals))
+        if missing_ids:
+            logger.warning(f"{len(missing_ids)} canonical chunks were not inserted; promoting their duplicates")
+            promoted_ids = set(await self.chunk_model.promote_duplicates(canonical_ids=list(missing_ids)))
+            canonicals.update(
+                (record.id, record) for record in records if record.id in promoted_ids
+            )
+
+        for chunk_id, record in canonicals.items():
+            if chunk_id not in missing_ids:
+                self.dedup_index.add(chunk_id, record.chunk_minhash, record.chunk_lsh_bands)
+        return missing_ids, promoted_ids
+
+    async def get_reusable_chunks(self, version_chain: list) -> Tuple[Dict[ObjectId, Optional[ObjectId]], dict]:
+        """
+        Existing chunks of the file and of the versions it replaces: their canonical ids
+        (None for canonical chunks) and, by normalized text hash, the ids a new chunk
+        with the same text takes over (same id, so same vector).
+        """
+        old_canonical_ids = {}
+        reusable_chunks = {}
+        for source_asset_id in version_chain:
+            for chunk_id, text_hash, canonical_id in await self.chunk_model.get_asset_chunk_hashes(
+                    asset_id=source_asset_id):
+                old_canonical_ids[chunk_id] = canonical_id
+                if text_hash:
+                    reusable_chunks.setdefault(text_hash, deque()).append(chunk_id)
+        return old_canonical_ids, reusable_chunks
+
+    async def insert_new_records(self, new_records: List[DataChunk]) -> Tuple[int, list, Set[ObjectId], Set[ObjectId]]:
+        """
+        Inserts a batch of new chunks and hands its canonical chunks to `on_chunks_unindexed`.
+        Returns (inserted count, failed insert batches, missing canonical ids, promoted ids).
+        """
+        app_settings = self.app_settings
+        for record in new_records:
+            if record.id is None:
+                record.id = ObjectId()
+        try:
+            inserted, batch_failures = await self.chunk_model.insert_chunk_documents(
+                documents=[record.to_document() for record in new_records],
+                batch_size=app_settings.CHUNK_INSERT_BATCH_SIZE,
+                max_in_flight=app_settings.CHUNK_INSERT_MAX_IN_FLIGHT,
+                write_concern=self.write_concern
+            )
+        except Exception:
+            if app_settings.CHUNK_DEDUP_ENABLED:
+                await self.commit_canonicals(new_records, insert_failed=True)
+            raise
+
+        missing_ids = set()
+        promoted_ids = set()
+        if app_settings.CHUNK_DEDUP_ENABLED:
+            missing_ids, promoted_ids = await self.commit_canonicals(new_records, insert_failed=bool(batch_failures))
+        if self.on_chunks_unindexed is not None:
+            canonicals = [
+                record for record in new_records
+                if record.chunk_canonical_id is None and record.id not in missing_ids
+            ]
+            if batch_failures and not app_settings.CHUNK_DEDUP_ENABLED:
+                existing_ids = await self.chunk_model.get_existing_chunk_ids(
+                    chunk_ids=[record.id for record in canonicals]
+                )
+                canonicals = [record for record in canonicals if record.id in existing_ids]
+            if canonicals:
+                await self.on_chunks_unindexed(canonicals)
+        return inserted, batch_failures, missing_ids, promoted_ids
+
+    async def remove_replaced_chunks(self, file_id: str, removed_ids: List[ObjectId],
+                                     old_canonical_ids: Dict[ObjectId, Optional[ObjectId]],
+                                     affected_canonical_ids: Set[ObjectId],
+                                     promoted_canonical_ids: Set[ObjectId]):
+        """
+        Deletes the old chunks no new chunk took over. Duplicates go first, so that
+        promotion only picks duplicates that are staying.
+        """
+        removed_duplicate_ids = [chunk_id for chunk_id in removed_ids if old_canonical_ids[chunk_id]]
+        removed_canonical_ids = [chunk_id for chunk_id in removed_ids if not old_canonical_ids[chunk_id]]
+        affected_canonical_ids.update(old_canonical_ids[chunk_id] for chunk_id in removed_duplicate_ids)
+
+        deleted_count = await self.chunk_model.delete_chunks_by_ids(chunk_ids=removed_duplicate_ids)
+        promoted_ids = await self.chunk_model.promote_duplicates(canonical_ids=removed_canonical_ids)
+        affected_canonical_ids.update(promoted_ids)
+        promoted_canonical_ids.update(promoted_ids)
+        deleted_count += await self.chunk_model.delete_chunks_by_ids(chunk_ids=removed_canonical_ids)
+        affected_canonical_ids.difference_update(removed_canonical_ids)
+
+        self.stale_chunk_ids.extend(removed_canonical_ids)
+        logger.info(f"Deleted {deleted_count} old chunks of file: {file_id}")
+
+    async def refresh_canonicals(self, affected_canonical_ids: Set[ObjectId], moved_canonical_ids: Set[ObjectId],
+                                 promoted_canonical_ids: Set[ObjectId]):
+        """
+        Recomputes the source assets of the affected canonical chunks. Indexed ones get their
+        payload refreshed at the end of the run; the others go to `on_chunks_unindexed`.
+        """
+        unindexed_chunks = []
+        for chunk in await self.chunk_model.refresh_source_asset_ids(canonical_ids=list(affected_canonical_ids)):
+            self.changed_canonicals[chunk.id] = chunk
+            if chunk.chunk_indexed_at is None:
+                # Possibly queued with its earlier sources: indexed again, the fresh payload wins
+                unindexed_chunks.append(chunk)
+        unchecked_ids = (moved_canonical_ids | promoted_canonical_ids) - set(self.changed_canonicals)
+        if unchecked_ids:
+            for chunk in await self.chunk_model.get_canonical_chunks_by_ids(chunk_ids=list(unchecked_ids)):
+                if chunk.chunk_indexed_at is None:
+                    unindexed_chunks.append(chunk)
+                else:
+                    self.changed_canonicals[chunk.id] = chunk
+        if unindexed_chunks and self.on_chunks_unindexed is not None:
+            await self.on_chunks_unindexed(unindexed_chunks)
+
+    async def process_file(self, asset: Asset) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Chunks one asset. Returns None when it is skipped, else its
+        (inserted, reused, duplicates, failed) chunk counts.
+        """
+        app_settings = self.app_settings
+        file_id = asset.asset_name
+        if asset.asset_superseded_by_id is not None:
+            logger.info(f"Skipping superseded file: {file_id}")
+            return None
+
+        content_hash, content_mtime = await self.process_controller.get_file_content_hash(
+            file_id=file_id,
+            known_hash=asset.asset_content_hash,
+            known_mtime=asset.asset_content_mtime,
+            blob_hash=asset.asset_blob_hash
+        )
+
+        # Unchanged file, same chunking: the stored chunks are still valid
+        if (self.do_reset != 1 and asset.asset_chunk_count
+                and asset.asset_content_hash == content_hash
+                and asset.asset_chunking_params == self.chunking_params):
+            logger.info(f"Skipping unchanged file: {file_id}")
+            return None
+
+        logger.info(f"Processing file: {file_id}")
+        await self.asset_model.clear_asset_processing_state(asset_id=asset.id)
+
+        version_chain = await self.get_version_chain(asset)
+        old_canonical_ids, reusable_chunks = await self.get_reusable_chunks(version_chain)
+
+        # The same blob already chunked with the same params (another upload, any project)
+        donor = None
+        donor_collection_name = None
+        if self.do_reset != 1:
+            donor = await self.asset_model.get_processed_asset_by_content(
+                content_hash=content_hash, chunking_params=self.chunking_params, exclude_asset_id=asset.id
+            )
+            if donor is not None:
+                logger.info(f"Copying chunks of identical asset {donor.id} for file: {file_id}")
+                donor_collection_name = await self.get_donor_collection_name(donor)
+
+        chunk_order = 0
+        document_metadata = None
+        inserted = 0
+        duplicates = 0
+        failed_batches = []
+        reused_ids = set()
+        # Canonical chunks whose list of source assets may have changed
+        affected_canonical_ids = set()
+        # Reused canonical chunks: their asset, order and metadata changed, so their payload has to follow
+        moved_canonical_ids = set()
+        # Duplicates promoted to canonical: never indexed under their own id
+        promoted_canonical_ids = set()
+
+        # chunk_order keeps counting across batches (and pages) of the same file
+        async for file_chunks in self.iter_chunk_batches(file_id, content_hash, donor=donor):
+            new_records = []
+            reused_records = []
+            for chunk_text, chunk_metadata, source_chunk in file_chunks:
+                if document_metadata is None:
+                    # Document-level fields repeat on every page; they are kept once on the asset
+                    document_metadata = get_document_metadata(chunk_metadata)
+                    await self.asset_model.set_asset_document_metadata(
+                        asset_id=asset.id, document_metadata=document_metadata
+                    )
+                chunk_metadata = get_chunk_own_metadata(chunk_metadata, document_metadata)
+                chunk_order += 1
+                # The splitter and stored chunks are trusted, so records skip validation
+                record = DataChunk.model_construct(
+                    chunk_text=chunk_text,
+                    chunk_metadata=chunk_metadata,
+                    chunk_order=chunk_order,
+                    chunk_project_id=self.project.id,
+                    chunk_asset_id=asset.id,
+                    chunk_text_hash=hash_chunk_text(chunk_text)
+                )
+                if source_chunk is not None:
+                    record.chunk_minhash = source_chunk.chunk_minhash
+                    record.chunk_lsh_bands = source_chunk.chunk_lsh_bands
+                    if donor_collection_name:
+                        # Duplicates have no vector of their own; their canonical chunk's is the same
+                        record.chunk_vector_source = {
+                            "collection_name": donor_collection_name,
+                            "record_id": self.nlp_controller.get_record_id(
+                                source_chunk.chunk_canonical_id or source_chunk.id
+                            ),
+                        }
+                matches = reusable_chunks.get(record.chunk_text_hash)
+                if matches:
+                    record.id = matches.popleft()
+                    reused_ids.add(record.id)
+                    reused_records.append(record)
+                else:
+                    new_records.append(record)
+
+            if new_records and app_settings.CHUNK_DEDUP_ENABLED:
+                # Old chunks of this file are about to be replaced, so they can't serve as canonicals
+                affected_canonical_ids |= await self.mark_duplicates(new_records, exclude_ids=set(old_canonical_ids))
+                duplicates += sum(1 for record in new_records if record.chunk_canonical_id is not None)
+            if new_records:
+                batch_inserted, batch_failures, missing_ids, promoted_ids = await self.insert_new_records(new_records)
+                inserted += batch_inserted
+                failed_batches.extend(batch_failures)
+                affected_canonical_ids.difference_update(missing_ids)
+                affected_canonical_ids.update(promoted_ids)
+                promoted_canonical_ids.update(promoted_ids)
+                duplicates -= len(promoted_ids)
+            if reused_records:
+                await self.chunk_model.reassign_chunks(asset_id=asset.id, chunks=reused_records)
+                affected_canonical_ids.update(
+                    old_canonical_ids[record.id] or record.id for record in reused_records
+                )
+                moved_canonical_ids.update(
+                    record.id for record in reused_records if not old_canonical_ids[record.id]
+                )
+
+        removed_ids = [chunk_id for chunk_id in old_canonical_ids if chunk_id not in reused_ids]
+        if removed_ids:
+            await self.remove_replaced_chunks(
+                file_id, removed_ids, old_canonical_ids, affected_canonical_ids, promoted_canonical_ids
+            )
+        await self.refresh_canonicals(affected_canonical_ids, moved_canonical_ids, promoted_canonical_ids)
+
+        # Earlier versions have handed all their chunks over to this one
+        for previous_id in version_chain[1:]:
+            await self.asset_model.clear_asset_processing_state(asset_id=previous_id)
+
+        if not chunk_order:
+            logger.warning(f"No chunks generated for file: {file_id}")
+            self.empty_files.append(file_id)
+            return 0, 0, 0, 0
+
+        failed = sum(failure["failed"] for failure in failed_batches)
+        if failed:
+            # Left unprocessed, so the next run keeps the inserted chunks and retries the rest
+            logger.error(f"File {file_id} processed with {failed} chunks in "
+                         f"{len(failed_batches)} failed insert batches: {failed_batches}")
+            return inserted, len(reused_ids), duplicates, failed
+
+        await self.asset_model.set_asset_processing_state(
+            asset_id=asset.id,
+            content_hash=content_hash,
+            content_mtime=content_mtime,
+            chunking_params=self.chunking_params,
+            chunk_count=chunk_order
+        )
+        logger.info(f"File {file_id} processed: {inserted} chunks inserted ({duplicates} duplicates), {len(reused_ids)} reused.")
+        return inserted, len(reused_ids), duplicates, 0
@@ -0,0 +1,129 @@
+from .LeasedWorker import LeasedWorker
+from .JobRunner import JobCancelled, JobContext
+from models.TaskModel import TaskModel
+from models.db_schemes import Task
+from models.enums.TaskEnums import TaskStatusEnum
+from bson import ObjectId
+from typing import Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[Task], Awaitable[Optional[dict]]]
+
+
+class TaskWorker(LeasedWorker):
+    """
+    Bounded pool of TASK_MAX_CONCURRENT workers leasing the tasks stored by TaskModel.
+    Any number of processes (the API and worker.py instances, on any host) can run one:
+    leases are renewed every TASK_HEARTBEAT_SECONDS, and the tasks of a worker that dies
+    are leased again once TASK_LEASE_SECONDS have passed.
+    """
+
+    LOG_PREFIX = "[TASKS]"
+    WORKER_LABEL = "Worker"
+    ITEM_LABEL = "task"
+
+    def __init__(self, task_model: TaskModel, handlers: Dict[str, TaskHandler]):
+        super().__init__(handlers=handlers)
+        self.task_model = task_model
+
+    @property
+    def concurrency(self) -> int:
+        return self.app_settings.TASK_MAX_CONCURRENT
+
+    @property
+    def poll_seconds(self) -> float:
+        return self.app_settings.TASK_POLL_SECONDS
+
+    @property
+    def heartbeat_seconds(self) -> float:
+        return self.app_settings.TASK_HEARTBEAT_SECONDS
+
+    async def claim(self) -> Optional[Task]:
+        return await self.task_model.claim_task(
+            worker_id=self.worker_id,
+            lease_seconds=self.app_settings.TASK_LEASE_SECONDS,
+            max_attempts=self.app_settings.TASK_MAX_ATTEMPTS
+        )
+
+    async def renew(self, item_ids: List[ObjectId]) -> List[ObjectId]:
+        return await self.task_model.extend_leases(
+            task_ids=item_ids,
+            worker_id=self.worker_id,
+            lease_seconds=self.app_settings.TASK_LEASE_SECONDS
+        )
+
+    def get_item_type(self, task: Task) -> str:
+        return task.task_type
+
+    def describe(self, task: Task) -> str:
+        return f"{task.task_type} task {task.task_key} of job {task.task_job_id} (attempt {task.task_attempts})"
+
+    async def run_task(self, task: Task):
+        await self.run_item(task)
+
+    async def record_success(self, task: Task, result: Optional[dict]):
+        await self.task_model.complete_task(task_id=task.id, worker_id=self.worker_id, result=result)
+
+    async def record_failure(self, task: Task, error: str, retry: bool = True):
+        await self.task_model.fail_task(
+            task_id=task.id, worker_id=self.worker_id, error=error,
+            max_attempts=self.app_settings.TASK_MAX_ATTEMPTS if retry else 0
+        )
+
+    async def record_interruption(self, task: Task):
+        # The lease was lost (cancelled job, or taken over after an expiry): nothing to record
+        logger.warning(f"[TASKS] Dropped task {task.id}, no longer leased by {self.worker_id}")
+
+    async def release(self, task: Task):
+        await self.task_model.release_task(task_id=task.id, worker_id=self.worker_id)
+
+
+async def wait_for_job_tasks(task_model: TaskModel, context: JobContext,
+                             poll_seconds: float, max_attempts: int) -> Dict[str, dict]:
+    """
+    Coordinator side of a distributed job: until none of the job's tasks is queued or leased,
+    adds the counters of newly finished tasks to the job's progress (a failed task counts as
+    an error). Returns the per-status task counts. When the job is cancelled, its unfinished
+    tasks are cancelled with it.
+    """
+    job_id = context.job.id
+    # Kept in the checkpoint, so a resumed coordinator doesn't count finished tasks twice
+    reported = context.checkpoint.get("task_totals") or dict.fromkeys(TaskModel.RESULT_COUNTERS, 0)
+    try:
+        while True:
+            await task_model.fail_exhausted_tasks(job_id=job_id, max_attempts=max_attempts)
+            counts = await task_model.count_job_tasks(job_id=job_id)
+
+            finished = [counts.get(task_status, {})
+                        for task_status in (TaskStatusEnum.DONE.value, TaskStatusEnum.FAILED.value)]
+            totals = {name: sum(count.get(name, 0) for count in finished) for name in TaskModel.RESULT_COUNTERS}
+            totals["errors"] += counts.get(TaskStatusEnum.FAILED.value, {}).get("tasks", 0)
+            await context.report(
+                checkpoint={**context.checkpoint, "task_totals": totals},
+                **{name: totals[name] - reported.get(name, 0) for name in totals}
+            )
+            reported = totals
+
+            if not any(counts.get(task_status) for task_status in (TaskStatusEnum.QUEUED.value,
+                                                                   TaskStatusEnum.LEASED.value)):
+                return counts
+            await asyncio.sleep(poll_seconds)
+    except JobCancelled:
+        await task_model.cancel_job_tasks(job_id=job_id)
+        raise
+    except asyncio.CancelledError:
+        # On shutdown the tasks keep running; the resumed job waits for them again
+        job = await context.job_model.get_job(job_id=job_id)
+        if job is not None and job.job_cancel_requested:
+            await task_model.cancel_job_tasks(job_id=job_id)
+        raise
+
+
+def get_task_summary(counts: Dict[str, dict]) -> Dict[str, int]:
+    """
+    Task counts by status, as reported in a distributed job's result.
+    """
+    return {f"{task_status}_tasks": counts[task_status]["tasks"] for task_status in counts}
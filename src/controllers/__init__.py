@@ -2,4 +2,9 @@ from .DataController import DataController
 from .ProjectController import ProjectController
 from .BaseController import BaseController
 from .ProcessController import ProcessController
-from .NLPController import NLPController
\ No newline at end of file
+from .NLPController import NLPController
+from .ProcessingPipeline import ProcessingPipeline
+from .ChunkIndexWorker import ChunkIndexWorker
+from .LeasedWorker import LeasedWorker
+from .JobRunner import JobRunner
+from .TaskWorker import TaskWorker
\ No newline at end of file
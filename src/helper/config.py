@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -13,10 +13,37 @@ class Settings(BaseSettings):
     FILE_ALLOWED_TYPES: List[str]
     FILE_MAX_SIZE: int 
     FILE_DEFAULT_CHUNK_SIZE: int
+    UPLOAD_BATCH_MAX_CONCURRENCY: int = 8  # Files of a batch upload written concurrently
+    UPLOAD_BATCH_MAX_FILES: int = 5000  # Files (or archive members) per batch upload
+    UPLOAD_SESSION_MAX_SIZE: int = 2048  # In MB; resumable upload sessions only
+    UPLOAD_SESSION_TTL_HOURS: int = 24  # Idle sessions and their partial data are removed after this
+
+    # Processing config
+    PROCESS_POOL_MAX_WORKERS: Optional[int] = None  # Defaults to the CPU count
+    PROCESS_MAX_CONCURRENT_FILES: int = 4
+    PDF_SHARD_PAGE_THRESHOLD: int = 200  # PDFs with more pages are parsed in page-range shards
+    PDF_SHARD_PAGE_SIZE: int = 50
+    PROCESS_STREAM_BATCH_SIZE: int = 500
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_MAX_SIZE: int = 2048  # In MB; least recently used entries are evicted beyond it (0 = no limit)
+    EXTRACTION_CACHE_MAX_AGE_DAYS: int = 30  # Entries unused for longer are evicted (0 = no limit)
+    CHUNK_LENGTH_UNIT: str = "characters"  # "characters" or "tokens"
+    CHUNK_TOKEN_ENCODING: str = "cl100k_base"
+    CHUNK_DEDUP_ENABLED: bool = True
+    CHUNK_DEDUP_THRESHOLD: float = 0.85  # Estimated Jaccard similarity of word shingles
+    CHUNK_DEDUP_NUM_PERM: int = 128
+    CHUNK_DEDUP_BANDS: int = 16  # Must divide CHUNK_DEDUP_NUM_PERM
+    CHUNK_DEDUP_SHINGLE_SIZE: int = 3
+    CHUNK_INSERT_BATCH_SIZE: int = 1000
+    CHUNK_INSERT_MAX_IN_FLIGHT: int = 4  # Concurrent insert batches per file
+    CHUNK_INSERT_WRITE_CONCERN: Optional[str] = None  # e.g. "1" or "majority"; None keeps the client default
+    CHUNK_INSERT_JOURNAL: Optional[bool] = None
 
     # MongoDB
     MONGO_URI: str
     MONGO_DB_NAME: str
+    PROJECT_CACHE_SIZE: int = 1024  # Projects kept in the per-process lookup cache
+    PROJECT_CACHE_TTL_SECONDS: int = 300
 
     # LLM config
     GENERATION_BACKEND: str
@@ -39,11 +66,45 @@ class Settings(BaseSettings):
     VECTOR_DB_BACKEND: str
     VECTOR_DB_PATH: str
     VECTOR_DB_DISTANCE_METHOD: str
+    VECTOR_DB_PAYLOAD_MODE: str = "full"  # "full" or "slim" (ids only, text hydrated from MongoDB)
+    CHUNK_TEXT_CACHE_SIZE: int = 4096  # Hot chunk texts kept per process for slim payload hydration
+    CHUNK_TEXT_CACHE_TTL_SECONDS: int = 600
 
     # Template Configs 
     PRIMARY_LANG: str = "en"
     DEFAULT_LANG: str = "en"
 
+    # Lexical Index Configuration
+    LEXICAL_INDEX_PATH: str = "lexical_index"
+    LEXICAL_BM25_K1: float = 1.2
+    LEXICAL_BM25_B: float = 0.75
+    HYBRID_RRF_K: int = 60
+
+    # Auto-indexing worker (needs MongoDB running as a replica set)
+    AUTO_INDEX_ENABLED: bool = False  # Tail the chunks change stream and index new chunks in the background
+    AUTO_INDEX_BATCH_SIZE: int = 256  # Max change events handled per flush
+    AUTO_INDEX_BATCH_WAIT_SECONDS: float = 2.0  # Max time the first event of a batch waits for more
+    AUTO_INDEX_DELETE_PRE_IMAGES: bool = True  # Enable pre-images (MongoDB 6.0+) so deleted chunks leave the indexes
+    AUTO_INDEX_RETRY_MAX_SECONDS: float = 60.0  # Backoff cap when the stream or indexing fails
+    AUTO_INDEX_LEASE_SECONDS: float = 30.0  # Only the process holding this lease tails the stream; others stand by
+
+    # Background jobs
+    JOB_MAX_CONCURRENT: int = 2  # Jobs run at once by this process; 0 disables the job runner
+    JOB_POLL_SECONDS: float = 5.0  # How often idle runners look for jobs submitted elsewhere
+    JOB_HEARTBEAT_SECONDS: float = 10.0
+    JOB_HEARTBEAT_TIMEOUT_SECONDS: float = 60.0  # Running jobs silent for longer are resumed by another runner
+    JOB_MAX_ATTEMPTS: int = 3  # Claims per job before a job whose runner keeps dying is marked failed
+    INDEX_CHECKPOINT_PAGES: int = 20  # Chunk pages pushed between lexical index saves / checkpoints
+    INGEST_QUEUE_BATCHES: int = 8  # Chunk batches an ingest holds for its indexer before parsing waits
+
+    # Distributed jobs: tasks leased by the task workers of every process
+    TASK_MAX_CONCURRENT: int = 2  # Tasks run at once by this process; 0 disables the task worker
+    TASK_POLL_SECONDS: float = 2.0  # How often idle workers and waiting jobs look at the task queue
+    TASK_LEASE_SECONDS: float = 60.0  # Tasks of a worker that stops renewing are leased again after this
+    TASK_HEARTBEAT_SECONDS: float = 15.0  # How often a worker renews its leases
+    TASK_MAX_ATTEMPTS: int = 3  # Leases per task before it is marked failed
+    INDEX_TASK_CHUNKS: int = 1000  # Unindexed chunks per index task
+
     model_config = SettingsConfigDict(
         env_file=os.environ.get("ENV_FILE", ".env")
     )
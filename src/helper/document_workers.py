@@ -0,0 +1,387 @@
+# CPU-bound parsing/splitting lives in module-level functions so it can run in a
+# ProcessPoolExecutor; results are plain (text, metadata) tuples that pickle cheaply.
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import time
+import unicodedata
+import uuid
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+from langchain_community.document_loaders import (
+    TextLoader, PyMuPDFLoader, Docx2txtLoader
+)
+from helper.text_splitter import RecursiveTextSplitter, get_token_length_function
+from models.enums.ProcessingEnums import ProcessingEnums, ChunkLengthUnitEnum
+
+LOADER_REGISTRY = {
+    ProcessingEnums.TXT.value: TextLoader,
+    ProcessingEnums.PDF.value: PyMuPDFLoader,
+    ProcessingEnums.DOCX.value: Docx2txtLoader,
+}
+
+PageTuple = Tuple[str, dict]
+
+# Bump when extraction output changes so stale cache entries are no longer hit
+EXTRACTION_CACHE_VERSION = 1
+EXTRACTION_CACHE_SUFFIX = ".jsonl.gz"
+# Next to each cache file: its page count and where page ranges start in it
+EXTRACTION_CACHE_INDEX_SUFFIX = ".pages.json"
+# Shard parts and tmp files older than this were left behind by a run that crashed
+EXTRACTION_CACHE_LEFTOVER_SECONDS = 24 * 3600
+
+
+def get_loader_class(file_path: str):
+    return LOADER_REGISTRY.get(os.path.splitext(file_path)[-1].lower())
+
+
+def iter_file_pages(file_path: str) -> Iterator[PageTuple]:
+    """
+    Lazily parses a file page by page with its registered loader.
+    """
+    loader_cls = get_loader_class(file_path)
+    if loader_cls is None:
+        raise ValueError(f"Unsupported file type for: {file_path}")
+
+    for doc in loader_cls(file_path).lazy_load():
+        yield doc.page_content, doc.metadata
+
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fh:
+        while block := fh.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_extraction_cache_key(file_path: str, content_hash: str) -> str:
+    """
+    Cache entries are keyed by file content and loader version, never by file name.
+    """
+    loader_cls = get_loader_class(file_path)
+    loader_name = loader_cls.__name__ if loader_cls else "unknown"
+    return f"{content_hash}-{loader_name}-v{EXTRACTION_CACHE_VERSION}"
+
+
+def get_cache_index_path(cache_path: str) -> str:
+    return f"{cache_path}{EXTRACTION_CACHE_INDEX_SUFFIX}"
+
+
+def write_cache_index(cache_path: str, page_count: int, members: List[Tuple[int, int]], size: int):
+    """
+    Records a cache file's page count and its gzip members as (first page, byte offset),
+    so a page range is read from the member holding it instead of from page 0.
+    The file size identifies which cache file the index describes.
+    """
+    index_path = get_cache_index_path(cache_path)
+    tmp_path = f"{index_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump({"page_count": page_count, "members": members, "size": size}, fh)
+    os.replace(tmp_path, index_path)
+
+
+def read_cache_index(cache_path: str) -> Optional[dict]:
+    """
+    Returns the index of a cache file, or None when it has none or one written for
+    another version of it (e.g. a concurrent run that replaced the file).
+    """
+    try:
+        with open(get_cache_index_path(cache_path), "r", encoding="utf-8") as fh:
+            index = json.load(fh)
+        if index.get("size") != os.path.getsize(cache_path):
+            return None
+        return index
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def parse_cached_pages(fh, file_path: Optional[str] = None) -> Iterator[PageTuple]:
+    for line in fh:
+        page_content, metadata = json.loads(line)
+        if file_path:
+            for key in ("source", "file_path"):
+                if key in metadata:
+                    metadata[key] = file_path
+        yield page_content, metadata
+
+
+def read_cached_pages(cache_path: str, file_path: Optional[str] = None) -> Iterator[PageTuple]:
+    """
+    Lazily reads pages from a gzipped JSON-lines cache file. Path fields in the
+    metadata are pointed at `file_path`, since identical content may live elsewhere.
+    """
+    with gzip.open(cache_path, "rt", encoding="utf-8") as fh:
+        yield from parse_cached_pages(fh, file_path=file_path)
+
+
+def read_cached_page_range(cache_path: str, start_page: int, end_page: int,
+                           file_path: Optional[str] = None) -> Iterator[PageTuple]:
+    """
+    Lazily reads pages [start_page, end_page) from a cache file, starting at the gzip
+    member that holds `start_page` when the file is indexed.
+    """
+    index = read_cache_index(cache_path)
+    if index is None:
+        yield from islice(read_cached_pages(cache_path, file_path=file_path), start_page, end_page)
+        return
+
+    member_page, offset = 0, 0
+    for first_page, member_offset in index["members"]:
+        if first_page > start_page:
+            break
+        member_page, offset = first_page, member_offset
+
+    with open(cache_path, "rb") as raw:
+        raw.seek(offset)
+        with gzip.open(raw, "rt", encoding="utf-8") as fh:
+            pages = parse_cached_pages(fh, file_path=file_path)
+            yield from islice(pages, start_page - member_page, end_page - member_page)
+
+
+def tee_pages_to_cache(pages: Iterable[PageTuple], cache_path: str,
+                       member_pages: int = 0) -> Iterator[PageTuple]:
+    """
+    Passes pages through while writing them to `cache_path`, starting a new gzip member
+    every `member_pages` pages (0 = a single member), and indexes the file. The cache
+    file only appears once every page has been written, so partial extractions are never cached.
+    """
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    completed = False
+    page_count = 0
+    members = [(0, 0)]
+    try:
+        with open(tmp_path, "wb") as raw:
+            fh = gzip.open(raw, "wt", encoding="utf-8")
+            try:
+                for page in pages:
+                    if member_pages and page_count and page_count % member_pages == 0:
+                        fh.close()
+                        members.append((page_count, raw.tell()))
+                        fh = gzip.open(raw, "wt", encoding="utf-8")
+                    fh.write(json.dumps(page, default=str) + "\n")
+                    page_count += 1
+                    yield page
+            finally:
+                fh.close()
+        write_cache_index(cache_path, page_count=page_count, members=members, size=os.path.getsize(tmp_path))
+        os.replace(tmp_path, cache_path)
+        completed = True
+    finally:
+        if not completed and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def merge_cache_parts(cache_path: str, part_paths: List[str]):
+    """
+    Concatenates one run's per-shard cache files in order (concatenated gzip members form
+    a valid gzip file) and merges their indexes, then removes them. Part names are unique
+    per run, so runs on identical content never touch each other's parts.
+    """
+    tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+    page_count = 0
+    members = []
+    try:
+        with open(tmp_path, "wb") as out:
+            for part_path in part_paths:
+                part_index = read_cache_index(part_path)
+                if part_index is None:
+                    part_index = {
+                        "page_count": sum(1 for _ in read_cached_pages(part_path)),
+                        "members": [(0, 0)]
+                    }
+                members.extend(
+                    (page_count + first_page, out.tell() + offset)
+                    for first_page, offset in part_index["members"]
+                )
+                page_count += part_index["page_count"]
+
+                with open(part_path, "rb") as fh:
+                    shutil.copyfileobj(fh, out)
+        write_cache_index(cache_path, page_count=page_count, members=members, size=os.path.getsize(tmp_path))
+        os.replace(tmp_path, cache_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        for part_path in part_paths:
+            for path in (part_path, get_cache_index_path(part_path)):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def get_cache_part_path(cache_path: str, run_id: str, part_index: int) -> str:
+    return f"{cache_path}.{run_id}.part{part_index:05d}"
+
+
+def evict_extraction_cache(cache_dir: str, max_bytes: int, max_age_seconds: float) -> int:
+    """
+    Removes cache entries unused for `max_age_seconds`, then the least recently used
+    ones until the entries take at most `max_bytes` (0 disables either limit). An entry's
+    mtime is its last use, since hits touch it; its index goes with it. Returns the number
+    of files removed.
+    """
+    now = time.time()
+    entries = []
+    expired_paths = []
+    for entry in os.scandir(cache_dir):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        age = now - stat.st_mtime
+        if entry.name.endswith(EXTRACTION_CACHE_INDEX_SUFFIX):
+            # Kept while its cache file (or shard part) exists
+            indexed_path = entry.path[:-len(EXTRACTION_CACHE_INDEX_SUFFIX)]
+            if age > EXTRACTION_CACHE_LEFTOVER_SECONDS and not os.path.exists(indexed_path):
+                expired_paths.append(entry.path)
+        elif not entry.name.endswith(EXTRACTION_CACHE_SUFFIX):
+            if age > EXTRACTION_CACHE_LEFTOVER_SECONDS:
+                expired_paths.append(entry.path)
+        elif max_age_seconds and age > max_age_seconds:
+            expired_paths.append(entry.path)
+        else:
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    if max_bytes:
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= max_bytes:
+                break
+            expired_paths.append(path)
+            total_bytes -= size
+
+    removed = 0
+    for path in expired_paths:
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            # Evicted concurrently by another process
+            pass
+        if path.endswith(EXTRACTION_CACHE_SUFFIX) and os.path.exists(get_cache_index_path(path)):
+            os.remove(get_cache_index_path(path))
+    return removed
+
+
+def get_pdf_page_count(file_path: str) -> int:
+    import fitz
+
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def load_pdf_page_range(file_path: str, start_page: int, end_page: int) -> List[PageTuple]:
+    """
+    Parses pages [start_page, end_page) of a PDF with PyMuPDF, producing the
+    same text and metadata PyMuPDFLoader would for those pages.
+    """
+    import fitz
+
+    with fitz.open(file_path) as doc:
+        doc_metadata = {k: v for k, v in doc.metadata.items() if type(v) in [str, int]}
+        pages = []
+        for page_number in range(start_page, min(end_page, doc.page_count)):
+            page = doc[page_number]
+            metadata = {
+                "source": file_path,
+                "file_path": file_path,
+                "page": page.number,
+                "total_pages": doc.page_count,
+                **doc_metadata,
+            }
+            pages.append((page.get_text(), metadata))
+        return pages
+
+
+def create_text_splitter(chunk_size: int, overlap_size: int,
+                         length_unit: str = ChunkLengthUnitEnum.CHARACTERS.value,
+                         token_encoding: str = "cl100k_base") -> RecursiveTextSplitter:
+    length_function = None
+    if length_unit == ChunkLengthUnitEnum.TOKENS.value:
+        length_function = get_token_length_function(token_encoding)
+
+    return RecursiveTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=overlap_size,
+        length_function=length_function
+    )
+
+
+def iter_split_pages(pages: Iterable[PageTuple], chunk_size: int, overlap_size: int,
+                     **splitter_options) -> Iterator[PageTuple]:
+    """
+    Splits pages into chunks as they arrive; every chunk inherits the metadata of its page.
+    """
+    text_splitter = create_text_splitter(chunk_size, overlap_size, **splitter_options)
+
+    for page_content, metadata in pages:
+        for chunk_text in text_splitter.split_text(page_content):
+            yield chunk_text, dict(metadata)
+
+
+def split_pages(pages: Iterable[PageTuple], chunk_size: int, overlap_size: int,
+                **splitter_options) -> List[PageTuple]:
+    return list(iter_split_pages(pages, chunk_size=chunk_size, overlap_size=overlap_size, **splitter_options))
+
+
+def hash_chunk_text(text: str) -> str:
+    """
+    Hashes chunk text after NFKC and whitespace normalization, so chunks that
+    only differ in layout (re-wrapped lines, extra spaces) are treated as equal.
+    """
+    normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+def iter_file_pages_cached(file_path: str, cache_path: Optional[str] = None,
+                           member_pages: int = 0) -> Iterator[PageTuple]:
+    """
+    Reads pages from the extraction cache when present, otherwise parses the file
+    (filling the cache on the way when `cache_path` is given).
+    """
+    if cache_path and os.path.exists(cache_path):
+        return read_cached_pages(cache_path, file_path=file_path)
+
+    pages = iter_file_pages(file_path)
+    if cache_path:
+        pages = tee_pages_to_cache(pages, cache_path, member_pages=member_pages)
+    return pages
+
+
+def count_file_pages_cached(file_path: str, cache_path: str, range_pages: int = 0) -> int:
+    """
+    Returns the file's page count from the extraction cache index, parsing the file into
+    the cache first (one gzip member per `range_pages` pages) when it isn't cached yet.
+    """
+    if os.path.exists(cache_path):
+        index = read_cache_index(cache_path)
+        if index is not None:
+            return index["page_count"]
+    return sum(1 for _ in iter_file_pages_cached(file_path, cache_path=cache_path, member_pages=range_pages))
+
+
+def load_and_split_file_page_range(file_path: str, start_page: int, end_page: int,
+                                   chunk_size: int, overlap_size: int, cache_path: str,
+                                   **splitter_options) -> List[PageTuple]:
+    """
+    Splits pages [start_page, end_page) of a file whose pages are in the extraction cache.
+    """
+    pages = read_cached_page_range(cache_path, start_page, end_page, file_path=file_path)
+    return split_pages(pages, chunk_size=chunk_size, overlap_size=overlap_size, **splitter_options)
+
+
+def load_and_split_file(file_path: str, chunk_size: int, overlap_size: int,
+                        cache_path: Optional[str] = None, **splitter_options) -> List[PageTuple]:
+    pages = iter_file_pages_cached(file_path, cache_path=cache_path)
+    return split_pages(pages, chunk_size=chunk_size, overlap_size=overlap_size, **splitter_options)
+
+
+def load_and_split_pdf_page_range(file_path: str, start_page: int, end_page: int,
+                                  chunk_size: int, overlap_size: int,
+                                  cache_part_path: Optional[str] = None, **splitter_options) -> List[PageTuple]:
+    pages = load_pdf_page_range(file_path, start_page=start_page, end_page=end_page)
+    if cache_part_path:
+        pages = list(tee_pages_to_cache(pages, cache_part_path))
+    return split_pages(pages, chunk_size=chunk_size, overlap_size=overlap_size, **splitter_options)
@@ -0,0 +1,109 @@
+import hashlib
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional, Set
+
+_WORD_RE = re.compile(r"\w+")
+_EMPTY = 0xFFFFFFFF
+# Offset added per bin skipped during densification, so borrowed values stay distinguishable
+_ROTATION_OFFSET = 0x9E3779B1
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def get_shingles(text: str, shingle_size: int = 3) -> Set[bytes]:
+    words = _WORD_RE.findall(text.casefold())
+    if len(words) <= shingle_size:
+        return {" ".join(words).encode("utf-8")}
+    return {
+        " ".join(words[i:i + shingle_size]).encode("utf-8")
+        for i in range(len(words) - shingle_size + 1)
+    }
+
+
+def compute_minhash(text: str, num_perm: int = 128, shingle_size: int = 3) -> bytes:
+    """
+    One-permutation MinHash of the text's word shingles: every shingle is hashed once,
+    the hash picks one of `num_perm` bins and each bin keeps its minimum. Empty bins
+    borrow from the next non-empty bin (rotation densification). The fraction of equal
+    bins between two signatures estimates the Jaccard similarity of their shingle sets.
+    Returns the signature as packed uint32 values.
+    """
+    bins = [_EMPTY] * num_perm
+    for shingle in get_shingles(text, shingle_size=shingle_size):
+        h = _hash64(shingle)
+        idx = h % num_perm
+        value = h >> 32
+        if value < bins[idx]:
+            bins[idx] = value
+
+    if _EMPTY in bins and any(value != _EMPTY for value in bins):
+        filled = list(bins)
+        for i in range(num_perm):
+            if filled[i] != _EMPTY:
+                continue
+            distance = 1
+            while bins[(i + distance) % num_perm] == _EMPTY:
+                distance += 1
+            filled[i] = (bins[(i + distance) % num_perm] + distance * _ROTATION_OFFSET) % _EMPTY
+        bins = filled
+
+    return array("I", bins).tobytes()
+
+
+def compute_minhashes(texts: Iterable[str], num_perm: int = 128, shingle_size: int = 3) -> List[bytes]:
+    return [compute_minhash(text, num_perm=num_perm, shingle_size=shingle_size) for text in texts]
+
+
+def estimate_similarity(signature_a: bytes, signature_b: bytes) -> float:
+    a = array("I", signature_a)
+    b = array("I", signature_b)
+    if len(a) != len(b) or not a:
+        return 0.0
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def get_lsh_bands(signature: bytes, bands: int = 16) -> List[str]:
+    """
+    Splits the signature into `bands` bands and hashes each one. Two signatures share
+    at least one band key with probability 1 - (1 - s^r)^b for similarity s and r rows per band.
+    """
+    band_size = len(signature) // bands
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * band_size:(band + 1) * band_size], digest_size=8).hexdigest()}"
+        for band in range(bands)
+    ]
+
+
+class LSHIndex:
+    """
+    In-memory band index over MinHash signatures, for matching within a single batch of work.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[str, List[object]] = {}
+        self.signatures: Dict[object, bytes] = {}
+
+    def add(self, key, signature: bytes, bands: List[str]):
+        self.signatures[key] = signature
+        for band in bands:
+            self.buckets.setdefault(band, []).append(key)
+
+    def query(self, signature: bytes, bands: List[str], threshold: float,
+              exclude: Optional[Set[object]] = None) -> Optional[object]:
+        """
+        Returns the key of the most similar indexed signature at or above `threshold`, if any.
+        """
+        best_key, best_score = None, threshold
+        seen = set(exclude or ())
+        for band in bands:
+            for key in self.buckets.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = estimate_similarity(signature, self.signatures[key])
+                if score >= best_score:
+                    best_key, best_score = key, score
+        return best_key
@@ -0,0 +1,25 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Optional
+
+
+def create_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Creates the process pool used for CPU-bound document work. Workers are
+    spawned rather than forked so they never inherit the app's DB client threads.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+async def run_in_executor(executor: Optional[Executor], func: Callable, *args, **kwargs):
+    """
+    Runs `func` in `executor` (the default thread pool when None) without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
@@ -0,0 +1,131 @@
+import re
+from typing import Callable, List, Optional, Tuple
+
+DEFAULT_SEPARATORS = ["\n\n", "\n", " ", ""]
+
+Span = Tuple[int, int, int]  # (start, end, length)
+
+
+class RecursiveTextSplitter:
+    """
+    Separator-hierarchy splitter producing the same chunks as LangChain's
+    RecursiveCharacterTextSplitter (keep_separator=True, strip_whitespace=True).
+
+    Separators are compiled once, and the recursion works on (start, end) offsets
+    into the original text; a substring is only materialized for emitted chunks
+    and, when a custom `length_function` is given, for measuring pieces.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 separators: Optional[List[str]] = None,
+                 length_function: Optional[Callable[[str], int]] = None):
+        if chunk_overlap > chunk_size:
+            raise ValueError(
+                f"Got a larger chunk overlap ({chunk_overlap}) than chunk size ({chunk_size}), should be smaller."
+            )
+
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or DEFAULT_SEPARATORS
+        self.patterns = [re.compile(re.escape(sep)) if sep else None for sep in self.separators]
+        self.length_function = length_function
+        # Pieces are joined with "", which only has a length for odd length functions
+        self.join_len = length_function("") if length_function else 0
+
+    def split_text(self, text: str) -> List[str]:
+        chunks: List[str] = []
+        self._split(text, 0, len(text), 0, chunks)
+        return chunks
+
+    def _split(self, text: str, start: int, end: int, sep_idx: int, chunks: List[str]):
+        # Pick the first separator present in this window; "" always matches.
+        chosen_idx = len(self.separators) - 1
+        next_idx = None
+        for i in range(sep_idx, len(self.separators)):
+            pattern = self.patterns[i]
+            if pattern is None:
+                chosen_idx = i
+                break
+            if pattern.search(text, start, end):
+                chosen_idx = i
+                next_idx = i + 1 if i + 1 < len(self.separators) else None
+                break
+
+        # Piece boundaries; separators stay attached to the start of the following piece
+        pattern = self.patterns[chosen_idx]
+        if pattern is None:
+            bounds = range(start + 1, end + 1)
+        else:
+            bounds = [m.start() for m in pattern.finditer(text, start, end)]
+            bounds.append(end)
+
+        length_function = self.length_function
+        chunk_size = self.chunk_size
+        good_spans: List[Span] = []
+        piece_start = start
+
+        for piece_end in bounds:
+            if piece_end == piece_start:
+                continue
+            if length_function is None:
+                piece_len = piece_end - piece_start
+            else:
+                piece_len = length_function(text[piece_start:piece_end])
+
+            if piece_len < chunk_size:
+                good_spans.append((piece_start, piece_end, piece_len))
+            else:
+                if good_spans:
+                    self._merge(text, good_spans, chunks)
+                    good_spans = []
+
+                if next_idx is None:
+                    chunks.append(text[piece_start:piece_end])
+                else:
+                    self._split(text, piece_start, piece_end, next_idx, chunks)
+
+            piece_start = piece_end
+
+        if good_spans:
+            self._merge(text, good_spans, chunks)
+
+    def _merge(self, text: str, spans: List[Span], chunks: List[str]):
+        # The chunk being built is always the window spans[lo:hi], and spans are
+        # contiguous, so emitting it is a single slice of the original text.
+        chunk_size = self.chunk_size
+        chunk_overlap = self.chunk_overlap
+        join_len = self.join_len
+        lo = 0
+        total = 0
+
+        for hi, (_, _, span_len) in enumerate(spans):
+            if hi > lo and total + span_len + join_len > chunk_size:
+                self._emit(text, spans[lo][0], spans[hi - 1][1], chunks)
+                while total > chunk_overlap or (
+                    total + span_len + (join_len if hi > lo else 0) > chunk_size and total > 0
+                ):
+                    total -= spans[lo][2] + (join_len if hi - lo > 1 else 0)
+                    lo += 1
+
+            total += span_len + (join_len if hi > lo else 0)
+
+        if spans:
+            self._emit(text, spans[lo][0], spans[-1][1], chunks)
+
+    def _emit(self, text: str, start: int, end: int, chunks: List[str]):
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+
+
+def get_token_length_function(encoding_name: str = "cl100k_base") -> Callable[[str], int]:
+    """
+    Returns a length function counting tiktoken tokens instead of characters.
+    """
+    try:
+        import tiktoken
+    except ImportError as e:
+        raise ImportError("Token-based chunk lengths require the 'tiktoken' package.") from e
+
+    encoding = tiktoken.get_encoding(encoding_name)
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
@@ -1,11 +1,23 @@
 from contextlib import asynccontextmanager
+import asyncio
+import functools
 from fastapi import FastAPI
 import logging
 from motor.motor_asyncio import AsyncIOMotorClient
 from helper.config import get_settings
 from stores.llm.LLMProviderFactory import LLMProviderFactory
 from stores.vectorDB.VectorDBProviderFactory import VectorDBProviderFactory
-from routes import base, data, nlp
+from stores.lexical.LexicalIndexStore import LexicalIndexStore
+from controllers.BaseController import BaseController
+from controllers.NLPController import NLPController
+from controllers.ChunkIndexWorker import ChunkIndexWorker
+from controllers.JobRunner import JobRunner
+from controllers.TaskWorker import TaskWorker
+from models.enums.JobEnums import JobTypeEnum
+from models.enums.TaskEnums import TaskTypeEnum
+from models.ModelRegistry import ModelRegistry
+from helper.process_pool import create_process_pool
+from routes import base, data, nlp, jobs
 from stores.llm.templates.template_parser import TemplateParser
 
 logging.basicConfig(level=logging.INFO)
@@ -16,6 +28,10 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     settings = get_settings()
 
+    # Process pool for CPU-bound document parsing
+    app.process_pool = create_process_pool(max_workers=settings.PROCESS_POOL_MAX_WORKERS)
+    logger.info("Process pool initialized")
+
     # MongoDB connection
     try:
         app.mongodb_client = AsyncIOMotorClient(settings.MONGO_URI)
@@ -26,6 +42,13 @@ async def lifespan(app: FastAPI):
         logger.exception("Failed to connect to MongoDB")
         raise
 
+    # Data models, with their indexes synced once here instead of on every request
+    try:
+        app.models = await ModelRegistry.create_instance(db_client=app.mongodb_client)
+    except Exception:
+        logger.exception("Failed to initialize data models")
+        raise
+
     # LLM Initialization
     try:
         llm_provider_factory = LLMProviderFactory(config=settings)
@@ -62,6 +85,18 @@ async def lifespan(app: FastAPI):
         logger.exception("Failed to initialize VectorDB provider")
         raise
 
+    # Lexical Index Initialization
+    try:
+        app.lexical_index_client = LexicalIndexStore(
+            index_dir=BaseController().get_database_path(db_name=settings.LEXICAL_INDEX_PATH),
+            k1=settings.LEXICAL_BM25_K1,
+            b=settings.LEXICAL_BM25_B
+        )
+        logger.info("Lexical index store initialized successfully")
+    except Exception:
+        logger.exception("Failed to initialize lexical index store")
+        raise
+
     # Template Parser Initialization
     try:
         app.template_parser = TemplateParser(
@@ -73,15 +108,75 @@ async def lifespan(app: FastAPI):
         logger.exception("Failed to initialize Template Parser")
         raise
 
+    # Auto-indexing worker, tailing the chunks change stream
+    app.index_worker_task = None
+    if settings.AUTO_INDEX_ENABLED:
+        index_worker = ChunkIndexWorker(
+            models=app.models,
+            nlp_controller=NLPController(
+                vectordb_client=app.vectordb_client,
+                generation_client=app.generation_client,
+                embedding_client=app.embedding_client,
+                template_parser=app.template_parser,
+                lexical_index_client=app.lexical_index_client
+            )
+        )
+        app.index_worker_task = asyncio.create_task(index_worker.run())
+        logger.info("Auto-indexing worker started")
+
+    # Background jobs (process / index requests submitted with run_as_job)
+    app.job_runner = None
+    if settings.JOB_MAX_CONCURRENT > 0:
+        app.job_runner = JobRunner(
+            job_model=app.models.job_model,
+            handlers={
+                JobTypeEnum.PROCESS.value: functools.partial(data.run_process_job, app),
+                JobTypeEnum.INDEX.value: functools.partial(nlp.run_index_job, app),
+                JobTypeEnum.INGEST.value: functools.partial(data.run_ingest_job, app),
+            }
+        )
+        app.job_runner.start()
+
+    # Task worker, running the tasks distributed jobs are split into (worker.py runs more of them)
+    app.task_worker = None
+    if settings.TASK_MAX_CONCURRENT > 0:
+        app.task_worker = TaskWorker(
+            task_model=app.models.task_model,
+            handlers={
+                TaskTypeEnum.PROCESS_ASSET.value: functools.partial(data.run_process_asset_task, app),
+                TaskTypeEnum.INDEX_RANGE.value: functools.partial(nlp.run_index_range_task, app),
+            }
+        )
+        app.task_worker.start()
+
     yield
 
     # Shutdown logic
+    if app.job_runner:
+        # Running jobs go back to the queue and resume from their checkpoint
+        await app.job_runner.stop()
+
+    if app.task_worker:
+        # Leased tasks go back to the queue for the workers of other processes
+        await app.task_worker.stop()
+
+    if app.index_worker_task:
+        app.index_worker_task.cancel()
+        try:
+            await app.index_worker_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Auto-indexing worker stopped")
+
     app.mongodb_client.close()
     logger.info("MongoDB client closed")
 
     app.vectordb_client.disconnect()
     logger.info("VectorDB client disconnected")
 
+    app.process_pool.shutdown(wait=True, cancel_futures=True)
+    logger.info("Process pool shut down")
+
 
 # FastAPI app with lifespan
 app = FastAPI(lifespan=lifespan)
@@ -90,3 +185,4 @@ app = FastAPI(lifespan=lifespan)
 app.include_router(base.base_router)
 app.include_router(data.data_router)
 app.include_router(nlp.nlp_router)
+app.include_router(jobs.jobs_router)
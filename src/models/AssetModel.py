@@ -1,10 +1,13 @@
 import logging
-import re
 from .BaseDataModel import BaseDataModel
-from .db_schemes import Asset
+from .db_schemes import Asset, DataChunk
 from .enums.DataBaseEnum import DataBaseEnum
 from bson import ObjectId, errors as bson_errors
 from pydantic import ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
 
 
 # Configure logger for this module
@@ -38,21 +41,96 @@ class AssetModel(BaseDataModel):
             DataBaseEnum.COLLECTION_ASSET_NAME.value,
             indexes
         )
+        await self.backfill_normalized_names()
+
+    @staticmethod
+    def normalize_asset_name(asset_name: str) -> str:
+        return asset_name.casefold()
+
+    async def backfill_normalized_names(self, batch_size: int = 1000) -> int:
+        """
+        Sets asset_name_normalized on assets stored before the field existed.
+        """
+        try:
+            updated = 0
+            operations = []
+            cursor = self.collection.find({"asset_name_normalized": {"$exists": False}}, {"asset_name": 1})
+            async for record in cursor:
+                operations.append(UpdateOne(
+                    {"_id": record["_id"]},
+                    {"$set": {"asset_name_normalized": self.normalize_asset_name(record["asset_name"])}}
+                ))
+                if len(operations) >= batch_size:
+                    updated += (await self.collection.bulk_write(operations, ordered=False)).modified_count
+                    operations = []
+            if operations:
+                updated += (await self.collection.bulk_write(operations, ordered=False)).modified_count
+            if updated:
+                logger.info("Backfilled normalized names of %d assets", updated)
+            return updated
+        except Exception as e:
+            logger.exception("Failed to backfill normalized asset names: %s", str(e))
+            raise
 
     async def create_asset(self, asset: Asset):
         logger.info("Attempting to create asset with ID: %s", asset.id)
+        asset.asset_name_normalized = self.normalize_asset_name(asset.asset_name)
         try:
             result = await self.collection.insert_one(asset.model_dump(by_alias=True, exclude_unset=True))
             asset.id = result.inserted_id
             logger.info("Asset created successfully with ObjectId: %s", result.inserted_id)
             return asset
+        except DuplicateKeyError:
+            # The project already has an asset of that name; callers decide whether that's an error
+            logger.info("Asset %s already exists in project %s", asset.asset_name, asset.asset_project_id)
+            raise
         except Exception as e:
             logger.exception("Failed to create asset with ID %s: %s", asset.id, str(e))
             raise
 
 
 
-    async def get_all_project_assets(self, asset_project_id: str, asset_type: str):
+    async def insert_many_assets(self, assets: List[Asset]) -> List[Optional[str]]:
+        """
+        Inserts the assets in one unordered bulk write. Ids are assigned up front, so a
+        failing asset (e.g. a duplicate name) doesn't stop the rest. Returns one error
+        message per asset, None where the insert succeeded.
+        """
+        logger.info("Inserting %d assets in bulk", len(assets))
+        if not assets:
+            return []
+
+        for asset in assets:
+            if asset.id is None:
+                asset.id = ObjectId()
+            asset.asset_name_normalized = self.normalize_asset_name(asset.asset_name)
+
+        errors: List[Optional[str]] = [None] * len(assets)
+        try:
+            await self.collection.insert_many(
+                [asset.model_dump(by_alias=True, exclude_unset=True) for asset in assets],
+                ordered=False
+            )
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                errors[write_error["index"]] = write_error.get("errmsg", "Insert failed")
+            logger.warning("Bulk asset insert: %d of %d failed", sum(1 for error in errors if error), len(assets))
+        except Exception as e:
+            logger.exception("Failed to insert assets in bulk: %s", str(e))
+            raise
+        return errors
+
+    async def get_assets_by_names(self, asset_project_id: ObjectId, asset_names: List[str]) -> Dict[str, Asset]:
+        logger.info("Looking up %d assets by name in project_id: %s", len(asset_names), asset_project_id)
+        try:
+            cursor = self.collection.find({"asset_project_id": asset_project_id, "asset_name": {"$in": asset_names}})
+            return {record["asset_name"]: self.build_record(Asset, record) async for record in cursor}
+        except Exception as e:
+            logger.exception("Error retrieving assets by name from project_id %s: %s", asset_project_id, str(e))
+            raise
+
+    async def get_all_project_assets(self, asset_project_id: str, asset_type: str,
+                                     projection: Optional[List[str]] = None, raw: bool = False):
         logger.info("Fetching all assets for project_id: %s with type: %s", asset_project_id, asset_type)
 
         try:
@@ -61,10 +139,10 @@ class AssetModel(BaseDataModel):
                 "asset_type": asset_type,
             }
 
-            records = await self.collection.find(query).to_list(length=None)
+            records = await self.collection.find(query, projection).to_list(length=None)
             logger.info("Found %d assets for project_id: %s", len(records), asset_project_id)
 
-            return [Asset(**record) for record in records]
+            return [self.build_record(Asset, record, raw=raw) for record in records]
 
         except bson_errors.InvalidId:
             logger.error("Invalid ObjectId provided for asset_project_id: %s", asset_project_id)
@@ -73,20 +151,67 @@ class AssetModel(BaseDataModel):
             logger.exception("Unexpected error while retrieving assets for project_id %s: %s", asset_project_id, str(e))
             raise
 
-    async def get_asset_record(self, asset_project_id: str, asset_name: str):
+    async def iter_project_assets(self, asset_project_id: ObjectId, asset_type: Optional[str] = None,
+                                  projection: Optional[List[str]] = None, raw: bool = False,
+                                  batch_size: int = 500,
+                                  after_id: Optional[ObjectId] = None) -> AsyncIterator[Union[Asset, dict]]:
+        """
+        Yields the project's assets in _id order straight from the cursor, without
+        loading them all into memory; with `after_id`, only the assets after it.
+        """
+        logger.info("Iterating assets for project_id: %s with type: %s", asset_project_id, asset_type)
+        query = {"asset_project_id": asset_project_id}
+        if asset_type is not None:
+            query["asset_type"] = asset_type
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+        try:
+            cursor = self.collection.find(query, projection).sort("_id", 1).batch_size(batch_size)
+            async for record in cursor:
+                yield self.build_record(Asset, record, raw=raw)
+        except Exception as e:
+            logger.exception("Failed to iterate assets for project_id %s: %s", asset_project_id, str(e))
+            raise
+
+    async def list_project_assets(self, asset_project_id: ObjectId, after_id: Optional[ObjectId] = None,
+                                  page_size: int = 50, asset_type: Optional[str] = None,
+                                  projection: Optional[List[str]] = None,
+                                  raw: bool = False) -> Tuple[List[Union[Asset, dict]], Optional[ObjectId]]:
+        """
+        Keyset pagination in _id order: returns the page after `after_id` and the
+        `after_id` of the next page (None on the last page).
+        """
+        logger.info("Listing assets for project_id: %s after: %s", asset_project_id, after_id)
+        query = {"asset_project_id": asset_project_id}
+        if asset_type is not None:
+            query["asset_type"] = asset_type
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+        try:
+            # One extra row tells whether another page follows
+            cursor = self.collection.find(query, projection).sort("_id", 1).limit(page_size + 1)
+            records = [record async for record in cursor]
+            next_after_id = records[page_size - 1]["_id"] if len(records) > page_size else None
+            return [self.build_record(Asset, record, raw=raw) for record in records[:page_size]], next_after_id
+        except Exception as e:
+            logger.exception("Failed to list assets for project_id %s: %s", asset_project_id, str(e))
+            raise
+
+    async def get_asset_record(self, asset_project_id: str, asset_name: str,
+                               projection: Optional[List[str]] = None, raw: bool = False):
         logger.info("Looking up asset with name '%s' in project_id: %s", asset_name, asset_project_id)
 
         try:
             query = {
                 "asset_project_id": ObjectId(asset_project_id) if isinstance(asset_project_id, str) else asset_project_id,
-                "asset_name": {"$regex": f"^{re.escape(asset_name)}$", "$options": "i"}
+                "asset_name_normalized": self.normalize_asset_name(asset_name)
             }
 
-            record = await self.collection.find_one(query)
+            record = await self.collection.find_one(query, projection)
 
             if record:
                 logger.info("Asset found: %s", record.get("_id"))
-                return Asset(**record)
+                return self.build_record(Asset, record, raw=raw)
             else:
                 logger.warning("No asset found with name '%s' in project_id: %s", asset_name, asset_project_id)
                 return None
@@ -96,4 +221,175 @@ class AssetModel(BaseDataModel):
             raise
         except Exception as e:
             logger.exception("Error retrieving asset '%s' from project_id %s: %s", asset_name, asset_project_id, str(e))
-            raise
\ No newline at end of file
+            raise
+
+    async def get_asset_records(self, asset_project_id: ObjectId, asset_names: List[str],
+                                projection: Optional[List[str]] = None,
+                                raw: bool = False) -> Dict[str, Asset]:
+        """
+        Case-insensitive lookup of many assets in one indexed query, keyed by the
+        requested names; names without a matching asset are left out.
+        """
+        logger.info("Looking up %d asset records in project_id: %s", len(asset_names), asset_project_id)
+        try:
+            requested = {}
+            for asset_name in asset_names:
+                requested.setdefault(self.normalize_asset_name(asset_name), []).append(asset_name)
+
+            if projection is not None and "asset_name_normalized" not in projection:
+                projection = [*projection, "asset_name_normalized"]
+            cursor = self.collection.find(
+                {"asset_project_id": asset_project_id, "asset_name_normalized": {"$in": list(requested)}},
+                projection
+            )
+
+            assets = {}
+            async for record in cursor:
+                for asset_name in requested.get(record["asset_name_normalized"], []):
+                    assets.setdefault(asset_name, self.build_record(Asset, record, raw=raw))
+            return assets
+        except Exception as e:
+            logger.exception("Error retrieving asset records from project_id %s: %s", asset_project_id, str(e))
+            raise
+
+    async def set_asset_processing_state(self, asset_id: ObjectId, content_hash: str,
+                                         content_mtime: Optional[float], chunking_params: dict,
+                                         chunk_count: int) -> bool:
+        """
+        Records what the asset's current chunks were generated from, so unchanged
+        assets can be skipped on the next processing run.
+        """
+        logger.info("Recording processing state for asset %s: %d chunks", asset_id, chunk_count)
+        try:
+            result = await self.collection.update_one(
+                {"_id": asset_id},
+                {"$set": {
+                    "asset_content_hash": content_hash,
+                    "asset_content_mtime": content_mtime,
+                    "asset_chunking_params": chunking_params,
+                    "asset_chunk_count": chunk_count,
+                    "asset_processed_at": datetime.utcnow(),
+                }}
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            logger.exception("Failed to record processing state for asset %s: %s", asset_id, str(e))
+            raise
+
+    async def set_asset_document_metadata(self, asset_id: ObjectId, document_metadata: dict) -> bool:
+        logger.info("Recording document metadata for asset %s", asset_id)
+        try:
+            result = await self.collection.update_one(
+                {"_id": asset_id},
+                {"$set": {"asset_document_metadata": document_metadata}}
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            logger.exception("Failed to record document metadata for asset %s: %s", asset_id, str(e))
+            raise
+
+    async def hydrate_chunk_metadata(self, chunks: List[DataChunk]) -> List[DataChunk]:
+        """
+        Merges each chunk's own metadata over the document metadata of its asset,
+        fetched for all the chunks' assets in one query.
+        """
+        asset_ids = list({chunk.chunk_asset_id for chunk in chunks})
+        if not asset_ids:
+            return chunks
+
+        try:
+            cursor = self.collection.find({"_id": {"$in": asset_ids}}, {"asset_document_metadata": 1})
+            document_metadata = {
+                record["_id"]: record.get("asset_document_metadata") or {} async for record in cursor
+            }
+        except Exception as e:
+            logger.exception("Failed to fetch document metadata of %d assets: %s", len(asset_ids), str(e))
+            raise
+
+        for chunk in chunks:
+            chunk.chunk_metadata = {**document_metadata.get(chunk.chunk_asset_id, {}), **chunk.chunk_metadata}
+        return chunks
+
+    async def clear_asset_processing_state(self, asset_id: ObjectId) -> bool:
+        """
+        Marks the asset as unprocessed before its chunks are replaced, so a run that
+        fails half-way is never mistaken for an up-to-date one.
+        """
+        logger.info("Clearing processing state for asset %s", asset_id)
+        try:
+            result = await self.collection.update_one(
+                {"_id": asset_id},
+                {"$set": {
+                    "asset_content_hash": None,
+                    "asset_content_mtime": None,
+                    "asset_chunking_params": None,
+                    "asset_chunk_count": None,
+                    "asset_processed_at": None,
+                }}
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            logger.exception("Failed to clear processing state for asset %s: %s", asset_id, str(e))
+            raise
+
+    async def get_asset_by_id(self, asset_id: ObjectId) -> Optional[Asset]:
+        logger.info("Looking up asset with ID: %s", asset_id)
+        try:
+            record = await self.collection.find_one({"_id": asset_id})
+            return self.build_record(Asset, record) if record else None
+        except Exception as e:
+            logger.exception("Error retrieving asset %s: %s", asset_id, str(e))
+            raise
+
+    async def get_processed_asset_by_content(self, content_hash: str, chunking_params: dict,
+                                             exclude_asset_id: Optional[ObjectId] = None) -> Optional[Asset]:
+        """
+        Finds an asset, in any project, whose chunks were generated from the same content
+        with the same chunking params, so its chunks can be copied instead of re-parsed.
+        """
+        logger.info("Looking up a processed asset with content hash %s", content_hash)
+        try:
+            # chunking_params are always built by the same code, so their key order matches
+            query = {
+                "asset_content_hash": content_hash,
+                "asset_chunking_params": chunking_params,
+                "asset_chunk_count": {"$gt": 0},
+            }
+            if exclude_asset_id is not None:
+                query["_id"] = {"$ne": exclude_asset_id}
+            record = await self.collection.find_one(query, sort=[("asset_processed_at", -1)])
+            return self.build_record(Asset, record) if record else None
+        except Exception as e:
+            logger.exception("Error looking up processed asset for content hash %s: %s", content_hash, str(e))
+            raise
+
+    async def link_asset_version(self, asset_id: ObjectId, previous_asset_id: ObjectId) -> bool:
+        """
+        Links `asset_id` as the new version of `previous_asset_id`. The new version is
+        marked unprocessed so the next processing run diffs it against the previous one,
+        and the previous version is marked superseded so it is no longer processed itself.
+        """
+        logger.info("Linking asset %s as a new version of %s", asset_id, previous_asset_id)
+        try:
+            result = await self.collection.update_one(
+                {"_id": asset_id},
+                {"$set": {
+                    "asset_previous_version_id": previous_asset_id,
+                    "asset_content_hash": None,
+                    "asset_content_mtime": None,
+                    "asset_chunking_params": None,
+                    "asset_chunk_count": None,
+                    "asset_processed_at": None,
+                }}
+            )
+            if result.matched_count == 0:
+                return False
+
+            await self.collection.update_one(
+                {"_id": previous_asset_id},
+                {"$set": {"asset_superseded_by_id": asset_id}}
+            )
+            return True
+        except Exception as e:
+            logger.exception("Failed to link asset %s to %s: %s", asset_id, previous_asset_id, str(e))
+            raise
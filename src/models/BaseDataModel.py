@@ -26,20 +26,49 @@ class BaseDataModel:
         logger.debug("Accessing collection: %s", collection_name)
         return self.db_client[self.settings.MONGO_DB_NAME][collection_name]
 
+    @staticmethod
+    def build_record(scheme, record: dict, raw: bool = False):
+        """
+        Stored documents were validated on the way in, so rows are built with
+        model_construct instead of being validated again; `raw` returns the dict itself.
+        Fields left out by a projection are simply missing on the result.
+        """
+        return record if raw else scheme.model_construct(**record)
+
     async def init_collection_with_indexes(self, collection_name: str, indexes: List[dict]):
+        """
+        Creates the declared indexes that the collection is missing. Meant to run once at
+        startup: indexes added to a scheme later are deployed on the next start, while an
+        existing index whose definition changed is only reported, never dropped.
+        """
         logger.info("Initializing collection '%s' with indexes...", collection_name)
         db = self.db_client[self.settings.MONGO_DB_NAME]
         existing_collections = await db.list_collection_names()
+        col = self.get_collection(collection_name)
 
+        existing_indexes = {}
         if collection_name not in existing_collections:
             logger.info("Creating new collection: %s", collection_name)
-            col = self.get_collection(collection_name)
-
-            for idx in indexes:
-                try:
-                    await col.create_index(idx["key"], name=idx["name"], unique=idx.get("unique", False))
-                    logger.info("Created index '%s' on '%s'", idx["name"], idx["key"])
-                except Exception as e:
-                    logger.error("Error creating index '%s': %s", idx.get("name", str(idx)), str(e))
         else:
-            logger.info("Collection '%s' already exists. Skipping index creation.", collection_name)
+            existing_indexes = await col.index_information()
+
+        existing_keys = {tuple(tuple(part) for part in info["key"]): name for name, info in existing_indexes.items()}
+        for idx in indexes:
+            key = tuple(tuple(part) for part in idx["key"])
+            unique = idx.get("unique", False)
+
+            if idx["name"] in existing_indexes:
+                info = existing_indexes[idx["name"]]
+                if tuple(tuple(part) for part in info["key"]) != key or bool(info.get("unique", False)) != unique:
+                    logger.warning("Index '%s' on '%s' differs from its declaration; drop it to have it rebuilt",
+                                   idx["name"], collection_name)
+                continue
+            if key in existing_keys:
+                logger.warning("Index '%s' on '%s' already exists as '%s'", idx["name"], collection_name, existing_keys[key])
+                continue
+
+            try:
+                await col.create_index(idx["key"], name=idx["name"], unique=unique)
+                logger.info("Created index '%s' on '%s'", idx["name"], idx["key"])
+            except Exception as e:
+                logger.error("Error creating index '%s': %s", idx.get("name", str(idx)), str(e))
@@ -1,18 +1,32 @@
+import asyncio
 import logging
 from .BaseDataModel import BaseDataModel
 from .db_schemes import DataChunk
 from .enums.DataBaseEnum import DataBaseEnum
+from helper.ttl_cache import TTLCache
 from bson import ObjectId
-from pymongo import InsertOne
-from typing import List
+from pymongo import InsertOne, UpdateOne, UpdateMany, WriteConcern
+from pymongo.errors import BulkWriteError
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+from datetime import datetime
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
 
 class ChunkModel(BaseDataModel):
+    # What indexing needs; leaves out the MinHash signature and LSH bands
+    INDEX_FIELDS = [
+        "_id", "chunk_text", "chunk_metadata", "chunk_asset_id", "chunk_source_asset_ids", "chunk_vector_source"
+    ]
+
     def __init__(self, db_client: object):
         super().__init__(db_client=db_client)
         self.collection = self.get_collection(DataBaseEnum.COLLECTION_CHUNK_NAME.value)
+        # A chunk's text never changes under the same _id, so cached texts only go stale on deletion
+        self.text_cache = TTLCache(
+            maxsize=self.settings.CHUNK_TEXT_CACHE_SIZE,
+            ttl=self.settings.CHUNK_TEXT_CACHE_TTL_SECONDS
+        )
     
         logger.info("ChunkModel initialized with collection: %s", self.collection.name)
 
@@ -52,11 +66,38 @@ class ChunkModel(BaseDataModel):
                 return None
             
             logger.info("Found chunk with ID: %s", chunk_id)
-            return DataChunk(**record)
+            return self.build_record(DataChunk, record)
         except Exception as e:
             logger.exception("Failed to fetch chunk with ID %s: %s", chunk_id, str(e))
             raise
 
+    async def get_chunk_texts(self, chunk_ids: List[ObjectId]) -> Dict[ObjectId, str]:
+        """
+        Texts of the given chunks, from the hot-chunk cache or one batched $in query.
+        Chunks that no longer exist are left out.
+        """
+        texts = {}
+        missing_ids = []
+        for chunk_id in chunk_ids:
+            text = self.text_cache.get(chunk_id)
+            if text is None:
+                missing_ids.append(chunk_id)
+            else:
+                texts[chunk_id] = text
+
+        if not missing_ids:
+            return texts
+
+        try:
+            cursor = self.collection.find({"_id": {"$in": missing_ids}}, {"chunk_text": 1})
+            async for record in cursor:
+                texts[record["_id"]] = record["chunk_text"]
+                self.text_cache.set(record["_id"], record["chunk_text"])
+            return texts
+        except Exception as e:
+            logger.exception("Failed to fetch texts of %d chunks: %s", len(missing_ids), str(e))
+            raise
+
     async def insert_many_chunks(self, chunks: List[DataChunk],batch_size: int = 100):
         logger.info("Attempting to insert multiple chunks")
         try:
@@ -71,6 +112,56 @@ class ChunkModel(BaseDataModel):
             logger.exception("Failed to insert chunks: %s", str(e))
             raise
     
+    async def insert_chunk_documents(self, documents: List[dict], batch_size: int = 1000,
+                                     max_in_flight: int = 4,
+                                     write_concern: Optional[WriteConcern] = None) -> Tuple[int, List[dict]]:
+        """
+        Bulk-inserts raw chunk documents (see DataChunk.to_document) in unordered batches,
+        up to `max_in_flight` of them at a time. Documents get their _id up front.
+        A failing batch does not stop the others; returns the number of inserted documents
+        and one {"batch", "inserted", "failed", "error"} entry per failed batch.
+        """
+        logger.info("Attempting to bulk insert %d chunk documents", len(documents))
+        for document in documents:
+            document.setdefault("_id", ObjectId())
+
+        collection = self.collection
+        if write_concern is not None:
+            collection = collection.with_options(write_concern=write_concern)
+
+        semaphore = asyncio.Semaphore(max(1, max_in_flight))
+
+        async def insert_batch(batch_no: int, batch: List[dict]) -> Tuple[int, Optional[dict]]:
+            async with semaphore:
+                try:
+                    await collection.insert_many(batch, ordered=False)
+                    return len(batch), None
+                except BulkWriteError as e:
+                    inserted = e.details.get("nInserted", 0)
+                    errors = e.details.get("writeErrors", [])
+                    message = errors[0].get("errmsg") if errors else str(e)
+                except Exception as e:
+                    inserted, message = 0, str(e)
+
+                logger.error("Chunk batch %d failed: %d of %d documents inserted: %s",
+                             batch_no, inserted, len(batch), message)
+                return inserted, {
+                    "batch": batch_no,
+                    "inserted": inserted,
+                    "failed": len(batch) - inserted,
+                    "error": message,
+                }
+
+        results = await asyncio.gather(*(
+            insert_batch(batch_no, documents[i:i + batch_size])
+            for batch_no, i in enumerate(range(0, len(documents), batch_size))
+        ))
+
+        inserted = sum(count for count, _ in results)
+        failures = [failure for _, failure in results if failure is not None]
+        logger.info("Inserted %d chunk documents (%d failed batches)", inserted, len(failures))
+        return inserted, failures
+
     async def delete_chunk_by_project_id(self, project_id: ObjectId) -> int:
         """
         Delete all chunks associated with a given project_id.
@@ -90,7 +181,335 @@ class ChunkModel(BaseDataModel):
             logger.exception("Failed to delete chunks for project ID %s: %s", str(project_id), str(e))
             raise
     
-    async def get_project_chunks(self, project_id: ObjectId,page_no:int =1, page_size:int = 50 ) -> List[DataChunk]:
+    async def get_asset_chunk_hashes(self, asset_id: ObjectId) -> List[Tuple[ObjectId, Optional[str], Optional[ObjectId]]]:
+        """
+        Returns (chunk id, normalized text hash, canonical chunk id) for every chunk
+        of a given asset, in chunk order.
+        """
+        logger.info("Retrieving chunk hashes for asset ID: %s", str(asset_id))
+        try:
+            cursor = self.collection.find(
+                {"chunk_asset_id": asset_id}, {"_id": 1, "chunk_text_hash": 1, "chunk_canonical_id": 1}
+            ).sort("chunk_order", 1)
+            return [
+                (record["_id"], record.get("chunk_text_hash"), record.get("chunk_canonical_id"))
+                async for record in cursor
+            ]
+        except Exception as e:
+            logger.exception("Failed to retrieve chunk hashes for asset ID %s: %s", str(asset_id), str(e))
+            raise
+
+    async def iter_asset_chunks(self, asset_id: ObjectId, batch_size: int = 100) -> AsyncIterator[List[DataChunk]]:
+        """
+        Yields the chunks of an asset in chunk order, `batch_size` at a time.
+        """
+        logger.info("Iterating chunks of asset ID: %s", str(asset_id))
+        try:
+            cursor = self.collection.find({"chunk_asset_id": asset_id}).sort("chunk_order", 1).batch_size(batch_size)
+            batch = []
+            async for record in cursor:
+                batch.append(self.build_record(DataChunk, record))
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        except Exception as e:
+            logger.exception("Failed to iterate chunks of asset ID %s: %s", str(asset_id), str(e))
+            raise
+
+    async def reassign_chunks(self, asset_id: ObjectId, chunks: List[DataChunk], batch_size: int = 100) -> int:
+        """
+        Moves existing chunks (matched by `id`) to `asset_id`, taking over the order
+        and metadata of the given chunks. Text, hash and indexing state are kept: the
+        vectors stay valid, and callers refresh the payload of the indexed ones.
+        """
+        logger.info("Reassigning %d chunks to asset ID: %s", len(chunks), str(asset_id))
+        try:
+            for i in range(0, len(chunks), batch_size):
+                operations = [
+                    UpdateOne(
+                        {"_id": chunk.id},
+                        {"$set": {
+                            "chunk_asset_id": asset_id,
+                            "chunk_order": chunk.chunk_order,
+                            "chunk_metadata": chunk.chunk_metadata,
+                        }}
+                    )
+                    for chunk in chunks[i:i + batch_size]
+                ]
+                await self.collection.bulk_write(operations, ordered=False)
+            return len(chunks)
+        except Exception as e:
+            logger.exception("Failed to reassign chunks to asset ID %s: %s", str(asset_id), str(e))
+            raise
+
+    async def get_canonical_candidates(self, project_id: ObjectId,
+                                       lsh_bands: List[str]) -> List[Tuple[ObjectId, bytes, List[str]]]:
+        """
+        Returns (chunk id, MinHash signature, LSH bands) of the project's canonical
+        chunks sharing at least one LSH band with `lsh_bands`.
+        """
+        logger.info("Looking up canonical chunk candidates for project ID: %s", str(project_id))
+        try:
+            cursor = self.collection.find(
+                {
+                    "chunk_project_id": project_id,
+                    "chunk_lsh_bands": {"$in": lsh_bands},
+                    "chunk_canonical_id": None,
+                },
+                {"_id": 1, "chunk_minhash": 1, "chunk_lsh_bands": 1}
+            )
+            return [
+                (record["_id"], record["chunk_minhash"], record["chunk_lsh_bands"])
+                async for record in cursor if record.get("chunk_minhash")
+            ]
+        except Exception as e:
+            logger.exception("Failed to look up canonical candidates for project ID %s: %s", str(project_id), str(e))
+            raise
+
+    async def promote_duplicates(self, canonical_ids: List[ObjectId]) -> List[ObjectId]:
+        """
+        Before canonical chunks are deleted, promotes the oldest duplicate of each to
+        canonical (to be indexed on the next push) and points the other duplicates at it.
+        Returns the ids of the promoted chunks.
+        """
+        if not canonical_ids:
+            return []
+
+        logger.info("Promoting duplicates of %d canonical chunks", len(canonical_ids))
+        try:
+            groups = {}
+            cursor = self.collection.find(
+                {"chunk_canonical_id": {"$in": canonical_ids}}, {"_id": 1, "chunk_canonical_id": 1}
+            ).sort("_id", 1)
+            async for record in cursor:
+                groups.setdefault(record["chunk_canonical_id"], []).append(record["_id"])
+
+            operations = []
+            for duplicate_ids in groups.values():
+                promoted_id, others = duplicate_ids[0], duplicate_ids[1:]
+                operations.append(UpdateOne(
+                    {"_id": promoted_id},
+                    {"$set": {"chunk_canonical_id": None, "chunk_indexed_at": None}}
+                ))
+                if others:
+                    operations.append(UpdateMany(
+                        {"_id": {"$in": others}},
+                        {"$set": {"chunk_canonical_id": promoted_id}}
+                    ))
+
+            if operations:
+                await self.collection.bulk_write(operations, ordered=False)
+            return [duplicate_ids[0] for duplicate_ids in groups.values()]
+        except Exception as e:
+            logger.exception("Failed to promote duplicate chunks: %s", str(e))
+            raise
+
+    async def refresh_source_asset_ids(self, canonical_ids: List[ObjectId]) -> List[DataChunk]:
+        """
+        Recomputes chunk_source_asset_ids (the canonical's own asset plus the assets of
+        all its duplicates) and returns the canonical chunks whose list changed.
+        """
+        if not canonical_ids:
+            return []
+
+        logger.info("Refreshing source assets of %d canonical chunks", len(canonical_ids))
+        try:
+            duplicate_sources = {}
+            pipeline = [
+                {"$match": {"chunk_canonical_id": {"$in": canonical_ids}}},
+                {"$group": {"_id": "$chunk_canonical_id", "asset_ids": {"$addToSet": "$chunk_asset_id"}}},
+            ]
+            async for record in self.collection.aggregate(pipeline):
+                duplicate_sources[record["_id"]] = record["asset_ids"]
+
+            changed = []
+            operations = []
+            cursor = self.collection.find({"_id": {"$in": canonical_ids}, "chunk_canonical_id": None})
+            async for record in cursor:
+                chunk = self.build_record(DataChunk, record)
+                source_asset_ids = sorted(
+                    {chunk.chunk_asset_id, *duplicate_sources.get(chunk.id, [])}, key=str
+                )
+                if source_asset_ids != (chunk.chunk_source_asset_ids or []):
+                    chunk.chunk_source_asset_ids = source_asset_ids
+                    changed.append(chunk)
+                    operations.append(UpdateOne(
+                        {"_id": chunk.id},
+                        {"$set": {"chunk_source_asset_ids": source_asset_ids}}
+                    ))
+
+            if operations:
+                await self.collection.bulk_write(operations, ordered=False)
+            return changed
+        except Exception as e:
+            logger.exception("Failed to refresh source assets of canonical chunks: %s", str(e))
+            raise
+
+    async def delete_chunks_by_ids(self, chunk_ids: List[ObjectId], batch_size: int = 1000) -> int:
+        logger.info("Attempting to delete %d chunks by ID", len(chunk_ids))
+        try:
+            deleted_count = 0
+            for i in range(0, len(chunk_ids), batch_size):
+                result = await self.collection.delete_many({"_id": {"$in": chunk_ids[i:i + batch_size]}})
+                deleted_count += result.deleted_count
+            logger.info("Deleted %d chunks by ID", deleted_count)
+            return deleted_count
+        except Exception as e:
+            logger.exception("Failed to delete chunks by ID: %s", str(e))
+            raise
+
+    async def get_unindexed_project_chunks(self, project_id: ObjectId, after_id: Optional[ObjectId] = None,
+                                           page_size: int = 50, projection: Optional[List[str]] = None,
+                                           raw: bool = False,
+                                           until_id: Optional[ObjectId] = None) -> List[Union[DataChunk, dict]]:
+        """
+        Retrieve the next page of canonical chunks that have not been pushed to the
+        indexes yet, in _id order starting after `after_id` (and up to `until_id`, included).
+        `projection` limits the fields read (e.g. INDEX_FIELDS); `raw` returns the documents as dicts.
+        """
+        logger.info("Retrieving unindexed chunks for project ID: %s", str(project_id))
+        try:
+            # Duplicates share their canonical chunk's vector and are never indexed themselves
+            query = {"chunk_project_id": project_id, "chunk_indexed_at": None, "chunk_canonical_id": None}
+            id_range = {}
+            if after_id is not None:
+                id_range["$gt"] = after_id
+            if until_id is not None:
+                id_range["$lte"] = until_id
+            if id_range:
+                query["_id"] = id_range
+            cursor = self.collection.find(query, projection).sort("_id", 1).limit(page_size)
+            return [self.build_record(DataChunk, record, raw=raw) async for record in cursor]
+        except Exception as e:
+            logger.exception("Failed to retrieve unindexed chunks for project ID %s: %s", str(project_id), str(e))
+            raise
+
+    async def get_canonical_chunks_by_ids(self, chunk_ids: List[ObjectId],
+                                          projection: Optional[List[str]] = None) -> List[DataChunk]:
+        """
+        The canonical chunks among `chunk_ids` that still exist, indexed or not, read with one $in query.
+        """
+        try:
+            query = {"_id": {"$in": chunk_ids}, "chunk_canonical_id": None}
+            cursor = self.collection.find(query, projection)
+            return [self.build_record(DataChunk, record) async for record in cursor]
+        except Exception as e:
+            logger.exception("Failed to retrieve %d canonical chunks by ID: %s", len(chunk_ids), str(e))
+            raise
+
+    async def get_existing_chunk_ids(self, chunk_ids: List[ObjectId]) -> Set[ObjectId]:
+        """
+        The ids among `chunk_ids` that are stored, e.g. to find what a failed bulk insert left out.
+        """
+        try:
+            cursor = self.collection.find({"_id": {"$in": chunk_ids}}, {"_id": 1})
+            return {record["_id"] async for record in cursor}
+        except Exception as e:
+            logger.exception("Failed to look up %d chunk ids: %s", len(chunk_ids), str(e))
+            raise
+
+    async def get_chunks_by_ids(self, chunk_ids: List[ObjectId],
+                                projection: Optional[List[str]] = None) -> List[DataChunk]:
+        """
+        The given chunks read with one $in query; chunks that no longer exist are left out.
+        """
+        try:
+            cursor = self.collection.find({"_id": {"$in": chunk_ids}}, projection)
+            return [self.build_record(DataChunk, record) async for record in cursor]
+        except Exception as e:
+            logger.exception("Failed to retrieve %d chunks by ID: %s", len(chunk_ids), str(e))
+            raise
+
+    async def enable_change_pre_images(self):
+        """
+        Makes change streams on the collection able to return the deleted document
+        (MongoDB 6.0+), which is where a delete event gets the chunk's project from.
+        """
+        db = self.db_client[self.settings.MONGO_DB_NAME]
+        try:
+            await db.command(
+                "collMod", DataBaseEnum.COLLECTION_CHUNK_NAME.value,
+                changeStreamPreAndPostImages={"enabled": True}
+            )
+        except Exception as e:
+            logger.exception("Failed to enable change stream pre-images on chunks: %s", str(e))
+            raise
+
+    def watch_chunks(self, resume_after: Optional[dict] = None, with_pre_images: bool = False,
+                     max_await_time_ms: Optional[int] = None):
+        """
+        Opens a change stream on the chunks collection, resuming after `resume_after` when given.
+        Events are trimmed to what indexing needs: the operation, the chunk id, the updated and
+        removed fields and, for deletes with pre-images, the chunk's project.
+        """
+        pipeline = [
+            {"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}},
+            {"$project": {
+                "operationType": 1,
+                "documentKey": 1,
+                "updateDescription.updatedFields": 1,
+                "updateDescription.removedFields": 1,
+                "fullDocumentBeforeChange.chunk_project_id": 1,
+            }},
+        ]
+        return self.collection.watch(
+            pipeline=pipeline,
+            resume_after=resume_after,
+            full_document_before_change="whenAvailable" if with_pre_images else None,
+            max_await_time_ms=max_await_time_ms
+        )
+
+    async def mark_chunks_indexed(self, chunk_ids: List[ObjectId]) -> int:
+        logger.info("Marking %d chunks as indexed", len(chunk_ids))
+        try:
+            result = await self.collection.update_many(
+                {"_id": {"$in": chunk_ids}},
+                {"$set": {"chunk_indexed_at": datetime.utcnow()}}
+            )
+            return result.modified_count
+        except Exception as e:
+            logger.exception("Failed to mark chunks as indexed: %s", str(e))
+            raise
+
+    async def reset_project_chunks_indexed(self, project_id: ObjectId) -> int:
+        """
+        Marks every chunk of the project as not indexed, e.g. after its collection was reset.
+        """
+        logger.info("Resetting indexing state for project ID: %s", str(project_id))
+        try:
+            result = await self.collection.update_many(
+                {"chunk_project_id": project_id, "chunk_indexed_at": {"$ne": None}},
+                {"$set": {"chunk_indexed_at": None}}
+            )
+            return result.modified_count
+        except Exception as e:
+            logger.exception("Failed to reset indexing state for project ID %s: %s", str(project_id), str(e))
+            raise
+
+    async def delete_chunks_by_asset_id(self, asset_id: ObjectId) -> int:
+        """
+        Delete all chunks generated from a given asset.
+
+        Args:
+            asset_id (ObjectId): The unique identifier of the asset.
+
+        Returns:
+            int: The number of deleted chunk documents.
+        """
+        logger.info("Attempting to delete chunks for asset ID: %s", str(asset_id))
+        try:
+            result = await self.collection.delete_many({"chunk_asset_id": asset_id})
+            logger.info("Deleted %d chunks for asset ID: %s", result.deleted_count, str(asset_id))
+            return result.deleted_count
+        except Exception as e:
+            logger.exception("Failed to delete chunks for asset ID %s: %s", str(asset_id), str(e))
+            raise
+
+    async def get_project_chunks(self, project_id: ObjectId,page_no:int =1, page_size:int = 50,
+                                 projection: Optional[List[str]] = None,
+                                 raw: bool = False) -> List[Union[DataChunk, dict]]:
         """
         Retrieve all chunks associated with a given project_id.
 
@@ -98,6 +517,8 @@ class ChunkModel(BaseDataModel):
             project_id (ObjectId): The unique identifier of the project.
             page_no (int): The page number for pagination.
             page_size (int): The number of records per page.
+            projection (List[str], optional): Fields to read; all fields by default.
+            raw (bool): Return the documents as dicts instead of DataChunk objects.
 
         Returns:
             List[DataChunk]: A list of DataChunk objects associated with the project.
@@ -105,9 +526,9 @@ class ChunkModel(BaseDataModel):
         logger.info("Retrieving chunks for project ID: %s", str(project_id))
         try:
             cursor = self.collection.find(
-                {"chunk_project_id": project_id}
+                {"chunk_project_id": project_id}, projection
                 ).skip((page_no - 1) * page_size).limit(page_size)
-            chunks = [DataChunk(**record) async for record in cursor]
+            chunks = [self.build_record(DataChunk, record, raw=raw) async for record in cursor]
             logger.info("Retrieved %d chunks for project ID: %s", len(chunks), str(project_id))
             return chunks
         except Exception as e:
@@ -0,0 +1,242 @@
+import logging
+from .BaseDataModel import BaseDataModel
+from .db_schemes import Job
+from .enums.DataBaseEnum import DataBaseEnum
+from .enums.JobEnums import JobStatusEnum
+from bson import ObjectId
+from pymongo import ReturnDocument
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JobModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.collection = self.get_collection(DataBaseEnum.COLLECTION_JOB_NAME.value)
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        """
+        Factory method to create an instance of JobModel.
+        """
+        instance = cls(db_client=db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        indexes = Job.get_indexes()
+        await self.init_collection_with_indexes(
+            DataBaseEnum.COLLECTION_JOB_NAME.value,
+            indexes
+        )
+
+    async def create_job(self, job: Job) -> Job:
+        logger.info("Creating '%s' job for project %s", job.job_type, job.job_project_id)
+        try:
+            # Defaults (status, counters, timestamps) are stored too; the queue queries rely on them
+            result = await self.collection.insert_one(job.model_dump(by_alias=True, exclude_none=True))
+            job.id = result.inserted_id
+            return job
+        except Exception as e:
+            logger.exception("Failed to create '%s' job: %s", job.job_type, str(e))
+            raise
+
+    async def get_job(self, job_id: ObjectId) -> Optional[Job]:
+        try:
+            record = await self.collection.find_one({"_id": job_id})
+            return self.build_record(Job, record) if record else None
+        except Exception as e:
+            logger.exception("Error retrieving job %s: %s", job_id, str(e))
+            raise
+
+    async def list_jobs(self, project_id: Optional[ObjectId] = None, job_status: Optional[str] = None,
+                        after_id: Optional[ObjectId] = None,
+                        page_size: int = 50) -> Tuple[List[Job], Optional[ObjectId]]:
+        """
+        Keyset pagination, newest first: returns the page after `after_id` and the
+        `after_id` of the next page (None on the last page).
+        """
+        query = {}
+        if project_id is not None:
+            query["job_project_id"] = project_id
+        if job_status is not None:
+            query["job_status"] = job_status
+        if after_id is not None:
+            query["_id"] = {"$lt": after_id}
+        try:
+            cursor = self.collection.find(query).sort("_id", -1).limit(page_size + 1)
+            records = [record async for record in cursor]
+            next_after_id = records[page_size - 1]["_id"] if len(records) > page_size else None
+            return [self.build_record(Job, record) for record in records[:page_size]], next_after_id
+        except Exception as e:
+            logger.exception("Failed to list jobs: %s", str(e))
+            raise
+
+    async def claim_next_job(self, worker_id: str, stale_before: datetime, max_attempts: int) -> Optional[Job]:
+        """
+        Atomically hands the oldest runnable job to `worker_id`: a queued one, or a running
+        one whose worker stopped heart-beating before `stale_before` (it resumes from its checkpoint),
+        as long as it has attempts left.
+        """
+        now = datetime.utcnow()
+        try:
+            record = await self.collection.find_one_and_update(
+                {
+                    "$or": [
+                        {"job_status": JobStatusEnum.QUEUED.value},
+                        {"job_status": JobStatusEnum.RUNNING.value, "job_heartbeat_at": {"$lt": stale_before}},
+                    ],
+                    "job_cancel_requested": False,
+                    "job_attempts": {"$lt": max_attempts},
+                },
+                {
+                    "$set": {
+                        "job_status": JobStatusEnum.RUNNING.value,
+                        "job_worker_id": worker_id,
+                        "job_started_at": now,
+                        "job_heartbeat_at": now,
+                    },
+                    "$inc": {"job_attempts": 1},
+                },
+                sort=[("job_created_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            return self.build_record(Job, record) if record else None
+        except Exception as e:
+            logger.exception("Failed to claim a job for worker %s: %s", worker_id, str(e))
+            raise
+
+    async def heartbeat(self, job_ids: List[ObjectId], worker_id: str) -> List[ObjectId]:
+        """
+        Refreshes the heartbeat of the worker's running jobs; returns those whose
+        cancellation was requested meanwhile.
+        """
+        if not job_ids:
+            return []
+        query = {"_id": {"$in": job_ids}, "job_worker_id": worker_id, "job_status": JobStatusEnum.RUNNING.value}
+        try:
+            await self.collection.update_many(query, {"$set": {"job_heartbeat_at": datetime.utcnow()}})
+            cursor = self.collection.find({**query, "job_cancel_requested": True}, {"_id": 1})
+            return [record["_id"] async for record in cursor]
+        except Exception as e:
+            logger.exception("Failed to refresh heartbeats of worker %s: %s", worker_id, str(e))
+            raise
+
+    async def update_progress(self, job_id: ObjectId, worker_id: str, increments: dict,
+                              checkpoint: Optional[dict] = None) -> Optional[Job]:
+        """
+        Adds `increments` to the job's progress counters and moves its checkpoint.
+        Returns None when the job is no longer running on this worker.
+        """
+        update = {"$set": {"job_heartbeat_at": datetime.utcnow()}}
+        if increments:
+            update["$inc"] = {f"job_progress.{name}": value for name, value in increments.items()}
+        if checkpoint is not None:
+            update["$set"]["job_checkpoint"] = checkpoint
+        try:
+            record = await self.collection.find_one_and_update(
+                {"_id": job_id, "job_worker_id": worker_id, "job_status": JobStatusEnum.RUNNING.value},
+                update,
+                return_document=ReturnDocument.AFTER
+            )
+            return self.build_record(Job, record) if record else None
+        except Exception as e:
+            logger.exception("Failed to update progress of job %s: %s", job_id, str(e))
+            raise
+
+    async def finish_job(self, job_id: ObjectId, worker_id: str, job_status: str,
+                         result: Optional[dict] = None, error: Optional[str] = None) -> bool:
+        logger.info("Job %s finished with status '%s'", job_id, job_status)
+        try:
+            update_result = await self.collection.update_one(
+                {"_id": job_id, "job_worker_id": worker_id, "job_status": JobStatusEnum.RUNNING.value},
+                {"$set": {
+                    "job_status": job_status,
+                    "job_result": result,
+                    "job_error": error,
+                    "job_finished_at": datetime.utcnow(),
+                }}
+            )
+            return update_result.modified_count > 0
+        except Exception as e:
+            logger.exception("Failed to finish job %s: %s", job_id, str(e))
+            raise
+
+    async def requeue_job(self, job_id: ObjectId, worker_id: str) -> bool:
+        """
+        Hands a running job back to the queue, e.g. on shutdown, without spending an attempt;
+        it resumes from its checkpoint.
+        """
+        try:
+            result = await self.collection.update_one(
+                {"_id": job_id, "job_worker_id": worker_id, "job_status": JobStatusEnum.RUNNING.value},
+                {
+                    "$set": {"job_status": JobStatusEnum.QUEUED.value, "job_worker_id": None},
+                    "$inc": {"job_attempts": -1},
+                }
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.exception("Failed to requeue job %s: %s", job_id, str(e))
+            raise
+
+    async def fail_exhausted_jobs(self, stale_before: datetime, max_attempts: int) -> int:
+        """
+        Marks failed the running jobs whose worker stopped heart-beating on their last allowed
+        attempt; no runner claims them anymore.
+        """
+        try:
+            result = await self.collection.update_many(
+                {
+                    "job_status": JobStatusEnum.RUNNING.value,
+                    "job_heartbeat_at": {"$lt": stale_before},
+                    "job_attempts": {"$gte": max_attempts},
+                },
+                {"$set": {
+                    "job_status": JobStatusEnum.FAILED.value,
+                    "job_error": f"Runner stopped on each of {max_attempts} attempts",
+                    "job_finished_at": datetime.utcnow(),
+                }}
+            )
+            return result.modified_count
+        except Exception as e:
+            logger.exception("Failed to expire exhausted jobs: %s", str(e))
+            raise
+
+    async def request_cancel(self, job_id: ObjectId, stale_before: datetime) -> Optional[Job]:
+        """
+        Cancels a queued job (or a running one whose worker is gone) right away, and flags
+        a live running job so its worker stops it. Finished jobs are returned unchanged.
+        """
+        logger.info("Requesting cancellation of job %s", job_id)
+        try:
+            record = await self.collection.find_one_and_update(
+                {
+                    "_id": job_id,
+                    "$or": [
+                        {"job_status": JobStatusEnum.QUEUED.value},
+                        {"job_status": JobStatusEnum.RUNNING.value, "job_heartbeat_at": {"$lt": stale_before}},
+                    ],
+                },
+                {"$set": {
+                    "job_status": JobStatusEnum.CANCELLED.value,
+                    "job_cancel_requested": True,
+                    "job_finished_at": datetime.utcnow(),
+                }},
+                return_document=ReturnDocument.AFTER
+            )
+            if record is None:
+                record = await self.collection.find_one_and_update(
+                    {"_id": job_id, "job_status": JobStatusEnum.RUNNING.value},
+                    {"$set": {"job_cancel_requested": True}},
+                    return_document=ReturnDocument.AFTER
+                )
+            if record is None:
+                record = await self.collection.find_one({"_id": job_id})
+            return self.build_record(Job, record) if record else None
+        except Exception as e:
+            logger.exception("Failed to cancel job %s: %s", job_id, str(e))
+            raise
@@ -0,0 +1,47 @@
+import logging
+from .ProjectModel import ProjectModel
+from .AssetModel import AssetModel
+from .ChunkModel import ChunkModel
+from .UploadSessionModel import UploadSessionModel
+from .WorkerStateModel import WorkerStateModel
+from .JobModel import JobModel
+from .TaskModel import TaskModel
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    App-scoped data models. They are created once in the app lifespan, which is also
+    the only place their collections and indexes are checked, and handed to the routes
+    through FastAPI dependencies.
+    """
+
+    def __init__(self, project_model: ProjectModel, asset_model: AssetModel,
+                 chunk_model: ChunkModel, upload_session_model: UploadSessionModel,
+                 worker_state_model: WorkerStateModel, job_model: JobModel,
+                 task_model: TaskModel):
+        self.project_model = project_model
+        self.asset_model = asset_model
+        self.chunk_model = chunk_model
+        self.upload_session_model = upload_session_model
+        self.worker_state_model = worker_state_model
+        self.job_model = job_model
+        self.task_model = task_model
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        """
+        Factory method creating every model and syncing its indexes.
+        """
+        registry = cls(
+            project_model=await ProjectModel.create_instance(db_client=db_client),
+            asset_model=await AssetModel.create_instance(db_client=db_client),
+            chunk_model=await ChunkModel.create_instance(db_client=db_client),
+            upload_session_model=await UploadSessionModel.create_instance(db_client=db_client),
+            worker_state_model=await WorkerStateModel.create_instance(db_client=db_client),
+            job_model=await JobModel.create_instance(db_client=db_client),
+            task_model=await TaskModel.create_instance(db_client=db_client),
+        )
+        logger.info("Data models initialized")
+        return registry
@@ -2,6 +2,11 @@ import logging
 from .BaseDataModel import BaseDataModel
 from .db_schemes import Project
 from .enums.DataBaseEnum import DataBaseEnum
+from helper.ttl_cache import TTLCache
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +15,12 @@ class ProjectModel(BaseDataModel):
     def __init__(self, db_client: object):
         super().__init__(db_client=db_client)
         self.collection = self.get_collection(DataBaseEnum.COLLECTION_PROJECT_NAME.value)
+        # Per-process: deletions in another process only become visible once the entry expires,
+        # so only reads use it (see get_project_or_create_one)
+        self.project_cache = TTLCache(
+            maxsize=self.settings.PROJECT_CACHE_SIZE,
+            ttl=self.settings.PROJECT_CACHE_TTL_SECONDS
+        )
         logger.info("ProjectModel initialized with collection: %s", self.collection.name)
 
     @classmethod
@@ -36,22 +47,82 @@ class ProjectModel(BaseDataModel):
             logger.exception("Failed to create project with ID %s: %s", project.project_id, str(e))
             raise
 
-    async def get_project_or_create_one(self, project_id: str):
+    async def get_project_or_create_one(self, project_id: str, cached: bool = False):
+        """
+        Upserts the project atomically, so concurrent first requests for a new project_id
+        all end up with the same document. Only reads should pass `cached`: a cached
+        project may have been deleted by another process, and anything written under
+        its `_id` would be orphaned, whereas the upsert recreates it.
+        """
+        project = self.project_cache.get(project_id) if cached else None
+        if project is not None:
+            return project
+
         logger.info("Looking for project with ID: %s", project_id)
-        record = await self.collection.find_one({"project_id": project_id})
+        # Validates project_id before anything is written
+        Project(project_id=project_id)
+        try:
+            record = await self.collection.find_one_and_update(
+                {"project_id": project_id},
+                {"$setOnInsert": {"project_id": project_id}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost an upsert race on the unique index; the winner's document is there now
+            record = await self.collection.find_one({"project_id": project_id})
+        except Exception as e:
+            logger.exception("Failed to get or create project with ID %s: %s", project_id, str(e))
+            raise
+
+        project = Project(**record)
+        self.project_cache.set(project_id, project)
+        return project
+
+    async def get_project(self, project_id: str) -> Optional[Project]:
+        """
+        Looks a project up without creating it; returns None when there is none.
+        """
+        project = self.project_cache.get(project_id)
+        if project is not None:
+            return project
 
+        logger.info("Looking for project with ID: %s", project_id)
+        try:
+            record = await self.collection.find_one({"project_id": project_id})
+        except Exception as e:
+            logger.exception("Failed to fetch project with ID %s: %s", project_id, str(e))
+            raise
         if record is None:
-            logger.info("Project with ID %s not found. Creating a new one.", project_id)
-            try:
-                project = Project(project_id=project_id)
-                project = await self.create_project(project=project)
-                return project
-            except Exception as e:
-                logger.exception("Failed to create new project with ID %s: %s", project_id, str(e))
-                raise
-        else:
-            logger.info("Found existing project with ID: %s", project_id)
-            return Project(**record)
+            return None
+
+        project = Project(**record)
+        self.project_cache.set(project_id, project)
+        return project
+
+    def invalidate_project(self, project_id: str):
+        self.project_cache.pop(project_id)
+
+    async def delete_project(self, project_id: str) -> bool:
+        logger.info("Attempting to delete project with ID: %s", project_id)
+        try:
+            result = await self.collection.delete_one({"project_id": project_id})
+            logger.info("Deleted %d project(s) with ID: %s", result.deleted_count, project_id)
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.exception("Failed to delete project with ID %s: %s", project_id, str(e))
+            raise
+        finally:
+            self.invalidate_project(project_id)
+
+    async def get_project_by_id(self, project_object_id: ObjectId) -> Optional[Project]:
+        logger.info("Looking for project with ObjectId: %s", project_object_id)
+        try:
+            record = await self.collection.find_one({"_id": project_object_id})
+            return Project(**record) if record else None
+        except Exception as e:
+            logger.exception("Failed to fetch project with ObjectId %s: %s", project_object_id, str(e))
+            raise
 
     async def get_all_projects(self, page: int = 1, page_size: int = 10):
         if page < 1: page = 1
@@ -70,3 +141,31 @@ class ProjectModel(BaseDataModel):
         except Exception as e:
             logger.exception("Failed to fetch projects: %s", str(e))
             raise
+
+    async def list_projects(self, after_id: Optional[ObjectId] = None,
+                            page_size: int = 50) -> Tuple[List[Project], Optional[ObjectId]]:
+        """
+        Keyset pagination in _id order: returns the page after `after_id` and the
+        `after_id` of the next page (None on the last page).
+        """
+        logger.info("Listing projects after: %s with page size %d", after_id, page_size)
+        try:
+            query = {"_id": {"$gt": after_id}} if after_id is not None else {}
+            # One extra row tells whether another page follows
+            cursor = self.collection.find(query).sort("_id", 1).limit(page_size + 1)
+            records = [record async for record in cursor]
+            next_after_id = records[page_size - 1]["_id"] if len(records) > page_size else None
+            return [self.build_record(Project, record) for record in records[:page_size]], next_after_id
+        except Exception as e:
+            logger.exception("Failed to list projects: %s", str(e))
+            raise
+
+    async def estimate_project_count(self) -> int:
+        """
+        Count from the collection metadata; cheap, but may be slightly off.
+        """
+        try:
+            return await self.collection.estimated_document_count()
+        except Exception as e:
+            logger.exception("Failed to estimate project count: %s", str(e))
+            raise
@@ -0,0 +1,241 @@
+import logging
+from .BaseDataModel import BaseDataModel
+from .db_schemes import Task
+from .enums.DataBaseEnum import DataBaseEnum
+from .enums.TaskEnums import TaskStatusEnum
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class TaskModel(BaseDataModel):
+    """
+    Queue of the tasks distributed jobs are split into. Workers of any process lease
+    tasks with one atomic update; a task whose lease runs out (its worker died or hung)
+    is leased again by another worker, up to the max attempts.
+    """
+
+    # Counters summed over a job's tasks
+    RESULT_COUNTERS = ["files", "chunks", "vectors", "errors"]
+    # Tasks inserted per insert_many by a fan-out
+    ENQUEUE_BATCH_SIZE = 500
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.collection = self.get_collection(DataBaseEnum.COLLECTION_TASK_NAME.value)
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        """
+        Factory method to create an instance of TaskModel.
+        """
+        instance = cls(db_client=db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        indexes = Task.get_indexes()
+        await self.init_collection_with_indexes(
+            DataBaseEnum.COLLECTION_TASK_NAME.value,
+            indexes
+        )
+
+    async def enqueue_tasks(self, tasks: List[Task]) -> int:
+        """
+        Inserts the tasks and returns how many are new; tasks whose key already
+        exists in their job (a resumed fan-out) are left as they are.
+        """
+        if not tasks:
+            return 0
+        try:
+            result = await self.collection.insert_many(
+                [task.model_dump(by_alias=True, exclude_none=True) for task in tasks],
+                ordered=False
+            )
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+                logger.exception("Failed to enqueue %d tasks: %s", len(tasks), str(e))
+                raise
+            return e.details.get("nInserted", 0)
+        except Exception as e:
+            logger.exception("Failed to enqueue %d tasks: %s", len(tasks), str(e))
+            raise
+
+    async def claim_task(self, worker_id: str, lease_seconds: float, max_attempts: int) -> Optional[Task]:
+        """
+        Atomically leases the oldest runnable task to `worker_id`: a queued one, or a leased
+        one whose lease has expired, as long as it has attempts left.
+        """
+        now = datetime.utcnow()
+        try:
+            record = await self.collection.find_one_and_update(
+                {
+                    "$or": [
+                        {"task_status": TaskStatusEnum.QUEUED.value},
+                        {"task_status": TaskStatusEnum.LEASED.value, "task_lease_expires_at": {"$lt": now}},
+                    ],
+                    "task_attempts": {"$lt": max_attempts},
+                },
+                {
+                    "$set": {
+                        "task_status": TaskStatusEnum.LEASED.value,
+                        "task_lease_owner": worker_id,
+                        "task_lease_expires_at": now + timedelta(seconds=lease_seconds),
+                    },
+                    "$inc": {"task_attempts": 1},
+                },
+                sort=[("task_created_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            return self.build_record(Task, record) if record else None
+        except Exception as e:
+            logger.exception("Failed to claim a task for worker %s: %s", worker_id, str(e))
+            raise
+
+    async def extend_leases(self, task_ids: List[ObjectId], worker_id: str, lease_seconds: float) -> List[ObjectId]:
+        """
+        Renews the worker's leases; returns the ids among `task_ids` it no longer holds
+        (its lease expired and another worker took the task, or the task was cancelled).
+        """
+        if not task_ids:
+            return []
+        query = {"_id": {"$in": task_ids}, "task_lease_owner": worker_id, "task_status": TaskStatusEnum.LEASED.value}
+        try:
+            await self.collection.update_many(
+                query, {"$set": {"task_lease_expires_at": datetime.utcnow() + timedelta(seconds=lease_seconds)}}
+            )
+            held_ids = {record["_id"] async for record in self.collection.find(query, {"_id": 1})}
+            return [task_id for task_id in task_ids if task_id not in held_ids]
+        except Exception as e:
+            logger.exception("Failed to extend the leases of worker %s: %s", worker_id, str(e))
+            raise
+
+    async def complete_task(self, task_id: ObjectId, worker_id: str, result: Optional[dict] = None) -> bool:
+        try:
+            update_result = await self.collection.update_one(
+                {"_id": task_id, "task_lease_owner": worker_id, "task_status": TaskStatusEnum.LEASED.value},
+                {"$set": {
+                    "task_status": TaskStatusEnum.DONE.value,
+                    "task_result": result,
+                    "task_error": None,
+                    "task_finished_at": datetime.utcnow(),
+                }}
+            )
+            return update_result.modified_count > 0
+        except Exception as e:
+            logger.exception("Failed to complete task %s: %s", task_id, str(e))
+            raise
+
+    async def fail_task(self, task_id: ObjectId, worker_id: str, error: str, max_attempts: int) -> Optional[str]:
+        """
+        Puts a failed task back in the queue while it has attempts left, otherwise marks it
+        failed. Returns the task's new status, or None when the worker no longer held it.
+        """
+        query = {"_id": task_id, "task_lease_owner": worker_id, "task_status": TaskStatusEnum.LEASED.value}
+        try:
+            update_result = await self.collection.update_one(
+                {**query, "task_attempts": {"$lt": max_attempts}},
+                {"$set": {"task_status": TaskStatusEnum.QUEUED.value, "task_lease_owner": None, "task_error": error}}
+            )
+            if update_result.modified_count:
+                return TaskStatusEnum.QUEUED.value
+
+            update_result = await self.collection.update_one(
+                query,
+                {"$set": {
+                    "task_status": TaskStatusEnum.FAILED.value,
+                    "task_error": error,
+                    "task_finished_at": datetime.utcnow(),
+                }}
+            )
+            return TaskStatusEnum.FAILED.value if update_result.modified_count else None
+        except Exception as e:
+            logger.exception("Failed to record the failure of task %s: %s", task_id, str(e))
+            raise
+
+    async def release_task(self, task_id: ObjectId, worker_id: str) -> bool:
+        """
+        Hands a leased task back to the queue on shutdown, without spending an attempt.
+        """
+        try:
+            result = await self.collection.update_one(
+                {"_id": task_id, "task_lease_owner": worker_id, "task_status": TaskStatusEnum.LEASED.value},
+                {
+                    "$set": {"task_status": TaskStatusEnum.QUEUED.value, "task_lease_owner": None},
+                    "$inc": {"task_attempts": -1},
+                }
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.exception("Failed to release task %s: %s", task_id, str(e))
+            raise
+
+    async def fail_exhausted_tasks(self, job_id: ObjectId, max_attempts: int) -> int:
+        """
+        Marks failed the job's tasks whose last allowed lease expired; no worker claims them anymore.
+        """
+        try:
+            result = await self.collection.update_many(
+                {
+                    "task_job_id": job_id,
+                    "task_status": TaskStatusEnum.LEASED.value,
+                    "task_lease_expires_at": {"$lt": datetime.utcnow()},
+                    "task_attempts": {"$gte": max_attempts},
+                },
+                {"$set": {
+                    "task_status": TaskStatusEnum.FAILED.value,
+                    "task_error": f"Lease expired on each of {max_attempts} attempts",
+                    "task_finished_at": datetime.utcnow(),
+                }}
+            )
+            return result.modified_count
+        except Exception as e:
+            logger.exception("Failed to expire the tasks of job %s: %s", job_id, str(e))
+            raise
+
+    async def cancel_job_tasks(self, job_id: ObjectId) -> int:
+        """
+        Cancels the job's unfinished tasks; workers holding one drop it at their next lease renewal.
+        """
+        logger.info("Cancelling the tasks of job %s", job_id)
+        try:
+            result = await self.collection.update_many(
+                {
+                    "task_job_id": job_id,
+                    "task_status": {"$in": [TaskStatusEnum.QUEUED.value, TaskStatusEnum.LEASED.value]},
+                },
+                {"$set": {"task_status": TaskStatusEnum.CANCELLED.value, "task_finished_at": datetime.utcnow()}}
+            )
+            return result.modified_count
+        except Exception as e:
+            logger.exception("Failed to cancel the tasks of job %s: %s", job_id, str(e))
+            raise
+
+    async def count_job_tasks(self, job_id: ObjectId) -> Dict[str, dict]:
+        """
+        Per task status: the number of tasks and the sums of their RESULT_COUNTERS.
+        """
+        pipeline = [
+            {"$match": {"task_job_id": job_id}},
+            {"$group": {
+                "_id": "$task_status",
+                "tasks": {"$sum": 1},
+                **{name: {"$sum": f"$task_result.{name}"} for name in self.RESULT_COUNTERS},
+            }},
+        ]
+        try:
+            return {
+                record.pop("_id"): record
+                async for record in self.collection.aggregate(pipeline)
+            }
+        except Exception as e:
+            logger.exception("Failed to count the tasks of job %s: %s", job_id, str(e))
+            raise
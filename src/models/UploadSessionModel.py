@@ -0,0 +1,113 @@
+import logging
+from .BaseDataModel import BaseDataModel
+from .db_schemes import UploadSession
+from .enums.DataBaseEnum import DataBaseEnum
+from .enums.UploadSessionEnums import UploadSessionStatusEnum
+from bson import ObjectId
+from pymongo import ReturnDocument
+from datetime import datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSessionModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.collection = self.get_collection(DataBaseEnum.COLLECTION_UPLOAD_SESSION_NAME.value)
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        """
+        Factory method to create an instance of UploadSessionModel.
+        """
+        instance = cls(db_client=db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        indexes = UploadSession.get_indexes()
+        await self.init_collection_with_indexes(
+            DataBaseEnum.COLLECTION_UPLOAD_SESSION_NAME.value,
+            indexes
+        )
+
+    async def create_session(self, session: UploadSession) -> UploadSession:
+        logger.info("Creating upload session for file '%s' (%d bytes)", session.session_file_name, session.session_file_size)
+        try:
+            result = await self.collection.insert_one(session.model_dump(by_alias=True, exclude_unset=True))
+            session.id = result.inserted_id
+            return session
+        except Exception as e:
+            logger.exception("Failed to create upload session for file '%s': %s", session.session_file_name, str(e))
+            raise
+
+    async def get_session(self, session_id: ObjectId, project_id: ObjectId) -> Optional[UploadSession]:
+        try:
+            record = await self.collection.find_one({"_id": session_id, "session_project_id": project_id})
+            return UploadSession(**record) if record else None
+        except Exception as e:
+            logger.exception("Error retrieving upload session %s: %s", session_id, str(e))
+            raise
+
+    async def add_received_range(self, session_id: ObjectId, start: int, end: int,
+                                 expires_at: datetime) -> Optional[UploadSession]:
+        """
+        Records that bytes [start, end) are on disk and pushes the session's expiry back.
+        Concurrent uploads of different ranges each add their own entry atomically.
+        """
+        logger.info("Recording bytes [%d, %d) of upload session %s", start, end, session_id)
+        try:
+            record = await self.collection.find_one_and_update(
+                {"_id": session_id, "session_status": UploadSessionStatusEnum.OPEN.value},
+                {
+                    "$push": {"session_received_ranges": [start, end]},
+                    "$set": {"session_expires_at": expires_at},
+                },
+                return_document=ReturnDocument.AFTER
+            )
+            return UploadSession(**record) if record else None
+        except Exception as e:
+            logger.exception("Failed to record range of upload session %s: %s", session_id, str(e))
+            raise
+
+    async def set_session_status(self, session_id: ObjectId, status: str, from_status: str,
+                                 expires_at: Optional[datetime] = None,
+                                 asset_id: Optional[ObjectId] = None) -> Optional[UploadSession]:
+        """
+        Moves the session from `from_status` to `status`; returns None when it was not in
+        `from_status`, so only one request can ever finalize a session.
+        """
+        logger.info("Moving upload session %s from '%s' to '%s'", session_id, from_status, status)
+        update = {"session_status": status}
+        if expires_at is not None:
+            update["session_expires_at"] = expires_at
+        if asset_id is not None:
+            update["session_asset_id"] = asset_id
+        try:
+            record = await self.collection.find_one_and_update(
+                {"_id": session_id, "session_status": from_status},
+                {"$set": update},
+                return_document=ReturnDocument.AFTER
+            )
+            return UploadSession(**record) if record else None
+        except Exception as e:
+            logger.exception("Failed to update status of upload session %s: %s", session_id, str(e))
+            raise
+
+    async def get_expired_sessions(self, now: datetime, limit: int = 100) -> List[UploadSession]:
+        try:
+            cursor = self.collection.find({"session_expires_at": {"$lt": now}}).limit(limit)
+            return [UploadSession(**record) async for record in cursor]
+        except Exception as e:
+            logger.exception("Failed to retrieve expired upload sessions: %s", str(e))
+            raise
+
+    async def delete_session(self, session_id: ObjectId) -> bool:
+        try:
+            result = await self.collection.delete_one({"_id": session_id})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.exception("Failed to delete upload session %s: %s", session_id, str(e))
+            raise
@@ -0,0 +1,95 @@
+import logging
+from .BaseDataModel import BaseDataModel
+from .db_schemes import WorkerState
+from .enums.DataBaseEnum import DataBaseEnum
+from datetime import datetime, timedelta
+from pymongo.errors import DuplicateKeyError
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerStateModel(BaseDataModel):
+
+    def __init__(self, db_client: object):
+        super().__init__(db_client=db_client)
+        self.collection = self.get_collection(DataBaseEnum.COLLECTION_WORKER_STATE_NAME.value)
+
+    @classmethod
+    async def create_instance(cls, db_client: object):
+        """
+        Factory method to create an instance of WorkerStateModel.
+        """
+        instance = cls(db_client=db_client)
+        await instance.init_collection()
+        return instance
+
+    async def init_collection(self):
+        indexes = WorkerState.get_indexes()
+        await self.init_collection_with_indexes(
+            DataBaseEnum.COLLECTION_WORKER_STATE_NAME.value,
+            indexes
+        )
+
+    async def get_resume_token(self, worker_name: str) -> Optional[dict]:
+        try:
+            record = await self.collection.find_one({"worker_name": worker_name}, {"worker_resume_token": 1})
+            return record.get("worker_resume_token") if record else None
+        except Exception as e:
+            logger.exception("Failed to load resume token of worker '%s': %s", worker_name, str(e))
+            raise
+
+    async def save_resume_token(self, worker_name: str, resume_token: Optional[dict]):
+        """
+        Stores the worker's resume token; None makes the next run start from the current time.
+        """
+        try:
+            await self.collection.update_one(
+                {"worker_name": worker_name},
+                {"$set": {"worker_resume_token": resume_token, "worker_updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.exception("Failed to save resume token of worker '%s': %s", worker_name, str(e))
+            raise
+
+    async def acquire_lease(self, worker_name: str, owner: str, lease_seconds: float) -> bool:
+        """
+        Takes or renews the lease that lets `owner` run the worker; False while another
+        owner holds an unexpired lease. Renewing is acquiring again before expiry.
+        """
+        now = datetime.utcnow()
+        try:
+            await self.collection.update_one(
+                {
+                    "worker_name": worker_name,
+                    "$or": [
+                        {"worker_lease_owner": owner},
+                        {"worker_lease_owner": None},
+                        {"worker_lease_expires_at": {"$lt": now}},
+                    ],
+                },
+                {"$set": {"worker_lease_owner": owner, "worker_lease_expires_at": now + timedelta(seconds=lease_seconds)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            # The worker's document exists but the lease is held: the upsert hit the unique name
+            return False
+        except Exception as e:
+            logger.exception("Failed to acquire the lease of worker '%s': %s", worker_name, str(e))
+            raise
+
+    async def release_lease(self, worker_name: str, owner: str) -> bool:
+        """
+        Gives the lease up on shutdown, so another process takes over without waiting for expiry.
+        """
+        try:
+            result = await self.collection.update_one(
+                {"worker_name": worker_name, "worker_lease_owner": owner},
+                {"$set": {"worker_lease_owner": None, "worker_lease_expires_at": None}}
+            )
+            return result.modified_count > 0
+        except Exception as e:
+            logger.exception("Failed to release the lease of worker '%s': %s", worker_name, str(e))
+            raise
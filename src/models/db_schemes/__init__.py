@@ -1,5 +1,9 @@
 from .project import Project
 from .data_chunk import DataChunk, RetrievedDocument
 from .asset import Asset
+from .upload_session import UploadSession
+from .worker_state import WorkerState
+from .job import Job
+from .task import Task
 
-__all__ = ["Project", "DataChunk", "Asset"]
\ No newline at end of file
+__all__ = ["Project", "DataChunk", "Asset", "UploadSession", "WorkerState", "Job", "Task"]
\ No newline at end of file
@@ -8,9 +8,21 @@ class Asset(BaseModel):
     asset_project_id: ObjectId
     asset_type: str = Field(..., min_length=1)
     asset_name: str = Field(..., min_length=1)
+    # Casefolded asset_name, set by AssetModel on insert, for indexed case-insensitive lookups
+    asset_name_normalized: Optional[str] = None
     asset_size: Optional[int] = Field(default=None, ge=0)
     asset_config: Optional[dict] = None
+    asset_blob_hash: Optional[str] = None
     asset_pushed_at: datetime = Field(default_factory=datetime.utcnow)
+    asset_content_hash: Optional[str] = None
+    asset_content_mtime: Optional[float] = None
+    asset_chunking_params: Optional[dict] = None
+    # Metadata shared by every page (source, author, total pages, ...); chunks only keep what differs
+    asset_document_metadata: Optional[dict] = None
+    asset_chunk_count: Optional[int] = Field(default=None, ge=0)
+    asset_processed_at: Optional[datetime] = None
+    asset_previous_version_id: Optional[ObjectId] = None
+    asset_superseded_by_id: Optional[ObjectId] = None
 
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
@@ -29,5 +41,26 @@ class Asset(BaseModel):
                 "key": [("asset_project_id", 1), ("asset_name", 1)],
                 "name": "asset_project_id_name_index_1",
                 "unique": True
+            },
+            {
+                "key": [("asset_project_id", 1), ("asset_name_normalized", 1)],
+                "name": "asset_project_id_name_normalized_index_1",
+                "unique": False
+            },
+            {
+                "key": [("asset_content_hash", 1)],
+                "name": "asset_content_hash_index_1",
+                "unique": False
+            },
+            # Keyset pages of a project's assets, optionally of one type, in _id order
+            {
+                "key": [("asset_project_id", 1), ("_id", 1)],
+                "name": "asset_project_id_id_index_1",
+                "unique": False
+            },
+            {
+                "key": [("asset_project_id", 1), ("asset_type", 1), ("_id", 1)],
+                "name": "asset_project_id_type_id_index_1",
+                "unique": False
             }
         ]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from bson.objectid import ObjectId
+from datetime import datetime
 
 class DataChunk(BaseModel):
     id: Optional[ObjectId] = Field(default=None, alias="_id")
@@ -9,12 +10,30 @@ class DataChunk(BaseModel):
     chunk_order: int = Field(..., gt=0)
     chunk_project_id: ObjectId
     chunk_asset_id: ObjectId
+    chunk_text_hash: Optional[str] = None
+    chunk_indexed_at: Optional[datetime] = None
+    chunk_minhash: Optional[bytes] = None
+    chunk_lsh_bands: Optional[List[str]] = None
+    chunk_canonical_id: Optional[ObjectId] = None
+    chunk_source_asset_ids: Optional[List[ObjectId]] = None
+    # {"collection_name", "record_id"} of an indexed copy of this chunk whose vector can be reused
+    chunk_vector_source: Optional[dict] = None
 
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
         populate_by_name=True
     )
 
+    def to_document(self) -> dict:
+        """
+        BSON-ready dict of the set fields, built without model_dump; meant for chunks
+        created with model_construct from trusted producers (the splitter, stored chunks).
+        """
+        return {
+            ("_id" if name == "id" else name): value
+            for name, value in self.__dict__.items() if value is not None
+        }
+
     @classmethod
     def get_indexes(cls):
         return [
@@ -22,9 +41,31 @@ class DataChunk(BaseModel):
                 "key": [("chunk_project_id", 1)],
                 "name": "chunk_project_id_index_1",
                 "unique": False
+            },
+            {
+                "key": [("chunk_asset_id", 1)],
+                "name": "chunk_asset_id_index_1",
+                "unique": False
+            },
+            {
+                "key": [("chunk_project_id", 1), ("chunk_indexed_at", 1), ("_id", 1)],
+                "name": "chunk_project_id_indexed_at_index_1",
+                "unique": False
+            },
+            {
+                "key": [("chunk_project_id", 1), ("chunk_lsh_bands", 1)],
+                "name": "chunk_project_id_lsh_bands_index_1",
+                "unique": False
+            },
+            {
+                "key": [("chunk_canonical_id", 1)],
+                "name": "chunk_canonical_id_index_1",
+                "unique": False
             }
         ]
 
 class RetrievedDocument(BaseModel):
     text: str
-    score: float
\ No newline at end of file
+    score: float
+    record_id: Optional[str] = None
+    metadata: Optional[dict] = None
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
+from bson.objectid import ObjectId
+from datetime import datetime
+from ..enums.JobEnums import JobStatusEnum
+
+class Job(BaseModel):
+    id: Optional[ObjectId] = Field(default=None, alias="_id")
+    job_project_id: ObjectId
+    job_type: str
+    # The request that submitted the job, replayed by its handler
+    job_params: dict = Field(default_factory=dict)
+    job_status: str = JobStatusEnum.QUEUED.value
+    # Counters: files, chunks, vectors, errors
+    job_progress: dict = Field(default_factory=dict)
+    # Where a resumed run picks up, e.g. {"after_asset_id": ...}
+    job_checkpoint: Optional[dict] = None
+    job_result: Optional[dict] = None
+    job_error: Optional[str] = None
+    job_cancel_requested: bool = False
+    job_worker_id: Optional[str] = None
+    job_attempts: int = 0
+    job_created_at: datetime = Field(default_factory=datetime.utcnow)
+    job_started_at: Optional[datetime] = None
+    job_heartbeat_at: Optional[datetime] = None
+    job_finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        populate_by_name=True
+    )
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key": [("job_status", 1), ("job_created_at", 1)],
+                "name": "job_status_created_at_index_1",
+                "unique": False
+            },
+            {
+                "key": [("job_project_id", 1), ("_id", 1)],
+                "name": "job_project_id_index_1",
+                "unique": False
+            }
+        ]
@@ -0,0 +1,49 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
+from bson.objectid import ObjectId
+from datetime import datetime
+from ..enums.TaskEnums import TaskStatusEnum
+
+class Task(BaseModel):
+    id: Optional[ObjectId] = Field(default=None, alias="_id")
+    task_job_id: ObjectId
+    task_project_id: ObjectId
+    task_type: str
+    # Unique within the job, so a resumed fan-out never enqueues a task twice
+    task_key: str
+    # e.g. {"asset_id": ...} or {"after_chunk_id": ..., "until_chunk_id": ...}
+    task_params: dict = Field(default_factory=dict)
+    task_status: str = TaskStatusEnum.QUEUED.value
+    task_lease_owner: Optional[str] = None
+    task_lease_expires_at: Optional[datetime] = None
+    task_attempts: int = 0
+    # Counters: files, chunks, vectors, errors
+    task_result: Optional[dict] = None
+    task_error: Optional[str] = None
+    task_created_at: datetime = Field(default_factory=datetime.utcnow)
+    task_finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        populate_by_name=True
+    )
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key": [("task_job_id", 1), ("task_key", 1)],
+                "name": "task_job_id_key_index_1",
+                "unique": True
+            },
+            {
+                "key": [("task_status", 1), ("task_lease_expires_at", 1)],
+                "name": "task_status_lease_index_1",
+                "unique": False
+            },
+            {
+                "key": [("task_job_id", 1), ("task_status", 1)],
+                "name": "task_job_id_status_index_1",
+                "unique": False
+            }
+        ]
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional
+from bson.objectid import ObjectId
+from datetime import datetime
+from ..enums.UploadSessionEnums import UploadSessionStatusEnum
+
+class UploadSession(BaseModel):
+    id: Optional[ObjectId] = Field(default=None, alias="_id")
+    session_project_id: ObjectId
+    session_file_name: str = Field(..., min_length=1)
+    session_file_size: int = Field(..., gt=0)
+    # [start, end) byte ranges written so far, in arrival order; may overlap
+    session_received_ranges: List[List[int]] = Field(default_factory=list)
+    session_status: str = UploadSessionStatusEnum.OPEN.value
+    session_created_at: datetime = Field(default_factory=datetime.utcnow)
+    session_expires_at: datetime
+    session_asset_id: Optional[ObjectId] = None
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        populate_by_name=True
+    )
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key": [("session_project_id", 1)],
+                "name": "session_project_id_index_1",
+                "unique": False
+            },
+            {
+                "key": [("session_expires_at", 1)],
+                "name": "session_expires_at_index_1",
+                "unique": False
+            }
+        ]
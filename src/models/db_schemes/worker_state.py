@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Optional
+from bson.objectid import ObjectId
+from datetime import datetime
+
+class WorkerState(BaseModel):
+    id: Optional[ObjectId] = Field(default=None, alias="_id")
+    worker_name: str = Field(..., min_length=1)
+    # Change stream resume token of the last event the worker has fully handled
+    worker_resume_token: Optional[dict] = None
+    # Process currently allowed to run the worker, until its lease expires
+    worker_lease_owner: Optional[str] = None
+    worker_lease_expires_at: Optional[datetime] = None
+    worker_updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        populate_by_name=True
+    )
+
+    @classmethod
+    def get_indexes(cls):
+        return [
+            {
+                "key": [("worker_name", 1)],
+                "name": "worker_name_index_1",
+                "unique": True
+            }
+        ]
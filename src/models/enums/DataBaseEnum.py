@@ -4,4 +4,8 @@ class DataBaseEnum(Enum):
     DATABASE_NAME = "mini_rag"
     COLLECTION_PROJECT_NAME= "projects"
     COLLECTION_CHUNK_NAME = "chunks"
-    COLLECTION_ASSET_NAME = "assets"
\ No newline at end of file
+    COLLECTION_ASSET_NAME = "assets"
+    COLLECTION_UPLOAD_SESSION_NAME = "upload_sessions"
+    COLLECTION_WORKER_STATE_NAME = "worker_states"
+    COLLECTION_JOB_NAME = "jobs"
+    COLLECTION_TASK_NAME = "tasks"
@@ -0,0 +1,19 @@
+from enum import Enum
+
+class JobTypeEnum(str, Enum):
+    """
+    Kinds of background jobs, each run by its own handler.
+    """
+    PROCESS = "process"
+    INDEX = "index"
+    INGEST = "ingest"
+
+class JobStatusEnum(str, Enum):
+    """
+    Lifecycle of a background job.
+    """
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
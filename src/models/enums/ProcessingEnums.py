@@ -3,4 +3,8 @@ from enum import Enum
 class ProcessingEnums(Enum):
     TXT = ".txt"
     PDF = ".pdf"
-    DOCX = ".docx"
\ No newline at end of file
+    DOCX = ".docx"
+
+class ChunkLengthUnitEnum(Enum):
+    CHARACTERS = "characters"
+    TOKENS = "tokens"
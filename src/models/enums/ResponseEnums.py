@@ -7,6 +7,7 @@ class ResponseStatus(Enum):
 
     FILE_VALIDATION_SUCCESS = "file_validation_success"
     FILE_VALIDATED_SUCCESS = "file_validate_successfully"
+    FILE_VALIDATION_FAILED = "file_validation_failed"
     FILE_TYPE_NOT_SUPPORTED = "file_type_not_supported"
     FILE_SIZE_EXCEEDED = "file_size_exceeded"
     FILE_UPLOAD_SUCCESS = "file_upload_success"
@@ -29,4 +30,23 @@ class ResponseStatus(Enum):
     VECTORDB_SEARCH_SUCCESS = "vectordb_search_success"
     RAG_ANSWER_ERROR = "rag_answer_error"
     RAG_ANSWER_SUCCESS = "rag_answer_success"
-    RAG_ANSWER_NOT_FOUND = "rag_answer_not_found"
\ No newline at end of file
+    RAG_ANSWER_NOT_FOUND = "rag_answer_not_found"
+    VERSION_LINK_SUCCESS = "version_link_success"
+    VERSION_LINK_FAILED = "version_link_failed"
+    UPLOAD_SESSION_CREATED = "upload_session_created"
+    UPLOAD_SESSION_RETRIEVED = "upload_session_retrieved"
+    UPLOAD_SESSION_NOT_FOUND = "upload_session_not_found"
+    UPLOAD_SESSION_INCOMPLETE = "upload_session_incomplete"
+    UPLOAD_SESSION_ABORTED = "upload_session_aborted"
+    UPLOAD_RANGE_RECEIVED = "upload_range_received"
+    UPLOAD_RANGE_INVALID = "upload_range_invalid"
+    PROJECTS_LISTED = "projects_listed"
+    ASSETS_LISTED = "assets_listed"
+    INVALID_PAGE_CURSOR = "invalid_page_cursor"
+    JOB_SUBMITTED = "job_submitted"
+    JOB_RETRIEVED = "job_retrieved"
+    JOB_NOT_FOUND = "job_not_found"
+    JOBS_LISTED = "jobs_listed"
+    JOB_CANCEL_REQUESTED = "job_cancel_requested"
+    JOB_NOT_CANCELLABLE = "job_not_cancellable"
+    INGEST_SUCCESS = "ingest_success"
@@ -0,0 +1,18 @@
+from enum import Enum
+
+class TaskTypeEnum(str, Enum):
+    """
+    Units of work a distributed job is split into, claimed by any task worker.
+    """
+    PROCESS_ASSET = "process_asset"
+    INDEX_RANGE = "index_range"
+
+class TaskStatusEnum(str, Enum):
+    """
+    Lifecycle of a task: leased tasks whose lease expires are claimed again.
+    """
+    QUEUED = "queued"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
@@ -0,0 +1,9 @@
+from enum import Enum
+
+class UploadSessionStatusEnum(str, Enum):
+    """
+    Lifecycle of a resumable upload session.
+    """
+    OPEN = "open"
+    FINALIZING = "finalizing"
+    FINALIZED = "finalized"
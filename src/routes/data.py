@@ -1,19 +1,38 @@
 
 import os
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, status,Request
+import asyncio
+import zipfile
+from contextlib import ExitStack
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, Query, status,Request
 from fastapi.responses import JSONResponse
 from helper.config import get_settings, Settings
-from .schema import ProcessRequest
-from controllers import DataController,ProcessController
+from .schema import ProcessRequest, VersionLinkRequest, UploadSessionRequest
+from controllers import DataController,ProcessController,NLPController,ProcessingPipeline
+from controllers.DataController import EXTENSION_CONTENT_TYPES
+from controllers.JobRunner import JobContext
+from controllers.TaskWorker import wait_for_job_tasks, get_task_summary
 from models import ResponseStatus
-import aiofiles
 import logging
 from models.ProjectModel import ProjectModel
 from models.ChunkModel import ChunkModel
 from models.AssetModel import AssetModel
-from models.db_schemes import DataChunk,Asset
+from models.UploadSessionModel import UploadSessionModel
+from models.db_schemes import DataChunk,Asset,UploadSession,Project,Job,Task
+from models.JobModel import JobModel
+from models.TaskModel import TaskModel
+from models.enums.JobEnums import JobTypeEnum
+from models.enums.TaskEnums import TaskTypeEnum
+from models.enums.UploadSessionEnums import UploadSessionStatusEnum
+from .dependencies import get_project_model, get_asset_model, get_chunk_model, get_upload_session_model, get_job_model
+from .jobs import submit_job
+from .nlp import push_project_chunks
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
 from models.enums.AssetTypeEnum import AssetTypeEnum
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timedelta
+import json
+import time
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -31,15 +50,15 @@ data_router = APIRouter(
 
 @data_router.post("/upload/{project_id}")
 async def upload_data(
-    request: Request,
     project_id: str,
     file: UploadFile,
-    app_settings: Settings = Depends(get_settings)
+    app_settings: Settings = Depends(get_settings),
+    project_model: ProjectModel = Depends(get_project_model),
+    asset_model: AssetModel = Depends(get_asset_model)
 ):
     """
     Upload a data file to the server for a specific project.
     """
-    project_model = await ProjectModel.create_instance(db_client= request.app.mongodb_client)
     project = await project_model.get_project_or_create_one(project_id=project_id)
 
     data_controller = DataController()
@@ -57,82 +76,733 @@ async def upload_data(
             }
         )
 
-    # Step 2: Generate a unique, safe file path
-    try:
-        safe_path,file_id = await data_controller.generate_unique_filepath(file.filename, project_id)
-    except Exception as e:
-        logger.error(f"Failed to generate file path for project '{project_id}': {e}")
+    # Step 2: Hash the file into the content-addressed blob store
+    save_result = await data_controller.save_stream(
+        stream=data_controller.iter_upload_file(file),
+        file_name=file.filename,
+        check_content_type=False
+    )
+    if not save_result["valid"]:
+        logger.error(f"File upload failed for '{file.filename}': {save_result['reason']}")
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "Status": ResponseStatus.FILE_UPLOAD_FAILED.value,
-                "reason": "File path generation failed"
+                "reason": save_result["reason"]
+            }
+        )
+
+    # Step 3: Create an Asset record pointing at the blob and return its metadata
+    return await create_document_asset(
+        asset_model=asset_model, project=project, file_name=file.filename, save_result=save_result
+    )
+
+
+@data_router.post("/upload/{project_id}/stream")
+async def upload_data_stream(
+    request: Request,
+    project_id: str,
+    file_name: str = Query(..., min_length=1, description="Original file name, used for the extension"),
+    project_model: ProjectModel = Depends(get_project_model),
+    asset_model: AssetModel = Depends(get_asset_model)
+):
+    """
+    Upload a file as the raw request body. The body is streamed straight into the blob
+    store (no spooled temp file) with hashing, the size limit and type sniffing applied on the fly.
+    """
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+    logger.info(f"Received streaming upload request for project: {project_id}, file: {file_name}")
+
+    save_result, error_response = await save_request_body(request, file_name)
+    if error_response is not None:
+        return error_response
+
+    logger.info(f"File '{file_name}' streamed successfully for project '{project_id}'")
+    return await create_document_asset(
+        asset_model=asset_model, project=project, file_name=file_name, save_result=save_result
+    )
+
+
+async def save_request_body(request: Request, file_name: str) -> Tuple[Optional[dict], Optional[JSONResponse]]:
+    """
+    Streams the raw request body into the blob store. Returns the save result, or the
+    error response to send when the declared type, the size or the content is rejected.
+    """
+    data_controller = DataController()
+
+    declared_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if declared_type and declared_type != "application/octet-stream" \
+            and declared_type not in data_controller.app_settings.FILE_ALLOWED_TYPES:
+        logger.warning(f"Unsupported declared content type for '{file_name}': {declared_type}")
+        return None, JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "Status": ResponseStatus.FILE_TYPE_NOT_SUPPORTED.value,
+                "reason": f"Unsupported file type: {declared_type}"
+            }
+        )
+
+    content_length = request.headers.get("content-length")
+    save_result = await data_controller.save_stream(
+        stream=request.stream(),
+        file_name=file_name,
+        content_length=int(content_length) if content_length and content_length.isdigit() else None
+    )
+    if not save_result["valid"]:
+        status_code = status.HTTP_400_BAD_REQUEST
+        if save_result["Status"] == ResponseStatus.FILE_SIZE_EXCEEDED.value:
+            status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        elif save_result["Status"] == ResponseStatus.FILE_UPLOAD_FAILED.value:
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        return None, JSONResponse(
+            status_code=status_code,
+            content={"Status": save_result["Status"], "reason": save_result["reason"]}
+        )
+    return save_result, None
+
+
+@data_router.post("/upload/{project_id}/batch")
+async def upload_data_batch(
+    project_id: str,
+    files: List[UploadFile],
+    app_settings: Settings = Depends(get_settings),
+    project_model: ProjectModel = Depends(get_project_model),
+    asset_model: AssetModel = Depends(get_asset_model)
+):
+    """
+    Upload many files at once; zip and tar archives are expanded into their members.
+    Members are streamed into the blob store concurrently (UPLOAD_BATCH_MAX_CONCURRENCY
+    at a time), all new assets are inserted in one bulk write, and every file gets its
+    own result: a failing member never aborts the rest of the batch.
+    """
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    data_controller = DataController()
+    semaphore = asyncio.Semaphore(app_settings.UPLOAD_BATCH_MAX_CONCURRENCY)
+    logger.info(f"Received batch upload request for project: {project_id}, {len(files)} files")
+
+    accepted_files = 0
+
+    def failed(file_name: str, status_value: str, reason: str) -> dict:
+        return {"file_name": file_name, "Status": status_value, "reason": reason}
+
+    def accept_file(file_name: str) -> Optional[dict]:
+        """
+        Counts the file against UPLOAD_BATCH_MAX_FILES; returns its failed result once the cap is reached.
+        """
+        nonlocal accepted_files
+        if accepted_files >= app_settings.UPLOAD_BATCH_MAX_FILES:
+            return failed(file_name, ResponseStatus.FILE_VALIDATION_FAILED.value,
+                          f"Batch exceeds {app_settings.UPLOAD_BATCH_MAX_FILES} files")
+        accepted_files += 1
+        return None
+
+    async def save_member(file_name: str, stream, content_length: Optional[int] = None,
+                          declared_type: Optional[str] = None) -> dict:
+        if declared_type and declared_type != "application/octet-stream" \
+                and declared_type not in app_settings.FILE_ALLOWED_TYPES:
+            return failed(file_name, ResponseStatus.FILE_TYPE_NOT_SUPPORTED.value, f"Unsupported file type: {declared_type}")
+
+        async with semaphore:
+            try:
+                save_result = await data_controller.save_stream(
+                    stream=stream, file_name=file_name, content_length=content_length
+                )
+                if not save_result["valid"]:
+                    return failed(file_name, save_result["Status"], save_result["reason"])
+
+                file_path, file_id = data_controller.link_blob_to_project(
+                    content_hash=save_result["content_hash"], orig_file_name=file_name, project_id=project_id
+                )
+            except Exception as e:
+                logger.error(f"Batch upload of '{file_name}' failed: {e}")
+                return failed(file_name, ResponseStatus.FILE_UPLOAD_FAILED.value, str(e))
+
+        return {"file_name": file_name, "file_id": file_id, "file_path": file_path, "save_result": save_result}
+
+    async def save_tar_members(file: UploadFile) -> List[dict]:
+        # Tar members can only be read in order, so they are saved one after another
+        member_results = []
+        try:
+            async for member_name, member_size, member_stream in data_controller.iter_tar_members(file.file):
+                if data_controller.is_archive_member_skipped(member_name):
+                    continue
+                rejected = accept_file(member_name)
+                if rejected is not None:
+                    member_results.append(rejected)
+                    continue
+                member_results.append(await save_member(member_name, member_stream, content_length=member_size))
+        except Exception as e:
+            logger.error(f"Failed to read archive '{file.filename}': {e}")
+            member_results.append(failed(file.filename, ResponseStatus.FILE_UPLOAD_FAILED.value, f"Unreadable archive: {e}"))
+        return member_results
+
+    async def as_list(coroutine) -> List[dict]:
+        return [await coroutine]
+
+    # Per file or archive member, in upload order: its results, or the coroutine saving it
+    planned = []
+    # Zip archives stay open until their members are saved
+    with ExitStack() as open_archives:
+        for file in files:
+            archive_type = data_controller.get_archive_type(file.filename)
+            if archive_type == "zip":
+                try:
+                    archive = open_archives.enter_context(zipfile.ZipFile(file.file))
+                except Exception as e:
+                    logger.error(f"Failed to read archive '{file.filename}': {e}")
+                    planned.append([failed(file.filename, ResponseStatus.FILE_UPLOAD_FAILED.value, f"Unreadable archive: {e}")])
+                    continue
+                for info in archive.infolist():
+                    if info.is_dir() or data_controller.is_archive_member_skipped(info.filename):
+                        continue
+                    rejected = accept_file(info.filename)
+                    if rejected is not None:
+                        planned.append([rejected])
+                        continue
+                    planned.append(as_list(save_member(
+                        info.filename, data_controller.iter_zip_member(archive, info), content_length=info.file_size
+                    )))
+            elif archive_type == "tar":
+                planned.append(save_tar_members(file))
+            else:
+                rejected = accept_file(file.filename)
+                if rejected is not None:
+                    planned.append([rejected])
+                    continue
+                planned.append(as_list(save_member(
+                    file.filename, data_controller.iter_upload_file(file),
+                    declared_type=(file.content_type or "").split(";")[0].strip()
+                )))
+
+        saved_results = iter(await asyncio.gather(*(entry for entry in planned if not isinstance(entry, list))))
+        results = [
+            result for entry in planned
+            for result in (entry if isinstance(entry, list) else next(saved_results))
+        ]
+
+    # One lookup for files already in the project, one bulk insert for the rest
+    saved = [result for result in results if "save_result" in result]
+    existing_assets = await asset_model.get_assets_by_names(
+        asset_project_id=project.id, asset_names=list({result["file_id"] for result in saved})
+    )
+    new_assets = {}
+    for result in saved:
+        if result["file_id"] not in existing_assets and result["file_id"] not in new_assets:
+            new_assets[result["file_id"]] = build_document_asset(
+                project=project, file_id=result["file_id"], save_result=result["save_result"]
+            )
+
+    insert_errors = dict(zip(new_assets, await asset_model.insert_many_assets(assets=list(new_assets.values()))))
+    failed_ids = [file_id for file_id, error in insert_errors.items() if error]
+    if failed_ids:
+        # Names a concurrent upload inserted first (duplicate key) resolve to that asset
+        concurrent_assets = await asset_model.get_assets_by_names(asset_project_id=project.id, asset_names=failed_ids)
+        existing_assets.update(concurrent_assets)
+        for file_id in concurrent_assets:
+            insert_errors[file_id] = None
+
+    no_uploaded = 0
+    for result in saved:
+        save_result = result.pop("save_result")
+        file_id = result["file_id"]
+        if insert_errors.get(file_id):
+            result.update(failed(result["file_name"], ResponseStatus.FILE_UPLOAD_FAILED.value, insert_errors[file_id]))
+            result.pop("file_id")
+            result.pop("file_path")
+            continue
+
+        asset = existing_assets.get(file_id) or new_assets[file_id]
+        result.update({
+            "Status": ResponseStatus.FILE_UPLOAD_SUCCESS.value,
+            "file_id": str(asset.id),
+            "deduplicated": file_id in existing_assets or save_result["deduplicated"],
+        })
+        no_uploaded += 1
+
+    no_failed = len(results) - no_uploaded
+    logger.info(f"Batch upload for project {project_id} finished: {no_uploaded} uploaded, {no_failed} failed")
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if no_uploaded else status.HTTP_400_BAD_REQUEST,
+        content={
+            "Status": ResponseStatus.FILE_UPLOAD_SUCCESS.value if no_uploaded else ResponseStatus.FILE_UPLOAD_FAILED.value,
+            "uploaded_files": no_uploaded,
+            "failed_files": no_failed,
+            "files": results,
+        }
+    )
+
+
+def get_upload_session_expiry(app_settings: Settings) -> datetime:
+    return datetime.utcnow() + timedelta(hours=app_settings.UPLOAD_SESSION_TTL_HOURS)
+
+
+def get_upload_session_progress(data_controller: DataController, session: UploadSession) -> dict:
+    received_ranges = data_controller.merge_byte_ranges(session.session_received_ranges)
+    received_bytes = sum(end - start for start, end in received_ranges)
+    return {
+        "session_id": str(session.id),
+        "file_name": session.session_file_name,
+        "file_size": session.session_file_size,
+        "offset": data_controller.get_received_offset(received_ranges),
+        "received_bytes": received_bytes,
+        "received_ranges": received_ranges,
+        "complete": received_bytes == session.session_file_size,
+        "session_status": session.session_status,
+        "expires_at": session.session_expires_at.isoformat(),
+    }
+
+
+async def purge_expired_upload_sessions(session_model: UploadSessionModel, data_controller: DataController) -> int:
+    """
+    Removes abandoned sessions together with their partial data on disk.
+    """
+    expired_sessions = await session_model.get_expired_sessions(now=datetime.utcnow())
+    for session in expired_sessions:
+        data_controller.remove_upload_session_file(str(session.id))
+        await session_model.delete_session(session.id)
+    if expired_sessions:
+        logger.info(f"Removed {len(expired_sessions)} expired upload sessions")
+    return len(expired_sessions)
+
+
+async def get_open_upload_session(project_model: ProjectModel, session_model: UploadSessionModel,
+                                  project_id: str, session_id: str):
+    """
+    Resolves the project and an unexpired upload session of it; the last value is an
+    error response when the session does not exist.
+    """
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    session = None
+    if ObjectId.is_valid(session_id):
+        session = await session_model.get_session(session_id=ObjectId(session_id), project_id=project.id)
+    if session is None or session.session_expires_at < datetime.utcnow():
+        logger.warning(f"Upload session {session_id} not found in project {project_id}")
+        return project, None, JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"status": ResponseStatus.UPLOAD_SESSION_NOT_FOUND.value}
+        )
+    return project, session, None
+
+
+@data_router.post("/upload/{project_id}/sessions")
+async def create_upload_session(
+    project_id: str,
+    session_request: UploadSessionRequest,
+    app_settings: Settings = Depends(get_settings),
+    project_model: ProjectModel = Depends(get_project_model),
+    session_model: UploadSessionModel = Depends(get_upload_session_model)
+):
+    """
+    Start a resumable upload. Byte ranges are then PUT to the session in any order (or in
+    parallel), the received offset can be queried to resume, and finalizing the session
+    turns it into a normal asset.
+    """
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+    data_controller = DataController()
+    file_name = session_request.file_name
+    logger.info(f"Creating upload session for project: {project_id}, file: {file_name} ({session_request.file_size} bytes)")
+
+    expected_type = EXTENSION_CONTENT_TYPES.get(os.path.splitext(file_name)[-1].lower())
+    if expected_type not in app_settings.FILE_ALLOWED_TYPES:
+        logger.warning(f"Unsupported file type for upload session: {file_name}")
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "Status": ResponseStatus.FILE_TYPE_NOT_SUPPORTED.value,
+                "reason": f"Unsupported file type: {file_name}"
+            }
+        )
+
+    if session_request.file_size > app_settings.UPLOAD_SESSION_MAX_SIZE * 1024 * 1024:
+        logger.warning(f"Upload session for {file_name} exceeds {app_settings.UPLOAD_SESSION_MAX_SIZE}MB")
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={
+                "Status": ResponseStatus.FILE_SIZE_EXCEEDED.value,
+                "reason": f"File exceeds limit of {app_settings.UPLOAD_SESSION_MAX_SIZE}MB"
             }
         )
 
-    # Step 3: Save the file in chunks
+    await purge_expired_upload_sessions(session_model, data_controller)
+
+    session = await session_model.create_session(UploadSession(
+        session_project_id=project.id,
+        session_file_name=file_name,
+        session_file_size=session_request.file_size,
+        session_expires_at=get_upload_session_expiry(app_settings),
+    ))
     try:
-        async with aiofiles.open(safe_path, 'wb') as out_file:
-            while chunk := await file.read(app_settings.FILE_DEFAULT_CHUNK_SIZE):
-                await out_file.write(chunk)
-        logger.info(f"File '{file.filename}' uploaded successfully to '{safe_path}' for project '{project_id}'")
+        data_controller.create_upload_session_file(str(session.id), session_request.file_size)
     except Exception as e:
-        logger.error(f"File upload failed: {e}")
+        logger.error(f"Failed to allocate upload session file for {file_name}: {e}")
+        await session_model.delete_session(session.id)
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "Status": ResponseStatus.FILE_UPLOAD_FAILED.value,
-                "reason": str(e)
+                "reason": "Upload session file allocation failed"
+            }
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            "status": ResponseStatus.UPLOAD_SESSION_CREATED.value,
+            **get_upload_session_progress(data_controller, session)
+        }
+    )
+
+
+@data_router.put("/upload/{project_id}/sessions/{session_id}")
+async def upload_session_range(
+    request: Request,
+    project_id: str,
+    session_id: str,
+    app_settings: Settings = Depends(get_settings),
+    project_model: ProjectModel = Depends(get_project_model),
+    session_model: UploadSessionModel = Depends(get_upload_session_model)
+):
+    """
+    Upload one byte range of a session as the raw request body, described by a
+    `Content-Range: bytes <first>-<last>/<total>` header. Ranges may be sent in any order
+    and concurrently; whatever part of a range arrived before a dropped connection is kept.
+    """
+    project, session, error_response = await get_open_upload_session(project_model, session_model, project_id, session_id)
+    if error_response:
+        return error_response
+
+    data_controller = DataController()
+    if session.session_status != UploadSessionStatusEnum.OPEN.value:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "status": ResponseStatus.UPLOAD_RANGE_INVALID.value,
+                "reason": f"Upload session is {session.session_status}",
+                **get_upload_session_progress(data_controller, session)
+            }
+        )
+
+    byte_range = data_controller.parse_content_range(request.headers.get("content-range"), session.session_file_size)
+    if byte_range is None:
+        logger.warning(f"Invalid Content-Range for upload session {session_id}: {request.headers.get('content-range')}")
+        return JSONResponse(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            content={
+                "status": ResponseStatus.UPLOAD_RANGE_INVALID.value,
+                "reason": f"Expected Content-Range: bytes <first>-<last>/{session.session_file_size}",
+                **get_upload_session_progress(data_controller, session)
             }
         )
-    # Step 4: Create an Asset record
-    asset_model = await AssetModel.create_instance(db_client=request.app.mongodb_client)
-    asset_resource = Asset(
+
+    start, end = byte_range
+    write_result = await data_controller.write_range(
+        stream=request.stream(),
+        file_path=data_controller.get_upload_session_path(session_id),
+        start=start,
+        end=end
+    )
+
+    if write_result["written"]:
+        updated_session = await session_model.add_received_range(
+            session_id=session.id,
+            start=start,
+            end=start + write_result["written"],
+            expires_at=get_upload_session_expiry(app_settings)
+        )
+        session = updated_session or session
+
+    if not write_result["valid"]:
+        status_code = status.HTTP_400_BAD_REQUEST
+        if write_result["Status"] == ResponseStatus.FILE_UPLOAD_FAILED.value:
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        return JSONResponse(
+            status_code=status_code,
+            content={
+                "status": write_result["Status"],
+                "reason": write_result["reason"],
+                **get_upload_session_progress(data_controller, session)
+            }
+        )
+
+    logger.info(f"Upload session {session_id} received bytes [{start}, {end})")
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": ResponseStatus.UPLOAD_RANGE_RECEIVED.value,
+            **get_upload_session_progress(data_controller, session)
+        }
+    )
+
+
+@data_router.get("/upload/{project_id}/sessions/{session_id}")
+async def get_upload_session(
+    project_id: str,
+    session_id: str,
+    project_model: ProjectModel = Depends(get_project_model),
+    session_model: UploadSessionModel = Depends(get_upload_session_model)
+):
+    """
+    Report which byte ranges of a session have been received, and the offset to resume from.
+    """
+    _, session, error_response = await get_open_upload_session(project_model, session_model, project_id, session_id)
+    if error_response:
+        return error_response
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": ResponseStatus.UPLOAD_SESSION_RETRIEVED.value,
+            **get_upload_session_progress(DataController(), session)
+        }
+    )
+
+
+@data_router.post("/upload/{project_id}/sessions/{session_id}/finalize")
+async def finalize_upload_session(
+    project_id: str,
+    session_id: str,
+    app_settings: Settings = Depends(get_settings),
+    project_model: ProjectModel = Depends(get_project_model),
+    asset_model: AssetModel = Depends(get_asset_model),
+    session_model: UploadSessionModel = Depends(get_upload_session_model)
+):
+    """
+    Turn a completely received session into an asset, exactly like a regular upload.
+    Finalizing an already finalized session returns the same asset again.
+    """
+    project, session, error_response = await get_open_upload_session(project_model, session_model, project_id, session_id)
+    if error_response:
+        return error_response
+
+    data_controller = DataController()
+    if session.session_status == UploadSessionStatusEnum.FINALIZED.value and session.session_asset_id:
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "Status": ResponseStatus.FILE_UPLOAD_SUCCESS.value,
+                "file_id": str(session.session_asset_id),
+            }
+        )
+
+    progress = get_upload_session_progress(data_controller, session)
+    if not progress["complete"]:
+        logger.warning(f"Upload session {session_id} finalized with {progress['received_bytes']} of {progress['file_size']} bytes")
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"status": ResponseStatus.UPLOAD_SESSION_INCOMPLETE.value, **progress}
+        )
+
+    session = await session_model.set_session_status(
+        session_id=session.id,
+        status=UploadSessionStatusEnum.FINALIZING.value,
+        from_status=UploadSessionStatusEnum.OPEN.value,
+        expires_at=get_upload_session_expiry(app_settings)
+    )
+    if session is None:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "status": ResponseStatus.UPLOAD_RANGE_INVALID.value,
+                "reason": "Upload session is already being finalized"
+            }
+        )
+
+    save_result = await data_controller.finalize_upload_file(
+        file_path=data_controller.get_upload_session_path(session_id),
+        file_name=session.session_file_name
+    )
+    if not save_result["valid"]:
+        if save_result["Status"] == ResponseStatus.FILE_UPLOAD_FAILED.value:
+            # Keep the received data so finalizing can be retried
+            await session_model.set_session_status(
+                session_id=session.id,
+                status=UploadSessionStatusEnum.OPEN.value,
+                from_status=UploadSessionStatusEnum.FINALIZING.value
+            )
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        else:
+            # The content itself is rejected, so the session can't ever succeed
+            data_controller.remove_upload_session_file(session_id)
+            await session_model.delete_session(session.id)
+            status_code = status.HTTP_400_BAD_REQUEST
+        return JSONResponse(
+            status_code=status_code,
+            content={"Status": save_result["Status"], "reason": save_result["reason"]}
+        )
+
+    response = await create_document_asset(
+        asset_model=asset_model, project=project, file_name=session.session_file_name, save_result=save_result
+    )
+    if response.status_code < 300:
+        await session_model.set_session_status(
+            session_id=session.id,
+            status=UploadSessionStatusEnum.FINALIZED.value,
+            from_status=UploadSessionStatusEnum.FINALIZING.value,
+            asset_id=ObjectId(json.loads(response.body)["file_id"])
+        )
+    else:
+        # The data already left the session file, so a retry has to start a new session
+        await session_model.delete_session(session.id)
+    logger.info(f"Upload session {session_id} finalized for project '{project_id}'")
+    return response
+
+
+@data_router.delete("/upload/{project_id}/sessions/{session_id}")
+async def abort_upload_session(
+    project_id: str,
+    session_id: str,
+    project_model: ProjectModel = Depends(get_project_model),
+    session_model: UploadSessionModel = Depends(get_upload_session_model)
+):
+    """
+    Abort a session and discard its partial data.
+    """
+    _, session, error_response = await get_open_upload_session(project_model, session_model, project_id, session_id)
+    if error_response:
+        return error_response
+
+    if session.session_status == UploadSessionStatusEnum.FINALIZING.value:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                "status": ResponseStatus.UPLOAD_RANGE_INVALID.value,
+                "reason": "Upload session is being finalized"
+            }
+        )
+
+    DataController().remove_upload_session_file(session_id)
+    await session_model.delete_session(session.id)
+    logger.info(f"Upload session {session_id} aborted")
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"status": ResponseStatus.UPLOAD_SESSION_ABORTED.value, "session_id": session_id}
+    )
+
+
+def build_document_asset(project, file_id: str, save_result: dict) -> Asset:
+    return Asset(
         asset_project_id=ObjectId(project.id),
         asset_type=AssetTypeEnum.DOCUMENT,
         asset_name=file_id,
-        asset_size=os.path.getsize(safe_path),
+        asset_size=save_result["size"],
+        asset_blob_hash=save_result["content_hash"],
     )
+
+
+async def get_or_create_document_asset(asset_model: AssetModel, project, file_name: str,
+                                       save_result: dict) -> Tuple[Asset, str, bool]:
+    """
+    Exposes a stored blob in the project and records it as an Asset. Uploading the same
+    content under the same name again returns the existing asset instead of a new copy.
+    Returns the asset, its file path and whether it already existed; raises RuntimeError
+    with the reason to report on failure.
+    """
+    content_hash = save_result["content_hash"]
+    try:
+        file_path, file_id = DataController().link_blob_to_project(
+            content_hash=content_hash, orig_file_name=file_name, project_id=project.project_id
+        )
+    except Exception as e:
+        logger.error(f"Failed to link blob {content_hash} into project '{project.project_id}': {e}")
+        raise RuntimeError("File path generation failed") from e
+
+    asset = await asset_model.get_asset_record(asset_project_id=project.id, asset_name=file_id)
+    if asset is not None:
+        logger.info(f"File '{file_name}' already uploaded to project '{project.project_id}' as asset {asset.id}")
+        return asset, str(file_path), True
+
+    asset_resource = build_document_asset(project=project, file_id=file_id, save_result=save_result)
     try:
         asset = await asset_model.create_asset(asset=asset_resource)
         logger.info(f"Asset created successfully with ID: {asset.id}")
+    except DuplicateKeyError:
+        # A concurrent upload of the same name created it first
+        asset = await asset_model.get_asset_record(asset_project_id=project.id, asset_name=file_id)
+        if asset is None:
+            raise RuntimeError("Asset creation failed")
+        logger.info(f"File '{file_name}' uploaded concurrently to project '{project.project_id}' as asset {asset.id}")
+        return asset, str(file_path), True
     except Exception as e:
         logger.error(f"Failed to create asset record: {e}")
+        raise RuntimeError("Asset creation failed") from e
+    return asset, str(file_path), False
+
+
+async def create_document_asset(asset_model: AssetModel, project, file_name: str, save_result: dict) -> JSONResponse:
+    try:
+        asset, file_path, existed = await get_or_create_document_asset(
+            asset_model=asset_model, project=project, file_name=file_name, save_result=save_result
+        )
+    except RuntimeError as e:
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "Status": ResponseStatus.FILE_UPLOAD_FAILED.value,
-                "reason": "Asset creation failed"
+                "reason": str(e)
             }
         )
-    
 
-    # Step 5: Return success response with metadata
     return JSONResponse(
-        status_code=status.HTTP_201_CREATED,
+        status_code=status.HTTP_200_OK if existed else status.HTTP_201_CREATED,
         content={
             "Status": ResponseStatus.FILE_UPLOAD_SUCCESS.value,
             "file_id": str(asset.id),
-            "file_path": str(safe_path),
-
+            "file_path": file_path,
+            "deduplicated": existed or save_result["deduplicated"],
         }
     )
 
 
-@data_router.post("/process/{project_id}")
-async def process_endpoint(request: Request, project_id: str, process_request: ProcessRequest):
-    logger.info(f"Starting file processing for project_id: {project_id}")
+def get_process_file_ids(process_request: ProcessRequest) -> List[str]:
+    return list(dict.fromkeys(
+        ([process_request.file_id] if process_request.file_id else []) + (process_request.file_ids or [])
+    ))
+
+
+def create_processing_pipeline(app, project: Project, process_request: ProcessRequest,
+                               **callbacks) -> ProcessingPipeline:
+    """
+    A ProcessingPipeline running `process_request` on the project, with the app's models,
+    clients and process pool; `callbacks` are its on_progress / on_chunks_unindexed.
+    """
+    nlp_controller = NLPController(
+        vectordb_client=app.vectordb_client,
+        generation_client=app.generation_client,
+        embedding_client=app.embedding_client,
+        template_parser=app.template_parser,
+        lexical_index_client=app.lexical_index_client
+    )
+    return ProcessingPipeline(
+        project=project,
+        project_model=app.models.project_model,
+        asset_model=app.models.asset_model,
+        chunk_model=app.models.chunk_model,
+        nlp_controller=nlp_controller,
+        chunk_size=process_request.chunk_size,
+        overlap_size=process_request.overlap_size,
+        do_reset=process_request.do_reset,
+        do_stream=process_request.do_stream,
+        executor=app.process_pool,
+        **callbacks
+    )
 
-    chunk_size = process_request.chunk_size
-    overlap_size = process_request.overlap_size
-    do_reset = process_request.do_reset
 
-    logger.debug(f"chunk_size: {chunk_size}, overlap_size: {overlap_size}, do_reset: {do_reset}")
+@data_router.post("/process/{project_id}")
+async def process_endpoint(
+    request: Request,
+    project_id: str,
+    process_request: ProcessRequest,
+    project_model: ProjectModel = Depends(get_project_model),
+    asset_model: AssetModel = Depends(get_asset_model),
+    job_model: JobModel = Depends(get_job_model)
+):
+    logger.info(f"Starting file processing for project_id: {project_id}")
+    logger.debug(f"chunk_size: {process_request.chunk_size}, overlap_size: {process_request.overlap_size}, "
+                 f"do_reset: {process_request.do_reset}, do_stream: {process_request.do_stream}")
 
     try:
-        project_model = await ProjectModel.create_instance(
-            db_client=request.app.mongodb_client
-        )
         project = await project_model.get_project_or_create_one(
             project_id=project_id
         )
@@ -141,110 +811,585 @@ async def process_endpoint(request: Request, project_id: str, process_request: P
         logger.exception(f"Failed to initialize or retrieve project: {project_id}")
         raise
 
-    asset_model = await AssetModel.create_instance(
-        db_client=request.app.mongodb_client
-    )
-
-    project_files_ids = {}
-
     try:
-        if process_request.file_id:
-            logger.info(f"Fetching specific file: {process_request.file_id}")
-            asset_record = await asset_model.get_asset_record(
+        file_ids = get_process_file_ids(process_request)
+        if file_ids:
+            logger.info(f"Fetching specific files: {file_ids}")
+            asset_records = await asset_model.get_asset_records(
                 asset_project_id=project.id,
-                asset_name=process_request.file_id
+                asset_names=file_ids
             )
 
-            if asset_record is None:
-                logger.warning(f"No file found with name: {process_request.file_id}")
+            missing_file_ids = [file_id for file_id in file_ids if file_id not in asset_records]
+            if missing_file_ids:
+                logger.warning(f"No file found with name: {missing_file_ids}")
                 return JSONResponse(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     content={"status": ResponseStatus.FILE_ID_ERROR.value}
                 )
 
-            project_files_ids = {asset_record.id: asset_record.asset_name}
+            # Case variants of one name resolve to the same asset; _id order, as for the full stream
+            selected_assets = sorted({asset.id: asset for asset in asset_records.values()}.values(),
+                                     key=lambda asset: asset.id)
+
+            async def iter_assets():
+                for asset in selected_assets:
+                    yield asset
         else:
-            logger.info(f"Fetching all DOCUMENT-type assets for project: {project.id}")
-            project_files = await asset_model.get_all_project_assets(
+            logger.info(f"Streaming all DOCUMENT-type assets for project: {project.id}")
+            stored_assets = asset_model.iter_project_assets(
                 asset_project_id=project.id,
                 asset_type=AssetTypeEnum.DOCUMENT.value,
             )
-            project_files_ids = {
-                record.id: record.asset_name for record in project_files
-            }
+            first_asset = await anext(stored_assets, None)
 
-        if len(project_files_ids) == 0:
-            logger.warning(f"No documents found for project: {project.id}")
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"status": ResponseStatus.NO_FILES_ERROR.value}
-            )
+            if first_asset is None:
+                logger.warning(f"No documents found for project: {project.id}")
+                return JSONResponse(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    content={"status": ResponseStatus.NO_FILES_ERROR.value}
+                )
+
+            async def iter_assets():
+                yield first_asset
+                async for asset in stored_assets:
+                    yield asset
     except Exception as e:
         logger.exception(f"Failed to retrieve project files for project: {project_id}")
         raise
 
-    process_controller = ProcessController(project_id=project_id)
+    if process_request.run_as_job or process_request.distributed:
+        return await submit_job(request, job_model, Job(
+            job_project_id=project.id,
+            job_type=JobTypeEnum.PROCESS.value,
+            job_params=process_request.model_dump(exclude={"run_as_job"})
+        ))
+
+    results = await create_processing_pipeline(request.app, project, process_request).run(iter_assets())
 
-    no_records = 0
-    no_files = 0
+    if results["empty_files"]:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"status": ResponseStatus.PROCESSING_FAILED.value}
+        )
 
-    chunk_model = await ChunkModel.create_instance(
-        db_client=request.app.mongodb_client
+    no_records = results["inserted_chunks"]
+    no_duplicates = results["duplicate_chunks"]
+    duplicate_ratio = round(no_duplicates / no_records, 4) if no_records else 0.0
+    logger.info(f"Processing completed. Total files: {results['processed_files']}, Total chunks: {no_records}, "
+                f"Reused chunks: {results['reused_chunks']}, Duplicates: {no_duplicates} ({duplicate_ratio:.1%}), "
+                f"Failed chunks: {results['failed_chunks']}, Failed files: {results['failed_files']}, "
+                f"Skipped unchanged: {results['skipped_files']}")
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "Status": ResponseStatus.PROCESSING_SUCCESS.value,
+            "inserted_chunks": no_records,
+            "duplicate_chunks": no_duplicates,
+            "duplicate_ratio": duplicate_ratio,
+            "reused_chunks": results["reused_chunks"],
+            "failed_chunks": results["failed_chunks"],
+            "processed_files": results["processed_files"],
+            "skipped_files": results["skipped_files"],
+            "failed_files": results["failed_files"]
+        }
     )
 
-    if do_reset == 1:
-        logger.info(f"Reset flag is set. Deleting old chunks for project: {project.id}")
-        deleted_count = await chunk_model.delete_chunks_by_project_id(project_id=project.id)
-        logger.info(f"Deleted {deleted_count} old chunks")
 
-    for asset_id, file_id in project_files_ids.items():
-        try:
-            logger.info(f"Processing file: {file_id}")
-            file_content = process_controller.get_file_content(file_id=file_id)
-
-            if file_content is None:
-                logger.error(f"No content returned for file: {file_id}")
-                continue
-
-            file_chunks = process_controller.process_file_content(
-                file_content=file_content,
-                file_id=file_id,
-                chunk_size=chunk_size,
-                overlap_size=overlap_size
+async def run_process_job(app, job: Job, context: JobContext) -> dict:
+    """
+    Handler of process jobs: replays the submitted request on the project's assets,
+    starting after the checkpointed asset when the job is resumed.
+    """
+    process_request = ProcessRequest(**job.job_params)
+    models = app.models
+    project = await models.project_model.get_project_by_id(project_object_id=job.job_project_id)
+    if project is None:
+        raise ValueError(f"Project {job.job_project_id} no longer exists")
+
+    after_id = context.checkpoint.get("after_asset_id")
+    file_ids = get_process_file_ids(process_request)
+    if file_ids:
+        asset_records = await models.asset_model.get_asset_records(asset_project_id=project.id, asset_names=file_ids)
+        selected_assets = sorted(
+            {asset.id: asset for asset in asset_records.values() if after_id is None or asset.id > after_id}.values(),
+            key=lambda asset: asset.id
+        )
+
+        async def iter_assets():
+            for asset in selected_assets:
+                yield asset
+
+        assets = iter_assets()
+    else:
+        assets = models.asset_model.iter_project_assets(
+            asset_project_id=project.id,
+            asset_type=AssetTypeEnum.DOCUMENT.value,
+            after_id=after_id
+        )
+
+    if process_request.distributed:
+        return await run_distributed_process_job(app, job, context, assets)
+
+    async def on_progress(increments: dict, checkpoint_id: Optional[ObjectId]):
+        await context.report(
+            checkpoint={"after_asset_id": checkpoint_id} if checkpoint_id is not None else None,
+            **increments
+        )
+
+    results = await create_processing_pipeline(app, project, process_request, on_progress=on_progress).run(assets)
+    if results["empty_files"]:
+        raise ValueError(f"No chunks generated for files: {results['empty_files']}")
+    return results
+
+
+async def run_distributed_process_job(app, job: Job, context: JobContext, assets: AsyncIterator[Asset]) -> dict:
+    """
+    Splits a process job into one task per asset, then waits while the task workers of
+    every process run them. A resumed job only enqueues the assets it had not reached.
+
+    Near-duplicate detection still spans files through the stored canonical chunks, but
+    tasks running at the same time don't see each other's uncommitted batches: two files
+    processed concurrently can each keep a canonical copy of the same text.
+    """
+    app_settings = get_settings()
+    task_model = app.models.task_model
+
+    if not context.checkpoint.get("fanned_out"):
+        batch = []
+
+        async def enqueue_batch():
+            await task_model.enqueue_tasks(batch)
+            await context.report(checkpoint={"after_asset_id": batch[-1].task_params["asset_id"]})
+            batch.clear()
+
+        async for asset in assets:
+            batch.append(Task(
+                task_job_id=job.id,
+                task_project_id=job.job_project_id,
+                task_type=TaskTypeEnum.PROCESS_ASSET.value,
+                task_key=str(asset.id),
+                task_params={"asset_id": asset.id, "process_request": job.job_params}
+            ))
+            if len(batch) >= TaskModel.ENQUEUE_BATCH_SIZE:
+                await enqueue_batch()
+        if batch:
+            await enqueue_batch()
+        await context.report(checkpoint={"fanned_out": True})
+
+    counts = await wait_for_job_tasks(
+        task_model=task_model,
+        context=context,
+        poll_seconds=app_settings.TASK_POLL_SECONDS,
+        max_attempts=app_settings.TASK_MAX_ATTEMPTS
+    )
+    summary = get_task_summary(counts)
+    if summary.get("failed_tasks"):
+        raise ValueError(f"{summary['failed_tasks']} file tasks failed: {summary}")
+    return summary
+
+
+async def run_process_asset_task(app, task: Task) -> dict:
+    """
+    Handler of process_asset tasks: processes one asset of a distributed process job.
+    """
+    models = app.models
+    project = await models.project_model.get_project_by_id(project_object_id=task.task_project_id)
+    asset = await models.asset_model.get_asset_by_id(asset_id=task.task_params["asset_id"])
+    if project is None or asset is None:
+        # Deleted since the job was submitted: nothing left to do
+        return {"files": 0, "chunks": 0, "errors": 0}
+
+    async def iter_assets():
+        yield asset
+
+    process_request = ProcessRequest(**task.task_params["process_request"])
+    results = await create_processing_pipeline(app, project, process_request).run(iter_assets())
+    if results["failed_files"] or results["empty_files"]:
+        # Retried by the queue while the task has attempts left
+        raise ValueError(f"Processing file {asset.asset_name} failed")
+    return {
+        "files": 1,
+        "chunks": results["inserted_chunks"],
+        "errors": results["failed_chunks"],
+    }
+
+
+async def ingest_project_assets(
+    app,
+    project: Project,
+    assets: AsyncIterator[Asset],
+    process_request: ProcessRequest,
+    app_settings: Settings,
+    chunk_model: ChunkModel,
+    on_progress: Optional[Callable[[dict], Awaitable]] = None,
+    resumed: bool = False
+) -> dict:
+    """
+    Processes `assets` and indexes their chunks in one pass: while pages are still being
+    parsed and chunked, an indexer embeds and upserts the chunk batches already written,
+    handed over through a bounded queue, so the files are searchable about as soon as the
+    slowest stage is done. Parsing waits while INGEST_QUEUE_BATCHES batches are waiting to be
+    indexed, and stops as soon as the indexer fails. A `resumed` run then also pushes the
+    project's chunks left unindexed.
+    Returns the processing counters plus `indexed_chunks`; `on_progress` gets the counter
+    increments (files, chunks, errors from processing, vectors from indexing).
+    """
+    nlp_controller = NLPController(
+        vectordb_client=app.vectordb_client,
+        generation_client=app.generation_client,
+        embedding_client=app.embedding_client,
+        template_parser=app.template_parser,
+        lexical_index_client=app.lexical_index_client
+    )
+    # Chunk batches written by the processing side, in order; None once processing is done
+    unindexed_batches: asyncio.Queue = asyncio.Queue(maxsize=max(1, app_settings.INGEST_QUEUE_BATCHES))
+
+    async def report(increments: dict):
+        if on_progress is not None:
+            await on_progress(increments)
+
+    async def on_process_progress(increments: dict, checkpoint_id: Optional[ObjectId]):
+        await report(increments)
+
+    async def on_index_checkpoint(chunks_count: int, last_chunk_id: ObjectId):
+        if chunks_count:
+            await report({"vectors": chunks_count})
+
+    async def iter_unindexed_batches():
+        while (batch := await unindexed_batches.get()) is not None:
+            yield batch
+
+    async def index_while_processing() -> int:
+        indexed_count = await push_project_chunks(
+            nlp_controller=nlp_controller,
+            chunk_model=chunk_model,
+            project=project,
+            checkpoint_pages=app_settings.INDEX_CHECKPOINT_PAGES,
+            on_checkpoint=on_index_checkpoint,
+            chunk_batches=iter_unindexed_batches()
+        )
+        if resumed:
+            # Chunks an interrupted run wrote but never indexed aren't written again
+            indexed_count += await push_project_chunks(
+                nlp_controller=nlp_controller,
+                chunk_model=chunk_model,
+                project=project,
+                checkpoint_pages=app_settings.INDEX_CHECKPOINT_PAGES,
+                on_checkpoint=on_index_checkpoint
             )
+        return indexed_count
 
-            if not file_chunks:
-                logger.warning(f"No chunks generated for file: {file_id}")
-                return JSONResponse(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    content={"status": ResponseStatus.PROCESSING_FAILED.value}
-                )
+    indexer = asyncio.create_task(index_while_processing())
+    pipeline = create_processing_pipeline(
+        app, project, process_request,
+        on_progress=on_process_progress,
+        on_chunks_unindexed=unindexed_batches.put
+    )
+    processing = asyncio.create_task(pipeline.run(assets))
+    try:
+        await asyncio.wait({processing, indexer}, return_when=asyncio.FIRST_COMPLETED)
+        if not processing.done():
+            # The indexer only returns after the final None: it failed, so stop parsing now
+            processing.cancel()
+            await asyncio.gather(processing, return_exceptions=True)
+            indexer.result()
+            raise RuntimeError("Indexer stopped before processing was done")
 
-            file_chunks_records = [
-                DataChunk(
-                    chunk_text=chunk.page_content,
-                    chunk_metadata=chunk.metadata,
-                    chunk_order=i + 1,
-                    chunk_project_id=project.id,
-                    chunk_asset_id=asset_id
-                )
-                for i, chunk in enumerate(file_chunks)
-            ]
+        results = processing.result()
+        await unindexed_batches.put(None)
+        results["indexed_chunks"] = await indexer
+        return results
+    except BaseException:
+        processing.cancel()
+        indexer.cancel()
+        raise
 
-            inserted = await chunk_model.insert_many_chunks(chunks=file_chunks_records)
-            no_records += inserted
-            no_files += 1
 
-            logger.info(f"File {file_id} processed: {inserted} chunks inserted.")
-        except Exception as e:
-            logger.exception(f"Error occurred while processing file {file_id}")
+@data_router.post("/ingest/{project_id}")
+async def ingest_data_stream(
+    request: Request,
+    project_id: str,
+    file_name: str = Query(..., min_length=1, description="Original file name, used for the extension"),
+    chunk_size: int = Query(default=1024 * 1024, gt=0),
+    overlap_size: int = Query(default=20, ge=0),
+    run_as_job: int = Query(default=1, description="1 = answer with a job id right away and report progress on the job, 0 = answer once the file is searchable"),
+    app_settings: Settings = Depends(get_settings),
+    project_model: ProjectModel = Depends(get_project_model),
+    asset_model: AssetModel = Depends(get_asset_model),
+    chunk_model: ChunkModel = Depends(get_chunk_model),
+    job_model: JobModel = Depends(get_job_model)
+):
+    """
+    Upload, process and index one file in a single call. The raw body is streamed into the
+    blob store, then its pages stream into chunking and bulk chunk writes while the written
+    chunks are embedded and upserted, instead of separate upload, process and push calls.
+    """
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+    logger.info(f"Received ingest request for project: {project_id}, file: {file_name}")
 
-    logger.info(f"Processing completed. Total files: {no_files}, Total chunks: {no_records}")
+    save_result, error_response = await save_request_body(request, file_name)
+    if error_response is not None:
+        return error_response
+
+    try:
+        asset, _, _ = await get_or_create_document_asset(
+            asset_model=asset_model, project=project, file_name=file_name, save_result=save_result
+        )
+    except RuntimeError as e:
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={"Status": ResponseStatus.FILE_UPLOAD_FAILED.value, "reason": str(e)}
+        )
+
+    process_request = ProcessRequest(
+        file_id=asset.asset_name,
+        chunk_size=chunk_size,
+        overlap_size=overlap_size,
+        do_stream=1
+    )
+    if run_as_job:
+        return await submit_job(request, job_model, Job(
+            job_project_id=project.id,
+            job_type=JobTypeEnum.INGEST.value,
+            job_params=process_request.model_dump(exclude={"run_as_job", "distributed"})
+        ), extra_content={"file_id": str(asset.id)})
+
+    async def iter_assets():
+        yield asset
+
+    started_at = time.perf_counter()
+    results = await ingest_project_assets(
+        app=request.app,
+        project=project,
+        assets=iter_assets(),
+        process_request=process_request,
+        app_settings=app_settings,
+        chunk_model=chunk_model
+    )
+    elapsed_seconds = round(time.perf_counter() - started_at, 3)
+
+    if results["empty_files"] or results["failed_files"]:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"Status": ResponseStatus.PROCESSING_FAILED.value, "file_id": str(asset.id)}
+        )
+
+    logger.info(f"Ingested '{file_name}' into project {project_id} in {elapsed_seconds}s: "
+                f"{results['inserted_chunks']} chunks inserted, {results['indexed_chunks']} indexed")
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content={
-            "Status": ResponseStatus.PROCESSING_SUCCESS.value,
-            "inserted_chunks": no_records,
-            "processed_files": no_files
+            "Status": ResponseStatus.INGEST_SUCCESS.value,
+            "file_id": str(asset.id),
+            "inserted_chunks": results["inserted_chunks"],
+            "duplicate_chunks": results["duplicate_chunks"],
+            "reused_chunks": results["reused_chunks"],
+            "failed_chunks": results["failed_chunks"],
+            "skipped_files": results["skipped_files"],
+            "indexed_chunks": results["indexed_chunks"],
+            "elapsed_seconds": elapsed_seconds,
         }
-    )
\ No newline at end of file
+    )
+
+
+async def run_ingest_job(app, job: Job, context: JobContext) -> dict:
+    """
+    Handler of ingest jobs. A resumed job simply runs again: the file is skipped as
+    unchanged once it was processed, and only chunks not indexed yet are pushed.
+    """
+    # Set on the first run, so a run that finds it knows an earlier one was interrupted
+    resumed = bool(context.checkpoint.get("ingest_started"))
+    await context.report(checkpoint={"ingest_started": True})
+    process_request = ProcessRequest(**job.job_params)
+    models = app.models
+    project = await models.project_model.get_project_by_id(project_object_id=job.job_project_id)
+    if project is None:
+        raise ValueError(f"Project {job.job_project_id} no longer exists")
+
+    asset_records = await models.asset_model.get_asset_records(
+        asset_project_id=project.id, asset_names=get_process_file_ids(process_request)
+    )
+
+    async def iter_assets():
+        for asset in sorted({asset.id: asset for asset in asset_records.values()}.values(),
+                            key=lambda asset: asset.id):
+            yield asset
+
+    async def on_progress(increments: dict):
+        await context.report(**increments)
+
+    results = await ingest_project_assets(
+        app=app,
+        project=project,
+        assets=iter_assets(),
+        process_request=process_request,
+        app_settings=get_settings(),
+        chunk_model=models.chunk_model,
+        on_progress=on_progress,
+        resumed=resumed
+    )
+    if results["empty_files"]:
+        raise ValueError(f"No chunks generated for files: {results['empty_files']}")
+    if results["failed_files"]:
+        raise ValueError(f"Processing failed for {results['failed_files']} files")
+    return results
+
+
+@data_router.post("/version/{project_id}")
+async def link_asset_version(
+    project_id: str,
+    link_request: VersionLinkRequest,
+    project_model: ProjectModel = Depends(get_project_model),
+    asset_model: AssetModel = Depends(get_asset_model)
+):
+    """
+    Link an uploaded file as the new version of an existing file. The next processing
+    run re-chunks the new version, reusing the chunks (and vectors) whose text is unchanged.
+    """
+    logger.info(f"Linking {link_request.file_id} as a new version of {link_request.previous_file_id} in project {project_id}")
+
+    project = await project_model.get_project_or_create_one(project_id=project_id)
+
+    asset = await asset_model.get_asset_record(asset_project_id=project.id, asset_name=link_request.file_id)
+    previous_asset = await asset_model.get_asset_record(
+        asset_project_id=project.id,
+        asset_name=link_request.previous_file_id
+    )
+    if asset is None or previous_asset is None:
+        logger.warning(f"Version link failed, file not found in project {project_id}")
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"status": ResponseStatus.FILE_ID_ERROR.value}
+        )
+
+    reason = None
+    if asset.id == previous_asset.id:
+        reason = "A file cannot be a version of itself"
+    elif asset.asset_previous_version_id not in (None, previous_asset.id):
+        reason = "File is already linked to another previous version"
+    elif previous_asset.asset_superseded_by_id not in (None, asset.id):
+        reason = "Previous file is already superseded by another version"
+    else:
+        # Walk back from the previous version to make sure the link does not close a cycle
+        ancestor_id = previous_asset.asset_previous_version_id
+        seen = {previous_asset.id}
+        while ancestor_id is not None and ancestor_id not in seen:
+            if ancestor_id == asset.id:
+                reason = "Linking would create a version cycle"
+                break
+            seen.add(ancestor_id)
+            ancestor = await asset_model.get_asset_by_id(asset_id=ancestor_id)
+            ancestor_id = ancestor.asset_previous_version_id if ancestor else None
+
+    if reason:
+        logger.warning(f"Version link rejected: {reason}")
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"status": ResponseStatus.VERSION_LINK_FAILED.value, "reason": reason}
+        )
+
+    await asset_model.link_asset_version(asset_id=asset.id, previous_asset_id=previous_asset.id)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": ResponseStatus.VERSION_LINK_SUCCESS.value,
+            "file_id": asset.asset_name,
+            "previous_file_id": previous_asset.asset_name
+        }
+    )
+
+
+ASSET_LISTING_FIELDS = [
+    "_id", "asset_name", "asset_type", "asset_size", "asset_pushed_at",
+    "asset_chunk_count", "asset_processed_at", "asset_previous_version_id", "asset_superseded_by_id",
+]
+
+
+def parse_page_cursor(after: Optional[str]):
+    """
+    Returns (after_id, error_response) for the `after` cursor of a listing endpoint.
+    """
+    if after is None:
+        return None, None
+    if not ObjectId.is_valid(after):
+        return None, JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"status": ResponseStatus.INVALID_PAGE_CURSOR.value}
+        )
+    return ObjectId(after), None
+
+
+def serialize_asset_listing(record: dict) -> dict:
+    return {
+        ("file_id" if key == "asset_name" else key): (
+            str(value) if isinstance(value, ObjectId)
+            else value.isoformat() if isinstance(value, datetime)
+            else value
+        )
+        for key, value in record.items()
+    }
+
+
+@data_router.get("/projects")
+async def list_projects(
+    after: Optional[str] = Query(default=None, description="next_after of the previous page"),
+    page_size: int = Query(default=50, ge=1, le=500),
+    project_model: ProjectModel = Depends(get_project_model)
+):
+    """
+    List projects page by page; the total is an estimate from the collection metadata.
+    """
+    after_id, error_response = parse_page_cursor(after)
+    if error_response:
+        return error_response
+
+    projects, next_after_id = await project_model.list_projects(after_id=after_id, page_size=page_size)
+    estimated_total = await project_model.estimate_project_count() if after_id is None else None
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": ResponseStatus.PROJECTS_LISTED.value,
+            "projects": [{"_id": str(project.id), "project_id": project.project_id} for project in projects],
+            "next_after": str(next_after_id) if next_after_id else None,
+            "estimated_total": estimated_total,
+        }
+    )
+
+
+@data_router.get("/assets/{project_id}")
+async def list_project_assets(
+    project_id: str,
+    after: Optional[str] = Query(default=None, description="next_after of the previous page"),
+    page_size: int = Query(default=50, ge=1, le=500),
+    asset_type: Optional[str] = Query(default=None),
+    project_model: ProjectModel = Depends(get_project_model),
+    asset_model: AssetModel = Depends(get_asset_model)
+):
+    """
+    List a project's assets page by page, in upload order.
+    """
+    after_id, error_response = parse_page_cursor(after)
+    if error_response:
+        return error_response
+
+    project = await project_model.get_project_or_create_one(project_id=project_id, cached=True)
+    assets, next_after_id = await asset_model.list_project_assets(
+        asset_project_id=project.id,
+        after_id=after_id,
+        page_size=page_size,
+        asset_type=asset_type,
+        projection=ASSET_LISTING_FIELDS,
+        raw=True
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": ResponseStatus.ASSETS_LISTED.value,
+            "assets": [serialize_asset_listing(asset) for asset in assets],
+            "next_after": str(next_after_id) if next_after_id else None,
+        }
+    )
@@ -0,0 +1,26 @@
+from fastapi import Request
+from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
+from models.ChunkModel import ChunkModel
+from models.UploadSessionModel import UploadSessionModel
+from models.JobModel import JobModel
+
+
+def get_project_model(request: Request) -> ProjectModel:
+    return request.app.models.project_model
+
+
+def get_asset_model(request: Request) -> AssetModel:
+    return request.app.models.asset_model
+
+
+def get_chunk_model(request: Request) -> ChunkModel:
+    return request.app.models.chunk_model
+
+
+def get_upload_session_model(request: Request) -> UploadSessionModel:
+    return request.app.models.upload_session_model
+
+
+def get_job_model(request: Request) -> JobModel:
+    return request.app.models.job_model
@@ -0,0 +1,184 @@
+from fastapi import APIRouter, Depends, Query, status, Request
+from fastapi.responses import JSONResponse
+from helper.config import get_settings, Settings
+from .dependencies import get_project_model, get_job_model
+from models.ProjectModel import ProjectModel
+from models.JobModel import JobModel
+from models.db_schemes import Job
+from models.enums.JobEnums import JobStatusEnum
+from models import ResponseStatus
+from bson import ObjectId
+from datetime import datetime, timedelta
+from typing import Optional
+import logging
+
+logger = logging.getLogger("uvicorn.error")
+
+jobs_router = APIRouter(
+    prefix="/api/v1/jobs",
+    tags=["api_v1", "jobs"],
+)
+
+FINISHED_JOB_STATUSES = {
+    JobStatusEnum.SUCCEEDED.value, JobStatusEnum.FAILED.value, JobStatusEnum.CANCELLED.value
+}
+
+
+def serialize_value(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: serialize_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [serialize_value(item) for item in value]
+    return value
+
+
+def serialize_job(job: Job) -> dict:
+    started_at, finished_at = job.job_started_at, job.job_finished_at
+    return {
+        "job_id": str(job.id),
+        "project_id": str(job.job_project_id),
+        "type": job.job_type,
+        "status": job.job_status,
+        "params": serialize_value(job.job_params),
+        "progress": {"files": 0, "chunks": 0, "vectors": 0, "errors": 0, **(job.job_progress or {})},
+        "checkpoint": serialize_value(job.job_checkpoint),
+        "result": serialize_value(job.job_result),
+        "error": job.job_error,
+        "cancel_requested": job.job_cancel_requested,
+        "attempts": job.job_attempts,
+        "created_at": serialize_value(job.job_created_at),
+        "started_at": serialize_value(started_at),
+        "finished_at": serialize_value(finished_at),
+        "duration_seconds": (
+            round(((finished_at or datetime.utcnow()) - started_at).total_seconds(), 3) if started_at else None
+        ),
+    }
+
+
+async def submit_job(request: Request, job_model: JobModel, job: Job,
+                     extra_content: Optional[dict] = None) -> JSONResponse:
+    """
+    Queues `job` and answers 202 with its id (plus `extra_content`); the local runner,
+    if any, takes it, otherwise a runner of another process picks the job up.
+    """
+    if request.app.job_runner is not None:
+        job = await request.app.job_runner.submit(job)
+    else:
+        job = await job_model.create_job(job)
+
+    logger.info(f"[JOBS] Submitted {job.job_type} job {job.id}")
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "status": ResponseStatus.JOB_SUBMITTED.value,
+            "job_id": str(job.id),
+            **(extra_content or {}),
+        }
+    )
+
+
+def parse_job_id(job_id: str) -> Optional[ObjectId]:
+    return ObjectId(job_id) if ObjectId.is_valid(job_id) else None
+
+
+def job_not_found() -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"status": ResponseStatus.JOB_NOT_FOUND.value}
+    )
+
+
+@jobs_router.get("/")
+async def list_jobs(
+    project_id: Optional[str] = Query(default=None),
+    job_status: Optional[str] = Query(default=None, alias="status"),
+    after: Optional[str] = Query(default=None, description="next_after of the previous page"),
+    page_size: int = Query(default=50, ge=1, le=500),
+    project_model: ProjectModel = Depends(get_project_model),
+    job_model: JobModel = Depends(get_job_model)
+):
+    """
+    List jobs, newest first, optionally of one project and/or in one status.
+    """
+    after_id = None
+    if after is not None:
+        after_id = parse_job_id(after)
+        if after_id is None:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"status": ResponseStatus.INVALID_PAGE_CURSOR.value}
+            )
+
+    project_object_id = None
+    if project_id is not None:
+        project = await project_model.get_project(project_id=project_id)
+        if project is None:
+            return JSONResponse(
+                status_code=status.HTTP_200_OK,
+                content={"status": ResponseStatus.JOBS_LISTED.value, "jobs": [], "next_after": None}
+            )
+        project_object_id = project.id
+
+    jobs, next_after_id = await job_model.list_jobs(
+        project_id=project_object_id,
+        job_status=job_status,
+        after_id=after_id,
+        page_size=page_size
+    )
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": ResponseStatus.JOBS_LISTED.value,
+            "jobs": [serialize_job(job) for job in jobs],
+            "next_after": str(next_after_id) if next_after_id else None,
+        }
+    )
+
+
+@jobs_router.get("/{job_id}")
+async def get_job(job_id: str, job_model: JobModel = Depends(get_job_model)):
+    job_object_id = parse_job_id(job_id)
+    job = await job_model.get_job(job_id=job_object_id) if job_object_id else None
+    if job is None:
+        return job_not_found()
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={"status": ResponseStatus.JOB_RETRIEVED.value, "job": serialize_job(job)}
+    )
+
+
+@jobs_router.post("/{job_id}/cancel")
+async def cancel_job(request: Request, job_id: str,
+                     app_settings: Settings = Depends(get_settings),
+                     job_model: JobModel = Depends(get_job_model)):
+    """
+    Cancel a job: a queued one right away, a running one as soon as its runner hears of it
+    (files already in flight are finished first).
+    """
+    job_object_id = parse_job_id(job_id)
+    if job_object_id is None:
+        return job_not_found()
+
+    if request.app.job_runner is not None:
+        job = await request.app.job_runner.cancel(job_id=job_object_id)
+    else:
+        stale_before = datetime.utcnow() - timedelta(seconds=app_settings.JOB_HEARTBEAT_TIMEOUT_SECONDS)
+        job = await job_model.request_cancel(job_id=job_object_id, stale_before=stale_before)
+
+    if job is None:
+        return job_not_found()
+    if job.job_status in FINISHED_JOB_STATUSES and not job.job_cancel_requested:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={"status": ResponseStatus.JOB_NOT_CANCELLABLE.value, "job": serialize_job(job)}
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": ResponseStatus.JOB_CANCEL_REQUESTED.value, "job": serialize_job(job)}
+    )
@@ -1,11 +1,25 @@
-from fastapi import FastAPI, APIRouter, status, Request
+from fastapi import FastAPI, APIRouter, Depends, status, Request
 from fastapi.responses import JSONResponse
 from .schema.nlp import PushRequest, SearchRequest
+from .dependencies import get_project_model, get_asset_model, get_chunk_model, get_job_model
+from .jobs import submit_job
+from helper.config import get_settings, Settings
 from models.ProjectModel import ProjectModel
+from models.AssetModel import AssetModel
 from models.ChunkModel import ChunkModel
+from models.JobModel import JobModel
+from models.db_schemes import Project, Job, Task, DataChunk
+from models.enums.JobEnums import JobTypeEnum
+from models.enums.TaskEnums import TaskTypeEnum
+from models.TaskModel import TaskModel
 from controllers import NLPController
+from controllers.JobRunner import JobContext
+from controllers.TaskWorker import wait_for_job_tasks, get_task_summary
+from bson import ObjectId
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
 from models import ResponseStatus
 from stores.llm.templates.template_parser import TemplateParser
+from helper.process_pool import run_in_executor
 
 
 import logging
@@ -17,13 +31,100 @@ nlp_router = APIRouter(
     tags=["api_v1", "nlp"],
 )
 
+async def push_project_chunks(nlp_controller: NLPController, chunk_model: ChunkModel, project: Project,
+                              do_reset: bool = False, checkpoint_pages: int = 20,
+                              on_checkpoint: Optional[Callable[[int, ObjectId], Awaitable]] = None,
+                              after_id: Optional[ObjectId] = None, until_id: Optional[ObjectId] = None,
+                              chunk_batches: Optional[AsyncIterator[List[DataChunk]]] = None,
+                              compact_lexical_index: bool = False) -> int:
+    """
+    Embeds the project's unindexed chunks page by page and returns how many were pushed;
+    `after_id` / `until_id` restrict the run to one _id range (an index task). With
+    `chunk_batches`, the pages are those batches instead of queried ones (e.g. chunks an
+    ingest has just written).
+    Every `checkpoint_pages` pages the lexical index is updated and only then are the pushed
+    chunks marked indexed, so an interrupted run leaves no chunk marked but missing from
+    an index; `on_checkpoint` is awaited with the chunk count and the last chunk id.
+    Each checkpoint adds a lexical index segment; `compact_lexical_index` merges them at the
+    end of a run that indexes the whole project.
+    """
+    if do_reset:
+        logger.info(f"[INDEX] Resetting indexes for project: {project.project_id}")
+        nlp_controller.reset_vector_db_collection(project=project)
+        await chunk_model.reset_project_chunks_indexed(project_id=project.id)
+
+    inserted_items_count = 0
+    last_chunk_id = after_id
+    pending_chunks = []
+    pending_records_ids = []
+    page_no = 0
+
+    async def checkpoint():
+        if pending_chunks and nlp_controller.lexical_index_client:
+            await run_in_executor(
+                None, nlp_controller.add_to_lexical_index,
+                project=project,
+                chunks=pending_chunks,
+                chunks_ids=pending_records_ids
+            )
+        await chunk_model.mark_chunks_indexed(chunk_ids=[chunk.id for chunk in pending_chunks])
+        if on_checkpoint is not None:
+            await on_checkpoint(len(pending_chunks), last_chunk_id)
+        pending_chunks.clear()
+        pending_records_ids.clear()
+
+    async def iter_unindexed_pages():
+        # Only chunks that were never pushed (new or changed since the last run) are embedded
+        last_page_id = after_id
+        while True:
+            page_chunks = await chunk_model.get_unindexed_project_chunks(
+                project_id=project.id,
+                after_id=last_page_id,
+                until_id=until_id,
+                projection=ChunkModel.INDEX_FIELDS
+            )
+            if not page_chunks:
+                logger.info("[INDEX] No more unindexed chunks found.")
+                return
+            last_page_id = page_chunks[-1].id
+            yield page_chunks
+
+    async for page_chunks in chunk_batches or iter_unindexed_pages():
+        last_chunk_id = page_chunks[-1].id
+
+        chunks_ids = [nlp_controller.get_chunk_record_id(chunk) for chunk in page_chunks]
+
+        # Embedding runs off the event loop, so e.g. an ingest keeps writing chunks meanwhile
+        await run_in_executor(
+            None, nlp_controller.index_into_vector_db,
+            project=project,
+            chunks=page_chunks,
+            chunks_ids=chunks_ids
+        )
+        pending_chunks.extend(page_chunks)
+        pending_records_ids.extend(chunks_ids)
+
+        inserted_items_count += len(page_chunks)
+        logger.info(f"[INDEX] Inserted {len(page_chunks)} chunks (Total so far: {inserted_items_count})")
+
+        page_no += 1
+        if page_no % max(1, checkpoint_pages) == 0:
+            await checkpoint()
+
+    await checkpoint()
+    if compact_lexical_index and nlp_controller.lexical_index_client:
+        await run_in_executor(None, nlp_controller.compact_lexical_index, project=project)
+    return inserted_items_count
+
+
 @nlp_router.post("/index/push/{project_id}")
-async def index_project(request: Request, project_id: str, push_request: PushRequest):
+async def index_project(request: Request, project_id: str, push_request: PushRequest,
+                        app_settings: Settings = Depends(get_settings),
+                        project_model: ProjectModel = Depends(get_project_model),
+                        chunk_model: ChunkModel = Depends(get_chunk_model),
+                        job_model: JobModel = Depends(get_job_model)):
     logger.info(f"[INDEX] Starting indexing for project_id={project_id}")
 
-    project_model = await ProjectModel.create_instance(db_client=request.app.mongodb_client)
-    chunk_model = await ChunkModel.create_instance(db_client=request.app.mongodb_client)
-
     project = await project_model.get_project_or_create_one(project_id=project_id)
     if not project:
         logger.warning(f"[INDEX] Project not found: {project_id}")
@@ -31,71 +132,186 @@ async def index_project(request: Request, project_id: str, push_request: PushReq
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"status": ResponseStatus.PROJECT_NOT_FOUND_ERROR.value}
         )
-    
+
+    if push_request.run_as_job or push_request.distributed:
+        return await submit_job(request, job_model, Job(
+            job_project_id=project.id,
+            job_type=JobTypeEnum.INDEX.value,
+            job_params=push_request.model_dump(exclude={"run_as_job"})
+        ))
+
     nlp_controller = NLPController(
         vectordb_client=request.app.vectordb_client,
         generation_client=request.app.generation_client,
         embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser
+        template_parser=request.app.template_parser,
+        lexical_index_client=request.app.lexical_index_client
     )
 
-    has_records = True
-    page_no = 1
-    inserted_items_count = 0
-    idx = 0
+    inserted_items_count = await push_project_chunks(
+        nlp_controller=nlp_controller,
+        chunk_model=chunk_model,
+        project=project,
+        do_reset=bool(push_request.do_reset),
+        checkpoint_pages=app_settings.INDEX_CHECKPOINT_PAGES,
+        compact_lexical_index=True
+    )
+
+    logger.info(f"[INDEX] Completed indexing project: {project_id}, total inserted: {inserted_items_count}")
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            "status": ResponseStatus.INSERT_INTO_VECTORDB_SUCCESS.value,
+            "inserted_items_count": inserted_items_count
+        }
+    )
 
-    while has_records:
-        page_chunks = await chunk_model.get_project_chunks(project_id=project.id, page_no=page_no)
-        if len(page_chunks):
-            page_no += 1
 
-        if not page_chunks:
-            logger.info(f"[INDEX] No more chunks found. Ending pagination at page {page_no}")
-            has_records = False
-            break
+async def run_index_job(app, job: Job, context: JobContext) -> dict:
+    """
+    Handler of index jobs. A resumed job never resets again: the chunks checkpointed
+    before the interruption are already in the indexes and marked.
+    """
+    push_request = PushRequest(**job.job_params)
+    project = await app.models.project_model.get_project_by_id(project_object_id=job.job_project_id)
+    if project is None:
+        raise ValueError(f"Project {job.job_project_id} no longer exists")
 
-        chunks_ids = list(range(idx, idx + len(page_chunks)))
-        idx += len(page_chunks)
+    nlp_controller = NLPController(
+        vectordb_client=app.vectordb_client,
+        generation_client=app.generation_client,
+        embedding_client=app.embedding_client,
+        template_parser=app.template_parser,
+        lexical_index_client=app.lexical_index_client
+    )
 
-        is_inserted = nlp_controller.index_into_vector_db(
-            project=project,
-            chunks=page_chunks,
-            do_reset=push_request.do_reset,
-            chunks_ids=chunks_ids
+    if push_request.distributed:
+        return await run_distributed_index_job(app, job, context, project, nlp_controller, push_request)
+
+    async def on_checkpoint(chunks_count: int, last_chunk_id: ObjectId):
+        await context.report(
+            checkpoint={"reset_done": True, "after_chunk_id": last_chunk_id},
+            chunks=chunks_count,
+            vectors=chunks_count
         )
 
-        if not is_inserted:
-            logger.error(f"[INDEX] Insertion into vector DB failed for project {project_id}")
-            return JSONResponse(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                content={"status": ResponseStatus.INSERT_INTO_VECTORDB_ERROR.value}
+    inserted_items_count = await push_project_chunks(
+        nlp_controller=nlp_controller,
+        chunk_model=app.models.chunk_model,
+        project=project,
+        do_reset=bool(push_request.do_reset) and not context.checkpoint.get("reset_done"),
+        checkpoint_pages=get_settings().INDEX_CHECKPOINT_PAGES,
+        on_checkpoint=on_checkpoint,
+        compact_lexical_index=True
+    )
+    return {"inserted_items_count": inserted_items_count}
+
+
+async def run_distributed_index_job(app, job: Job, context: JobContext, project: Project,
+                                    nlp_controller: NLPController, push_request: PushRequest) -> dict:
+    """
+    Splits an index job into tasks of INDEX_TASK_CHUNKS unindexed chunks, each an _id range,
+    then waits while the task workers of every process run them. Only the chunk ids are read here.
+    """
+    app_settings = get_settings()
+    task_model = app.models.task_model
+    chunk_model = app.models.chunk_model
+
+    if not context.checkpoint.get("fanned_out"):
+        if push_request.do_reset and not context.checkpoint.get("reset_done"):
+            logger.info(f"[INDEX] Resetting indexes for project: {project.project_id}")
+            nlp_controller.reset_vector_db_collection(project=project)
+            await chunk_model.reset_project_chunks_indexed(project_id=project.id)
+            await context.report(checkpoint={"reset_done": True})
+
+        after_id = context.checkpoint.get("after_chunk_id")
+        batch = []
+
+        async def enqueue_batch():
+            await task_model.enqueue_tasks(batch)
+            await context.report(checkpoint={"reset_done": True, "after_chunk_id": after_id})
+            batch.clear()
+
+        while True:
+            page = await chunk_model.get_unindexed_project_chunks(
+                project_id=project.id,
+                after_id=after_id,
+                page_size=app_settings.INDEX_TASK_CHUNKS,
+                projection=["_id"],
+                raw=True
             )
+            if not page:
+                break
+            until_id = page[-1]["_id"]
+            batch.append(Task(
+                task_job_id=job.id,
+                task_project_id=project.id,
+                task_type=TaskTypeEnum.INDEX_RANGE.value,
+                task_key=f"{after_id}-{until_id}",
+                task_params={"after_chunk_id": after_id, "until_chunk_id": until_id}
+            ))
+            after_id = until_id
+            if len(batch) >= TaskModel.ENQUEUE_BATCH_SIZE:
+                await enqueue_batch()
+        if batch:
+            await enqueue_batch()
+        await context.report(checkpoint={"reset_done": True, "fanned_out": True})
+
+    counts = await wait_for_job_tasks(
+        task_model=task_model,
+        context=context,
+        poll_seconds=app_settings.TASK_POLL_SECONDS,
+        max_attempts=app_settings.TASK_MAX_ATTEMPTS
+    )
+    summary = get_task_summary(counts)
+    if summary.get("failed_tasks"):
+        raise ValueError(f"{summary['failed_tasks']} index tasks failed: {summary}")
 
-        inserted_items_count += len(page_chunks)
-        logger.info(f"[INDEX] Inserted {len(page_chunks)} chunks (Total so far: {inserted_items_count})")
+    # The range tasks each added lexical index segments
+    if nlp_controller.lexical_index_client:
+        await run_in_executor(None, nlp_controller.compact_lexical_index, project=project)
+    return summary
 
-    logger.info(f"[INDEX] Completed indexing project: {project_id}, total inserted: {inserted_items_count}")
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={
-            "status": ResponseStatus.INSERT_INTO_VECTORDB_SUCCESS.value,
-            "inserted_items_count": inserted_items_count
-        }
+
+async def run_index_range_task(app, task: Task) -> dict:
+    """
+    Handler of index_range tasks: pushes the still unindexed chunks of one _id range.
+    Ranges of one project are indexed concurrently, so the lexical index is updated under its lock.
+    """
+    project = await app.models.project_model.get_project_by_id(project_object_id=task.task_project_id)
+    if project is None:
+        return {"chunks": 0, "vectors": 0}
+
+    nlp_controller = NLPController(
+        vectordb_client=app.vectordb_client,
+        generation_client=app.generation_client,
+        embedding_client=app.embedding_client,
+        template_parser=app.template_parser,
+        lexical_index_client=app.lexical_index_client
+    )
+    inserted_items_count = await push_project_chunks(
+        nlp_controller=nlp_controller,
+        chunk_model=app.models.chunk_model,
+        project=project,
+        checkpoint_pages=get_settings().INDEX_CHECKPOINT_PAGES,
+        after_id=task.task_params.get("after_chunk_id"),
+        until_id=task.task_params["until_chunk_id"]
     )
+    return {"chunks": inserted_items_count, "vectors": inserted_items_count}
 
 @nlp_router.get("/index/info/{project_id}")
-async def get_project_index_info(request: Request, project_id: str):
+async def get_project_index_info(request: Request, project_id: str,
+                                 project_model: ProjectModel = Depends(get_project_model)):
     logger.info(f"[INFO] Fetching vector DB info for project_id={project_id}")
 
-    project_model = await ProjectModel.create_instance(db_client=request.app.mongodb_client)
-    project = await project_model.get_project_or_create_one(project_id=project_id)
+    project = await project_model.get_project_or_create_one(project_id=project_id, cached=True)
 
     nlp_controller = NLPController(
         vectordb_client=request.app.vectordb_client,
         generation_client=request.app.generation_client,
         embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser
-
+        template_parser=request.app.template_parser,
+        lexical_index_client=request.app.lexical_index_client
     )
 
     collection_info = nlp_controller.get_vector_db_collection_info(project=project)
@@ -110,11 +326,13 @@ async def get_project_index_info(request: Request, project_id: str):
 
 
 @nlp_router.post("/index/search/{project_id}")
-async def search_index(request: Request, project_id: str, search_request: SearchRequest):
+async def search_index(request: Request, project_id: str, search_request: SearchRequest,
+                       project_model: ProjectModel = Depends(get_project_model),
+                       asset_model: AssetModel = Depends(get_asset_model),
+                       chunk_model: ChunkModel = Depends(get_chunk_model)):
     logger.info(f"[SEARCH] Searching in vector DB for project_id={project_id}")
 
-    project_model = await ProjectModel.create_instance(db_client=request.app.mongodb_client)
-    project = await project_model.get_project_or_create_one(project_id=project_id)
+    project = await project_model.get_project_or_create_one(project_id=project_id, cached=True)
 
     if not project:
         logger.warning(f"[SEARCH] Project not found: {project_id}")
@@ -127,13 +345,18 @@ async def search_index(request: Request, project_id: str, search_request: Search
         vectordb_client=request.app.vectordb_client,
         generation_client=request.app.generation_client,
         embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser
+        template_parser=request.app.template_parser,
+        lexical_index_client=request.app.lexical_index_client
     )
 
-    search_results = nlp_controller.search_vector_db_collection(
+    search_results = nlp_controller.search_collection(
         project=project,
         query=search_request.query_text,
-        limit=search_request.limit
+        limit=search_request.limit,
+        search_mode=search_request.search_mode
+    )
+    search_results = await nlp_controller.hydrate_search_results(
+        search_results, chunk_model=chunk_model, asset_model=asset_model
     )
 
     if not search_results:
@@ -148,18 +371,22 @@ async def search_index(request: Request, project_id: str, search_request: Search
         content={
             "status": ResponseStatus.VECTORDB_SEARCH_SUCCESS.value,
             "results": [
-                {"text": result.text, "score": result.score} for result in search_results
+                {"text": result.text, "score": result.score, "record_id": result.record_id,
+                 "metadata": result.metadata}
+                for result in search_results
             ]
         }
     )
 
 
 @nlp_router.post("/index/answer/{project_id}")
-async def answer_rag(request: Request, project_id: str, search_request: SearchRequest):
+async def answer_rag(request: Request, project_id: str, search_request: SearchRequest,
+                     project_model: ProjectModel = Depends(get_project_model),
+                     asset_model: AssetModel = Depends(get_asset_model),
+                     chunk_model: ChunkModel = Depends(get_chunk_model)):
     logger.info(f"[ANSWER] Answering RAG question for project_id={project_id}")
 
-    project_model = await ProjectModel.create_instance(db_client=request.app.mongodb_client)
-    project = await project_model.get_project_or_create_one(project_id=project_id)
+    project = await project_model.get_project_or_create_one(project_id=project_id, cached=True)
 
     if not project:
         logger.warning(f"[ANSWER] Project not found: {project_id}")
@@ -172,14 +399,24 @@ async def answer_rag(request: Request, project_id: str, search_request: SearchRe
         vectordb_client=request.app.vectordb_client,
         generation_client=request.app.generation_client,
         embedding_client=request.app.embedding_client,
-        template_parser=request.app.template_parser
+        template_parser=request.app.template_parser,
+        lexical_index_client=request.app.lexical_index_client
     )
 
     try:
+        search_results = nlp_controller.search_collection(
+            project=project,
+            query=search_request.query_text,
+            limit=search_request.limit,
+            search_mode=search_request.search_mode
+        )
+        search_results = await nlp_controller.hydrate_search_results(
+            search_results, chunk_model=chunk_model, asset_model=asset_model
+        )
         answer_response = nlp_controller.answer_rag_question(
             project=project,
             question=search_request.query_text,
-            limit=search_request.limit
+            search_results=search_results
         )
     except Exception as e:
         logger.exception(f"[ANSWER] Exception occurred during RAG answer generation: {e}")
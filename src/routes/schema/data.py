@@ -1,11 +1,31 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 
 class ProcessRequest(BaseModel):
     """
     Request model for processing data.
     """
     file_id: Optional[str] = Field(default=None, description="Unique identifier for the file to be processed")
+    file_ids: Optional[List[str]] = Field(default=None, description="Several files to process, looked up together")
     chunk_size: Optional[int] = Field(default=1024 * 1024, description="Size of each chunk in bytes, default is 1MB")
     overlap_size: Optional[int] = Field(default=20, description="Size of overlap between chunks in bytes, default is 20")
-    do_reset: Optional[int] = Field(default=0, description="Data processing reset flag, default is 0 (no reset)")
+    do_reset: Optional[int] = Field(default=0, description="Reprocess files even when their content and chunking parameters are unchanged, default is 0 (skip unchanged files)")
+    do_stream: Optional[int] = Field(default=0, description="Stream pages and flush chunk batches as they fill, default is 0 (load whole files)")
+    run_as_job: Optional[int] = Field(default=0, description="1 = return a job id right away and process in the background, default is 0 (process within the request)")
+    distributed: Optional[int] = Field(default=0, description="1 = run as a job split into one task per file, leased by the task workers of every process; near-duplicates between files processed at the same time are not merged. Default is 0")
+
+
+class VersionLinkRequest(BaseModel):
+    """
+    Request model for linking an uploaded file as a new version of an existing one.
+    """
+    file_id: str = Field(..., description="The newly uploaded file (the new version)")
+    previous_file_id: str = Field(..., description="The file it replaces")
+
+
+class UploadSessionRequest(BaseModel):
+    """
+    Request model for starting a resumable upload session.
+    """
+    file_name: str = Field(..., min_length=1, description="Original file name, used for the extension")
+    file_size: int = Field(..., gt=0, description="Total size of the file in bytes")
@@ -1,12 +1,28 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
+from stores.lexical import SearchModeEnum
 
 class PushRequest(BaseModel):
     do_reset: Optional[int] = Field(
         default=0,
-        description="Whether to reset the vector DB collection before indexing. 1 = reset, 0 = append."
+        description="1 = reset the collection and re-embed every chunk, 0 = embed only chunks that are not indexed yet."
+    )
+    run_as_job: Optional[int] = Field(
+        default=0,
+        description="1 = return a job id right away and index in the background, 0 = index within the request."
+    )
+    distributed: Optional[int] = Field(
+        default=0,
+        description="1 = run as a job split into chunk range tasks, leased by the task workers of every process."
     )
 
 class SearchRequest(BaseModel):
+    # search_mode is handed to the controller as its string value
+    model_config = ConfigDict(use_enum_values=True)
+
     query_text: str
-    limit: Optional[int] = 10
\ No newline at end of file
+    limit: Optional[int] = 10
+    search_mode: Optional[SearchModeEnum] = Field(
+        default=SearchModeEnum.DENSE.value,
+        description="Retrieval mode: 'dense' (vector), 'lexical' (BM25, no embedding call) or 'hybrid' (RRF of both)."
+    )
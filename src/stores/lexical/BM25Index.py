@@ -0,0 +1,348 @@
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import zlib
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+(?:[.\-/]\w+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase terms. Dotted, dashed and slashed identifiers
+    such as clause numbers ("4.2.1") are kept as single terms.
+    """
+    return [token.casefold() for token in TOKEN_PATTERN.findall(text or "")]
+
+
+def _write_array(fh, values: array):
+    fh.write(struct.pack("<cQ", values.typecode.encode(), len(values)))
+    values.tofile(fh)
+
+
+def _read_array(fh) -> array:
+    typecode, length = struct.unpack("<cQ", fh.read(struct.calcsize("<cQ")))
+    values = array(typecode.decode())
+    values.fromfile(fh, length)
+    return values
+
+
+class BM25Index:
+    """
+    Immutable BM25 inverted index with array-backed postings.
+
+    Postings of term `i` live in `postings_docs[term_offsets[i]:term_offsets[i + 1]]`
+    (document positions) and the matching slice of `postings_tfs` (term frequencies).
+    Document texts are kept zlib-compressed so hits can be returned without
+    touching the vector store or the embedding provider.
+
+    An index can also be one segment of a BM25SegmentedIndex: `deleted_ids` then lists
+    documents removed from the older segments.
+    """
+    MAGIC = b"MRBM25\x00\x01"
+
+    def __init__(self, doc_ids: List[str], doc_lengths: array, terms: List[str],
+                 term_offsets: array, postings_docs: array, postings_tfs: array,
+                 text_offsets: array, texts_blob: bytes,
+                 k1: float = 1.2, b: float = 0.75, deleted_ids: Optional[List[str]] = None):
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.text_offsets = text_offsets
+        self.texts_blob = texts_blob
+        self.k1 = k1
+        self.b = b
+        self.deleted_ids = deleted_ids or []
+
+        self.term_index = {term: i for i, term in enumerate(terms)}
+        self.total_length = sum(doc_lengths)
+        self.avgdl = (self.total_length / len(doc_lengths)) if len(doc_lengths) else 0.0
+        self._doc_positions: Optional[Dict[str, int]] = None
+
+    @property
+    def doc_positions(self) -> Dict[str, int]:
+        if self._doc_positions is None:
+            self._doc_positions = {doc_id: doc_idx for doc_idx, doc_id in enumerate(self.doc_ids)}
+        return self._doc_positions
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_ids)
+
+    def get_text(self, doc_idx: int) -> str:
+        start, end = self.text_offsets[doc_idx], self.text_offsets[doc_idx + 1]
+        return zlib.decompress(self.texts_blob[start:end]).decode("utf-8")
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, float]]:
+        """
+        Returns up to `limit` (doc_idx, score) pairs ordered by descending BM25 score.
+        """
+        if not self.num_docs or limit <= 0:
+            return []
+
+        scores: Dict[int, float] = {}
+        avgdl = self.avgdl or 1.0
+
+        for term in set(tokenize(query)):
+            term_idx = self.term_index.get(term)
+            if term_idx is None:
+                continue
+
+            start, end = self.term_offsets[term_idx], self.term_offsets[term_idx + 1]
+            df = end - start
+            idf = math.log(1.0 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+            for pos in range(start, end):
+                doc_idx = self.postings_docs[pos]
+                tf = self.postings_tfs[pos]
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[doc_idx] / avgdl)
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def save(self, path: str):
+        header = json.dumps({
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "terms": self.terms,
+            "deleted_ids": self.deleted_ids,
+        }).encode("utf-8")
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(self.MAGIC)
+            fh.write(struct.pack("<Q", len(header)))
+            fh.write(header)
+            for values in (self.doc_lengths, self.term_offsets, self.postings_docs,
+                           self.postings_tfs, self.text_offsets):
+                _write_array(fh, values)
+            fh.write(self.texts_blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path, "rb") as fh:
+            if fh.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise ValueError(f"Not a BM25 index file: {path}")
+            (header_len,) = struct.unpack("<Q", fh.read(8))
+            header = json.loads(fh.read(header_len).decode("utf-8"))
+            doc_lengths = _read_array(fh)
+            term_offsets = _read_array(fh)
+            postings_docs = _read_array(fh)
+            postings_tfs = _read_array(fh)
+            text_offsets = _read_array(fh)
+            texts_blob = fh.read()
+
+        return cls(
+            doc_ids=header["doc_ids"],
+            doc_lengths=doc_lengths,
+            terms=header["terms"],
+            term_offsets=term_offsets,
+            postings_docs=postings_docs,
+            postings_tfs=postings_tfs,
+            text_offsets=text_offsets,
+            texts_blob=texts_blob,
+            k1=header["k1"],
+            b=header["b"],
+            deleted_ids=header.get("deleted_ids"),
+        )
+
+
+class BM25IndexBuilder:
+    """
+    Mutable counterpart of BM25Index. Documents are keyed by an external id
+    (the chunk's vector record id), so re-adding a document replaces it.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._docs: Dict[str, Tuple[Counter, bytes]] = {}
+
+    @classmethod
+    def from_index(cls, index: BM25Index) -> "BM25IndexBuilder":
+        builder = cls(k1=index.k1, b=index.b)
+        doc_terms = [Counter() for _ in range(index.num_docs)]
+
+        for term_idx, term in enumerate(index.terms):
+            for pos in range(index.term_offsets[term_idx], index.term_offsets[term_idx + 1]):
+                doc_terms[index.postings_docs[pos]][term] = index.postings_tfs[pos]
+
+        for doc_idx, doc_id in enumerate(index.doc_ids):
+            start, end = index.text_offsets[doc_idx], index.text_offsets[doc_idx + 1]
+            builder._docs[doc_id] = (doc_terms[doc_idx], index.texts_blob[start:end])
+
+        return builder
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def add_terms(self, documents: Iterable[Tuple[str, Counter, bytes]]):
+        """
+        Adds already tokenized documents: (doc_id, term counts, compressed text).
+        """
+        for doc_id, terms, text in documents:
+            self._docs[doc_id] = (terms, text)
+
+    def add_document(self, doc_id: str, text: str):
+        self._docs[doc_id] = (Counter(tokenize(text)), zlib.compress(text.encode("utf-8")))
+
+    def add_documents(self, doc_ids: Iterable[str], texts: Iterable[str]):
+        for doc_id, text in zip(doc_ids, texts):
+            self.add_document(doc_id=doc_id, text=text)
+
+    def remove_documents(self, doc_ids: Iterable[str]) -> int:
+        removed = 0
+        for doc_id in doc_ids:
+            if self._docs.pop(doc_id, None) is not None:
+                removed += 1
+        return removed
+
+    def build(self, deleted_ids: Optional[Iterable[str]] = None) -> BM25Index:
+        doc_ids: List[str] = []
+        doc_lengths = array("I")
+        text_offsets = array("Q", [0])
+        texts = []
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        for doc_idx, (doc_id, (term_counts, compressed_text)) in enumerate(self._docs.items()):
+            doc_ids.append(doc_id)
+            doc_lengths.append(sum(term_counts.values()))
+            texts.append(compressed_text)
+            text_offsets.append(text_offsets[-1] + len(compressed_text))
+            for term, tf in term_counts.items():
+                postings.setdefault(term, []).append((doc_idx, tf))
+
+        terms = sorted(postings)
+        term_offsets = array("Q", [0])
+        postings_docs = array("I")
+        postings_tfs = array("I")
+        for term in terms:
+            for doc_idx, tf in postings[term]:
+                postings_docs.append(doc_idx)
+                postings_tfs.append(tf)
+            term_offsets.append(len(postings_docs))
+
+        return BM25Index(
+            doc_ids=doc_ids,
+            doc_lengths=doc_lengths,
+            terms=terms,
+            term_offsets=term_offsets,
+            postings_docs=postings_docs,
+            postings_tfs=postings_tfs,
+            text_offsets=text_offsets,
+            texts_blob=b"".join(texts),
+            k1=self.k1,
+            b=self.b,
+            deleted_ids=sorted(deleted_ids or []),
+        )
+
+
+class BM25SegmentedIndex:
+    """
+    Read view over the segments of one collection, oldest first. A document lives in the
+    newest segment that holds it; listing it in a newer segment (again, or in its
+    `deleted_ids`) hides the older copies. Scores use the statistics of the live documents,
+    so they match those of a single index holding the same documents.
+
+    Hits are keyed by (segment position, document position).
+    """
+
+    def __init__(self, segments: List[BM25Index], k1: float = 1.2, b: float = 0.75):
+        self.segments = segments
+        self.k1 = segments[0].k1 if segments else k1
+        self.b = segments[0].b if segments else b
+
+        # dead[i] holds the positions of segment i shadowed by newer segments
+        self.deleted: List[set] = [set(segment.deleted_ids) for segment in segments]
+        self.dead: List[set] = [set() for _ in segments]
+        for newer_no in range(1, len(segments)):
+            newer = segments[newer_no]
+            for older_no in range(newer_no):
+                positions = segments[older_no].doc_positions
+                for doc_id in (*newer.doc_ids, *newer.deleted_ids):
+                    doc_idx = positions.get(doc_id)
+                    if doc_idx is not None:
+                        self.dead[older_no].add(doc_idx)
+
+        self.num_docs = sum(segment.num_docs - len(dead) for segment, dead in zip(segments, self.dead))
+        total_length = sum(
+            segment.total_length - sum(segment.doc_lengths[doc_idx] for doc_idx in dead)
+            for segment, dead in zip(segments, self.dead)
+        )
+        self.avgdl = (total_length / self.num_docs) if self.num_docs else 0.0
+
+    def get_doc_id(self, key: Tuple[int, int]) -> str:
+        return self.segments[key[0]].doc_ids[key[1]]
+
+    def get_text(self, key: Tuple[int, int]) -> str:
+        return self.segments[key[0]].get_text(key[1])
+
+    def contains(self, doc_id: str) -> bool:
+        for segment_no in range(len(self.segments) - 1, -1, -1):
+            segment = self.segments[segment_no]
+            doc_idx = segment.doc_positions.get(doc_id)
+            if doc_idx is not None:
+                return doc_idx not in self.dead[segment_no]
+            if doc_id in self.deleted[segment_no]:
+                return False
+        return False
+
+    def iter_live_documents(self) -> Iterator[Tuple[str, Counter, bytes]]:
+        """
+        Yields (doc_id, term counts, compressed text) of every live document, segment by segment.
+        """
+        for segment, dead in zip(self.segments, self.dead):
+            doc_terms = [Counter() for _ in range(segment.num_docs)]
+            for term_idx, term in enumerate(segment.terms):
+                for pos in range(segment.term_offsets[term_idx], segment.term_offsets[term_idx + 1]):
+                    doc_terms[segment.postings_docs[pos]][term] = segment.postings_tfs[pos]
+            for doc_idx, doc_id in enumerate(segment.doc_ids):
+                if doc_idx not in dead:
+                    start, end = segment.text_offsets[doc_idx], segment.text_offsets[doc_idx + 1]
+                    yield doc_id, doc_terms[doc_idx], segment.texts_blob[start:end]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Tuple[int, int], float]]:
+        """
+        Returns up to `limit` (key, score) pairs ordered by descending BM25 score.
+        """
+        if not self.num_docs or limit <= 0:
+            return []
+
+        scores: Dict[Tuple[int, int], float] = {}
+        avgdl = self.avgdl or 1.0
+
+        for term in set(tokenize(query)):
+            postings = []
+            for segment_no, (segment, dead) in enumerate(zip(self.segments, self.dead)):
+                term_idx = segment.term_index.get(term)
+                if term_idx is None:
+                    continue
+                for pos in range(segment.term_offsets[term_idx], segment.term_offsets[term_idx + 1]):
+                    doc_idx = segment.postings_docs[pos]
+                    if doc_idx not in dead:
+                        postings.append((segment_no, doc_idx, segment.postings_tfs[pos]))
+            if not postings:
+                continue
+
+            df = len(postings)
+            idf = math.log(1.0 + (self.num_docs - df + 0.5) / (df + 0.5))
+            for segment_no, doc_idx, tf in postings:
+                doc_length = self.segments[segment_no].doc_lengths[doc_idx]
+                norm = self.k1 * (1.0 - self.b + self.b * doc_length / avgdl)
+                key = (segment_no, doc_idx)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,6 @@
+from enum import Enum
+
+class SearchModeEnum(Enum):
+    DENSE = "dense"
+    LEXICAL = "lexical"
+    HYBRID = "hybrid"
@@ -0,0 +1,298 @@
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from models.db_schemes import RetrievedDocument
+from .BM25Index import BM25Index, BM25IndexBuilder, BM25SegmentedIndex
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows: updates are then only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LexicalIndexStore:
+    """
+    Keeps each collection's BM25 index as immutable segment files under `index_dir`, listed
+    oldest first by a manifest. Updates write a new segment holding just the added documents
+    (or the ids of removed ones) and replace the manifest under a file lock, so several
+    processes can share `index_dir` without rewriting the whole index on every batch.
+
+    Segments are merged like a binary counter: while a segment is at least as big as the
+    one before it, the two are merged. A collection thus has O(log n) segments and each
+    document is rewritten O(log n) times; `compact` merges everything, e.g. after a full index job.
+    Readers cache segments by file name and the view over them by the manifest's mtime.
+    """
+
+    MANIFEST_SUFFIX = ".manifest.json"
+    # Segments removed by a concurrent merge are re-read from the new manifest
+    MAX_LOAD_ATTEMPTS = 3
+
+    def __init__(self, index_dir: str, k1: float = 1.2, b: float = 0.75):
+        self.index_dir = index_dir
+        self.k1 = k1
+        self.b = b
+        self._cache: Dict[str, Tuple[float, List[str], BM25SegmentedIndex]] = {}
+        self._segments: Dict[str, BM25Index] = {}
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        logger.info(f"LexicalIndexStore initialized at: {self.index_dir}")
+
+    def get_index_path(self, collection_name: str) -> str:
+        """
+        Single-file index of earlier versions, read as the collection's only segment.
+        """
+        return os.path.join(self.index_dir, f"{collection_name}.bm25")
+
+    def get_manifest_path(self, collection_name: str) -> str:
+        return os.path.join(self.index_dir, f"{collection_name}{self.MANIFEST_SUFFIX}")
+
+    def get_segment_name(self, collection_name: str, segment_no: int) -> str:
+        return f"{collection_name}.{segment_no:08d}.bm25"
+
+    def read_manifest(self, collection_name: str) -> Optional[dict]:
+        try:
+            with open(self.get_manifest_path(collection_name), "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            if os.path.exists(self.get_index_path(collection_name)):
+                return {"segments": [os.path.basename(self.get_index_path(collection_name))], "next_segment_no": 1}
+            return None
+
+    def write_manifest(self, collection_name: str, manifest: dict):
+        path = self.get_manifest_path(collection_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh)
+        os.replace(tmp_path, path)
+
+    def load_segment(self, segment_name: str) -> BM25Index:
+        with self._lock:
+            segment = self._segments.get(segment_name)
+        if segment is None:
+            segment = BM25Index.load(os.path.join(self.index_dir, segment_name))
+            with self._lock:
+                self._segments[segment_name] = segment
+        return segment
+
+    def drop_segments(self, segment_names: List[str]):
+        for segment_name in segment_names:
+            with self._lock:
+                self._segments.pop(segment_name, None)
+            try:
+                os.remove(os.path.join(self.index_dir, segment_name))
+            except FileNotFoundError:
+                pass
+
+    def get_index(self, collection_name: str) -> Optional[BM25SegmentedIndex]:
+        for attempt in range(self.MAX_LOAD_ATTEMPTS):
+            path = self.get_manifest_path(collection_name)
+            try:
+                mtime = os.path.getmtime(path)
+            except FileNotFoundError:
+                mtime = None
+
+            with self._lock:
+                cached = self._cache.get(collection_name)
+            if cached and mtime is not None and cached[0] == mtime:
+                return cached[2]
+
+            manifest = self.read_manifest(collection_name)
+            if manifest is None:
+                return None
+            try:
+                segments = [self.load_segment(segment_name) for segment_name in manifest["segments"]]
+            except FileNotFoundError:
+                if attempt + 1 == self.MAX_LOAD_ATTEMPTS:
+                    raise
+                continue
+
+            index = BM25SegmentedIndex(segments, k1=self.k1, b=self.b)
+            with self._lock:
+                if mtime is not None:
+                    self._cache[collection_name] = (mtime, manifest["segments"], index)
+                # Segments merged away by other processes
+                for segment_name in (cached[1] if cached else []):
+                    if segment_name not in manifest["segments"]:
+                        self._segments.pop(segment_name, None)
+            logger.info(f"Loaded lexical index '{collection_name}' with {index.num_docs} documents "
+                        f"in {len(segments)} segments")
+            return index
+
+    def open_builder(self, collection_name: str, do_reset: bool = False) -> BM25IndexBuilder:
+        """
+        Returns a builder seeded with the current index contents, or an empty one on reset.
+        """
+        index = None if do_reset else self.get_index(collection_name)
+        builder = BM25IndexBuilder(k1=self.k1, b=self.b)
+        if index is not None:
+            builder.add_terms(index.iter_live_documents())
+        return builder
+
+    def save_index(self, collection_name: str, builder: BM25IndexBuilder) -> BM25Index:
+        """
+        Replaces the collection's whole index with the builder's documents, as one segment.
+        """
+        with self.lock_collection(collection_name):
+            manifest = self.read_manifest(collection_name) or {"segments": [], "next_segment_no": 1}
+            index = builder.build()
+            self.replace_segments(collection_name, manifest, [], [index])
+
+        logger.info(f"Saved lexical index '{collection_name}' with {index.num_docs} documents")
+        return index
+
+    def replace_segments(self, collection_name: str, manifest: dict,
+                         kept_names: List[str], new_segments: List[BM25Index]):
+        """
+        Writes `new_segments` after the kept ones, publishes the manifest, then removes the
+        segments it no longer lists. Runs under the collection lock.
+        """
+        segment_names = list(kept_names)
+        next_segment_no = manifest["next_segment_no"]
+        for segment in new_segments:
+            segment_name = self.get_segment_name(collection_name, next_segment_no)
+            segment.save(os.path.join(self.index_dir, segment_name))
+            with self._lock:
+                self._segments[segment_name] = segment
+            segment_names.append(segment_name)
+            next_segment_no += 1
+
+        self.write_manifest(collection_name, {"segments": segment_names, "next_segment_no": next_segment_no})
+        self.drop_segments([name for name in manifest["segments"] if name not in segment_names])
+
+    def append_segment(self, collection_name: str, segment: BM25Index):
+        """
+        Adds a segment after the newest one, then merges the tail while a segment is not
+        bigger than the one after it. Runs under the collection lock.
+        """
+        manifest = self.read_manifest(collection_name) or {"segments": [], "next_segment_no": 1}
+        segments = [self.load_segment(segment_name) for segment_name in manifest["segments"]] + [segment]
+
+        def size(index: BM25Index) -> int:
+            return index.num_docs + len(index.deleted_ids)
+
+        merged = 0
+        while len(segments) - merged >= 2 and size(segments[-2 - merged]) <= sum(
+                size(newer) for newer in segments[len(segments) - 1 - merged:]):
+            merged += 1
+
+        if merged:
+            tail = segments[len(segments) - 1 - merged:]
+            keep_deleted = len(tail) < len(segments)
+            segment = self.merge_segments(tail, keep_deleted=keep_deleted)
+        kept_names = manifest["segments"][:len(segments) - 1 - merged]
+        self.replace_segments(collection_name, manifest, kept_names, [segment])
+
+    def merge_segments(self, segments: List[BM25Index], keep_deleted: bool) -> BM25Index:
+        """
+        One segment holding the live documents of `segments`. Its deleted ids only matter
+        while older segments remain below it.
+        """
+        view = BM25SegmentedIndex(segments, k1=self.k1, b=self.b)
+        builder = BM25IndexBuilder(k1=view.k1, b=view.b)
+        builder.add_terms(view.iter_live_documents())
+
+        deleted_ids = set()
+        if keep_deleted:
+            for segment in segments:
+                deleted_ids.update(segment.deleted_ids)
+            deleted_ids = {doc_id for doc_id in deleted_ids if doc_id not in builder}
+        return builder.build(deleted_ids=deleted_ids)
+
+    def compact(self, collection_name: str) -> Optional[BM25Index]:
+        """
+        Merges all segments of the collection into one.
+        """
+        with self.lock_collection(collection_name):
+            manifest = self.read_manifest(collection_name)
+            if manifest is None or len(manifest["segments"]) <= 1:
+                return None
+            segments = [self.load_segment(segment_name) for segment_name in manifest["segments"]]
+            index = self.merge_segments(segments, keep_deleted=False)
+            self.replace_segments(collection_name, manifest, [], [index])
+
+        logger.info(f"Compacted lexical index '{collection_name}' from {len(segments)} segments "
+                    f"({index.num_docs} documents)")
+        return index
+
+    @contextmanager
+    def lock_collection(self, collection_name: str):
+        """
+        Serializes manifest updates of one index, across threads and processes.
+        """
+        with self._update_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(f"{self.get_index_path(collection_name)}.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add_documents(self, collection_name: str, doc_ids: List[str], texts: List[str]) -> int:
+        """
+        Adds (or replaces) documents by writing them as a new segment; the cost is that of
+        the batch plus the amortized merges, never a rewrite of the whole index.
+        """
+        builder = BM25IndexBuilder(k1=self.k1, b=self.b)
+        builder.add_documents(doc_ids=doc_ids, texts=texts)
+        # Tokenized and compressed outside the lock
+        segment = builder.build()
+        if not segment.num_docs:
+            return 0
+
+        with self.lock_collection(collection_name):
+            self.append_segment(collection_name, segment)
+        return segment.num_docs
+
+    def remove_documents(self, collection_name: str, doc_ids: List[str]) -> int:
+        with self.lock_collection(collection_name):
+            index = self.get_index(collection_name)
+            if index is None:
+                return 0
+
+            removed_ids = sorted({doc_id for doc_id in doc_ids if index.contains(doc_id)})
+            if removed_ids:
+                self.append_segment(collection_name, BM25IndexBuilder(k1=self.k1, b=self.b).build(
+                    deleted_ids=removed_ids
+                ))
+            return len(removed_ids)
+
+    def delete_index(self, collection_name: str) -> bool:
+        with self.lock_collection(collection_name):
+            manifest = self.read_manifest(collection_name)
+            with self._lock:
+                self._cache.pop(collection_name, None)
+            if manifest is None:
+                return False
+
+            try:
+                os.remove(self.get_manifest_path(collection_name))
+            except FileNotFoundError:
+                pass
+            self.drop_segments(manifest["segments"])
+            logger.info(f"Deleted lexical index '{collection_name}'")
+            return True
+
+    def search(self, collection_name: str, query: str, limit: int = 10) -> List[RetrievedDocument]:
+        index = self.get_index(collection_name)
+        if index is None:
+            logger.warning(f"Lexical index '{collection_name}' does not exist.")
+            return []
+
+        return [
+            RetrievedDocument.model_construct(
+                text=index.get_text(key),
+                score=score,
+                record_id=index.get_doc_id(key),
+            )
+            for key, score in index.search(query=query, limit=limit)
+        ]
@@ -0,0 +1,3 @@
+from .BM25Index import BM25Index, BM25IndexBuilder, BM25SegmentedIndex, tokenize
+from .LexicalIndexStore import LexicalIndexStore
+from .LexicalEnums import SearchModeEnum
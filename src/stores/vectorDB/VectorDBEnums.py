@@ -4,6 +4,10 @@ class VectorDBEnums(Enum):
     QDRANT = "QDRANT"
     PGVECTOR = "PGVECTOR"
 
+class VectorDBPayloadModeEnum(Enum):
+    FULL = "full"  # Points carry the chunk text and metadata
+    SLIM = "slim"  # Points carry ids only; text is read back from MongoDB
+
 class DistanceMethodEnums(Enum):
     COSINE = "cosine"
     DOT = "dot"
@@ -51,7 +51,22 @@ class VectorDBInterface(ABC):
     def insert_many(self, collection_name: str, texts: list, 
                     vectors: list, metadata: list = None, 
                     record_ids: list = None, batch_size: int = 50):
-        """Insert multiple records in batch."""
+        """Insert multiple records in batch; a None text is left out of the payload."""
+        pass
+
+    @abstractmethod
+    def delete_by_ids(self, collection_name: str, record_ids: list) -> bool:
+        """Delete the records with the given ids."""
+        pass
+
+    @abstractmethod
+    def update_metadata(self, collection_name: str, record_ids: list, metadata: list) -> bool:
+        """Replace the metadata payload of existing records."""
+        pass
+
+    @abstractmethod
+    def get_vectors(self, collection_name: str, record_ids: list) -> dict:
+        """Return {record id: vector} for the records that exist."""
         pass
 
     @abstractmethod
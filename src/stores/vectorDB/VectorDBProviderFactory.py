@@ -9,9 +9,10 @@ class VectorDBProviderFactory:
 
     def create(self, provider: str):
         if provider == VectorDBEnums.QDRANT.value:
-            db_path = self.base_controller.get_database_path(
-                db_name=self.config.VECTOR_DB_PATH
-            )
+            db_path = self.config.VECTOR_DB_PATH
+            # A local path is locked by one process; several workers share a Qdrant server URL
+            if not db_path.startswith(("http://", "https://")):
+                db_path = self.base_controller.get_database_path(db_name=db_path)
 
             return QdrantDBProvider(
                 db_client=db_path,
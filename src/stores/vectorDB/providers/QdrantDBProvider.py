@@ -175,6 +175,12 @@ class QdrantDBProvider(VectorDBInterface):
         
 
 
+    def build_payload(self, text: str, metadata: dict) -> dict:
+        # Slim payloads leave the text out; it is hydrated from MongoDB on search
+        if text is None:
+            return {"metadata": metadata}
+        return {"text": text, "metadata": metadata}
+
     def insert_one(self, collection_name: str, text: str, vector: list,
                         metadata: dict = None, 
                         record_id: str = None) -> bool:
@@ -188,10 +194,7 @@ class QdrantDBProvider(VectorDBInterface):
         record = models.Record(
             id=record_id,
             vector=vector,
-            payload={
-                "text": text,
-                "metadata": metadata
-            }
+            payload=self.build_payload(text, metadata)
         )
 
         self.logger.debug(f"Prepared record for insertion: id={record_id}, vector_dim={len(vector)}, text_len={len(text)}, metadata_keys={list(metadata.keys()) if metadata else []}")
@@ -247,10 +250,7 @@ class QdrantDBProvider(VectorDBInterface):
                 models.Record(
                     id=batch_record_ids[x],
                     vector=batch_vectors[x],
-                    payload={
-                        "text": batch_texts[x],
-                        "metadata": batch_metadata[x]
-                    }
+                    payload=self.build_payload(batch_texts[x], batch_metadata[x])
                 )
                 for x in range(len(batch_texts))
             ]
@@ -272,6 +272,81 @@ class QdrantDBProvider(VectorDBInterface):
         return True
 
 
+    def delete_by_ids(self, collection_name: str, record_ids: list, batch_size: int = 1000) -> bool:
+        self.logger.debug(f"Deleting {len(record_ids)} records from '{collection_name}'")
+
+        if not self.is_collection_existed(collection_name):
+            self.logger.warning(f"Collection '{collection_name}' does not exist. Nothing to delete.")
+            return False
+
+        for i in range(0, len(record_ids), batch_size):
+            try:
+                self.client.delete(
+                    collection_name=collection_name,
+                    points_selector=models.PointIdsList(points=record_ids[i:i + batch_size]),
+                )
+            except Exception as e:
+                self.logger.error(f"Error deleting records from '{collection_name}': {e}")
+                return False
+
+        self.logger.info(f"Deleted {len(record_ids)} records from '{collection_name}'")
+        return True
+
+
+    def update_metadata(self, collection_name: str, record_ids: list, metadata: list,
+                        batch_size: int = 100) -> bool:
+        self.logger.debug(f"Updating metadata of {len(record_ids)} records in '{collection_name}'")
+
+        if not self.is_collection_existed(collection_name):
+            self.logger.error(f"Cannot update records: collection '{collection_name}' does not exist.")
+            return False
+
+        if len(record_ids) != len(metadata):
+            self.logger.error("Length mismatch: 'record_ids' and 'metadata' must have same length.")
+            return False
+
+        for i in range(0, len(record_ids), batch_size):
+            operations = [
+                models.SetPayloadOperation(
+                    set_payload=models.SetPayload(payload={"metadata": record_metadata}, points=[record_id])
+                )
+                for record_id, record_metadata in zip(record_ids[i:i + batch_size], metadata[i:i + batch_size])
+            ]
+            try:
+                self.client.batch_update_points(collection_name=collection_name, update_operations=operations)
+            except Exception as e:
+                self.logger.error(f"Error updating metadata in '{collection_name}': {e}")
+                return False
+
+        self.logger.info(f"Updated metadata of {len(record_ids)} records in '{collection_name}'")
+        return True
+
+
+    def get_vectors(self, collection_name: str, record_ids: list, batch_size: int = 100) -> dict:
+        self.logger.debug(f"Fetching vectors of {len(record_ids)} records from '{collection_name}'")
+
+        if not self.is_collection_existed(collection_name):
+            self.logger.warning(f"Collection '{collection_name}' does not exist. No vectors to fetch.")
+            return {}
+
+        vectors = {}
+        for i in range(0, len(record_ids), batch_size):
+            try:
+                points = self.client.retrieve(
+                    collection_name=collection_name,
+                    ids=record_ids[i:i + batch_size],
+                    with_payload=False,
+                    with_vectors=True,
+                )
+            except Exception as e:
+                self.logger.error(f"Error fetching vectors from '{collection_name}': {e}")
+                return vectors
+            vectors.update({str(point.id): point.vector for point in points})
+
+        self.logger.info(f"Fetched {len(vectors)} of {len(record_ids)} vectors from '{collection_name}'")
+        return vectors
+
+
     def search_by_vector(self, collection_name: str, vector: list, limit: int = 5)-> List[RetrievedDocument]:
         self.logger.debug(f"Searching in '{collection_name}' with vector of dim={len(vector)} and limit={limit}")
 
@@ -294,9 +369,10 @@ class QdrantDBProvider(VectorDBInterface):
 
             self.logger.info(f"Search returned {len(results)} results from '{collection_name}'")
             return [
-                RetrievedDocument(
+                RetrievedDocument.model_construct(
                     text=result.payload.get("text", ""),
-                    score=result.score
+                    score=result.score,
+                    record_id=str(result.id)
                 ) for result in results
             ]
 
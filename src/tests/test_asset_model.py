@@ -1,9 +1,10 @@
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from bson import ObjectId
 from models.AssetModel import AssetModel
-from models.db_schemes import Asset
+from models.db_schemes import Asset, DataChunk
 from helper.config import Settings
+from pymongo.errors import BulkWriteError
 
 
 @pytest.fixture
@@ -67,3 +68,132 @@ async def test_get_asset_record_found(mock_get_settings, fake_db_client, fake_se
 
     assert asset.asset_name == "doc.pdf"
     fake_db_client["test_db"]["assets"].find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_set_asset_processing_state(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    asset_model = AssetModel(db_client=fake_db_client)
+    collection = fake_db_client["test_db"]["assets"]
+    collection.update_one.return_value.matched_count = 1
+
+    asset_id = ObjectId()
+    params = {"chunk_size": 1000, "overlap_size": 200}
+    result = await asset_model.set_asset_processing_state(
+        asset_id=asset_id, content_hash="abc", content_mtime=1.0,
+        chunking_params=params, chunk_count=7
+    )
+
+    assert result is True
+    query, update = collection.update_one.await_args.args
+    assert query == {"_id": asset_id}
+    assert update["$set"]["asset_content_hash"] == "abc"
+    assert update["$set"]["asset_chunking_params"] == params
+    assert update["$set"]["asset_chunk_count"] == 7
+    assert update["$set"]["asset_processed_at"] is not None
+
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_insert_many_assets_reports_failures_per_asset(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    asset_model = AssetModel(db_client=fake_db_client)
+    collection = fake_db_client["test_db"]["assets"]
+    collection.insert_many.side_effect = BulkWriteError({
+        "writeErrors": [{"index": 1, "code": 11000, "errmsg": "E11000 duplicate key"}]
+    })
+
+    project_id = ObjectId()
+    assets = [
+        Asset(asset_project_id=project_id, asset_type="document", asset_name=f"doc{i}.pdf")
+        for i in range(3)
+    ]
+    errors = await asset_model.insert_many_assets(assets)
+
+    assert errors == [None, "E11000 duplicate key", None]
+    assert all(asset.id is not None for asset in assets)
+    documents = collection.insert_many.await_args.args[0]
+    assert [document["_id"] for document in documents] == [asset.id for asset in assets]
+    assert collection.insert_many.await_args.kwargs["ordered"] is False
+
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_get_asset_records_matches_names_case_insensitively(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+    project_id = ObjectId()
+    record = {
+        "_id": ObjectId(),
+        "asset_project_id": project_id,
+        "asset_type": "document",
+        "asset_name": "Report.PDF",
+        "asset_name_normalized": "report.pdf",
+    }
+
+    async def iter_records():
+        yield record
+
+    asset_model = AssetModel(db_client=fake_db_client)
+    asset_model.collection = MagicMock()
+    asset_model.collection.find.return_value = iter_records()
+
+    assets = await asset_model.get_asset_records(project_id, ["report.pdf", "REPORT.pdf", "missing.txt"])
+
+    assert set(assets) == {"report.pdf", "REPORT.pdf"}
+    assert assets["report.pdf"].id == record["_id"]
+    query = asset_model.collection.find.call_args.args[0]
+    assert query == {
+        "asset_project_id": project_id,
+        "asset_name_normalized": {"$in": ["report.pdf", "missing.txt"]},
+    }
+
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_list_project_assets_last_page(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+    project_id = ObjectId()
+    records = [{"_id": ObjectId(), "asset_name": f"doc{i}.pdf"} for i in range(2)]
+
+    async def iter_records():
+        for record in records:
+            yield record
+
+    asset_model = AssetModel(db_client=fake_db_client)
+    asset_model.collection = MagicMock()
+    asset_model.collection.find.return_value.sort.return_value.limit.return_value = iter_records()
+
+    assets, next_after_id = await asset_model.list_project_assets(
+        project_id, page_size=2, asset_type="document", projection=["_id", "asset_name"], raw=True
+    )
+
+    assert assets == records
+    assert next_after_id is None
+    asset_model.collection.find.assert_called_once_with(
+        {"asset_project_id": project_id, "asset_type": "document"}, ["_id", "asset_name"]
+    )
+
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_hydrate_chunk_metadata_merges_document_metadata(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+    asset_id = ObjectId()
+
+    async def iter_records():
+        yield {"_id": asset_id, "asset_document_metadata": {"source": "a.pdf", "total_pages": 2, "page": 0}}
+
+    asset_model = AssetModel(db_client=fake_db_client)
+    asset_model.collection = MagicMock()
+    asset_model.collection.find.return_value = iter_records()
+
+    chunk = DataChunk.model_construct(
+        chunk_text="clause", chunk_metadata={"page": 1}, chunk_order=1,
+        chunk_project_id=ObjectId(), chunk_asset_id=asset_id
+    )
+    await asset_model.hydrate_chunk_metadata([chunk])
+
+    assert chunk.chunk_metadata == {"source": "a.pdf", "total_pages": 2, "page": 1}
@@ -55,3 +55,34 @@ async def test_init_collection_with_indexes_creates_new_collection(mock_get_sett
     mock_collection.create_index.assert_awaited_once_with(
         indexes[0]["key"], name="field1_index", unique=True
     )
+
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_init_collection_with_indexes_creates_missing_indexes_only(mock_get_settings):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    mock_collection = AsyncMock()
+    mock_collection.index_information.return_value = {
+        "_id_": {"key": [("_id", 1)], "v": 2},
+        "field1_index": {"key": [("field1", 1)], "unique": True, "v": 2},
+        "legacy_field3": {"key": [("field3", 1)], "v": 2},
+    }
+    mock_db_obj = AsyncMock()
+    mock_db_obj.__getitem__.side_effect = lambda name: mock_collection
+    mock_db_obj.list_collection_names.return_value = ["test_collection"]
+    mock_client = MagicMock()
+    mock_client.__getitem__.return_value = mock_db_obj
+
+    model = BaseDataModel(db_client=mock_client)
+    indexes = [
+        {"key": [("field1", 1)], "name": "field1_index", "unique": True},
+        {"key": [("field2", 1), ("_id", 1)], "name": "field2_index", "unique": False},
+        {"key": [("field3", 1)], "name": "field3_index", "unique": False},
+    ]
+
+    await model.init_collection_with_indexes("test_collection", indexes)
+
+    mock_collection.create_index.assert_awaited_once_with(
+        [("field2", 1), ("_id", 1)], name="field2_index", unique=False
+    )
@@ -0,0 +1,149 @@
+import multiprocessing
+import pytest
+from stores.lexical.BM25Index import BM25Index, BM25IndexBuilder, tokenize
+from stores.lexical.LexicalIndexStore import LexicalIndexStore
+
+
+@pytest.fixture
+def builder():
+    builder = BM25IndexBuilder()
+    builder.add_documents(
+        doc_ids=["a", "b", "c"],
+        texts=[
+            "The Effective Date of this Agreement is stated in clause 4.2.1.",
+            "Governing law: this Agreement is governed by the laws of England.",
+            "Confidentiality obligations survive termination of the Agreement.",
+        ],
+    )
+    return builder
+
+
+def test_tokenize_keeps_clause_numbers():
+    assert tokenize("See Clause 4.2.1, Effective-Date") == ["see", "clause", "4.2.1", "effective-date"]
+
+
+def test_search_ranks_exact_terms_first(builder):
+    index = builder.build()
+
+    results = index.search("clause 4.2.1", limit=3)
+
+    assert results[0][0] == index.doc_ids.index("a")
+    assert len(results) == 1
+
+
+def test_save_and_load_roundtrip(builder, tmp_path):
+    path = str(tmp_path / "collection_p1.bm25")
+    builder.build().save(path)
+
+    index = BM25Index.load(path)
+    doc_idx, score = index.search("governing law", limit=1)[0]
+
+    assert index.doc_ids[doc_idx] == "b"
+    assert score > 0
+    assert index.get_text(doc_idx).startswith("Governing law")
+
+
+def test_builder_from_index_replaces_and_removes(builder):
+    rebuilt = BM25IndexBuilder.from_index(builder.build())
+    rebuilt.add_document("a", "Termination for convenience.")
+    rebuilt.remove_documents(["c"])
+    index = rebuilt.build()
+
+    assert sorted(index.doc_ids) == ["a", "b"]
+    assert index.search("4.2.1") == []
+    assert index.doc_ids[index.search("convenience")[0][0]] == "a"
+
+
+def test_store_search_returns_record_ids(builder, tmp_path):
+    store = LexicalIndexStore(index_dir=str(tmp_path))
+    store.save_index("collection_p1", builder)
+
+    results = store.search("collection_p1", "confidentiality", limit=5)
+
+    assert [r.record_id for r in results] == ["c"]
+    assert store.search("collection_missing", "confidentiality") == []
+
+
+def add_documents_in_process(index_dir: str, worker_no: int):
+    store = LexicalIndexStore(index_dir=index_dir)
+    for doc_no in range(10):
+        store.add_documents("collection_p1", [f"{worker_no}-{doc_no}"], [f"clause {worker_no} {doc_no}"])
+
+
+def test_store_updates_from_several_processes_are_not_lost(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=add_documents_in_process, args=(str(tmp_path), n)) for n in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    store = LexicalIndexStore(index_dir=str(tmp_path))
+    assert store.get_index("collection_p1").num_docs == 30
+    assert store.remove_documents("collection_p1", ["0-0", "missing"]) == 1
+    assert store.get_index("collection_p1").num_docs == 29
+
+
+def test_store_updates_write_segments_and_merge_them(tmp_path):
+    store = LexicalIndexStore(index_dir=str(tmp_path))
+    for doc_no in range(8):
+        store.add_documents("collection_p1", [f"doc-{doc_no}"], [f"clause {doc_no} termination"])
+
+    # Merged like a binary counter: 8 single-document batches end as one segment
+    assert len(store.read_manifest("collection_p1")["segments"]) == 1
+    store.add_documents("collection_p1", ["doc-8"], ["clause 8 termination"])
+    manifest = store.read_manifest("collection_p1")
+    base_mtime = (tmp_path / manifest["segments"][0]).stat().st_mtime_ns
+
+    store.add_documents("collection_p1", ["doc-9"], ["clause 9 governing law"])
+    manifest = store.read_manifest("collection_p1")
+
+    assert len(manifest["segments"]) == 2
+    assert (tmp_path / manifest["segments"][0]).stat().st_mtime_ns == base_mtime
+    assert len(list(tmp_path.glob("collection_p1.*.bm25"))) == 2
+
+
+def test_segmented_scores_match_a_single_index(tmp_path):
+    texts = {f"doc-{n}": f"clause {n} {'termination ' * (n % 3 + 1)}notice period {n % 4}" for n in range(12)}
+    store = LexicalIndexStore(index_dir=str(tmp_path))
+    for doc_no in range(0, 12, 3):
+        doc_ids = [f"doc-{n}" for n in range(doc_no, doc_no + 3)]
+        store.add_documents("collection_p1", doc_ids, [texts[doc_id] for doc_id in doc_ids])
+    store.add_documents("collection_p1", ["doc-1"], ["clause 1 governing law"])
+    store.remove_documents("collection_p1", ["doc-5"])
+
+    texts["doc-1"] = "clause 1 governing law"
+    del texts["doc-5"]
+    builder = BM25IndexBuilder()
+    builder.add_documents(doc_ids=list(texts), texts=list(texts.values()))
+    single = builder.build()
+
+    segmented = store.get_index("collection_p1")
+    assert len(segmented.segments) > 1
+    assert segmented.num_docs == single.num_docs
+    for query in ["termination notice", "governing law", "clause 5", "period 2"]:
+        expected = {single.doc_ids[doc_idx]: score for doc_idx, score in single.search(query, limit=20)}
+        got = {segmented.get_doc_id(key): score for key, score in segmented.search(query, limit=20)}
+        assert got.keys() == expected.keys()
+        for doc_id, score in expected.items():
+            assert got[doc_id] == pytest.approx(score)
+
+
+def test_store_compact_merges_segments(tmp_path):
+    store = LexicalIndexStore(index_dir=str(tmp_path))
+    store.add_documents("collection_p1", ["a", "b", "c"], ["clause one", "clause two", "clause three"])
+    store.add_documents("collection_p1", ["d"], ["clause four"])
+    store.remove_documents("collection_p1", ["b"])
+    assert len(store.read_manifest("collection_p1")["segments"]) > 1
+
+    index = store.compact("collection_p1")
+
+    assert sorted(index.doc_ids) == ["a", "c", "d"]
+    assert index.deleted_ids == []
+    assert store.read_manifest("collection_p1")["segments"] == [
+        store.get_segment_name("collection_p1", store.read_manifest("collection_p1")["next_segment_no"] - 1)
+    ]
+    assert [r.record_id for r in store.search("collection_p1", "four")] == ["d"]
+    assert store.search("collection_p1", "two") == []
+    assert store.delete_index("collection_p1")
+    assert list(tmp_path.glob("collection_p1.*")) == list(tmp_path.glob("collection_p1.bm25.lock"))
@@ -0,0 +1,212 @@
+import asyncio
+import os
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from controllers.ChunkIndexWorker import ChunkIndexWorker
+from models.db_schemes import DataChunk, Project
+
+# e.g. the mongodb-rs service of docker/docker-compose.yaml
+REPLICA_SET_URI = os.environ.get("MONGO_REPLICA_SET_URI")
+
+
+def make_settings(**overrides):
+    settings = dict(
+        MONGO_DB_NAME="test_auto_index",
+        PROJECT_CACHE_SIZE=16,
+        PROJECT_CACHE_TTL_SECONDS=60,
+        CHUNK_TEXT_CACHE_SIZE=16,
+        CHUNK_TEXT_CACHE_TTL_SECONDS=60,
+        AUTO_INDEX_BATCH_SIZE=100,
+        AUTO_INDEX_BATCH_WAIT_SECONDS=0.2,
+        AUTO_INDEX_DELETE_PRE_IMAGES=True,
+        AUTO_INDEX_RETRY_MAX_SECONDS=1.0,
+        AUTO_INDEX_LEASE_SECONDS=0.3,
+        VECTOR_DB_PAYLOAD_MODE="full",
+    )
+    settings.update(overrides)
+    return MagicMock(**settings)
+
+
+def make_worker(models, nlp_controller=None):
+    with patch("controllers.BaseController.get_settings", return_value=make_settings()):
+        return ChunkIndexWorker(models=models, nlp_controller=nlp_controller or MagicMock())
+
+
+def test_group_events_skips_bookkeeping_updates():
+    worker = make_worker(models=MagicMock())
+    project_id = ObjectId()
+    inserted, promoted, marked, deleted, untracked = (ObjectId() for _ in range(5))
+
+    changed_ids, deleted_ids = worker.group_events([
+        {"operationType": "insert", "documentKey": {"_id": inserted}},
+        {"operationType": "update", "documentKey": {"_id": marked},
+         "updateDescription": {"updatedFields": {"chunk_indexed_at": None}, "removedFields": []}},
+        {"operationType": "update", "documentKey": {"_id": promoted},
+         "updateDescription": {"updatedFields": {"chunk_canonical_id": None, "chunk_indexed_at": None}}},
+        {"operationType": "delete", "documentKey": {"_id": deleted},
+         "fullDocumentBeforeChange": {"chunk_project_id": project_id}},
+        {"operationType": "delete", "documentKey": {"_id": untracked}},
+    ])
+
+    assert changed_ids == [inserted, promoted]
+    assert deleted_ids == {project_id: [deleted]}
+
+
+@pytest.mark.asyncio
+async def test_flush_indexes_by_project_and_removes_deleted():
+    project = Project(_id=ObjectId(), project_id="p1")
+    chunks = [
+        DataChunk.model_construct(id=ObjectId(), chunk_text=f"text {i}", chunk_metadata={},
+                                  chunk_project_id=project.id, chunk_asset_id=ObjectId(), chunk_indexed_at=None)
+        for i in range(2)
+    ]
+    # Already indexed, then moved to another asset
+    moved = DataChunk.model_construct(id=ObjectId(), chunk_text="moved", chunk_metadata={},
+                                      chunk_project_id=project.id, chunk_asset_id=ObjectId(),
+                                      chunk_indexed_at=datetime.utcnow())
+    deleted_id = ObjectId()
+
+    models = MagicMock()
+    models.chunk_model.get_canonical_chunks_by_ids = AsyncMock(return_value=chunks + [moved])
+    models.chunk_model.mark_chunks_indexed = AsyncMock(return_value=2)
+    models.project_model.get_project_by_id = AsyncMock(return_value=project)
+    nlp_controller = MagicMock()
+    nlp_controller.lexical_index_client = None
+    worker = make_worker(models=models, nlp_controller=nlp_controller)
+
+    await worker.flush([
+        {"operationType": "insert", "documentKey": {"_id": chunk.id}} for chunk in chunks
+    ] + [
+        {"operationType": "update", "documentKey": {"_id": moved.id},
+         "updateDescription": {"updatedFields": {"chunk_asset_id": moved.chunk_asset_id, "chunk_order": 3}}},
+        {"operationType": "delete", "documentKey": {"_id": deleted_id},
+         "fullDocumentBeforeChange": {"chunk_project_id": project.id}},
+    ])
+
+    _, kwargs = nlp_controller.index_into_vector_db.call_args
+    assert kwargs["chunks"] == chunks
+    models.chunk_model.mark_chunks_indexed.assert_awaited_once_with(chunk_ids=[chunk.id for chunk in chunks])
+    nlp_controller.update_chunk_payloads.assert_called_once_with(project, [moved])
+    nlp_controller.delete_chunks_from_indexes.assert_called_once_with(project, [deleted_id])
+    models.project_model.get_project_by_id.assert_awaited_once_with(project.id)
+
+
+@pytest.mark.asyncio
+async def test_only_the_lease_holder_follows_the_stream():
+    lease = {"owner": None}
+
+    async def acquire_lease(worker_name, owner, lease_seconds):
+        if lease["owner"] in (None, owner):
+            lease["owner"] = owner
+            return True
+        return False
+
+    async def release_lease(worker_name, owner):
+        if lease["owner"] == owner:
+            lease["owner"] = None
+
+    models = MagicMock()
+    models.worker_state_model.acquire_lease = AsyncMock(side_effect=acquire_lease)
+    models.worker_state_model.release_lease = AsyncMock(side_effect=release_lease)
+    workers = [make_worker(models=models) for _ in range(2)]
+    following, stopped = [], []
+
+    async def follow(worker):
+        following.append(worker.worker_id)
+        try:
+            await asyncio.sleep(60)
+        finally:
+            stopped.append(worker.worker_id)
+
+    for worker in workers:
+        worker.follow = lambda worker=worker: follow(worker)
+    tasks = [asyncio.create_task(worker.run()) for worker in workers]
+    await asyncio.sleep(0.2)
+    assert following == [workers[0].worker_id]
+
+    # The holder stops: the standby takes over
+    tasks[0].cancel()
+    await asyncio.gather(tasks[0], return_exceptions=True)
+    await asyncio.sleep(0.3)
+    assert following == [workers[0].worker_id, workers[1].worker_id]
+
+    # The standby loses its lease on renewal and stops following
+    lease["owner"] = "someone-else"
+    await asyncio.sleep(0.3)
+    assert stopped == [workers[0].worker_id, workers[1].worker_id]
+    assert not tasks[1].done()
+    tasks[1].cancel()
+    await asyncio.gather(tasks[1], return_exceptions=True)
+    assert lease["owner"] == "someone-else"
+
+
+@pytest.mark.asyncio
+async def test_next_batch_stops_on_size_wait_or_idle():
+    worker = make_worker(models=MagicMock())
+    stream = MagicMock(alive=True)
+    stream.try_next = AsyncMock(return_value=None)
+
+    assert await worker.next_batch(stream, batch_size=10, batch_wait=60) == []
+
+    stream.try_next = AsyncMock(side_effect=[{"_id": 1}, {"_id": 2}, {"_id": 3}])
+    events = await worker.next_batch(stream, batch_size=2, batch_wait=60)
+    assert [event["_id"] for event in events] == [1, 2]
+
+    # Once the first event has waited batch_wait, the batch is flushed as is
+    stream.try_next = AsyncMock(side_effect=[{"_id": 1}, None, {"_id": 2}])
+    events = await worker.next_batch(stream, batch_size=10, batch_wait=0)
+    assert [event["_id"] for event in events] == [1]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not REPLICA_SET_URI, reason="needs MONGO_REPLICA_SET_URI (a single-node replica set)")
+async def test_worker_follows_change_stream():
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from models.ModelRegistry import ModelRegistry
+
+    client = AsyncIOMotorClient(REPLICA_SET_URI)
+    settings = make_settings()
+    try:
+        with patch("models.BaseDataModel.get_settings", return_value=settings):
+            await client.drop_database(settings.MONGO_DB_NAME)
+            models = await ModelRegistry.create_instance(db_client=client)
+
+        project = await models.project_model.get_project_or_create_one("auto_index")
+        nlp_controller = MagicMock()
+        nlp_controller.lexical_index_client = None
+        worker = make_worker(models=models, nlp_controller=nlp_controller)
+        task = asyncio.create_task(worker.run())
+
+        async def wait_for(condition):
+            for _ in range(100):
+                if condition():
+                    return
+                await asyncio.sleep(0.1)
+            raise AssertionError("worker did not catch up")
+
+        await asyncio.sleep(1)
+        chunk_id = ObjectId()
+        await models.chunk_model.collection.insert_one({
+            "_id": chunk_id, "chunk_text": "hello", "chunk_metadata": {}, "chunk_order": 1,
+            "chunk_project_id": project.id, "chunk_asset_id": ObjectId(),
+        })
+        await wait_for(lambda: nlp_controller.index_into_vector_db.called)
+
+        await models.chunk_model.collection.delete_one({"_id": chunk_id})
+        await wait_for(lambda: nlp_controller.delete_chunks_from_indexes.called)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        record = await models.chunk_model.collection.database["worker_states"].find_one(
+            {"worker_name": ChunkIndexWorker.WORKER_NAME}
+        )
+        assert record["worker_resume_token"] is not None
+        # The mark_chunks_indexed update was not treated as a new change
+        assert nlp_controller.index_into_vector_db.call_count == 1
+    finally:
+        await client.drop_database(settings.MONGO_DB_NAME)
+        client.close()
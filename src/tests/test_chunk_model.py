@@ -4,6 +4,7 @@ from bson import ObjectId
 from models.ChunkModel import ChunkModel
 from models.db_schemes import DataChunk
 from models.enums.DataBaseEnum import DataBaseEnum
+from pymongo.errors import BulkWriteError
 from helper.config import Settings
 
 @pytest.fixture
@@ -110,6 +111,42 @@ async def test_insert_many_chunks(mock_get_settings, fake_db_client, fake_settin
     await model.insert_many_chunks(chunks, batch_size=2)
     assert mock_collection.bulk_write.await_count == 3
 
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_insert_chunk_documents_reports_failed_batches(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    mock_collection = AsyncMock()
+    fake_db_client.__getitem__.return_value = {DataBaseEnum.COLLECTION_CHUNK_NAME.value: mock_collection}
+    model = ChunkModel(db_client=fake_db_client)
+    model.collection = mock_collection
+
+    async def insert_many(batch, ordered):
+        assert ordered is False
+        if batch[0]["chunk_order"] == 3:
+            raise BulkWriteError({"nInserted": 1, "writeErrors": [{"index": 1, "errmsg": "boom"}]})
+
+    mock_collection.insert_many.side_effect = insert_many
+    project_id, asset_id = ObjectId(), ObjectId()
+    documents = [
+        DataChunk.model_construct(
+            chunk_text=f"text {i}",
+            chunk_metadata={},
+            chunk_order=i + 1,
+            chunk_project_id=project_id,
+            chunk_asset_id=asset_id
+        ).to_document()
+        for i in range(5)
+    ]
+
+    inserted, failures = await model.insert_chunk_documents(documents, batch_size=2, max_in_flight=2)
+
+    assert inserted == 4
+    assert failures == [{"batch": 1, "inserted": 1, "failed": 1, "error": "boom"}]
+    assert mock_collection.insert_many.await_count == 3
+    assert all(isinstance(document["_id"], ObjectId) for document in documents)
+    assert "chunk_indexed_at" not in documents[0]
+
 @patch("models.BaseDataModel.get_settings")
 @pytest.mark.asyncio
 async def test_delete_chunk_by_project_id(mock_get_settings, fake_db_client, fake_settings):
@@ -125,3 +162,135 @@ async def test_delete_chunk_by_project_id(mock_get_settings, fake_db_client, fak
     result = await model.delete_chunk_by_project_id(ObjectId())
     assert result == 5
     mock_collection.delete_many.assert_awaited_once()
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_delete_chunks_by_asset_id(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    mock_collection = AsyncMock()
+    model = ChunkModel(db_client=fake_db_client)
+    model.collection = mock_collection
+
+    asset_id = ObjectId()
+    mock_collection.delete_many.return_value.deleted_count = 3
+
+    result = await model.delete_chunks_by_asset_id(asset_id)
+    assert result == 3
+    mock_collection.delete_many.assert_awaited_once_with({"chunk_asset_id": asset_id})
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_reassign_chunks_keeps_ids(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    mock_collection = AsyncMock()
+    model = ChunkModel(db_client=fake_db_client)
+    model.collection = mock_collection
+
+    new_asset_id = ObjectId()
+    chunks = [
+        DataChunk(
+            _id=ObjectId(),
+            chunk_text=f"clause {i}",
+            chunk_metadata={"page": i},
+            chunk_order=i + 1,
+            chunk_project_id=ObjectId(),
+            chunk_asset_id=new_asset_id
+        )
+        for i in range(3)
+    ]
+
+    result = await model.reassign_chunks(new_asset_id, chunks, batch_size=2)
+
+    assert result == 3
+    assert mock_collection.bulk_write.await_count == 2
+    operations = mock_collection.bulk_write.await_args_list[0].args[0]
+    assert operations[0]._filter == {"_id": chunks[0].id}
+    assert operations[0]._doc["$set"]["chunk_asset_id"] == new_asset_id
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_iter_asset_chunks_batches_in_order(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    asset_id = ObjectId()
+    records = [
+        {
+            "_id": ObjectId(),
+            "chunk_text": f"clause {i}",
+            "chunk_metadata": {},
+            "chunk_order": i + 1,
+            "chunk_project_id": ObjectId(),
+            "chunk_asset_id": asset_id,
+        }
+        for i in range(5)
+    ]
+
+    async def iter_records():
+        for record in records:
+            yield record
+
+    cursor = MagicMock()
+    cursor.sort.return_value.batch_size.return_value = iter_records()
+    model = ChunkModel(db_client=fake_db_client)
+    model.collection = MagicMock()
+    model.collection.find.return_value = cursor
+
+    batches = [batch async for batch in model.iter_asset_chunks(asset_id, batch_size=2)]
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [chunk.chunk_order for batch in batches for chunk in batch] == [1, 2, 3, 4, 5]
+    model.collection.find.assert_called_once_with({"chunk_asset_id": asset_id})
+    cursor.sort.assert_called_once_with("chunk_order", 1)
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_get_unindexed_project_chunks_projection_and_raw(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    record = {"_id": ObjectId(), "chunk_text": "clause", "chunk_metadata": {"page": 1}}
+
+    def make_cursor():
+        async def iter_records():
+            yield dict(record)
+        cursor = MagicMock()
+        cursor.sort.return_value.limit.return_value = iter_records()
+        return cursor
+
+    model = ChunkModel(db_client=fake_db_client)
+    model.collection = MagicMock()
+    model.collection.find.side_effect = lambda *args: make_cursor()
+    project_id = ObjectId()
+
+    chunks = await model.get_unindexed_project_chunks(project_id, projection=ChunkModel.INDEX_FIELDS)
+    raw_chunks = await model.get_unindexed_project_chunks(project_id, raw=True)
+
+    assert isinstance(chunks[0], DataChunk)
+    assert chunks[0].id == record["_id"]
+    assert chunks[0].chunk_text == "clause"
+    assert chunks[0].chunk_vector_source is None
+    assert model.collection.find.call_args_list[0].args[1] == ChunkModel.INDEX_FIELDS
+    assert raw_chunks == [record]
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_get_chunk_texts_batches_and_caches(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value = MagicMock(
+        MONGO_DB_NAME="test_db", CHUNK_TEXT_CACHE_SIZE=16, CHUNK_TEXT_CACHE_TTL_SECONDS=60
+    )
+    chunk_ids = [ObjectId(), ObjectId()]
+
+    async def iter_records():
+        for i, chunk_id in enumerate(chunk_ids):
+            yield {"_id": chunk_id, "chunk_text": f"clause {i}"}
+
+    model = ChunkModel(db_client=fake_db_client)
+    model.collection = MagicMock()
+    model.collection.find.return_value = iter_records()
+
+    first = await model.get_chunk_texts(chunk_ids)
+    second = await model.get_chunk_texts(chunk_ids)
+
+    assert first == second == {chunk_ids[0]: "clause 0", chunk_ids[1]: "clause 1"}
+    model.collection.find.assert_called_once_with({"_id": {"$in": chunk_ids}}, {"chunk_text": 1})
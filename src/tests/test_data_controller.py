@@ -0,0 +1,161 @@
+import hashlib
+import io
+import os
+import pytest
+import tarfile
+from unittest.mock import MagicMock, patch
+from controllers.DataController import DataController
+from models import ResponseStatus
+
+
+@pytest.fixture
+def data_controller():
+    settings = MagicMock(
+        FILE_MAX_SIZE=1,
+        FILE_DEFAULT_CHUNK_SIZE=4,
+        FILE_ALLOWED_TYPES=["text/plain", "application/pdf"],
+    )
+    with patch("controllers.BaseController.get_settings", return_value=settings):
+        yield DataController()
+
+
+@pytest.fixture
+def blob_files_dir(data_controller, tmp_path):
+    data_controller.files_dir = tmp_path
+    return tmp_path
+
+
+def stored_files(files_dir):
+    return sorted(p.name for p in (files_dir / "blobs").rglob("*") if p.is_file())
+
+
+async def stream_of(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def test_sniff_content_type(data_controller):
+    assert data_controller.sniff_content_type(b"%PDF-1.7\n...") == "application/pdf"
+    assert data_controller.sniff_content_type("Clause 4.2 — Términos".encode("utf-8")) == "text/plain"
+    assert data_controller.sniff_content_type(b"\x89PNG\r\n\x1a\n\x00\x00") is None
+
+
+@pytest.mark.asyncio
+async def test_save_stream_stores_blob_by_hash(data_controller, blob_files_dir):
+    result = await data_controller.save_stream(stream_of(b"governing ", b"law"), "contract.txt")
+
+    assert result["valid"] is True
+    assert result["size"] == 13
+    assert result["content_hash"] == hashlib.sha256(b"governing law").hexdigest()
+    assert result["deduplicated"] is False
+    with open(result["blob_path"], "rb") as fh:
+        assert fh.read() == b"governing law"
+
+
+@pytest.mark.asyncio
+async def test_save_stream_deduplicates_identical_uploads(data_controller, blob_files_dir):
+    first = await data_controller.save_stream(stream_of(b"governing law"), "contract.txt")
+    second = await data_controller.save_stream(stream_of(b"governing ", b"law"), "copy.txt")
+
+    assert second["deduplicated"] is True
+    assert second["blob_path"] == first["blob_path"]
+    assert stored_files(blob_files_dir) == [first["content_hash"]]
+
+
+@pytest.mark.asyncio
+async def test_save_stream_aborts_over_limit(data_controller, blob_files_dir):
+    chunk = b"a" * (256 * 1024)
+
+    result = await data_controller.save_stream(stream_of(*[chunk] * 5), "bundle.txt")
+
+    assert result["Status"] == ResponseStatus.FILE_SIZE_EXCEEDED.value
+    assert stored_files(blob_files_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_save_stream_rejects_mismatched_content(data_controller, blob_files_dir):
+    result = await data_controller.save_stream(stream_of(b"%PDF-1.4\n", b"x" * 9000), "scan.txt")
+
+    assert result["Status"] == ResponseStatus.FILE_TYPE_NOT_SUPPORTED.value
+    assert stored_files(blob_files_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_link_blob_to_project_is_idempotent(data_controller, blob_files_dir):
+    result = await data_controller.save_stream(stream_of(b"governing law"), "contract.txt")
+    project_dir = blob_files_dir / "project1"
+    project_dir.mkdir()
+
+    with patch("controllers.DataController.ProjectController") as project_controller:
+        project_controller.return_value.get_project_path.return_value = str(project_dir)
+        file_path, file_id = data_controller.link_blob_to_project(result["content_hash"], "My Contract.txt", "project1")
+        again_path, again_id = data_controller.link_blob_to_project(result["content_hash"], "My Contract.txt", "project1")
+
+    assert file_id == f"{result['content_hash'][:16]}_My_Contract.txt"
+    assert (again_path, again_id) == (file_path, file_id)
+    assert os.path.samefile(file_path, result["blob_path"])
+
+
+def test_parse_content_range(data_controller):
+    assert data_controller.parse_content_range("bytes 0-99/1000", 1000) == (0, 100)
+    assert data_controller.parse_content_range("bytes 900-999/1000", 1000) == (900, 1000)
+    assert data_controller.parse_content_range("bytes 900-1000/1000", 1000) is None
+    assert data_controller.parse_content_range("bytes 0-99/2000", 1000) is None
+    assert data_controller.parse_content_range(None, 1000) is None
+
+
+@pytest.mark.asyncio
+async def test_write_range_out_of_order(data_controller, blob_files_dir):
+    file_path = data_controller.create_upload_session_file("session1", 8)
+
+    second = await data_controller.write_range(stream_of(b"law!"), file_path, 4, 8)
+    first = await data_controller.write_range(stream_of(b"gov", b"."), file_path, 0, 4)
+
+    assert first["valid"] and second["valid"]
+    with open(file_path, "rb") as fh:
+        assert fh.read() == b"gov.law!"
+
+
+@pytest.mark.asyncio
+async def test_write_range_reports_partial_body(data_controller, blob_files_dir):
+    file_path = data_controller.create_upload_session_file("session2", 100)
+
+    result = await data_controller.write_range(stream_of(b"a" * 30), file_path, 10, 60)
+
+    assert result["valid"] is False
+    assert result["Status"] == ResponseStatus.UPLOAD_RANGE_INVALID.value
+    assert result["written"] == 30
+
+
+def test_merge_byte_ranges_and_offset(data_controller):
+    merged = data_controller.merge_byte_ranges([[50, 80], [0, 20], [10, 30], [30, 40]])
+
+    assert merged == [[0, 40], [50, 80]]
+    assert data_controller.get_received_offset(merged) == 40
+    assert data_controller.get_received_offset([[5, 10]]) == 0
+
+
+def test_get_archive_type(data_controller):
+    assert data_controller.get_archive_type("dataroom.ZIP") == "zip"
+    assert data_controller.get_archive_type("dataroom.tar.gz") == "tar"
+    assert data_controller.get_archive_type("contract.pdf") is None
+    assert data_controller.is_archive_member_skipped("__MACOSX/room/._a.pdf")
+    assert data_controller.is_archive_member_skipped("room/.DS_Store")
+    assert not data_controller.is_archive_member_skipped("room/a.pdf")
+
+
+@pytest.mark.asyncio
+async def test_iter_tar_members_streams_files(data_controller, tmp_path):
+    archive_path = tmp_path / "set.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as archive:
+        for name, body in [("set/a.txt", b"first"), ("set/b.txt", b"second")]:
+            info = tarfile.TarInfo(name)
+            info.size = len(body)
+            archive.addfile(info, io.BytesIO(body))
+
+    members = []
+    with open(archive_path, "rb") as fh:
+        async for name, size, stream in data_controller.iter_tar_members(fh):
+            members.append((name, size, b"".join([chunk async for chunk in stream])))
+
+    assert members == [("set/a.txt", 5, b"first"), ("set/b.txt", 6, b"second")]
@@ -0,0 +1,91 @@
+import gzip
+import json
+import os
+import time
+from helper.document_workers import (
+    evict_extraction_cache, get_cache_part_path, merge_cache_parts, read_cached_pages,
+    read_cached_page_range, read_cache_index, tee_pages_to_cache, get_cache_index_path,
+    EXTRACTION_CACHE_LEFTOVER_SECONDS
+)
+
+
+def write_entry(path, size, age_seconds):
+    with open(path, "wb") as fh:
+        fh.write(b"x" * size)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+
+
+def write_part(path, pages):
+    with gzip.open(path, "wt", encoding="utf-8") as fh:
+        for page in pages:
+            fh.write(json.dumps(page) + "\n")
+
+
+def test_evict_least_recently_used_and_expired_entries(tmp_path):
+    write_entry(tmp_path / "old.jsonl.gz", 100, age_seconds=40 * 24 * 3600)
+    write_entry(tmp_path / "a.jsonl.gz", 100, age_seconds=300)
+    write_entry(tmp_path / "b.jsonl.gz", 100, age_seconds=200)
+    write_entry(tmp_path / "c.jsonl.gz", 100, age_seconds=100)
+    # A shard part of a running merge is kept; one left by a crashed run is not
+    write_entry(tmp_path / "c.jsonl.gz.run1.part00000", 10, age_seconds=10)
+    write_entry(tmp_path / "c.jsonl.gz.run0.part00000", 10, age_seconds=EXTRACTION_CACHE_LEFTOVER_SECONDS + 1)
+
+    removed = evict_extraction_cache(str(tmp_path), max_bytes=250, max_age_seconds=30 * 24 * 3600)
+
+    assert removed == 3
+    assert sorted(os.listdir(tmp_path)) == ["b.jsonl.gz", "c.jsonl.gz", "c.jsonl.gz.run1.part00000"]
+    assert evict_extraction_cache(str(tmp_path), max_bytes=0, max_age_seconds=0) == 0
+
+
+def test_merge_only_touches_its_own_parts(tmp_path):
+    cache_path = str(tmp_path / "hash.jsonl.gz")
+    own_parts = [get_cache_part_path(cache_path, "run1", i) for i in range(2)]
+    other_parts = [get_cache_part_path(cache_path, "run2", i) for i in range(2)]
+    for part_paths in (own_parts, other_parts):
+        write_part(part_paths[0], [["page 0", {"page": 0}]])
+        write_part(part_paths[1], [["page 1", {"page": 1}]])
+
+    merge_cache_parts(cache_path, own_parts)
+
+    assert [page for page, _ in read_cached_pages(cache_path)] == ["page 0", "page 1"]
+    assert read_cache_index(cache_path)["page_count"] == 2
+    assert [page for page, _ in read_cached_page_range(cache_path, 1, 2)] == ["page 1"]
+    assert not any(os.path.exists(path) for path in own_parts)
+    assert all(os.path.exists(path) for path in other_parts)
+
+
+def test_page_ranges_are_read_from_their_gzip_member(tmp_path):
+    cache_path = str(tmp_path / "hash.jsonl.gz")
+    pages = [(f"page {n}", {"page": n, "source": "old.txt"}) for n in range(7)]
+    assert list(tee_pages_to_cache(pages, cache_path, member_pages=3)) == pages
+
+    index = read_cache_index(cache_path)
+    assert index["page_count"] == 7
+    assert [first_page for first_page, _ in index["members"]] == [0, 3, 6]
+
+    # Reading from the member's offset alone yields that member's pages onwards
+    with open(cache_path, "rb") as raw:
+        raw.seek(index["members"][1][1])
+        with gzip.open(raw, "rt", encoding="utf-8") as fh:
+            assert json.loads(fh.readline())[0] == "page 3"
+
+    ranged = list(read_cached_page_range(cache_path, 4, 7, file_path="new.txt"))
+    assert [page for page, _ in ranged] == ["page 4", "page 5", "page 6"]
+    assert ranged[0][1]["source"] == "new.txt"
+
+    # An index left by another version of the file is ignored
+    with open(cache_path, "ab") as fh:
+        fh.write(gzip.compress(b'["page 7", {}]\n'))
+    assert read_cache_index(cache_path) is None
+    assert [page for page, _ in read_cached_page_range(cache_path, 6, 8)] == ["page 6", "page 7"]
+
+
+def test_evict_removes_the_index_with_its_entry(tmp_path):
+    cache_path = str(tmp_path / "a.jsonl.gz")
+    list(tee_pages_to_cache([("page 0", {})], cache_path))
+    assert os.path.exists(get_cache_index_path(cache_path))
+
+    evict_extraction_cache(str(tmp_path), max_bytes=1, max_age_seconds=0)
+
+    assert os.listdir(tmp_path) == []
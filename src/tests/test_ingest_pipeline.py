@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from models.db_schemes import DataChunk, Project
+from routes import data as data_routes
+
+
+def make_batch(size: int):
+    return [DataChunk.model_construct(id=ObjectId(), chunk_text=f"text {i}", chunk_metadata={}) for i in range(size)]
+
+
+def make_ingest_args(chunk_model):
+    return dict(
+        app=MagicMock(),
+        project=Project(_id=ObjectId(), project_id="p1"),
+        assets=MagicMock(),
+        process_request=MagicMock(),
+        app_settings=MagicMock(INGEST_QUEUE_BATCHES=2, INDEX_CHECKPOINT_PAGES=20),
+        chunk_model=chunk_model,
+    )
+
+
+def patch_pipeline(callbacks: dict, run):
+    """
+    Stands in for create_processing_pipeline: records the callbacks, runs `run`.
+    """
+    def create_processing_pipeline(app, project, process_request, **pipeline_callbacks):
+        callbacks.update(pipeline_callbacks)
+        return MagicMock(run=run)
+
+    return patch.object(data_routes, "create_processing_pipeline", create_processing_pipeline)
+
+
+@pytest.mark.asyncio
+async def test_written_batches_are_pushed_while_processing():
+    batches = [make_batch(3), make_batch(2), make_batch(4)]
+    callbacks = {}
+
+    async def run(assets):
+        for batch in batches:
+            await callbacks["on_chunks_unindexed"](batch)
+        return {"inserted_chunks": 9}
+
+    nlp_controller = MagicMock(lexical_index_client=None)
+    nlp_controller.get_chunk_record_id.side_effect = lambda chunk: str(chunk.id)
+    chunk_model = MagicMock(mark_chunks_indexed=AsyncMock())
+
+    with patch_pipeline(callbacks, run), patch.object(data_routes, "NLPController", return_value=nlp_controller):
+        results = await data_routes.ingest_project_assets(**make_ingest_args(chunk_model))
+
+    assert results == {"inserted_chunks": 9, "indexed_chunks": 9}
+    pushed = [call.kwargs["chunks"] for call in nlp_controller.index_into_vector_db.call_args_list]
+    assert pushed == batches
+    # Nothing is queried: only the batches handed over are indexed
+    chunk_model.get_unindexed_project_chunks.assert_not_called()
+    marked = [chunk_id for call in chunk_model.mark_chunks_indexed.call_args_list for chunk_id in call.kwargs["chunk_ids"]]
+    assert marked == [chunk.id for batch in batches for chunk in batch]
+
+
+@pytest.mark.asyncio
+async def test_processing_stops_when_the_indexer_fails():
+    handed_over = []
+    callbacks = {}
+
+    async def run(assets):
+        while True:
+            batch = make_batch(1)
+            await callbacks["on_chunks_unindexed"](batch)
+            handed_over.append(batch)
+
+    nlp_controller = MagicMock(lexical_index_client=None)
+    nlp_controller.index_into_vector_db.side_effect = RuntimeError("embedding failed")
+    chunk_model = MagicMock(mark_chunks_indexed=AsyncMock())
+
+    with patch_pipeline(callbacks, run), patch.object(data_routes, "NLPController", return_value=nlp_controller):
+        with pytest.raises(RuntimeError, match="embedding failed"):
+            await asyncio.wait_for(data_routes.ingest_project_assets(**make_ingest_args(chunk_model)), timeout=5)
+
+    # The queue is bounded, so parsing was held back and then cancelled
+    assert len(handed_over) <= 4
+    chunk_model.mark_chunks_indexed.assert_not_called()
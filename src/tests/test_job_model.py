@@ -0,0 +1,135 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from models.JobModel import JobModel
+from models.db_schemes import Job
+from models.enums.JobEnums import JobStatusEnum, JobTypeEnum
+from controllers.JobRunner import JobCancelled, JobContext, JobRunner
+
+
+@pytest.fixture
+def job_record():
+    return {
+        "_id": ObjectId(),
+        "job_project_id": ObjectId(),
+        "job_type": JobTypeEnum.PROCESS.value,
+        "job_params": {},
+        "job_status": JobStatusEnum.RUNNING.value,
+        "job_progress": {"files": 1},
+        "job_cancel_requested": False,
+        "job_worker_id": "w1",
+        "job_attempts": 1,
+        "job_created_at": datetime.utcnow(),
+    }
+
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_claim_next_job_takes_queued_or_stale_jobs(mock_get_settings, job_record):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    model = JobModel(db_client=MagicMock())
+    model.collection = AsyncMock()
+    model.collection.find_one_and_update.return_value = job_record
+
+    stale_before = datetime.utcnow() - timedelta(seconds=60)
+    job = await model.claim_next_job(worker_id="w1", stale_before=stale_before, max_attempts=3)
+
+    assert job.id == job_record["_id"]
+    query, update = model.collection.find_one_and_update.await_args.args
+    assert {"job_status": JobStatusEnum.QUEUED.value} in query["$or"]
+    assert {"job_status": JobStatusEnum.RUNNING.value, "job_heartbeat_at": {"$lt": stale_before}} in query["$or"]
+    assert query["job_cancel_requested"] is False
+    assert query["job_attempts"] == {"$lt": 3}
+    assert update["$set"]["job_worker_id"] == "w1"
+    assert update["$inc"] == {"job_attempts": 1}
+
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_fail_exhausted_jobs_and_requeue_keep_attempts_bounded(mock_get_settings):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    model = JobModel(db_client=MagicMock())
+    model.collection = AsyncMock()
+    model.collection.update_many.return_value = MagicMock(modified_count=1)
+
+    stale_before = datetime.utcnow() - timedelta(seconds=60)
+    assert await model.fail_exhausted_jobs(stale_before=stale_before, max_attempts=3) == 1
+    query, update = model.collection.update_many.await_args.args
+    assert query["job_heartbeat_at"] == {"$lt": stale_before}
+    assert query["job_attempts"] == {"$gte": 3}
+    assert update["$set"]["job_status"] == JobStatusEnum.FAILED.value
+
+    # Handing a job back on shutdown does not spend an attempt
+    model.collection.update_one.return_value = MagicMock(modified_count=1)
+    assert await model.requeue_job(job_id=ObjectId(), worker_id="w1")
+    _, update = model.collection.update_one.await_args.args
+    assert update["$inc"] == {"job_attempts": -1}
+
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_report_raises_once_cancel_is_requested(mock_get_settings, job_record):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    model = JobModel(db_client=MagicMock())
+    model.collection = AsyncMock()
+    model.collection.find_one_and_update.return_value = {**job_record, "job_cancel_requested": True}
+
+    context = JobContext(job=Job.model_construct(**{**job_record, "id": job_record["_id"]}), job_model=model, worker_id="w1")
+    checkpoint = {"after_asset_id": ObjectId()}
+    with pytest.raises(JobCancelled):
+        await context.report(checkpoint=checkpoint, files=2, chunks=10, errors=0)
+
+    query, update = model.collection.find_one_and_update.await_args.args
+    assert query == {"_id": job_record["_id"], "job_worker_id": "w1", "job_status": JobStatusEnum.RUNNING.value}
+    assert update["$inc"] == {"job_progress.files": 2, "job_progress.chunks": 10}
+    assert update["$set"]["job_checkpoint"] == checkpoint
+
+
+@patch("controllers.BaseController.get_settings")
+@pytest.mark.asyncio
+async def test_runner_records_handler_outcome(mock_get_settings, job_record):
+    mock_get_settings.return_value = MagicMock(JOB_MAX_CONCURRENT=1)
+    job_model = MagicMock()
+    job_model.finish_job = AsyncMock(return_value=True)
+    job_model.requeue_job = AsyncMock(return_value=True)
+    job = Job.model_construct(**{**job_record, "id": job_record["_id"]})
+
+    async def succeed(job, context):
+        return {"inserted_chunks": 3}
+
+    async def fail(job, context):
+        raise ValueError("broken file")
+
+    async def cancelled(job, context):
+        raise JobCancelled("stop")
+
+    runner = JobRunner(job_model=job_model, handlers={})
+    for handler, expected in [(succeed, JobStatusEnum.SUCCEEDED), (fail, JobStatusEnum.FAILED),
+                              (cancelled, JobStatusEnum.CANCELLED)]:
+        runner.handlers = {JobTypeEnum.PROCESS.value: handler}
+        await runner.run_job(job)
+        assert job_model.finish_job.await_args.kwargs["job_status"] == expected.value
+    assert job_model.finish_job.await_args_list[0].kwargs["result"] == {"inserted_chunks": 3}
+    assert job_model.finish_job.await_args_list[1].kwargs["error"] == "broken file"
+
+    # On shutdown a running job goes back to the queue instead of being cancelled
+    started = asyncio.Event()
+
+    async def slow(job, context):
+        started.set()
+        await asyncio.sleep(60)
+
+    runner.handlers = {JobTypeEnum.PROCESS.value: slow}
+    task = asyncio.create_task(runner.run_job(job))
+    await started.wait()
+    runner.stopping = True
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    job_model.requeue_job.assert_awaited_once_with(job_id=job.id, worker_id=runner.worker_id)
+    assert not runner.running
@@ -0,0 +1,33 @@
+from helper.minhash import LSHIndex, compute_minhash, estimate_similarity, get_lsh_bands
+
+CLAUSE = (
+    "Each party shall keep confidential all information disclosed by the other party under "
+    "this agreement and shall not disclose it to any third party without prior written consent, "
+    "except as required by law or by any competent regulatory authority."
+)
+
+
+def test_identical_text_has_identical_signature():
+    assert compute_minhash(CLAUSE) == compute_minhash(" ".join(CLAUSE.split()))
+    assert estimate_similarity(compute_minhash(CLAUSE), compute_minhash(CLAUSE.upper())) == 1.0
+
+
+def test_similarity_tracks_edits():
+    near = CLAUSE.replace("the other party", "Acme Ltd")
+    unrelated = "Governing law. This agreement is governed by the laws of England and Wales."
+
+    assert estimate_similarity(compute_minhash(CLAUSE), compute_minhash(near)) > 0.7
+    assert estimate_similarity(compute_minhash(CLAUSE), compute_minhash(unrelated)) < 0.2
+
+
+def test_lsh_index_finds_near_duplicate():
+    index = LSHIndex()
+    signature = compute_minhash(CLAUSE)
+    index.add("canonical", signature, get_lsh_bands(signature, bands=16))
+
+    near = compute_minhash(CLAUSE.replace("competent", "relevant"))
+    other = compute_minhash("Payment terms. Fees are payable within thirty days of invoice.")
+
+    assert index.query(near, get_lsh_bands(near, bands=16), threshold=0.7) == "canonical"
+    assert index.query(near, get_lsh_bands(near, bands=16), threshold=0.7, exclude={"canonical"}) is None
+    assert index.query(other, get_lsh_bands(other, bands=16), threshold=0.7) is None
@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from controllers.ProcessController import ProcessController
+
+# Pages of different lengths, one of them empty, so shard boundaries fall between
+# pages with several chunks, a single chunk and none
+PAGE_TEXTS = [
+    "Clause one sets out the parties. " * 4,
+    "Short page.",
+    "Clause three covers payment terms and late fees. " * 3,
+    "",
+    "Clause five is about termination for convenience. " * 5,
+    "Governing law.",
+    "Clause seven lists the notices and their addresses. " * 2,
+]
+
+
+def stub_pages(file_path, start_page=0, end_page=len(PAGE_TEXTS)):
+    return [
+        (PAGE_TEXTS[n], {"source": file_path, "page": n, "total_pages": len(PAGE_TEXTS), "title": "Contract"})
+        for n in range(start_page, min(end_page, len(PAGE_TEXTS)))
+    ]
+
+
+def with_chunk_order(batches):
+    # chunk_order counts across batches and pages, as ProcessingPipeline assigns it
+    chunks = [chunk for batch in batches for chunk in batch]
+    return [(order, text, metadata["page"]) for order, (text, metadata) in enumerate(chunks, start=1)]
+
+
+@pytest.fixture
+def make_controller(tmp_path):
+    (tmp_path / "contract.pdf").write_bytes(b"%PDF-1.7\n")
+
+    def make(cache_dir=None, shard_size=3, shard_threshold=0):
+        settings = MagicMock(
+            EXTRACTION_CACHE_ENABLED=cache_dir is not None,
+            EXTRACTION_CACHE_MAX_SIZE=1024,
+            EXTRACTION_CACHE_MAX_AGE_DAYS=30,
+            PDF_SHARD_PAGE_SIZE=shard_size,
+            PDF_SHARD_PAGE_THRESHOLD=shard_threshold,
+            CHUNK_LENGTH_UNIT="characters",
+            CHUNK_TOKEN_ENCODING="cl100k_base",
+        )
+        with patch("controllers.BaseController.get_settings", return_value=settings), \
+                patch("controllers.ProcessController.ProjectController") as project_controller:
+            project_controller.return_value.get_project_path.return_value = str(tmp_path)
+            controller = ProcessController(project_id="p1")
+        if cache_dir is not None:
+            cache_dir.mkdir(exist_ok=True)
+            controller.extraction_cache_dir = cache_dir
+        return controller
+
+    with patch("controllers.ProcessController.get_pdf_page_count", return_value=len(PAGE_TEXTS)), \
+            patch("helper.document_workers.load_pdf_page_range", side_effect=stub_pages), \
+            patch("helper.document_workers.iter_file_pages", side_effect=lambda path: iter(stub_pages(path))):
+        yield make
+
+
+async def collect_stream(controller, batch_size):
+    return [
+        batch async for batch in controller.stream_file_chunks(
+            "contract.pdf", chunk_size=60, overlap_size=15, batch_size=batch_size, content_hash="abc"
+        )
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sharded_and_unsharded_parsing_give_the_same_chunks(make_controller, tmp_path):
+    unsharded = with_chunk_order([await make_controller(shard_threshold=len(PAGE_TEXTS)).get_file_chunks(
+        "contract.pdf", chunk_size=60, overlap_size=15, content_hash="abc"
+    )])
+
+    # Every page shows up, and several pages split into more than one chunk
+    assert sorted({page for _, _, page in unsharded}) == [0, 1, 2, 4, 5, 6]
+    assert len(unsharded) > len(PAGE_TEXTS)
+
+    # Parallel shards of 3 pages, merged into the extraction cache
+    sharded = await make_controller(cache_dir=tmp_path / "cache").get_file_chunks(
+        "contract.pdf", chunk_size=60, overlap_size=15, content_hash="abc"
+    )
+    assert with_chunk_order([sharded]) == unsharded
+
+    # Page ranges read back from that cache, in batches that cut across ranges
+    from_cache = await collect_stream(make_controller(cache_dir=tmp_path / "cache"), batch_size=4)
+    assert with_chunk_order(from_cache) == unsharded
+
+    # Uncached PDF streamed shard by shard, with a shard size that doesn't divide the page count
+    streamed = await collect_stream(make_controller(cache_dir=tmp_path / "fresh", shard_size=2), batch_size=5)
+    assert with_chunk_order(streamed) == unsharded
+    assert [metadata for _, metadata in sharded] == [metadata for batch in streamed for _, metadata in batch]
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from bson import ObjectId
 from models.ProjectModel import ProjectModel
 from models.db_schemes import Project
@@ -20,6 +20,8 @@ async def test_create_project(mock_get_settings, fake_db_client, fake_settings):
     mock_collection.insert_one.return_value.inserted_id = ObjectId("64f07e1cfc13ae1c4b000000")
 
     mock_get_settings.return_value.MONGO_DB_NAME = "test_db"
+    mock_get_settings.return_value.PROJECT_CACHE_SIZE = 16
+    mock_get_settings.return_value.PROJECT_CACHE_TTL_SECONDS = 60
 
     project_model = ProjectModel(db_client=fake_db_client)
     result = await project_model.create_project(fake_settings)
@@ -32,15 +34,66 @@ async def test_get_project_or_create_new(mock_get_settings, fake_db_client):
     mock_collection = AsyncMock()
     fake_db_client.__getitem__.return_value = {"projects": mock_collection}
 
-    mock_collection.find_one.return_value = None
-    mock_collection.insert_one.return_value.inserted_id = ObjectId("64f07e1cfc13ae1c4b000111")
+    mock_collection.find_one_and_update.return_value = {
+        "_id": ObjectId("64f07e1cfc13ae1c4b000111"), "project_id": "auto123"
+    }
     mock_get_settings.return_value.MONGO_DB_NAME = "test_db"
+    mock_get_settings.return_value.PROJECT_CACHE_SIZE = 16
+    mock_get_settings.return_value.PROJECT_CACHE_TTL_SECONDS = 60
 
     model = ProjectModel(db_client=fake_db_client)
     project = await model.get_project_or_create_one("auto123")
 
     assert project.project_id == "auto123"
     assert project.id == ObjectId("64f07e1cfc13ae1c4b000111")
+    _, kwargs = mock_collection.find_one_and_update.call_args
+    assert kwargs["upsert"] is True
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_get_project_or_create_caches_until_deleted(mock_get_settings, fake_db_client):
+    mock_collection = AsyncMock()
+    fake_db_client.__getitem__.return_value = {"projects": mock_collection}
+
+    mock_collection.find_one_and_update.return_value = {"_id": ObjectId(), "project_id": "p1"}
+    mock_collection.delete_one.return_value.deleted_count = 1
+    mock_get_settings.return_value.MONGO_DB_NAME = "test_db"
+    mock_get_settings.return_value.PROJECT_CACHE_SIZE = 16
+    mock_get_settings.return_value.PROJECT_CACHE_TTL_SECONDS = 60
+
+    model = ProjectModel(db_client=fake_db_client)
+    first = await model.get_project_or_create_one("p1", cached=True)
+    second = await model.get_project_or_create_one("p1", cached=True)
+
+    assert first is second
+    assert mock_collection.find_one_and_update.await_count == 1
+
+    # Writes never trust the cache: the project may have been deleted by another process
+    await model.get_project_or_create_one("p1")
+    assert mock_collection.find_one_and_update.await_count == 2
+
+    assert await model.delete_project("p1") is True
+    await model.get_project_or_create_one("p1", cached=True)
+
+    assert mock_collection.find_one_and_update.await_count == 3
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_get_project_does_not_create(mock_get_settings, fake_db_client):
+    mock_collection = AsyncMock()
+    fake_db_client.__getitem__.return_value = {"projects": mock_collection}
+
+    mock_collection.find_one.return_value = None
+    mock_get_settings.return_value.MONGO_DB_NAME = "test_db"
+    mock_get_settings.return_value.PROJECT_CACHE_SIZE = 16
+    mock_get_settings.return_value.PROJECT_CACHE_TTL_SECONDS = 60
+
+    model = ProjectModel(db_client=fake_db_client)
+
+    assert await model.get_project("missing") is None
+    mock_collection.find_one.assert_awaited_once_with({"project_id": "missing"})
+    mock_collection.find_one_and_update.assert_not_called()
+    mock_collection.insert_one.assert_not_called()
 
 @pytest.mark.asyncio
 @patch("models.BaseDataModel.get_settings")
@@ -56,6 +109,8 @@ async def test_get_all_projects(mock_get_settings, fake_db_client):
     mock_collection.find.return_value = mock_cursor
 
     mock_get_settings.return_value.MONGO_DB_NAME = "test_db"
+    mock_get_settings.return_value.PROJECT_CACHE_SIZE = 16
+    mock_get_settings.return_value.PROJECT_CACHE_TTL_SECONDS = 60
 
     model = ProjectModel(db_client=fake_db_client)
     projects, total_pages = await model.get_all_projects(page=1, page_size=10)
@@ -63,3 +118,28 @@ async def test_get_all_projects(mock_get_settings, fake_db_client):
     assert len(projects) == 1
     assert projects[0].project_id == "p1"
     assert total_pages == 1
+
+@pytest.mark.asyncio
+@patch("models.BaseDataModel.get_settings")
+async def test_list_projects_keyset_pages(mock_get_settings, fake_db_client):
+    mock_get_settings.return_value.MONGO_DB_NAME = "test_db"
+    mock_get_settings.return_value.PROJECT_CACHE_SIZE = 16
+    mock_get_settings.return_value.PROJECT_CACHE_TTL_SECONDS = 60
+
+    records = [{"_id": ObjectId(), "project_id": f"p{i}"} for i in range(3)]
+
+    async def iter_records():
+        for record in records:
+            yield record
+
+    model = ProjectModel(db_client=fake_db_client)
+    model.collection = MagicMock()
+    model.collection.find.return_value.sort.return_value.limit.return_value = iter_records()
+
+    after_id = ObjectId()
+    projects, next_after_id = await model.list_projects(after_id=after_id, page_size=2)
+
+    assert [project.project_id for project in projects] == ["p0", "p1"]
+    assert next_after_id == records[1]["_id"]
+    model.collection.find.assert_called_once_with({"_id": {"$gt": after_id}})
+    model.collection.find.return_value.sort.return_value.limit.assert_called_once_with(3)
@@ -0,0 +1,272 @@
+import asyncio
+import multiprocessing
+import os
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from models.TaskModel import TaskModel
+from models.db_schemes import Job, Task
+from models.enums.TaskEnums import TaskStatusEnum, TaskTypeEnum
+from controllers.JobRunner import JobCancelled, JobContext
+from controllers.TaskWorker import TaskWorker, wait_for_job_tasks
+
+# Any MongoDB works, e.g. the mongodb service of docker/docker-compose.yaml
+MONGO_TEST_URI = os.environ.get("MONGO_TEST_URI")
+
+
+def make_settings(**overrides):
+    settings = dict(
+        MONGO_DB_NAME="test_task_queue",
+        TASK_MAX_CONCURRENT=2,
+        TASK_POLL_SECONDS=0.05,
+        TASK_LEASE_SECONDS=30.0,
+        TASK_HEARTBEAT_SECONDS=0.2,
+        TASK_MAX_ATTEMPTS=3,
+    )
+    settings.update(overrides)
+    return MagicMock(**settings)
+
+
+def make_task(**overrides):
+    record = {
+        "id": ObjectId(),
+        "task_job_id": ObjectId(),
+        "task_project_id": ObjectId(),
+        "task_type": TaskTypeEnum.PROCESS_ASSET.value,
+        "task_key": "a1",
+        "task_params": {},
+        "task_status": TaskStatusEnum.LEASED.value,
+        "task_lease_owner": "w1",
+        "task_attempts": 1,
+    }
+    record.update(overrides)
+    return Task.model_construct(**record)
+
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_claim_task_leases_queued_or_expired_tasks(mock_get_settings):
+    mock_get_settings.return_value = make_settings()
+    task = make_task()
+
+    model = TaskModel(db_client=MagicMock())
+    model.collection = AsyncMock()
+    model.collection.find_one_and_update.return_value = {**task.model_dump(by_alias=True), "_id": task.id}
+
+    claimed = await model.claim_task(worker_id="w1", lease_seconds=30, max_attempts=3)
+
+    assert claimed.id == task.id
+    query, update = model.collection.find_one_and_update.await_args.args
+    assert {"task_status": TaskStatusEnum.QUEUED.value} in query["$or"]
+    expired = [clause for clause in query["$or"] if clause["task_status"] == TaskStatusEnum.LEASED.value]
+    assert expired[0]["task_lease_expires_at"]["$lt"] <= datetime.utcnow()
+    assert query["task_attempts"] == {"$lt": 3}
+    assert update["$set"]["task_lease_owner"] == "w1"
+    assert update["$set"]["task_lease_expires_at"] > datetime.utcnow() + timedelta(seconds=25)
+    assert update["$inc"] == {"task_attempts": 1}
+
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_enqueue_and_fail_task(mock_get_settings):
+    mock_get_settings.return_value = make_settings()
+    model = TaskModel(db_client=MagicMock())
+    model.collection = AsyncMock()
+
+    # A resumed fan-out enqueues the same keys again: duplicates are not errors
+    model.collection.insert_many.side_effect = BulkWriteError({
+        "nInserted": 1, "writeErrors": [{"index": 1, "code": 11000, "errmsg": "E11000 duplicate key"}]
+    })
+    tasks = [make_task(task_key=key) for key in ("a1", "a2")]
+    assert await model.enqueue_tasks(tasks) == 1
+
+    model.collection.insert_many.side_effect = BulkWriteError({
+        "nInserted": 0, "writeErrors": [{"index": 0, "code": 121, "errmsg": "Document failed validation"}]
+    })
+    with pytest.raises(BulkWriteError):
+        await model.enqueue_tasks(tasks)
+
+    # Requeued while it has attempts left, failed after that
+    model.collection.update_one.side_effect = [MagicMock(modified_count=1)]
+    assert await model.fail_task(task_id=tasks[0].id, worker_id="w1", error="boom", max_attempts=3) == "queued"
+    requeue_query, requeue_update = model.collection.update_one.await_args.args
+    assert requeue_query["task_attempts"] == {"$lt": 3}
+    assert requeue_update["$set"]["task_lease_owner"] is None
+
+    model.collection.update_one.side_effect = [MagicMock(modified_count=0), MagicMock(modified_count=1)]
+    assert await model.fail_task(task_id=tasks[0].id, worker_id="w1", error="boom", max_attempts=3) == "failed"
+
+
+@patch("controllers.BaseController.get_settings")
+@pytest.mark.asyncio
+async def test_worker_records_task_outcome(mock_get_settings):
+    mock_get_settings.return_value = make_settings()
+    task_model = MagicMock()
+    for method in ("complete_task", "fail_task", "release_task"):
+        setattr(task_model, method, AsyncMock(return_value=True))
+    task = make_task()
+
+    async def succeed(task):
+        return {"files": 1, "chunks": 4}
+
+    async def fail(task):
+        raise ValueError("broken file")
+
+    worker = TaskWorker(task_model=task_model, handlers={TaskTypeEnum.PROCESS_ASSET.value: succeed})
+    await worker.run_task(task)
+    task_model.complete_task.assert_awaited_once_with(
+        task_id=task.id, worker_id=worker.worker_id, result={"files": 1, "chunks": 4}
+    )
+
+    worker.handlers = {TaskTypeEnum.PROCESS_ASSET.value: fail}
+    await worker.run_task(task)
+    assert task_model.fail_task.await_args.kwargs["error"] == "broken file"
+    assert task_model.fail_task.await_args.kwargs["max_attempts"] == 3
+
+    # On shutdown a leased task goes back to the queue without spending an attempt
+    started = asyncio.Event()
+
+    async def slow(task):
+        started.set()
+        await asyncio.sleep(60)
+
+    worker.handlers = {TaskTypeEnum.PROCESS_ASSET.value: slow}
+    running = asyncio.create_task(worker.run_task(task))
+    await started.wait()
+    worker.stopping = True
+    running.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await running
+    task_model.release_task.assert_awaited_once_with(task_id=task.id, worker_id=worker.worker_id)
+    assert not worker.running
+
+
+@patch("controllers.BaseController.get_settings")
+@pytest.mark.asyncio
+async def test_heartbeat_stops_tasks_whose_lease_was_lost(mock_get_settings):
+    mock_get_settings.return_value = make_settings(TASK_HEARTBEAT_SECONDS=0.01)
+    task_model = MagicMock()
+    for method in ("complete_task", "fail_task", "release_task"):
+        setattr(task_model, method, AsyncMock(return_value=True))
+    task = make_task()
+    task_model.extend_leases = AsyncMock(return_value=[task.id])
+
+    async def slow(task):
+        await asyncio.sleep(60)
+
+    worker = TaskWorker(task_model=task_model, handlers={TaskTypeEnum.PROCESS_ASSET.value: slow})
+    heartbeat = asyncio.create_task(worker.heartbeat())
+    try:
+        await asyncio.wait_for(worker.run_task(task), timeout=5)
+    finally:
+        heartbeat.cancel()
+
+    task_model.extend_leases.assert_awaited_with(task_ids=[task.id], worker_id=worker.worker_id, lease_seconds=30.0)
+    for method in ("complete_task", "fail_task", "release_task"):
+        getattr(task_model, method).assert_not_awaited()
+    assert not worker.running
+
+
+@pytest.mark.asyncio
+async def test_wait_for_job_tasks_reports_progress_and_cancels():
+    job = Job.model_construct(id=ObjectId(), job_checkpoint={"fanned_out": True})
+    context = JobContext(job=job, job_model=MagicMock(), worker_id="w1")
+    context.report = AsyncMock()
+
+    task_model = MagicMock()
+    task_model.fail_exhausted_tasks = AsyncMock(return_value=0)
+    task_model.cancel_job_tasks = AsyncMock(return_value=2)
+    task_model.count_job_tasks = AsyncMock(side_effect=[
+        {"queued": {"tasks": 2}, "done": {"tasks": 1, "files": 1, "chunks": 10, "vectors": 0, "errors": 0}},
+        {"done": {"tasks": 2, "files": 2, "chunks": 25, "vectors": 0, "errors": 0},
+         "failed": {"tasks": 1, "files": 0, "chunks": 0, "vectors": 0, "errors": 0}},
+    ])
+
+    counts = await wait_for_job_tasks(task_model=task_model, context=context, poll_seconds=0, max_attempts=3)
+
+    assert counts["failed"]["tasks"] == 1
+    first, second = context.report.await_args_list
+    assert first.kwargs["files"] == 1 and first.kwargs["chunks"] == 10
+    assert second.kwargs["files"] == 1 and second.kwargs["chunks"] == 15 and second.kwargs["errors"] == 1
+    assert second.kwargs["checkpoint"]["fanned_out"] is True
+
+    context.report = AsyncMock(side_effect=JobCancelled("stop"))
+    task_model.count_job_tasks = AsyncMock(return_value={"queued": {"tasks": 2}})
+    with pytest.raises(JobCancelled):
+        await wait_for_job_tasks(task_model=task_model, context=context, poll_seconds=0, max_attempts=3)
+    task_model.cancel_job_tasks.assert_awaited_once_with(job_id=job.id)
+
+
+def run_worker_process(uri: str, seconds: float):
+    """
+    One worker process of the integration test: leases tasks until `seconds` have passed.
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def handle(task):
+        await asyncio.sleep(0.05)
+        return {"files": 1, "chunks": 1}
+
+    async def run():
+        client = AsyncIOMotorClient(uri)
+        settings = make_settings()
+        with patch("models.BaseDataModel.get_settings", return_value=settings), \
+                patch("controllers.BaseController.get_settings", return_value=settings):
+            worker = TaskWorker(task_model=TaskModel(db_client=client),
+                                handlers={TaskTypeEnum.PROCESS_ASSET.value: handle})
+            worker.start()
+            await asyncio.sleep(seconds)
+            await worker.stop()
+        client.close()
+
+    asyncio.run(run())
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not MONGO_TEST_URI, reason="needs MONGO_TEST_URI")
+async def test_worker_processes_share_the_queue():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(MONGO_TEST_URI)
+    settings = make_settings()
+    try:
+        with patch("models.BaseDataModel.get_settings", return_value=settings):
+            await client.drop_database(settings.MONGO_DB_NAME)
+            model = await TaskModel.create_instance(db_client=client)
+
+        job_id, project_id = ObjectId(), ObjectId()
+        tasks = [
+            Task(task_job_id=job_id, task_project_id=project_id, task_type=TaskTypeEnum.PROCESS_ASSET.value,
+                 task_key=f"asset-{i}")
+            for i in range(40)
+        ]
+        assert await model.enqueue_tasks(tasks) == 40
+        assert await model.enqueue_tasks(tasks[:5]) == 0
+
+        # A task leased by a worker that died: its lease has expired
+        await model.collection.update_one(
+            {"task_key": "asset-0"},
+            {"$set": {"task_status": TaskStatusEnum.LEASED.value, "task_lease_owner": "dead-worker",
+                      "task_lease_expires_at": datetime.utcnow() - timedelta(seconds=1), "task_attempts": 1}}
+        )
+
+        processes = [
+            multiprocessing.get_context("spawn").Process(target=run_worker_process, args=(MONGO_TEST_URI, 4.0))
+            for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            await asyncio.to_thread(process.join, 30)
+
+        counts = await model.count_job_tasks(job_id=job_id)
+        assert counts == {TaskStatusEnum.DONE.value: {"tasks": 40, "files": 40, "chunks": 40, "vectors": 0, "errors": 0}}
+        owners = await model.collection.distinct("task_lease_owner")
+        assert len(owners) > 1 and "dead-worker" not in owners
+        recovered = await model.collection.find_one({"task_key": "asset-0"})
+        assert recovered["task_attempts"] == 2
+    finally:
+        await client.drop_database(settings.MONGO_DB_NAME)
+        client.close()
@@ -0,0 +1,35 @@
+import pytest
+from helper.text_splitter import RecursiveTextSplitter
+
+
+def test_merges_paragraphs_up_to_chunk_size():
+    splitter = RecursiveTextSplitter(chunk_size=10, chunk_overlap=0)
+
+    assert splitter.split_text("aaaa\n\nbbbb\n\ncccc") == ["aaaa\n\nbbbb", "cccc"]
+
+
+def test_long_word_falls_back_to_characters():
+    splitter = RecursiveTextSplitter(chunk_size=4, chunk_overlap=0)
+
+    assert splitter.split_text("abcdefghij") == ["abcd", "efgh", "ij"]
+
+
+def test_chunks_overlap():
+    splitter = RecursiveTextSplitter(chunk_size=7, chunk_overlap=3)
+
+    assert splitter.split_text("a b c d e f g") == ["a b c d", "d e f", "f g"]
+
+
+def test_custom_length_function():
+    splitter = RecursiveTextSplitter(chunk_size=3, chunk_overlap=0, length_function=lambda t: len(t.split()))
+
+    assert splitter.split_text("one two three four five") == ["one two three", "four five"]
+
+
+def test_whitespace_only_text_yields_no_chunks():
+    assert RecursiveTextSplitter(chunk_size=10, chunk_overlap=0).split_text("  \n\n  ") == []
+
+
+def test_overlap_larger_than_chunk_size_is_rejected():
+    with pytest.raises(ValueError):
+        RecursiveTextSplitter(chunk_size=5, chunk_overlap=6)
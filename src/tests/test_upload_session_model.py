@@ -0,0 +1,60 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from models.UploadSessionModel import UploadSessionModel
+from models.enums.UploadSessionEnums import UploadSessionStatusEnum
+
+
+@pytest.fixture
+def session_record():
+    return {
+        "_id": ObjectId(),
+        "session_project_id": ObjectId(),
+        "session_file_name": "contract.pdf",
+        "session_file_size": 1000,
+        "session_received_ranges": [[0, 500]],
+        "session_status": UploadSessionStatusEnum.OPEN.value,
+        "session_expires_at": datetime.utcnow() + timedelta(hours=1),
+    }
+
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_add_received_range_only_for_open_sessions(mock_get_settings, session_record):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    model = UploadSessionModel(db_client=MagicMock())
+    model.collection = AsyncMock()
+    model.collection.find_one_and_update.return_value = {
+        **session_record, "session_received_ranges": [[0, 500], [500, 1000]]
+    }
+
+    expires_at = datetime.utcnow() + timedelta(hours=2)
+    session = await model.add_received_range(session_record["_id"], 500, 1000, expires_at=expires_at)
+
+    assert session.session_received_ranges == [[0, 500], [500, 1000]]
+    query, update = model.collection.find_one_and_update.await_args.args
+    assert query == {"_id": session_record["_id"], "session_status": UploadSessionStatusEnum.OPEN.value}
+    assert update["$push"] == {"session_received_ranges": [500, 1000]}
+    assert update["$set"] == {"session_expires_at": expires_at}
+
+
+@patch("models.BaseDataModel.get_settings")
+@pytest.mark.asyncio
+async def test_set_session_status_requires_expected_status(mock_get_settings, session_record):
+    mock_get_settings.return_value = MagicMock(MONGO_DB_NAME="test_db")
+
+    model = UploadSessionModel(db_client=MagicMock())
+    model.collection = AsyncMock()
+    model.collection.find_one_and_update.return_value = None
+
+    session = await model.set_session_status(
+        session_record["_id"],
+        status=UploadSessionStatusEnum.FINALIZING.value,
+        from_status=UploadSessionStatusEnum.OPEN.value
+    )
+
+    assert session is None
+    query = model.collection.find_one_and_update.await_args.args[0]
+    assert query["session_status"] == UploadSessionStatusEnum.OPEN.value
@@ -0,0 +1,32 @@
+"""
+Worker process: runs the app's background workers (task worker, job runner, auto-indexing,
+as configured) without serving HTTP. Distributed jobs scale out by starting more of these,
+on any host sharing the MongoDB database, a Qdrant server (VECTOR_DB_PATH=http://...)
+and the lexical index directory.
+
+    cd src && python worker.py
+"""
+import asyncio
+import logging
+import signal
+from types import SimpleNamespace
+from main import lifespan
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop_event.set)
+
+    # The lifespan only sets attributes on the app, so a plain namespace stands in for it
+    async with lifespan(SimpleNamespace()):
+        logger.info("Worker process started")
+        await stop_event.wait()
+    logger.info("Worker process stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())